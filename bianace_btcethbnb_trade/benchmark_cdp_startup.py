@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Direct CDP vs. Playwright startup benchmark
+
+Measures, against a Chrome already running with remote debugging, how long each path takes
+until it is attached to a tab and until the first screenshot is written:
+
+- playwright: sync_playwright() (starts the Node driver) + connect_over_cdp + page.screenshot
+- direct: GET /json + websocket connect + Page.captureScreenshot
+
+Usage:
+    python3 benchmark_cdp_startup.py --rounds 5 --port 9222
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import tempfile
+from playwright.sync_api import sync_playwright
+
+# Add the project root directory to Python path to import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.settings import CHROME_DEBUG_PORT
+from utils.cdp_client import CDPClient, list_targets
+
+
+def run_playwright(port, path):
+    """
+    Returns:
+        tuple: (attach_seconds, screenshot_seconds) measured from the start of the call
+    """
+    start = time.perf_counter()
+    with sync_playwright() as p:
+        browser = p.chromium.connect_over_cdp(f"http://localhost:{port}")
+        page = browser.contexts[0].pages[0]
+        attached = time.perf_counter() - start
+        page.screenshot(path=path)
+        captured = time.perf_counter() - start
+    return attached, captured
+
+
+def run_direct(port, path):
+    """
+    Returns:
+        tuple: (attach_seconds, screenshot_seconds) measured from the start of the call
+    """
+    start = time.perf_counter()
+    target = list_targets(port)[0]
+    with CDPClient(target['webSocketDebuggerUrl']) as client:
+        attached = time.perf_counter() - start
+        client.capture_screenshot(path)
+        captured = time.perf_counter() - start
+    return attached, captured
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare startup latency of direct CDP and Playwright capture")
+    parser.add_argument("--rounds", type=int, default=5, help="Captures per path (default: 5)")
+    parser.add_argument("--port", type=int, default=CHROME_DEBUG_PORT, help="Chrome remote debugging port")
+    args = parser.parse_args()
+
+    paths = {'playwright': run_playwright, 'direct': run_direct}
+    results = {name: [] for name in paths}
+    with tempfile.TemporaryDirectory() as output_dir:
+        for round_index in range(args.rounds):
+            for name, run in paths.items():
+                attached, captured = run(args.port, os.path.join(output_dir, f'{name}.png'))
+                results[name].append((attached, captured))
+                print(f"Round {round_index + 1} {name:10s} attach {attached * 1000:7.0f} ms  screenshot {captured * 1000:7.0f} ms")
+
+    print()
+    print(f"{'path':10s} {'attach median':>14s} {'screenshot median':>18s}")
+    for name, samples in results.items():
+        print(f"{name:10s} {statistics.median(a for a, _ in samples) * 1000:11.0f} ms "
+              f"{statistics.median(c for _, c in samples) * 1000:15.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Headed vs. headless capture benchmark
+
+Captures the same currency pages with a headed and a headless browser, alternating
+the modes each round, and reports wall time and CPU time per mode. CPU time covers
+this process plus the Playwright driver and the browser processes it started, which
+are counted once the browser has exited.
+
+Usage:
+    python3 benchmark_headless.py --currencies BTCUSDT ETHUSDT --rounds 3
+"""
+
+import os
+import sys
+import time
+import resource
+import argparse
+import statistics
+import tempfile
+from playwright.sync_api import sync_playwright
+
+# Add the project root directory to Python path to import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.settings import BINANCE_CONTRACT_URLS
+from utils.screenshot import launch_capture_context, close_capture_context, install_resource_blocker
+from utils.page_readiness import NetworkTracker, wait_for_page_ready
+
+
+def _cpu_seconds():
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def run_capture(currencies, headless, output_dir):
+    """
+    Launch a browser, capture every currency once and close it again
+
+    Returns:
+        tuple: (wall_seconds, cpu_seconds)
+    """
+    wall_start = time.perf_counter()
+    cpu_start = _cpu_seconds()
+
+    with sync_playwright() as p:
+        browser, context = launch_capture_context(p, persistent=False, headless=headless)
+        try:
+            for currency in currencies:
+                page = context.new_page()
+                page.set_viewport_size({"width": 1920, "height": 1080})
+                install_resource_blocker(page)
+                tracker = NetworkTracker(page)
+                page.goto(BINANCE_CONTRACT_URLS.get(currency, BINANCE_CONTRACT_URLS['BTCUSDT']), timeout=60000)
+                wait_for_page_ready(page, tracker, label=currency)
+                tracker.detach()
+                page.screenshot(path=os.path.join(output_dir, f"{currency}_{'headless' if headless else 'headed'}.png"))
+                page.close()
+        finally:
+            close_capture_context(browser, context)
+
+    # The driver has exited here, so the browser's CPU time is included in RUSAGE_CHILDREN
+    return time.perf_counter() - wall_start, _cpu_seconds() - cpu_start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare CPU and wall time of headed and headless capture")
+    parser.add_argument("--currencies", nargs='+', default=["BTCUSDT"], help="Currency pairs to capture (default: BTCUSDT)")
+    parser.add_argument("--rounds", type=int, default=3, help="Captures per mode (default: 3)")
+    args = parser.parse_args()
+
+    results = {True: [], False: []}
+    with tempfile.TemporaryDirectory() as output_dir:
+        for round_index in range(args.rounds):
+            # Alternate the order so network and cache effects don't favour one mode
+            for headless in ((False, True) if round_index % 2 == 0 else (True, False)):
+                wall, cpu = run_capture(args.currencies, headless, output_dir)
+                results[headless].append((wall, cpu))
+                print(f"Round {round_index + 1} {'headless' if headless else 'headed':8s} wall {wall:6.2f}s  cpu {cpu:6.2f}s")
+
+    print()
+    print(f"{'mode':8s} {'wall median':>12s} {'cpu median':>12s}")
+    for headless in (False, True):
+        walls = [wall for wall, _ in results[headless]]
+        cpus = [cpu for _, cpu in results[headless]]
+        print(f"{'headless' if headless else 'headed':8s} {statistics.median(walls):11.2f}s {statistics.median(cpus):11.2f}s")
+
+
+if __name__ == "__main__":
+    main()
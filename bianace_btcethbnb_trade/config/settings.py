@@ -42,3 +42,186 @@ LARK_WEBHOOK_URL = os.getenv('LARK_WEBHOOK_URL', '')
 
 # Supported currencies
 SUPPORTED_CURRENCIES = os.getenv('SUPPORTED_CURRENCIES', 'BTCUSDT,ETHUSDT,BNBUSDT').split(',')
+
+# Screenshot capture configuration
+# Maximum number of currency pages captured at the same time by the async capture engine
+CAPTURE_MAX_CONCURRENCY = int(os.getenv('CAPTURE_MAX_CONCURRENCY', '3'))
+
+# Process-isolated capture: the scheduler hands currencies to supervised worker processes
+CAPTURE_WORKER_ISOLATION = os.getenv('CAPTURE_WORKER_ISOLATION', 'true').lower() == 'true'
+CAPTURE_WORKERS = int(os.getenv('CAPTURE_WORKERS', '2'))
+# Hard deadline per currency; a worker that exceeds it is killed with its browser
+CAPTURE_WORKER_JOB_TIMEOUT_S = float(os.getenv('CAPTURE_WORKER_JOB_TIMEOUT_S', '300'))
+# Workers are replaced after this many captures or when worker and browser exceed this RSS
+CAPTURE_WORKER_MAX_CAPTURES = int(os.getenv('CAPTURE_WORKER_MAX_CAPTURES', '20'))
+CAPTURE_WORKER_MAX_RSS_MB = float(os.getenv('CAPTURE_WORKER_MAX_RSS_MB', '1536'))
+
+# Page readiness detection (replaces fixed waits before screenshots)
+READINESS_MAX_WAIT_MS = int(os.getenv('READINESS_MAX_WAIT_MS', '30000'))
+READINESS_SAMPLE_INTERVAL_MS = int(os.getenv('READINESS_SAMPLE_INTERVAL_MS', '500'))
+READINESS_STABLE_FRAMES = int(os.getenv('READINESS_STABLE_FRAMES', '3'))
+READINESS_NETWORK_QUIET_MS = int(os.getenv('READINESS_NETWORK_QUIET_MS', '1000'))
+READINESS_MAX_PENDING_REQUESTS = int(os.getenv('READINESS_MAX_PENDING_REQUESTS', '2'))
+# A live chart never stops changing: consecutive samples count as stable when at most this
+# fraction of the sampled pixels changed, ignoring the right edge (price axis and last candle)
+READINESS_CANVAS_TOLERANCE = float(os.getenv('READINESS_CANVAS_TOLERANCE', '0.02'))
+READINESS_CANVAS_EXCLUDE_RIGHT = float(os.getenv('READINESS_CANVAS_EXCLUDE_RIGHT', '0.15'))
+# Requests in flight longer than this are long-polls or streams and don't block readiness
+READINESS_LONG_REQUEST_MS = int(os.getenv('READINESS_LONG_REQUEST_MS', '5000'))
+
+# Warm browser pool daemon
+BROWSER_POOL_HOST = os.getenv('BROWSER_POOL_HOST', '127.0.0.1')
+BROWSER_POOL_PORT = int(os.getenv('BROWSER_POOL_PORT', '9333'))
+CHROME_DEBUG_PORT = int(os.getenv('CHROME_DEBUG_PORT', '9222'))
+
+# Region-clipped screenshots
+# Each region lists candidate selectors; the first visible match on the page is captured.
+SCREENSHOT_REGIONS = {
+    'chart': ['[data-testid="chart-container"]', '.tradingview-chart', '.chart-container', '.tv-chart-container', '.chart-wrapper'],
+    'orderbook': ['.orderbook', '.order-book', '[class*="orderbook"]', '[class*="OrderBook"]'],
+    'funding': ['.contract-ticker', '.ticker-wrap', '[class*="funding"]', '[class*="ticker"]'],
+    'position': ['.position-info', '[class*="position-table"]', '[class*="positions"]']
+}
+# Comma-separated region names to capture instead of the full page (empty: full page screenshot)
+CAPTURE_REGIONS = [region for region in os.getenv('CAPTURE_REGIONS', '').split(',') if region]
+
+# Screenshot compression
+SCREENSHOT_COMPRESSION = os.getenv('SCREENSHOT_COMPRESSION', 'true').lower() == 'true'
+SCREENSHOT_IMAGE_FORMAT = os.getenv('SCREENSHOT_IMAGE_FORMAT', 'webp').lower()  # webp or jpeg
+SCREENSHOT_IMAGE_QUALITY = int(os.getenv('SCREENSHOT_IMAGE_QUALITY', '80'))
+SCREENSHOT_MAX_WIDTH = int(os.getenv('SCREENSHOT_MAX_WIDTH', '1600'))
+SCREENSHOT_MAX_HEIGHT = int(os.getenv('SCREENSHOT_MAX_HEIGHT', '1600'))
+SCREENSHOT_KEEP_ORIGINAL = os.getenv('SCREENSHOT_KEEP_ORIGINAL', 'false').lower() == 'true'
+
+# Perceptual-hash deduplication of screenshots before analysis
+SCREENSHOT_DEDUP = os.getenv('SCREENSHOT_DEDUP', 'true').lower() == 'true'
+# Bits of the 32x32 hashes that may differ; a 0.1% move of the last candle already changes a few
+DEDUP_MAX_HAMMING_DISTANCE = int(os.getenv('DEDUP_MAX_HAMMING_DISTANCE', '0'))
+# Keep the hashes in the day's screenshot directory so later runs of the day are deduplicated too
+DEDUP_PERSIST_INDEX = os.getenv('DEDUP_PERSIST_INDEX', 'true').lower() == 'true'
+
+# Network request blocking during capture
+RESOURCE_BLOCKING = os.getenv('RESOURCE_BLOCKING', 'true').lower() == 'true'
+# Resource types to block (Playwright resource types: font, media, image, stylesheet, ...)
+BLOCKED_RESOURCE_TYPES = [t for t in os.getenv('BLOCKED_RESOURCE_TYPES', 'font,media').split(',') if t]
+# Domains (substring match) whose requests are always blocked
+BLOCKED_DOMAINS = [d for d in os.getenv(
+    'BLOCKED_DOMAINS',
+    'google-analytics.com,googletagmanager.com,doubleclick.net,googlesyndication.com,facebook.net,'
+    'facebook.com,hotjar.com,sensorsdata,intercom.io,zendesk.com,twitter.com,analytics.tiktok.com,'
+    'bat.bing.com,clarity.ms,sentry.io,braze.com,appsflyer.com'
+).split(',') if d]
+# Domains (substring match) that are never blocked, even for blocked resource types
+ALLOWED_DOMAINS = [d for d in os.getenv('ALLOWED_DOMAINS', 'tradingview').split(',') if d]
+
+# Persistent browser profile for launch mode (keeps HTTP cache, localStorage and chart layout between runs)
+BROWSER_PERSISTENT_PROFILE = os.getenv('BROWSER_PERSISTENT_PROFILE', 'false').lower() == 'true'
+BROWSER_PROFILE_DIR = os.getenv('BROWSER_PROFILE_DIR', './browser_profile')
+# Bump to start from a clean profile; profiles of other versions are removed
+BROWSER_PROFILE_VERSION = os.getenv('BROWSER_PROFILE_VERSION', '1')
+BROWSER_CACHE_SIZE_MB = int(os.getenv('BROWSER_CACHE_SIZE_MB', '256'))
+
+# Headless operation for servers without a display: Chrome runs in the new headless mode
+BROWSER_HEADLESS = os.getenv('BROWSER_HEADLESS', 'false').lower() == 'true'
+# Cookies and localStorage exported by the one-time headed login (python3 main.py --login-bootstrap)
+STORAGE_STATE_FILE = os.getenv('STORAGE_STATE_FILE', './binance_storage_state.json')
+# Start Xvfb for headed Chrome on Linux when no X server is available
+XVFB_FALLBACK = os.getenv('XVFB_FALLBACK', 'false').lower() == 'true'
+XVFB_DISPLAY = os.getenv('XVFB_DISPLAY', ':99')
+# Chrome executable for the remote debugging instance (default: searched on the system)
+CHROME_PATH = os.getenv('CHROME_PATH', '')
+
+# Market data extracted from the page DOM alongside each screenshot
+DOM_EXTRACTION = os.getenv('DOM_EXTRACTION', 'true').lower() == 'true'
+ORDERBOOK_LEVELS = int(os.getenv('ORDERBOOK_LEVELS', '5'))
+
+# Browserless market data from the public Binance futures REST API
+BINANCE_FAPI_BASE = os.getenv('BINANCE_FAPI_BASE', 'https://fapi.binance.com')
+MARKET_DATA_TIMEFRAMES = [t for t in os.getenv('MARKET_DATA_TIMEFRAMES', '1h,4h,1d').split(',') if t]
+MARKET_DATA_KLINE_LIMIT = int(os.getenv('MARKET_DATA_KLINE_LIMIT', '200'))
+MARKET_DATA_MAX_WORKERS = int(os.getenv('MARKET_DATA_MAX_WORKERS', '16'))
+MARKET_DATA_TIMEOUT = float(os.getenv('MARKET_DATA_TIMEOUT', '10'))
+MARKET_DATA_OUTPUT_DIR = os.getenv('MARKET_DATA_OUTPUT_DIR', './data/market')
+
+# Indicator table (EMA21, MACD, RSI, ATR) computed from exchange klines and added to the prompt
+INDICATORS_ENABLED = os.getenv('INDICATORS_ENABLED', 'true').lower() == 'true'
+
+# Offline candlestick chart rendering from klines (replaces browser screenshots when enabled)
+CHART_RENDER_WIDTH = int(os.getenv('CHART_RENDER_WIDTH', '1280'))
+CHART_RENDER_HEIGHT = int(os.getenv('CHART_RENDER_HEIGHT', '800'))
+CHART_RENDER_BARS = int(os.getenv('CHART_RENDER_BARS', '120'))
+CHART_RENDER_WORKERS = int(os.getenv('CHART_RENDER_WORKERS', str(os.cpu_count() or 2)))
+
+# Multi-timeframe capture: switch the chart interval in place and capture each one
+# Comma-separated intervals, e.g. 1d,4h,1h (empty: capture the interval the page opens with)
+CAPTURE_TIMEFRAMES = [t for t in os.getenv('CAPTURE_TIMEFRAMES', '').split(',') if t]
+# TradingView resolution and interval button labels for each interval
+TIMEFRAME_OPTIONS = {
+    '15m': {'resolution': '15', 'labels': ['15m', '15分钟']},
+    '30m': {'resolution': '30', 'labels': ['30m', '30分钟']},
+    '1h': {'resolution': '60', 'labels': ['1h', '1H', '1小时']},
+    '2h': {'resolution': '120', 'labels': ['2h', '2H', '2小时']},
+    '4h': {'resolution': '240', 'labels': ['4h', '4H', '4小时']},
+    '1d': {'resolution': '1D', 'labels': ['1d', '1D', '1天', '1日']},
+    '1w': {'resolution': '1W', 'labels': ['1w', '1W', '1周']}
+}
+TIMEFRAME_SWITCH_MAX_WAIT_MS = int(os.getenv('TIMEFRAME_SWITCH_MAX_WAIT_MS', '8000'))
+
+# Tab-resident capture over CDP: one pinned tab per symbol, reloaded only when its ticker stops updating
+RESIDENT_TAB_CAPTURE = os.getenv('RESIDENT_TAB_CAPTURE', 'true').lower() == 'true'
+# A tab whose price ticker has not changed for this long is considered stale and reloaded
+RESIDENT_TAB_STALE_MS = int(os.getenv('RESIDENT_TAB_STALE_MS', '15000'))
+# How long to watch a newly attached tab for a first ticker update
+RESIDENT_TAB_PROBE_MS = int(os.getenv('RESIDENT_TAB_PROBE_MS', '3000'))
+
+# Capture all open tabs concurrently over per-tab CDP sessions instead of one at a time
+PARALLEL_TAB_CAPTURE = os.getenv('PARALLEL_TAB_CAPTURE', 'true').lower() == 'true'
+
+# Screencast sampling: stream each pinned tab over CDP and keep a frame every SCREENCAST_INTERVAL_S
+SCREENCAST_INTERVAL_S = float(os.getenv('SCREENCAST_INTERVAL_S', '10'))
+SCREENCAST_DURATION_S = float(os.getenv('SCREENCAST_DURATION_S', '60'))
+# Retention per currency: at most this many frames, none older than this many minutes (0: no age limit)
+SCREENCAST_MAX_FRAMES = int(os.getenv('SCREENCAST_MAX_FRAMES', '30'))
+SCREENCAST_MAX_AGE_MINUTES = int(os.getenv('SCREENCAST_MAX_AGE_MINUTES', '240'))
+SCREENCAST_FORMAT = os.getenv('SCREENCAST_FORMAT', 'jpeg')  # jpeg or png
+SCREENCAST_QUALITY = int(os.getenv('SCREENCAST_QUALITY', '80'))
+SCREENCAST_MAX_WIDTH = int(os.getenv('SCREENCAST_MAX_WIDTH', '1920'))
+SCREENCAST_MAX_HEIGHT = int(os.getenv('SCREENCAST_MAX_HEIGHT', '1080'))
+
+# Capture already loaded tabs over a direct CDP websocket instead of starting the Playwright driver
+DIRECT_CDP_CAPTURE = os.getenv('DIRECT_CDP_CAPTURE', 'true').lower() == 'true'
+
+# Time budgets for browser capture: per currency and for the whole run.
+# Stage timeouts (navigation, load, readiness, screenshot) shrink to the time left.
+CAPTURE_SYMBOL_BUDGET_S = float(os.getenv('CAPTURE_SYMBOL_BUDGET_S', '180'))
+CAPTURE_RUN_BUDGET_S = float(os.getenv('CAPTURE_RUN_BUDGET_S', '900'))
+
+# DeepSeek HTTP client: pooled keep-alive session with separate connect and read timeouts
+DEEPSEEK_CONNECT_TIMEOUT = float(os.getenv('DEEPSEEK_CONNECT_TIMEOUT', '10'))
+DEEPSEEK_READ_TIMEOUT = float(os.getenv('DEEPSEEK_READ_TIMEOUT', '300'))
+DEEPSEEK_POOL_SIZE = int(os.getenv('DEEPSEEK_POOL_SIZE', '8'))
+# Retry backoff when the server sends no Retry-After: random wait up to base * 2^attempt, capped at max
+DEEPSEEK_BACKOFF_BASE_S = float(os.getenv('DEEPSEEK_BACKOFF_BASE_S', '1'))
+DEEPSEEK_BACKOFF_MAX_S = float(os.getenv('DEEPSEEK_BACKOFF_MAX_S', '60'))
+
+# Concurrent analysis: per-currency requests are sent at once instead of one after another
+LLM_CONCURRENT_ANALYSIS = os.getenv('LLM_CONCURRENT_ANALYSIS', 'true').lower() == 'true'
+# Requests in flight at once (keep at or below DEEPSEEK_POOL_SIZE so connections are reused)
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', str(DEEPSEEK_POOL_SIZE)))
+# Client-side budget; the rate drops after each 429 and recovers with every successful request
+DEEPSEEK_RPM = int(os.getenv('DEEPSEEK_RPM', '60'))
+DEEPSEEK_TPM = int(os.getenv('DEEPSEEK_TPM', '500000'))
+
+# Stream completions (SSE) into the report file as they are generated
+DEEPSEEK_STREAM = os.getenv('DEEPSEEK_STREAM', 'true').lower() == 'true'
+# Seconds between Lark messages with the partial report while it is generated (0: disabled)
+LARK_STREAM_PROGRESS_INTERVAL_S = float(os.getenv('LARK_STREAM_PROGRESS_INTERVAL_S', '0'))
+
+# DeepSeek response cache (SQLite), keyed by model, prompt, rules document and screenshot content
+RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+RESPONSE_CACHE_PATH = os.getenv('RESPONSE_CACHE_PATH', './data/response_cache.sqlite3')
+RESPONSE_CACHE_TTL_HOURS = float(os.getenv('RESPONSE_CACHE_TTL_HOURS', '24'))
+# Least recently used responses are evicted beyond this size
+RESPONSE_CACHE_MAX_MB = float(os.getenv('RESPONSE_CACHE_MAX_MB', '50'))
+# Always request a fresh completion (it is still stored); same as --no-cache
+RESPONSE_CACHE_BYPASS = os.getenv('RESPONSE_CACHE_BYPASS', 'false').lower() == 'true'
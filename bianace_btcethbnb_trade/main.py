@@ -1,11 +1,23 @@
 import os
 import sys
 from datetime import datetime
-from utils.screenshot import capture_screenshot, connect_to_existing_chrome_and_screenshot, capture_all_tabs_screenshot
+from utils.screenshot import capture_screenshot, connect_to_existing_chrome_and_screenshot, capture_all_tabs_screenshot, bootstrap_login
 from utils.document_reader import read_document
-from utils.deepseek_client import send_to_deepseek, send_multiple_screenshots_to_deepseek, save_response
+from utils.deepseek_client import (
+    warm_up_deepseek, log_prompt_cache_report, send_to_deepseek, send_multiple_screenshots_to_deepseek, send_market_data_to_deepseek, save_response,
+    build_screenshot_payload, build_multiple_screenshots_payload
+)
+from utils.llm_fanout import send_payloads_concurrently
+from utils.response_cache import payload_cache_key, bypass_response_cache
 from utils.lark_notifier import notify_completion, notify_error
-from config.settings import REPORT_OUTPUT_DIR, SCREENSHOT_OUTPUT_DIR, SUPPORTED_CURRENCIES
+from utils.image_pipeline import compress_screenshots
+from utils.image_dedup import deduplicate_screenshots
+from utils.market_data import fetch_market_snapshots, save_market_data
+from utils.indicators import build_indicator_table, build_indicator_tables
+from utils.chart_renderer import render_charts
+from utils.resident_tabs import capture_resident_tabs
+from utils.screencast_sampler import sample_screencast
+from config.settings import REPORT_OUTPUT_DIR, SCREENSHOT_OUTPUT_DIR, SUPPORTED_CURRENCIES, SCREENSHOT_COMPRESSION, SCREENSHOT_DEDUP, INDICATORS_ENABLED, RESIDENT_TAB_CAPTURE, LLM_CONCURRENT_ANALYSIS
 import logging
 from logging.handlers import RotatingFileHandler
 import argparse
@@ -43,7 +55,139 @@ def setup_logging():
     return logger
 
 
-def analyze_currency(currency, prompt=None, use_existing_chrome=True):  # 默认使用现有Chrome
+def capture_currency_screenshot(currency, use_existing_chrome=True):
+    """
+    Capture one screenshot of a currency pair and compress it if enabled
+    
+    Args:
+        currency (str): Currency pair to capture
+        use_existing_chrome (bool): Whether to use existing Chrome instance with remote debugging
+    
+    Returns:
+        str: Path to the screenshot
+    """
+    logger = logging.getLogger('binance_trade_analyzer')
+    logger.info("Capturing screenshot...")
+    if use_existing_chrome and RESIDENT_TAB_CAPTURE:
+        # Reuse the pinned tab for this currency instead of navigating the first tab
+        resident_paths = capture_resident_tabs([currency])
+        screenshot_path = resident_paths[0] if resident_paths else connect_to_existing_chrome_and_screenshot(currency)
+    elif use_existing_chrome:
+        screenshot_path = connect_to_existing_chrome_and_screenshot(currency)
+    else:
+        screenshot_path = capture_screenshot(currency)
+    logger.info(f"Screenshot saved to {screenshot_path}")
+    
+    # Convert and downscale the screenshot before it is stored and encoded
+    if SCREENSHOT_COMPRESSION:
+        screenshot_path = compress_screenshots([screenshot_path])[0]
+    return screenshot_path
+
+
+def find_currency_screenshots(currency, date_dir):
+    """
+    All screenshots of a currency pair on a date, deduplicated if enabled
+    
+    Args:
+        currency (str): Currency pair
+        date_dir (str): Date directory to look for screenshots
+    
+    Returns:
+        list: List of screenshot paths (empty if there are none)
+    """
+    logger = logging.getLogger('binance_trade_analyzer')
+    currency_screenshot_dir = os.path.join(SCREENSHOT_OUTPUT_DIR, date_dir, currency)
+    if not os.path.exists(currency_screenshot_dir):
+        logger.warning(f"No screenshots found for {currency} in {currency_screenshot_dir}")
+        return []
+    
+    screenshot_files = [f for f in os.listdir(currency_screenshot_dir) if f.endswith(('.png', '.jpg', '.jpeg', '.webp'))]
+    if not screenshot_files:
+        logger.warning(f"No screenshot files found for {currency} in {currency_screenshot_dir}")
+        return []
+    
+    screenshot_paths = [os.path.join(currency_screenshot_dir, f) for f in screenshot_files]
+    logger.info(f"Found {len(screenshot_paths)} screenshots for {currency}")
+    
+    # Drop near-duplicate captures (e.g. a quiet market or a page that never refreshed)
+    if SCREENSHOT_DEDUP:
+        screenshot_paths = deduplicate_screenshots(screenshot_paths)
+        logger.info(f"{len(screenshot_paths)} distinct screenshots left after deduplication")
+    return screenshot_paths
+
+
+def batch_indicator_table(currency, indicator_tables=None):
+    """
+    Indicator table of one currency, taken from a batch computed for all currencies if one is given
+    
+    Args:
+        currency (str): Currency pair
+        indicator_tables (dict): Result of build_indicator_tables (default: compute for this currency alone)
+    
+    Returns:
+        str: Indicator table, or None if indicators are disabled or unavailable
+    """
+    if not INDICATORS_ENABLED:
+        return None
+    if indicator_tables is not None:
+        return indicator_tables.get(currency)
+    return build_indicator_table([currency])
+
+
+def save_and_notify(currency, response, response_path, screenshot_path):
+    """
+    Save a DeepSeek response as a report and send the completion notification
+    
+    Args:
+        currency (str): Currency pair
+        response (dict): Response from DeepSeek API
+        response_path (str): Report file path
+        screenshot_path (str): Screenshot attached to the notification
+    
+    Returns:
+        str: Path to the saved report
+    """
+    logger = logging.getLogger('binance_trade_analyzer')
+    saved_path = save_response(response, response_path)
+    logger.info(f"Response saved to {saved_path}")
+    notify_completion(currency, response_path, screenshot_path)
+    return saved_path
+
+
+def analyze_concurrently(currencies, payloads, screenshots, filename_suffix, cache_keys=None):
+    """
+    Send the prepared requests of several currencies at once and save each report as it is done
+    
+    Args:
+        currencies (list): Currency pairs, in report order
+        payloads (dict): Currency -> request body
+        screenshots (dict): Currency -> screenshot attached to the notification
+        filename_suffix (str): Report file name suffix
+        cache_keys (dict): Currency -> response cache key
+    """
+    logger = logging.getLogger('binance_trade_analyzer')
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    report_paths = {
+        currency: os.path.join(REPORT_OUTPUT_DIR, f'{timestamp}_{currency}_{filename_suffix}.txt') for currency in payloads
+    }
+    logger.info(f"Sending {len(payloads)} analyses to DeepSeek API concurrently...")
+    responses = send_payloads_concurrently(payloads, report_paths, cache_keys)
+    for currency in currencies:
+        if currency not in responses:
+            continue
+        response = responses[currency]
+        if isinstance(response, Exception):
+            notify_error(currency, str(response))
+            continue
+        try:
+            save_and_notify(currency, response, report_paths[currency], screenshots[currency])
+            logger.info(f"Analysis completed successfully for {currency}")
+        except Exception as e:
+            logger.error(f"Failed to save analysis for {currency}: {str(e)}", exc_info=True)
+            notify_error(currency, str(e))
+
+
+def analyze_currency(currency, prompt=None, use_existing_chrome=True, indicator_tables=None):  # 默认使用现有Chrome
     """
     Analyze a single currency pair
     
@@ -51,35 +195,39 @@ def analyze_currency(currency, prompt=None, use_existing_chrome=True):  # 默认
         currency (str): Currency pair to analyze
         prompt (str): Custom prompt for DeepSeek API
         use_existing_chrome (bool): Whether to use existing Chrome instance with remote debugging
+        indicator_tables (dict): Currency -> indicator table computed for a whole batch (default: computed here)
     """
     logger = setup_logging()
     
     try:
         logger.info(f"Starting analysis for {currency}")
+        # Open the API connection while the screenshot is captured
+        warm_up_deepseek()
         
         # Step 1: Capture screenshot
-        logger.info("Capturing screenshot...")
-        if use_existing_chrome:
-            screenshot_path = connect_to_existing_chrome_and_screenshot(currency)
-        else:
-            screenshot_path = capture_screenshot(currency)
-        logger.info(f"Screenshot saved to {screenshot_path}")
+        screenshot_path = capture_currency_screenshot(currency, use_existing_chrome)
         
         # Step 2: Read document
         logger.info("Reading trade rules document...")
         document_content = read_document()
         logger.info("Document read successfully")
         
+        # Exact indicator values from exchange klines, so they don't have to be read off the chart
+        indicator_table = batch_indicator_table(currency, indicator_tables)
+        
         # Step 3: Send to DeepSeek API
         logger.info("Sending data to DeepSeek API...")
-        response = send_to_deepseek(screenshot_path, document_content, prompt)
-        logger.info("Response received from DeepSeek API")
-        
-        # Step 4: Save response
+        # The report is created before sending, so a streamed completion can be written into it
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         response_filename = f'{timestamp}_{currency}_trade.txt'
         response_path = os.path.join(REPORT_OUTPUT_DIR, response_filename)
         
+        response = send_to_deepseek(
+            screenshot_path, document_content, prompt, indicator_table=indicator_table, report_path=response_path
+        )
+        logger.info("Response received from DeepSeek API")
+        
+        # Step 4: Save response
         saved_path = save_response(response, response_path)
         logger.info(f"Response saved to {saved_path}")
         
@@ -97,7 +245,8 @@ def analyze_currency(currency, prompt=None, use_existing_chrome=True):  # 默认
         raise
 
 
-def analyze_currency_multiple_screenshots(currency, date_dir=None, prompt=None, use_existing_chrome=True):
+def analyze_currency_multiple_screenshots(currency, date_dir=None, prompt=None, use_existing_chrome=True,
+                                          indicator_tables=None):
     """
     Analyze a single currency pair using multiple screenshots for the day
     
@@ -106,6 +255,7 @@ def analyze_currency_multiple_screenshots(currency, date_dir=None, prompt=None,
         date_dir (str): Date directory to look for screenshots (default: today)
         prompt (str): Custom prompt for DeepSeek API
         use_existing_chrome (bool): Whether to use existing Chrome instance with remote debugging
+        indicator_tables (dict): Currency -> indicator table computed for a whole batch (default: computed here)
     """
     logger = setup_logging()
     
@@ -116,34 +266,31 @@ def analyze_currency_multiple_screenshots(currency, date_dir=None, prompt=None,
         logger.info(f"Starting analysis for {currency} with multiple screenshots")
         
         # Step 1: Find all screenshots for this currency on this date
-        currency_screenshot_dir = os.path.join(SCREENSHOT_OUTPUT_DIR, date_dir, currency)
-        if not os.path.exists(currency_screenshot_dir):
-            logger.warning(f"No screenshots found for {currency} in {currency_screenshot_dir}")
+        screenshot_paths = find_currency_screenshots(currency, date_dir)
+        if not screenshot_paths:
             return
         
-        screenshot_files = [f for f in os.listdir(currency_screenshot_dir) if f.endswith(('.png', '.jpg', '.jpeg'))]
-        if not screenshot_files:
-            logger.warning(f"No screenshot files found for {currency} in {currency_screenshot_dir}")
-            return
-        
-        screenshot_paths = [os.path.join(currency_screenshot_dir, f) for f in screenshot_files]
-        logger.info(f"Found {len(screenshot_paths)} screenshots for {currency}")
-        
         # Step 2: Read document
         logger.info("Reading trade rules document...")
         document_content = read_document()
         logger.info("Document read successfully")
         
+        # Exact indicator values from exchange klines, so they don't have to be read off the charts
+        indicator_table = batch_indicator_table(currency, indicator_tables)
+        
         # Step 3: Send all screenshots to DeepSeek API
         logger.info("Sending multiple screenshots and document to DeepSeek API...")
-        response = send_multiple_screenshots_to_deepseek(screenshot_paths, document_content, currency, prompt)
-        logger.info("Response received from DeepSeek API")
-        
-        # Step 4: Save response
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         response_filename = f'{timestamp}_{currency}_multi_analysis.txt'
         response_path = os.path.join(REPORT_OUTPUT_DIR, response_filename)
         
+        response = send_multiple_screenshots_to_deepseek(
+            screenshot_paths, document_content, currency, prompt, indicator_table=indicator_table,
+            report_path=response_path
+        )
+        logger.info("Response received from DeepSeek API")
+        
+        # Step 4: Save response
         saved_path = save_response(response, response_path)
         logger.info(f"Response saved to {saved_path}")
         
@@ -194,14 +341,16 @@ def analyze_screenshots_from_path(screenshot_paths, prompt=None, currency="CUSTO
         
         # Step 3: Send all screenshots to DeepSeek API
         logger.info("Sending screenshots and document to DeepSeek API...")
-        response = send_multiple_screenshots_to_deepseek(screenshot_paths, document_content, currency, prompt)
-        logger.info("Response received from DeepSeek API")
-        
-        # Step 4: Save response
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         response_filename = f'{timestamp}_{currency}_path_analysis.txt'
         response_path = os.path.join(REPORT_OUTPUT_DIR, response_filename)
         
+        response = send_multiple_screenshots_to_deepseek(
+            screenshot_paths, document_content, currency, prompt, report_path=response_path
+        )
+        logger.info("Response received from DeepSeek API")
+        
+        # Step 4: Save response
         saved_path = save_response(response, response_path)
         logger.info(f"Response saved to {saved_path}")
         
@@ -220,6 +369,60 @@ def analyze_screenshots_from_path(screenshot_paths, prompt=None, currency="CUSTO
         raise
 
 
+def analyze_currency_market_data(currency, snapshot, prompt=None, render=False):
+    """
+    Analyze a single currency pair from a REST market snapshot, without a browser
+    
+    Args:
+        currency (str): Currency pair to analyze
+        snapshot (dict): Market snapshot from fetch_market_snapshots
+        prompt (str): Custom prompt for DeepSeek API
+        render (bool): Render candlestick charts from the klines for the notification
+    """
+    logger = setup_logging()
+    
+    try:
+        logger.info(f"Starting market data analysis for {currency}")
+        
+        # Step 1: Store the snapshot that is analyzed
+        market_data_path = save_market_data(snapshot)
+        logger.info(f"Market data saved to {market_data_path}")
+        
+        # Render charts locally when an image is wanted (no browser involved)
+        chart_paths = render_charts({currency: snapshot}) if render else []
+        
+        # Step 2: Read document
+        logger.info("Reading trade rules document...")
+        document_content = read_document()
+        logger.info("Document read successfully")
+        
+        # Step 3: Send to DeepSeek API
+        logger.info("Sending market data and document to DeepSeek API...")
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        response_filename = f'{timestamp}_{currency}_market_analysis.txt'
+        response_path = os.path.join(REPORT_OUTPUT_DIR, response_filename)
+        
+        response = send_market_data_to_deepseek([snapshot], document_content, currency, prompt, report_path=response_path)
+        logger.info("Response received from DeepSeek API")
+        
+        # Step 4: Save response
+        saved_path = save_response(response, response_path)
+        logger.info(f"Response saved to {saved_path}")
+        
+        # Step 5: Send notification
+        logger.info("Sending completion notification...")
+        notify_completion(currency, response_path, chart_paths[0] if chart_paths else market_data_path)
+        logger.info("Notification sent successfully")
+        
+        logger.info(f"Market data analysis completed successfully for {currency}")
+        
+    except Exception as e:
+        logger.error(f"Error during market data analysis for {currency}: {str(e)}", exc_info=True)
+        # Send error notification
+        notify_error(currency, str(e))
+        raise
+
+
 def main(currencies=None, prompt=None, use_existing_chrome=True):  # 默认使用现有Chrome
     """
     Main function to orchestrate the analysis workflow
@@ -235,16 +438,39 @@ def main(currencies=None, prompt=None, use_existing_chrome=True):  # 默认使
     
     logger = setup_logging()
     
+    if LLM_CONCURRENT_ANALYSIS and len(currencies) > 1:
+        # Capture one currency after another (one browser), then analyze all of them at once
+        warm_up_deepseek()
+        document_content = read_document()
+        payloads = {}
+        screenshots = {}
+        cache_keys = {}
+        # One kline fetch and one indicator pass for all currencies
+        indicator_tables = build_indicator_tables(currencies) if INDICATORS_ENABLED else None
+        for currency in currencies:
+            try:
+                logger.info(f"Processing {currency}...")
+                screenshots[currency] = capture_currency_screenshot(currency, use_existing_chrome)
+                indicator_table = batch_indicator_table(currency, indicator_tables)
+                payloads[currency] = build_screenshot_payload(screenshots[currency], document_content, prompt, indicator_table)
+                cache_keys[currency] = payload_cache_key(payloads[currency], [screenshots[currency]])
+            except Exception as e:
+                logger.error(f"Failed to process {currency}: {str(e)}")
+                notify_error(currency, str(e))
+        analyze_concurrently(currencies, payloads, screenshots, 'trade', cache_keys)
+        return
+    
+    indicator_tables = build_indicator_tables(currencies) if INDICATORS_ENABLED else None
     for currency in currencies:
         try:
             logger.info(f"Processing {currency}...")
-            analyze_currency(currency, prompt, use_existing_chrome)
+            analyze_currency(currency, prompt, use_existing_chrome, indicator_tables)
         except Exception as e:
             logger.error(f"Failed to process {currency}: {str(e)}")
             continue
 
 
-def main_multiple_screenshots(currencies=None, prompt=None, use_existing_chrome=True, date_dir=None):
+def main_multiple_screenshots(currencies=None, prompt=None, use_existing_chrome=True, date_dir=None, screencast=False):
     """
     Main function to orchestrate the analysis workflow using multiple screenshots per currency
     
@@ -253,6 +479,7 @@ def main_multiple_screenshots(currencies=None, prompt=None, use_existing_chrome=
         prompt (str): Custom prompt for DeepSeek API
         use_existing_chrome (bool): Whether to use existing Chrome instance with remote debugging
         date_dir (str): Date directory to look for screenshots (default: today)
+        screencast (bool): Sample a frame series from the open tabs before the analysis
     """
     if not currencies:
         # If no currencies specified, use default list
@@ -260,15 +487,79 @@ def main_multiple_screenshots(currencies=None, prompt=None, use_existing_chrome=
     
     logger = setup_logging()
     
+    warm_up_deepseek()
+    if screencast:
+        # Frames land in today's screenshot directories, where the analysis below picks them up
+        logger.info("Sampling screencast frames from the open tabs...")
+        sample_screencast(currencies)
+    
+    if LLM_CONCURRENT_ANALYSIS and len(currencies) > 1:
+        date_dir = date_dir or datetime.now().strftime('%Y-%m-%d')
+        document_content = read_document()
+        payloads = {}
+        screenshots = {}
+        cache_keys = {}
+        # One kline fetch and one indicator pass for all currencies
+        indicator_tables = build_indicator_tables(currencies) if INDICATORS_ENABLED else None
+        for currency in currencies:
+            try:
+                screenshot_paths = find_currency_screenshots(currency, date_dir)
+                if not screenshot_paths:
+                    continue
+                screenshots[currency] = screenshot_paths[0]
+                indicator_table = batch_indicator_table(currency, indicator_tables)
+                payloads[currency] = build_multiple_screenshots_payload(
+                    screenshot_paths, document_content, currency, prompt, indicator_table
+                )
+                cache_keys[currency] = payload_cache_key(payloads[currency], screenshot_paths)
+            except Exception as e:
+                logger.error(f"Failed to process {currency} with multiple screenshots: {str(e)}")
+                notify_error(currency, str(e))
+        analyze_concurrently(currencies, payloads, screenshots, 'multi_analysis', cache_keys)
+        return
+    
+    indicator_tables = build_indicator_tables(currencies) if INDICATORS_ENABLED else None
     for currency in currencies:
         try:
             logger.info(f"Processing {currency} with multiple screenshots...")
-            analyze_currency_multiple_screenshots(currency, date_dir, prompt, use_existing_chrome)
+            analyze_currency_multiple_screenshots(currency, date_dir, prompt, use_existing_chrome, indicator_tables)
         except Exception as e:
             logger.error(f"Failed to process {currency} with multiple screenshots: {str(e)}")
             continue
 
 
+def main_market_data(currencies=None, prompt=None, base_url=None, render=False):
+    """
+    Main function to orchestrate the browserless analysis workflow using the public REST API
+    
+    Args:
+        currencies (list): List of currency pairs to analyze
+        prompt (str): Custom prompt for DeepSeek API
+        base_url (str): REST base URL, e.g. a local stub server (default: BINANCE_FAPI_BASE)
+        render (bool): Render candlestick charts from the klines
+    """
+    if not currencies:
+        # If no currencies specified, use default list
+        currencies = SUPPORTED_CURRENCIES
+    
+    logger = setup_logging()
+    
+    # Fetch all currencies in one concurrent batch before analyzing them
+    snapshots = fetch_market_snapshots(currencies, base_url=base_url)
+    
+    for currency in currencies:
+        if currency not in snapshots:
+            logger.error(f"Failed to fetch market data for {currency}")
+            notify_error(currency, "Failed to fetch market data")
+            continue
+        try:
+            logger.info(f"Processing {currency} from market data...")
+            analyze_currency_market_data(currency, snapshots[currency], prompt, render)
+        except Exception as e:
+            logger.error(f"Failed to process {currency} from market data: {str(e)}")
+            continue
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Binance Trade Analyzer")
     parser.add_argument(
@@ -298,6 +589,11 @@ if __name__ == "__main__":
         action="store_true",
         help="Use multiple screenshots for analysis instead of single screenshot"
     )
+    parser.add_argument(
+        "--screencast",
+        action="store_true",
+        help="With --multi-analysis, first sample a frame series from the open Chrome tabs over CDP screencast"
+    )
     parser.add_argument(
         "--date",
         help="Date directory to look for screenshots (format: YYYY-MM-DD, default: today)"
@@ -307,6 +603,30 @@ if __name__ == "__main__":
         nargs='+',
         help="List of specific screenshot file paths to analyze (bypasses automatic screenshot capture)"
     )
+    parser.add_argument(
+        "--rest",
+        action="store_true",
+        help="Fetch market data from the Binance futures REST API instead of capturing screenshots"
+    )
+    parser.add_argument(
+        "--fapi-base",
+        help="Base URL of the futures REST API, e.g. a local stub server (default: BINANCE_FAPI_BASE)"
+    )
+    parser.add_argument(
+        "--render-charts",
+        action="store_true",
+        help="With --rest, also render candlestick charts from the klines into data/screenshots"
+    )
+    parser.add_argument(
+        "--login-bootstrap",
+        action="store_true",
+        help="Open a browser window to log in once and export the storage state for headless runs"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Request fresh DeepSeek completions instead of reusing cached responses (they are still stored)"
+    )
     parser.add_argument(
         "--currency-name",
         default="CUSTOM",
@@ -315,10 +635,20 @@ if __name__ == "__main__":
     
     args = parser.parse_args()
     
-    if args.screenshot_paths:
+    if args.no_cache:
+        bypass_response_cache()
+    
+    if args.login_bootstrap:
+        bootstrap_login(args.currencies[0])
+    elif args.screenshot_paths:
         # Analyze specific screenshot paths
         analyze_screenshots_from_path(args.screenshot_paths, args.prompt, args.currency_name)
+    elif args.rest:
+        main_market_data(args.currencies, args.prompt, args.fapi_base, args.render_charts)
     elif args.multi_analysis:
-        main_multiple_screenshots(args.currencies, args.prompt, args.use_existing_chrome, args.date)
+        main_multiple_screenshots(args.currencies, args.prompt, args.use_existing_chrome, args.date, args.screencast)
     else:
         main(args.currencies, args.prompt, args.use_existing_chrome)
+    
+    # Prompt cache hit/miss tokens of all requests in this run
+    log_prompt_cache_report()
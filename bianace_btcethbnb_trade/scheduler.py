@@ -3,11 +3,21 @@ from apscheduler.triggers.cron import CronTrigger
 import pytz
 from datetime import datetime
 from config.settings import SCHEDULE_TIME, TIMEZONE, SUPPORTED_CURRENCIES, LARK_WEBHOOK_URL
-from utils.screenshot import capture_multiple_screenshots_new_browser, start_chrome_with_debugging_and_urls
+from utils.screenshot import start_chrome_with_debugging_and_urls, wait_for_cdp_ready
+from utils.async_screenshot import capture_multiple_screenshots_concurrent
+from utils.browser_pool import ping_browser_pool, request_pool_capture
+from utils.resident_tabs import capture_resident_tabs
+from utils.capture_workers import capture_in_workers, capture_paths
 from utils.document_reader import read_document
-from utils.deepseek_client import send_multiple_screenshots_to_deepseek, save_response
+from utils.deepseek_client import warm_up_deepseek, log_prompt_cache_report, send_multiple_screenshots_to_deepseek, send_market_data_to_deepseek, save_response
 from utils.lark_notifier import LarkNotifier
-from config.settings import REPORT_OUTPUT_DIR, ANALYSIS_PROMPT_TEMPLATE
+from config.settings import REPORT_OUTPUT_DIR, ANALYSIS_PROMPT_TEMPLATE, SCREENSHOT_COMPRESSION, SCREENSHOT_DEDUP, INDICATORS_ENABLED, RESIDENT_TAB_CAPTURE, CAPTURE_WORKER_ISOLATION
+from utils.image_pipeline import compress_screenshots
+from utils.image_dedup import deduplicate_screenshots
+from utils.market_data import fetch_market_snapshots, save_market_data
+from utils.indicators import build_indicator_table
+from utils.chart_renderer import render_charts
+from utils.dom_extractor import save_market_snapshot
 import os
 import logging
 
@@ -28,16 +38,114 @@ logger = logging.getLogger('binance_scheduler')
 lark_notifier = LarkNotifier(LARK_WEBHOOK_URL) if LARK_WEBHOOK_URL else None
 
 
-def run_analysis(use_existing_chrome=False):  # 修改为默认不使用现有Chrome
+def run_market_data_analysis(base_url=None):
+    """
+    Run the analysis from the public futures REST API instead of browser screenshots
+    
+    Args:
+        base_url (str): REST base URL, e.g. a local stub server (default: BINANCE_FAPI_BASE)
+    """
+    logger.info("Scheduled market data task started")
+    try:
+        snapshots = fetch_market_snapshots(SUPPORTED_CURRENCIES, base_url=base_url)
+        if not snapshots:
+            logger.warning("No market data was fetched")
+            if lark_notifier:
+                lark_notifier.send_text_message("⚠️ 警告：未获取到任何行情数据")
+            return
+        
+        for snapshot in snapshots.values():
+            save_market_data(snapshot)
+        
+        # Read document content once
+        logger.info("Reading trade rules document...")
+        document_content = read_document()
+        logger.info("Document read successfully")
+        
+        logger.info(f"Sending market data for {list(snapshots.keys())} to DeepSeek API for comprehensive analysis...")
+        # The report is created before sending, so a streamed completion can be written into it
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        response_filename = f'{timestamp}_comprehensive_analysis.txt'
+        response_path = os.path.join(REPORT_OUTPUT_DIR, response_filename)
+        
+        response = send_market_data_to_deepseek(
+            snapshots=list(snapshots.values()),
+            document_content=document_content,
+            currency="COMPREHENSIVE",
+            prompt=ANALYSIS_PROMPT_TEMPLATE,
+            report_path=response_path
+        )
+        logger.info("Comprehensive analysis response received from DeepSeek API")
+        
+        # Save response
+        saved_path = save_response(response, response_path)
+        logger.info(f"Comprehensive analysis response saved to {saved_path}")
+        
+        if lark_notifier:
+            lark_notifier.send_text_message("✅ 所有币种的币安期货综合分析任务已成功完成")
+        
+        logger.info("Scheduled market data task completed successfully")
+        
+    except Exception as e:
+        logger.error(f"Scheduled market data task failed: {str(e)}", exc_info=True)
+        # Send error notification
+        if lark_notifier:
+            lark_notifier.send_text_message(f"❌ 币安期货分析任务失败: {str(e)}")
+    finally:
+        log_prompt_cache_report(logger=logger)
+
+
+def render_market_charts(currencies):
+    """
+    Render charts from REST klines instead of capturing browser screenshots.
+    The market snapshot is saved next to each chart so the prompt still gets the exact values.
+    
+    Returns:
+        list: Paths to the rendered charts
+    """
+    snapshots = fetch_market_snapshots(currencies)
+    chart_paths = render_charts(snapshots)
+    for path in chart_paths:
+        currency = os.path.basename(os.path.dirname(path))
+        snapshot = {key: value for key, value in snapshots[currency].items() if key != 'klines'}
+        save_market_snapshot(snapshot, path)
+    return chart_paths
+
+
+def run_analysis(use_existing_chrome=False, use_rest=False, use_rendered_charts=False):  # 修改为默认不使用现有Chrome
     """
     Run the analysis by launching a new browser instance, navigating to URLs, capturing screenshots, and sending to DeepSeek
+    
+    Args:
+        use_existing_chrome (bool): Whether to use existing Chrome instance with remote debugging
+        use_rest (bool): Fetch market data from the REST API instead of capturing screenshots
+        use_rendered_charts (bool): Render charts from REST klines instead of capturing screenshots
     """
+    if use_rest:
+        run_market_data_analysis()
+        return
+    
     logger.info("Scheduled task started")
     try:
+        # Open the API connection while the browser captures, so the request below doesn't wait for it
+        warm_up_deepseek()
         logger.info("Capturing screenshots from multiple currency pages...")
         
+        # Prefer the warm browser pool daemon when it is running
+        screenshot_paths = None
+        if use_rendered_charts:
+            logger.info("Rendering charts from REST market data instead of capturing screenshots...")
+            screenshot_paths = render_market_charts(SUPPORTED_CURRENCIES)
+        elif ping_browser_pool():
+            logger.info("Browser pool daemon is running, requesting capture from warm tabs...")
+            screenshot_paths = request_pool_capture(SUPPORTED_CURRENCIES)
+            if not screenshot_paths:
+                # An empty capture is treated like an unavailable pool, so the capture below still runs
+                logger.warning("Browser pool captured no screenshots, capturing locally instead")
+                screenshot_paths = None
+        
         # If using existing chrome and it's not running, try to start it
-        if use_existing_chrome:
+        if screenshot_paths is None and use_existing_chrome:
             # Try to connect to existing Chrome instance, if fails, start a new one
             try:
                 from playwright.sync_api import sync_playwright
@@ -53,18 +161,29 @@ def run_analysis(use_existing_chrome=False):  # 修改为默认不使用现有Ch
                     logger.error("Failed to start Chrome with debugging, falling back to new browser instance")
                     use_existing_chrome = False
                 else:
-                    logger.info("Chrome started with debugging, waiting 10 seconds for pages to load...")
-                    import time
-                    time.sleep(10)  # Wait for pages to load
+                    logger.info("Chrome started with debugging, waiting for DevTools endpoint...")
+                    wait_for_cdp_ready()
         
         # Capture screenshots for all supported currencies
-        if use_existing_chrome:
+        if screenshot_paths is not None:
+            logger.info("Using rendered charts" if use_rendered_charts else "Using screenshots captured by the browser pool daemon")
+        elif use_existing_chrome and RESIDENT_TAB_CAPTURE:
+            # Capture from the pinned tab of each currency without re-navigating healthy tabs
+            screenshot_paths = capture_resident_tabs(SUPPORTED_CURRENCIES)
+        elif use_existing_chrome:
             # Use existing browser instance
             from utils.screenshot import capture_multiple_screenshots_existing_browser
             screenshot_paths = capture_multiple_screenshots_existing_browser(SUPPORTED_CURRENCIES)
+        elif CAPTURE_WORKER_ISOLATION:
+            # Capture in supervised worker processes, so a hung or leaking browser can't stall the scheduler
+            capture_records = capture_in_workers(SUPPORTED_CURRENCIES)
+            for record in capture_records:
+                if record['status'] != 'ok':
+                    logger.warning(f"Capture of {record['currency']} {record['status']}: {record['error']}")
+            screenshot_paths = capture_paths(capture_records)
         else:
-            # Use new browser instance
-            screenshot_paths = capture_multiple_screenshots_new_browser(SUPPORTED_CURRENCIES)
+            # Use new browser instance, capturing all currencies concurrently
+            screenshot_paths = capture_multiple_screenshots_concurrent(SUPPORTED_CURRENCIES)
         
         if not screenshot_paths:
             logger.warning("No screenshots were captured")
@@ -74,6 +193,14 @@ def run_analysis(use_existing_chrome=False):  # 修改为默认不使用现有Ch
         
         logger.info(f"Captured {len(screenshot_paths)} screenshots: {screenshot_paths}")
         
+        # Convert and downscale the captured PNGs before they are stored and encoded
+        if SCREENSHOT_COMPRESSION:
+            screenshot_paths = compress_screenshots(screenshot_paths)
+        
+        # Drop visually identical captures so they are not analyzed twice
+        if SCREENSHOT_DEDUP:
+            screenshot_paths = deduplicate_screenshots(screenshot_paths)
+        
         # Group screenshots by currency
         screenshots_by_currency = {}
         for path in screenshot_paths:
@@ -110,20 +237,25 @@ def run_analysis(use_existing_chrome=False):  # 修改为默认不使用现有Ch
             # Get custom prompt from environment
             prompt = ANALYSIS_PROMPT_TEMPLATE
             
+            # Exact indicator values from exchange klines, so they don't have to be read off the charts
+            indicator_table = build_indicator_table(list(screenshots_by_currency.keys())) if INDICATORS_ENABLED else None
+            
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            response_filename = f'{timestamp}_comprehensive_analysis.txt'
+            response_path = os.path.join(REPORT_OUTPUT_DIR, response_filename)
+            
             # Send all screenshots and document to DeepSeek API for comprehensive analysis
             response = send_multiple_screenshots_to_deepseek(
                 screenshot_paths=all_screenshot_paths, 
                 document_content=document_content, 
                 currency="COMPREHENSIVE", 
-                prompt=prompt
+                prompt=prompt,
+                indicator_table=indicator_table,
+                report_path=response_path
             )
             logger.info("Comprehensive analysis response received from DeepSeek API")
             
             # Save response
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            response_filename = f'{timestamp}_comprehensive_analysis.txt'
-            response_path = os.path.join(REPORT_OUTPUT_DIR, response_filename)
-            
             saved_path = save_response(response, response_path)
             logger.info(f"Comprehensive analysis response saved to {saved_path}")
             
@@ -150,9 +282,11 @@ def run_analysis(use_existing_chrome=False):  # 修改为默认不使用现有Ch
         # Send error notification
         if lark_notifier:
             lark_notifier.send_text_message(f"❌ 币安期货分析任务失败: {str(e)}")
+    finally:
+        log_prompt_cache_report(logger=logger)
 
 
-def start_scheduler(use_existing_chrome=False):  # 修改为默认不使用现有Chrome
+def start_scheduler(use_existing_chrome=False, use_rest=False, use_rendered_charts=False):  # 修改为默认不使用现有Chrome
     """
     Start the scheduler to run the analysis daily
     """
@@ -165,7 +299,7 @@ def start_scheduler(use_existing_chrome=False):  # 修改为默认不使用现
     
     # Add job to scheduler
     scheduler.add_job(
-        lambda: run_analysis(use_existing_chrome),
+        lambda: run_analysis(use_existing_chrome, use_rest, use_rendered_charts),
         CronTrigger(hour=hour, minute=minute, timezone=TIMEZONE),
         id='binance_analysis_job',
         name='Binance Contract Analysis',
@@ -203,6 +337,18 @@ if __name__ == "__main__":
         dest="use_existing_chrome",
         help="Launch new browser instance instead of using existing Chrome (default behavior)"
     )
+    parser.add_argument(
+        "--rest",
+        action="store_true",
+        default=False,
+        help="Fetch market data from the Binance futures REST API instead of capturing screenshots"
+    )
+    parser.add_argument(
+        "--render-charts",
+        action="store_true",
+        default=False,
+        help="Render candlestick charts from REST klines instead of capturing browser screenshots"
+    )
     parser.add_argument(
         "--auto-start-chrome",
         action="store_true",
@@ -213,14 +359,13 @@ if __name__ == "__main__":
     args = parser.parse_args()
     
     # If auto-start-chrome is specified, start Chrome and then run analysis immediately
-    if args.auto_start_chrome:
+    if args.auto_start_chrome and not (args.rest or args.render_charts):
         from utils.screenshot import start_chrome_with_debugging_and_urls
         success = start_chrome_with_debugging_and_urls()
         if success:
             logger = logging.getLogger('binance_scheduler')
-            logger.info("Chrome started with debugging, waiting 10 seconds before running analysis...")
-            import time
-            time.sleep(10)  # Wait for pages to load
+            logger.info("Chrome started with debugging, waiting for DevTools endpoint before running analysis...")
+            wait_for_cdp_ready()
             
             # Run analysis immediately instead of starting scheduler
             logger.info("Running analysis immediately...")
@@ -229,4 +374,4 @@ if __name__ == "__main__":
             logger = logging.getLogger('binance_scheduler')
             logger.error("Failed to start Chrome with debugging, exiting...")
     else:
-        start_scheduler(use_existing_chrome=args.use_existing_chrome)
+        start_scheduler(use_existing_chrome=args.use_existing_chrome, use_rest=args.rest, use_rendered_charts=args.render_charts)
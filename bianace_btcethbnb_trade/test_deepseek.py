@@ -14,6 +14,7 @@ project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 from utils.deepseek_client import send_multiple_screenshots_to_deepseek, encode_image_to_base64, save_response
+from utils.response_cache import bypass_response_cache
 from utils.document_reader import read_document
 from config.settings import TRADE_RULE_DOCX_PATH, ANALYSIS_PROMPT_TEMPLATE, REPORT_OUTPUT_DIR
 import glob
@@ -35,7 +36,7 @@ def find_latest_screenshots(date_str=None):
     # 查找所有截图文件
     screenshot_paths = []
     for file_path in glob.glob(search_pattern):
-        if file_path.lower().endswith(('.png', '.jpg', '.jpeg')):
+        if file_path.lower().endswith(('.png', '.jpg', '.jpeg', '.webp')):
             screenshot_paths.append(file_path)
     
     # 按修改时间排序，获取最新的
@@ -152,7 +153,7 @@ def test_image_encoding():
     
     screenshot_paths = []
     for file_path in glob.glob(search_pattern):
-        if file_path.lower().endswith(('.png', '.jpg', '.jpeg')):
+        if file_path.lower().endswith(('.png', '.jpg', '.jpeg', '.webp')):
             screenshot_paths.append(file_path)
     
     if screenshot_paths:
@@ -171,6 +172,10 @@ if __name__ == "__main__":
     print("DeepSeek API 测试工具")
     print("=" * 60)
     
+    # --no-cache: 不使用缓存的响应，重新请求 DeepSeek
+    if "--no-cache" in sys.argv[1:]:
+        bypass_response_cache()
+    
     # 运行图像编码测试
     test_image_encoding()
     
@@ -0,0 +1,18 @@
+import sys
+import types
+
+
+def stub_playwright():
+    """
+    Register empty playwright modules when Playwright isn't installed, so the capture modules can
+    be imported. The tests replace every browser call with fakes.
+    """
+    try:
+        import playwright.sync_api
+        import playwright.async_api
+    except ImportError:
+        sys.modules['playwright'] = types.ModuleType('playwright')
+        for name, attr in (('playwright.sync_api', 'sync_playwright'), ('playwright.async_api', 'async_playwright')):
+            module = types.ModuleType(name)
+            setattr(module, attr, None)
+            sys.modules[name] = module
@@ -0,0 +1,170 @@
+import threading
+import unittest
+from unittest import mock
+
+from tests import stub_playwright
+
+# The pool is tested with fake pages, so Playwright doesn't have to be installed
+stub_playwright()
+
+from utils import browser_pool
+from utils.browser_pool import BrowserPool, BrowserPoolServer, ping_browser_pool, request_pool_capture
+
+
+class FakePage:
+    def __init__(self, url='about:blank'):
+        self.url = url
+        self.closed = False
+        self.shots = []
+
+    def is_closed(self):
+        return self.closed
+
+    def goto(self, url, timeout=None):
+        self.url = url
+
+    def bring_to_front(self):
+        pass
+
+    def screenshot(self, path, full_page=False, timeout=None):
+        self.shots.append(path)
+
+
+class FakeContext:
+    def __init__(self, pages=()):
+        self.pages = list(pages)
+
+    def new_page(self):
+        page = FakePage()
+        self.pages.append(page)
+        return page
+
+
+class FakeBrowser:
+    def __init__(self, context):
+        self.contexts = [context]
+
+    def is_connected(self):
+        return True
+
+
+class BrowserPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.btc = FakePage('https://www.binance.com/en/futures/BTCUSDT')
+        self.context = FakeContext([self.btc])
+        self.pool = BrowserPool(['BTCUSDT', 'ETHUSDT'])
+        self.pool.browser = FakeBrowser(self.context)
+        self.pool.context = self.context
+        self.installed = []
+        self.removed = []
+
+        def install(page):
+            blocker = object()
+            self.installed.append(blocker)
+            return blocker
+
+        def remove(blocker):
+            if blocker is not None:
+                self.removed.append(blocker)
+
+        for name, value in (('install_resource_blocker', install), ('remove_resource_blocker', remove),
+                            ('finish_capture', mock.Mock()), ('CAPTURE_TIMEFRAMES', False),
+                            ('build_screenshot_path', lambda currency, date_dir: f"/tmp/{currency}.png")):
+            patcher = mock.patch.object(browser_pool, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_ensure_tabs_reuses_open_tabs_and_opens_missing_ones(self):
+        self.pool.ensure_tabs()
+        self.assertIs(self.pool.pages['BTCUSDT'], self.btc)
+        self.assertEqual(self.pool.pages['ETHUSDT'].url, 'https://www.binance.com/en/futures/ETHUSDT')
+        self.assertEqual(len(self.context.pages), 2)
+        self.assertEqual(len(self.installed), 2)
+
+        # Live tabs are left alone
+        self.pool.ensure_tabs()
+        self.assertEqual(len(self.installed), 2)
+        self.assertEqual(self.removed, [])
+
+    def test_failed_capture_replaces_the_blocker_instead_of_stacking_it(self):
+        self.pool.ensure_tabs()
+        first_blocker = self.pool.blockers['BTCUSDT']
+
+        def ready(page, label=None):
+            if label == 'BTCUSDT':
+                raise RuntimeError('page crashed')
+
+        with mock.patch.object(browser_pool, 'wait_for_page_ready', ready), \
+                self.assertLogs('binance_browser_pool', level='ERROR'):
+            self.assertEqual(self.pool.capture(), ['/tmp/ETHUSDT.png'])
+        self.assertNotIn('BTCUSDT', self.pool.pages)
+        self.assertNotIn('BTCUSDT', self.pool.blockers)
+        self.assertEqual(self.removed, [first_blocker])
+
+        with mock.patch.object(browser_pool, 'wait_for_page_ready', mock.Mock()):
+            self.assertEqual(self.pool.capture(['BTCUSDT']), ['/tmp/BTCUSDT.png'])
+        # The same tab is found again by its URL and gets exactly one new blocker
+        self.assertIs(self.pool.pages['BTCUSDT'], self.btc)
+        self.assertEqual(self.btc.shots, ['/tmp/BTCUSDT.png'])
+        self.assertEqual(len(self.installed), 3)
+        self.assertEqual(self.removed, [first_blocker])
+
+
+class FakePool:
+    def __init__(self, result):
+        self.result = result
+        self.requests = []
+
+    def capture(self, currencies=None):
+        self.requests.append(currencies)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+    def ensure_tabs(self):
+        pass
+
+
+class PoolRequestHandlerTest(unittest.TestCase):
+
+    def serve(self, pool):
+        server = BrowserPoolServer(pool, '127.0.0.1', 0)
+        thread = threading.Thread(target=server.serve_until_shutdown, daemon=True)
+        thread.start()
+        port = server.server_address[1]
+
+        def stop():
+            browser_pool._send_request({'action': 'shutdown'}, '127.0.0.1', port, timeout=5)
+            thread.join(5)
+            server.server_close()
+
+        self.addCleanup(stop)
+        return port
+
+    def test_ping_and_capture(self):
+        pool = FakePool(['/tmp/BTCUSDT.png'])
+        port = self.serve(pool)
+        self.assertTrue(ping_browser_pool('127.0.0.1', port))
+        self.assertEqual(request_pool_capture(['BTCUSDT'], '127.0.0.1', port, timeout=5), ['/tmp/BTCUSDT.png'])
+        self.assertEqual(pool.requests, [['BTCUSDT']])
+
+    def test_errors_are_reported_to_the_client(self):
+        port = self.serve(FakePool(RuntimeError('browser gone')))
+        with self.assertLogs('binance_browser_pool', level='ERROR') as logs:
+            self.assertIsNone(request_pool_capture(['BTCUSDT'], '127.0.0.1', port, timeout=5))
+        self.assertIn('browser gone', '\n'.join(logs.output))
+        response = browser_pool._send_request({'action': 'reload'}, '127.0.0.1', port, timeout=5)
+        self.assertEqual(response, {'status': 'error', 'message': 'Unknown action: reload'})
+
+    def test_unavailable_pool(self):
+        server = BrowserPoolServer(FakePool([]), '127.0.0.1', 0)
+        port = server.server_address[1]
+        server.server_close()
+        self.assertFalse(ping_browser_pool('127.0.0.1', port))
+        with self.assertLogs('binance_browser_pool', level='WARNING'):
+            self.assertIsNone(request_pool_capture(['BTCUSDT'], '127.0.0.1', port, timeout=5))
+
+
+if __name__ == '__main__':
+    unittest.main()
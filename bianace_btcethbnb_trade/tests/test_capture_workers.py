@@ -0,0 +1,84 @@
+import os
+import time
+import unittest
+from unittest import mock
+
+from tests import stub_playwright
+
+# The supervisor is tested with fake workers, so Playwright doesn't have to be installed
+stub_playwright()
+
+from utils import capture_workers
+from utils.capture_workers import capture_in_workers, capture_paths
+
+
+def fake_worker_main(conn, profile_dir=None):
+    """
+    Worker that answers jobs without a browser: HANG never answers and CRASH exits
+    """
+    if hasattr(os, 'setpgrp'):
+        os.setpgrp()
+    while True:
+        job = conn.recv()
+        if job is None:
+            return
+        # Every job carries the worker's own budget, which ends before the supervisor's deadline
+        assert 0 < job['budget_s'] < 30
+        if job['currency'] == 'HANG':
+            time.sleep(60)
+        if job['currency'] == 'CRASH':
+            os._exit(3)
+        conn.send({
+            'currency': job['currency'],
+            'status': 'ok',
+            'paths': [f"{job['currency']}.png"],
+            'error': None,
+            'elapsed_s': 0.0,
+            'worker_pid': os.getpid(),
+            'profile_dir': profile_dir
+        })
+
+
+class CaptureInWorkersTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(capture_workers, '_worker_main', fake_worker_main)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def capture(self, currencies, **kwargs):
+        with self.assertLogs('binance_trade_analyzer', level='INFO') as logs:
+            records = capture_in_workers(currencies, max_rss_mb=1e9, **kwargs)
+        return records, logs.output
+
+    def test_hung_and_crashed_workers_are_replaced(self):
+        start = time.monotonic()
+        records, _ = self.capture(['HANG', 'BTCUSDT', 'CRASH', 'ETHUSDT'], workers=2, job_timeout_s=2, max_captures=10)
+        self.assertLess(time.monotonic() - start, 30)
+        self.assertEqual([record['status'] for record in records], ['timeout', 'ok', 'crashed', 'ok'])
+        self.assertEqual(capture_paths(records), ['BTCUSDT.png', 'ETHUSDT.png'])
+        self.assertIn('code 3', records[2]['error'])
+
+    def test_workers_are_recycled_after_max_captures(self):
+        records, logs = self.capture(['BTCUSDT', 'ETHUSDT', 'BNBUSDT'], workers=1, job_timeout_s=30, max_captures=1)
+        self.assertEqual([record['status'] for record in records], ['ok'] * 3)
+        self.assertEqual(len({record['worker_pid'] for record in records}), 3)
+        self.assertEqual(sum('Recycling capture worker' in line for line in logs), 3)
+
+    def test_run_budget_caps_job_deadlines(self):
+        start = time.monotonic()
+        records, _ = self.capture(['HANG', 'BTCUSDT'], workers=1, job_timeout_s=30, max_captures=10, run_budget_s=2)
+        self.assertLess(time.monotonic() - start, 15)
+        self.assertEqual([record['status'] for record in records], ['timeout', 'skipped'])
+        self.assertLessEqual(records[0]['elapsed_s'], 2)
+
+    def test_each_worker_slot_gets_its_own_profile(self):
+        with mock.patch.object(capture_workers, 'BROWSER_PERSISTENT_PROFILE', True), \
+                mock.patch.object(capture_workers, 'get_profile_dir', return_value='profile'):
+            records, _ = self.capture(['BTCUSDT', 'ETHUSDT', 'BNBUSDT'], workers=2, job_timeout_s=30, max_captures=1)
+        profiles = [record['profile_dir'] for record in records]
+        self.assertEqual(set(profiles), {os.path.join('profile', 'worker-1'), os.path.join('profile', 'worker-2')})
+        self.assertNotEqual(profiles[0], profiles[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
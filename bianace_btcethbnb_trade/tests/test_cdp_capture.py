@@ -0,0 +1,87 @@
+import os
+import types
+import asyncio
+import tempfile
+import unittest
+from unittest import mock
+
+from tests import stub_playwright
+
+# The tab capture only needs page-like objects, so Playwright doesn't have to be installed
+stub_playwright()
+
+from utils import cdp_capture
+from utils.cdp_client import currency_for_url
+
+
+class FakePage:
+    def __init__(self, url, symbol_text=''):
+        self.url = url
+        self.symbol_text = symbol_text
+
+    async def evaluate(self, script, arg=None):
+        return self.symbol_text
+
+
+class FakePlaywright:
+    def __init__(self, pages):
+        context = types.SimpleNamespace(pages=pages)
+        browser = types.SimpleNamespace(contexts=[context])
+
+        async def connect_over_cdp(url):
+            return browser
+
+        self.chromium = types.SimpleNamespace(connect_over_cdp=connect_over_cdp)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class CurrencyForUrlTest(unittest.TestCase):
+    def test_url_symbol_text_and_generic_tabs(self):
+        self.assertEqual(currency_for_url('https://www.binance.com/en/futures/ETHUSDT', 0), 'ETHUSDT')
+        self.assertEqual(currency_for_url('https://www.binance.com/en/futures', 1, 'BNBUSDT Perpetual'), 'BNBUSDT')
+        self.assertEqual(currency_for_url('https://www.binance.com/en/futures', 1, ''), 'UNKNOWN')
+        self.assertEqual(currency_for_url('https://example.com/', 2), 'TAB_3')
+
+
+class CaptureTabsParallelTest(unittest.TestCase):
+    def setUp(self):
+        self.pages = [
+            FakePage('https://www.binance.com/en/futures/BTCUSDT'),
+            FakePage('https://www.binance.com/en/futures', 'ETHUSDT Perpetual'),
+            FakePage('https://example.com/'),
+            FakePage('https://www.binance.com/en/futures/BTCUSDT'),
+        ]
+        self.captured = []
+
+        async def capture_tab(context, page, currency, path, label, max_wait_ms=None):
+            self.captured.append(currency)
+            return 0.0
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        cwd = os.getcwd()
+        os.chdir(tmp.name)
+        self.addCleanup(os.chdir, cwd)
+        for target, value in (('async_playwright', lambda: FakePlaywright(self.pages)), ('_capture_tab', capture_tab)):
+            patcher = mock.patch.object(cdp_capture, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_captures_every_tab_by_default(self):
+        paths = asyncio.run(cdp_capture.capture_tabs_parallel_async())
+        self.assertEqual(self.captured, ['BTCUSDT', 'ETHUSDT', 'TAB_3', 'BTCUSDT'])
+        self.assertEqual([os.path.basename(os.path.dirname(path)) for path in paths], self.captured)
+
+    def test_currencies_take_the_first_tab_of_each(self):
+        paths = asyncio.run(cdp_capture.capture_tabs_parallel_async(currencies=['BTCUSDT', 'ETHUSDT', 'SOLUSDT']))
+        self.assertEqual(self.captured, ['BTCUSDT', 'ETHUSDT'])
+        self.assertIn('_tab_1_BTCUSDT_', paths[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import base64
+import tempfile
+import unittest
+from unittest import mock
+
+from utils import cdp_client
+from utils.cdp_client import TAB_READY_EXPRESSION, capture_client, wait_for_target_ready
+
+
+class FakeClient:
+    """
+    CDPClient stand-in for a tab with a chart canvas in the main frame and in one child frame
+    """
+
+    def __init__(self, loaded=True, chart=True):
+        self.loaded = loaded
+        self.chart = chart
+        self.sampled_contexts = []
+        self.screenshots = 0
+
+    def send(self, method, params=None):
+        if method == 'Page.getFrameTree':
+            return {'frameTree': {'frame': {'id': 'main'}, 'childFrames': [{'frame': {'id': 'chart'}}]}}
+        if method == 'Page.createIsolatedWorld':
+            return {'executionContextId': {'main': 1, 'chart': 2}[params['frameId']]}
+        if method == 'Page.captureScreenshot':
+            self.screenshots += 1
+            return {'data': base64.b64encode(b'png').decode()}
+        return {}
+
+    def evaluate(self, expression, context_id=None):
+        if expression == TAB_READY_EXPRESSION:
+            return self.loaded
+        if 'querySelectorAll(selector)' in expression:
+            return {'chart': self.chart, 'price': True, 'orderbook': True}
+        self.sampled_contexts.append(context_id)
+        return [[128] * 1024]
+
+    def capture_screenshot(self, path):
+        return cdp_client.CDPClient.capture_screenshot(self, path)
+
+
+class DirectReadinessTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(cdp_client, 'READINESS_SAMPLE_INTERVAL_MS', 1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'tab.png')
+
+    def test_waits_for_stable_canvases_in_every_frame(self):
+        client = FakeClient()
+        with self.assertLogs('binance_trade_analyzer', level='INFO'):
+            result = wait_for_target_ready(client, max_wait_ms=5000, label='BTCUSDT')
+        self.assertTrue(result['ready'])
+        self.assertTrue(result['network_idle'])
+        self.assertEqual(set(client.sampled_contexts), {1, 2})
+
+    def test_captures_a_ready_tab(self):
+        client = FakeClient()
+        with self.assertLogs('binance_trade_analyzer', level='INFO'):
+            self.assertEqual(capture_client(client, self.path, max_wait_ms=5000), self.path)
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), b'png')
+
+    def test_skips_tabs_that_are_loading_or_show_no_chart(self):
+        loading = FakeClient(loaded=False)
+        self.assertIsNone(capture_client(loading, self.path))
+        self.assertEqual(loading.sampled_contexts, [])
+
+        no_chart = FakeClient(chart=False)
+        with self.assertLogs('binance_trade_analyzer', level='INFO'):
+            self.assertIsNone(capture_client(no_chart, self.path, max_wait_ms=50))
+        self.assertEqual(no_chart.screenshots, 0)
+
+    def test_chartless_tabs_are_captured_when_not_required(self):
+        client = FakeClient(chart=False)
+        with self.assertLogs('binance_trade_analyzer', level='INFO'):
+            self.assertEqual(capture_client(client, self.path, require_ready=False, max_wait_ms=50), self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from PIL import Image
+
+from utils import chart_renderer
+from utils.chart_renderer import render_candlestick_chart, render_charts
+
+
+def hourly_klines(count, seed=0):
+    rng = np.random.default_rng(seed)
+    closes = 60000 + np.cumsum(rng.normal(0, 100, count))
+    opens = np.r_[closes[0], closes[:-1]]
+    return [[1760000000000 + i * 3600000, o, max(o, c) + 50, min(o, c) - 50, c, 1000.0 + i]
+            for i, (o, c) in enumerate(zip(opens, closes))]
+
+
+class RenderCandlestickChartTest(unittest.TestCase):
+
+    def test_png_size_and_mode(self):
+        png = render_candlestick_chart(hourly_klines(150), 'BTCUSDT 1h', width=640, height=400, bars=100)
+        with Image.open(io.BytesIO(png)) as image:
+            self.assertEqual(image.format, 'PNG')
+            self.assertEqual(image.size, (640, 400))
+            self.assertEqual(image.mode, 'RGB')
+
+    def test_only_the_last_bars_are_drawn(self):
+        klines = hourly_klines(150)
+        # Widen the wicks of the first kline; its close, which the indicators use, stays the same
+        widened = [list(row) for row in klines]
+        widened[0][2] += 5000
+        widened[0][3] -= 5000
+        self.assertEqual(render_candlestick_chart(klines, width=640, height=400, bars=100),
+                         render_candlestick_chart(widened, width=640, height=400, bars=100))
+        self.assertNotEqual(render_candlestick_chart(klines, width=640, height=400, bars=150),
+                            render_candlestick_chart(widened, width=640, height=400, bars=150))
+
+    def test_fewer_klines_than_bars(self):
+        png = render_candlestick_chart(hourly_klines(30), width=320, height=200, bars=100)
+        with Image.open(io.BytesIO(png)) as image:
+            self.assertEqual(image.size, (320, 200))
+
+
+class RenderChartsTest(unittest.TestCase):
+
+    def test_charts_are_written_per_date_and_currency(self):
+        snapshots = {
+            'BTCUSDT': {'klines': {'1h': hourly_klines(60), '4h': hourly_klines(60, 1)}},
+            'ETHUSDT': {'klines': {'1h': hourly_klines(60, 2)}}
+        }
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.object(chart_renderer, 'SCREENSHOT_OUTPUT_DIR', tmp), \
+                self.assertLogs('binance_trade_analyzer', level='INFO'):
+            paths = render_charts(snapshots, timeframes=['1h', '4h'], max_workers=2, date_dir='2026-10-17')
+            self.assertEqual([os.path.relpath(os.path.dirname(path), tmp) for path in paths],
+                             [os.path.join('2026-10-17', 'BTCUSDT')] * 2 + [os.path.join('2026-10-17', 'ETHUSDT')])
+            self.assertEqual([os.path.basename(path).split('_', 2)[2] for path in paths],
+                             ['BTCUSDT_1h_chart.png', 'BTCUSDT_4h_chart.png', 'ETHUSDT_1h_chart.png'])
+            for path in paths:
+                with Image.open(path) as image:
+                    self.assertEqual(image.format, 'PNG')
+
+    def test_no_klines(self):
+        self.assertEqual(render_charts({'BTCUSDT': {'klines': {}}}, timeframes=['1h']), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from unittest import mock
+
+from utils import deadline as deadline_module
+from utils.deadline import Deadline, BudgetExceeded, stage_timeout_ms
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class DeadlineTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(deadline_module, 'time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_child_never_outlasts_its_parent(self):
+        run = Deadline(100, label='run')
+        symbol = run.child(180, label='BTCUSDT')
+        self.assertEqual(symbol.remaining_s(), 100)
+        self.clock.now += 30
+        self.assertEqual(run.child(20).remaining_s(), 20)
+        self.clock.now += 70
+        self.assertTrue(symbol.expired())
+        self.assertEqual(Deadline(None).remaining_s(), float('inf'))
+
+    def test_stage_timeouts_shrink_to_the_time_left(self):
+        deadline = Deadline(10, label='BTCUSDT')
+        self.assertEqual(deadline.stage_timeout_ms('goto', 5000), 5000)
+        self.clock.now += 8
+        self.assertEqual(deadline.stage_timeout_ms('screenshot', 5000), 2000)
+        self.assertEqual(deadline.report()['clipped_stages'], ['screenshot'])
+
+        self.clock.now += 2
+        with self.assertRaises(BudgetExceeded):
+            deadline.stage_timeout_ms('regions', 5000)
+        report = deadline.report()
+        self.assertTrue(report['expired'])
+        self.assertEqual(report['timed_out_stages'], ['regions'])
+
+    def test_sleep_stops_at_the_deadline(self):
+        deadline = Deadline(3)
+        self.assertTrue(deadline.sleep(1))
+        self.assertFalse(deadline.sleep(5))
+        self.assertEqual(self.clock.now, 1003.0)
+
+    def test_stage_timeout_without_deadline_is_the_default(self):
+        self.assertEqual(stage_timeout_ms(None, 'regions', 30000), 30000)
+        deadline = Deadline(1)
+        self.assertEqual(stage_timeout_ms(deadline, 'regions', 30000), 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
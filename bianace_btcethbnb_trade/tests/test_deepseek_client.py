@@ -0,0 +1,114 @@
+import json
+import types
+import unittest
+import requests
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from unittest import mock
+
+from utils import deepseek_client
+from utils.deepseek_client import DeepSeekClient, parse_retry_after
+
+
+class ParseRetryAfterTest(unittest.TestCase):
+    def test_seconds(self):
+        self.assertEqual(parse_retry_after('7'), 7.0)
+        self.assertEqual(parse_retry_after('1.5'), 1.5)
+        self.assertEqual(parse_retry_after('-3'), 0.0)
+
+    def test_http_date(self):
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+        self.assertAlmostEqual(parse_retry_after(format_datetime(retry_at, usegmt=True)), 30, delta=2)
+        past = datetime.now(timezone.utc) - timedelta(minutes=5)
+        self.assertEqual(parse_retry_after(format_datetime(past, usegmt=True)), 0.0)
+
+    def test_missing_or_invalid(self):
+        for value in (None, '', 'soon', 'Mon, 99 Foo 2024'):
+            self.assertIsNone(parse_retry_after(value))
+
+
+class RetryDelayTest(unittest.TestCase):
+    def setUp(self):
+        self.client = DeepSeekClient(api_key='test')
+        self.addCleanup(self.client.close)
+
+    def response(self, retry_after=None):
+        return types.SimpleNamespace(headers={'Retry-After': retry_after} if retry_after is not None else {})
+
+    def test_retry_after_is_used_up_to_the_backoff_cap(self):
+        self.assertEqual(self.client.retry_delay(0, self.response('4')), 4.0)
+        with mock.patch.object(deepseek_client, 'DEEPSEEK_BACKOFF_MAX_S', 10):
+            self.assertEqual(self.client.retry_delay(0, self.response('120')), 10)
+
+    def test_backoff_without_retry_after_is_jittered_and_capped(self):
+        with mock.patch.object(deepseek_client, 'DEEPSEEK_BACKOFF_BASE_S', 1), \
+                mock.patch.object(deepseek_client, 'DEEPSEEK_BACKOFF_MAX_S', 10):
+            for attempt in range(8):
+                delay = self.client.retry_delay(attempt, self.response())
+                self.assertGreaterEqual(delay, 0)
+                self.assertLessEqual(delay, min(10, 2 ** attempt))
+
+
+class FakeStreamResponse:
+    def __init__(self, lines, error=None):
+        self.lines = lines
+        self.error = error
+        self.closed = False
+
+    def iter_lines(self):
+        yield from self.lines
+        if self.error:
+            raise self.error
+
+    def close(self):
+        self.closed = True
+
+
+def sse(chunk):
+    return b'data: ' + json.dumps(chunk).encode('utf-8')
+
+
+def delta(content, finish_reason=None):
+    return sse({'choices': [{'delta': {'content': content}, 'finish_reason': finish_reason}]})
+
+
+class ReadStreamTest(unittest.TestCase):
+    def setUp(self):
+        self.client = DeepSeekClient(api_key='test')
+        self.addCleanup(self.client.close)
+
+    def test_assembles_chunks_into_a_completion(self):
+        usage = {'prompt_tokens': 10, 'completion_tokens': 3, 'total_tokens': 13}
+        response = FakeStreamResponse([
+            b': keep-alive', b'', delta('Long '), b'', delta(''), delta('BTC', 'stop'),
+            sse({'choices': [], 'usage': usage}), b'data: [DONE]', delta('ignored')
+        ])
+        received = []
+        with self.assertLogs('binance_trade_analyzer', level='INFO'):
+            result = self.client.read_stream(response, received.append)
+
+        self.assertEqual(received, ['Long ', 'BTC'])
+        self.assertEqual(result['choices'][0]['message'], {'role': 'assistant', 'content': 'Long BTC'})
+        self.assertEqual(result['choices'][0]['finish_reason'], 'stop')
+        self.assertEqual(result['usage'], usage)
+        self.assertIsNotNone(result['metrics']['time_to_first_token_s'])
+        self.assertTrue(response.closed)
+
+    def test_interruption_before_any_content_is_retryable(self):
+        response = FakeStreamResponse([b': keep-alive'], requests.exceptions.ChunkedEncodingError('reset'))
+        with self.assertRaises(requests.exceptions.RequestException):
+            self.client.read_stream(response)
+        self.assertTrue(response.closed)
+
+    def test_interruption_after_content_is_not_retried(self):
+        response = FakeStreamResponse([delta('Short ETH')], requests.exceptions.ConnectionError('reset'))
+        with self.assertLogs('binance_trade_analyzer', level='INFO'):
+            with self.assertRaises(Exception) as raised:
+                self.client.read_stream(response)
+        self.assertNotIsInstance(raised.exception, requests.exceptions.RequestException)
+        self.assertIn('after 9 characters', str(raised.exception))
+        self.assertTrue(response.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+from utils.dom_extractor import _to_number, format_market_snapshot, parse_market_snapshot
+
+
+class ToNumberTest(unittest.TestCase):
+
+    def test_displayed_numbers(self):
+        self.assertEqual(_to_number('96,123.4'), 96123.4)
+        self.assertEqual(_to_number('-0.0050%'), -0.005)
+        self.assertEqual(_to_number('0.0100%'), 0.01)
+        self.assertEqual(_to_number('612'), 612.0)
+
+    def test_suffixes(self):
+        self.assertEqual(_to_number('1.23B'), 1.23e9)
+        self.assertEqual(_to_number('45.6M'), 45.6e6)
+        self.assertEqual(_to_number('7K'), 7000.0)
+        self.assertEqual(_to_number('12.5 M'), 12.5e6)
+
+    def test_unparseable(self):
+        self.assertIsNone(_to_number(None))
+        self.assertIsNone(_to_number(''))
+        self.assertIsNone(_to_number('--'))
+
+
+class ParseMarketSnapshotTest(unittest.TestCase):
+
+    def raw(self, **values):
+        raw = {
+            'title': '', 'last_price': '96,123.4', 'mark_price': '96,120.0', 'index_price': '96,118.9',
+            'funding': '0.0100%/07:45:12', 'high_24h': '97,000.0', 'low_24h': '94,500.5',
+            'volume_24h_base': '123,456.789', 'volume_24h_quote': '11.87B', 'asks': [], 'bids': []
+        }
+        raw.update(values)
+        return raw
+
+    def test_ticker_values(self):
+        snapshot = parse_market_snapshot(self.raw(), 'BTCUSDT', levels=5)
+        self.assertEqual(snapshot['currency'], 'BTCUSDT')
+        self.assertEqual(snapshot['last_price'], 96123.4)
+        self.assertEqual(snapshot['mark_price'], 96120.0)
+        self.assertEqual(snapshot['index_price'], 96118.9)
+        self.assertEqual(snapshot['high_24h'], 97000.0)
+        self.assertEqual(snapshot['low_24h'], 94500.5)
+        self.assertEqual(snapshot['volume_24h_base'], 123456.789)
+        self.assertEqual(snapshot['volume_24h_quote'], 11.87e9)
+
+    def test_last_price_falls_back_to_the_title(self):
+        raw = self.raw(last_price=None, title='96,200.1 | BTCUSDT USDⓈ-M Perpetual | Binance Futures')
+        self.assertEqual(parse_market_snapshot(raw, 'BTCUSDT')['last_price'], 96200.1)
+        self.assertIsNone(parse_market_snapshot(self.raw(last_price='', title=''), 'BTCUSDT')['last_price'])
+
+    def test_funding_rate_and_countdown_are_split(self):
+        snapshot = parse_market_snapshot(self.raw(funding='-0.0032% / 01:02:03'), 'BTCUSDT')
+        self.assertEqual(snapshot['funding_rate_pct'], -0.0032)
+        self.assertEqual(snapshot['funding_countdown'], '01:02:03')
+
+        # The 'Funding Rate' label carries the rate only
+        snapshot = parse_market_snapshot(self.raw(funding='0.0100%'), 'BTCUSDT')
+        self.assertEqual(snapshot['funding_rate_pct'], 0.01)
+        self.assertIsNone(snapshot['funding_countdown'])
+
+        snapshot = parse_market_snapshot(self.raw(funding=None), 'BTCUSDT')
+        self.assertIsNone(snapshot['funding_rate_pct'])
+        self.assertIsNone(snapshot['funding_countdown'])
+
+    def test_order_book_is_sorted_and_truncated(self):
+        asks = [['96,125.0', '1.5'], ['96,123.5', '0.2'], ['96,124.0', '3'], ['--', '1'], ['96,130.0', '2K']]
+        bids = [['96,120.0', '0.8'], ['96,123.0', '1.1'], ['96,121.5', '4']]
+        snapshot = parse_market_snapshot(self.raw(asks=asks, bids=bids), 'BTCUSDT', levels=3)
+        self.assertEqual(snapshot['asks'], [[96123.5, 0.2], [96124.0, 3.0], [96125.0, 1.5]])
+        self.assertEqual(snapshot['bids'], [[96123.0, 1.1], [96121.5, 4.0], [96120.0, 0.8]])
+
+    def test_formatted_line_leaves_out_missing_values(self):
+        snapshot = parse_market_snapshot(self.raw(mark_price=None, asks=[['96,125.0', '1.5']]), 'BTCUSDT')
+        line = format_market_snapshot(snapshot)
+        self.assertTrue(line.startswith('BTCUSDT @ '))
+        self.assertIn('last=96123.4', line)
+        self.assertNotIn('mark=', line)
+        self.assertIn('asks=96125.0x1.5', line)
+        self.assertNotIn('bids=', line)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import json
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from utils.chart_renderer import render_candlestick_chart
+from utils.image_dedup import INDEX_FILENAME, deduplicate_screenshots
+
+
+def save_chart(path, seed):
+    rng = np.random.default_rng(seed)
+    pixels = (rng.random((64, 64)) * 255).astype(np.uint8)
+    Image.fromarray(pixels, 'L').resize((256, 256)).save(path)
+    return path
+
+
+def hourly_klines(count=120, seed=0):
+    rng = np.random.default_rng(seed)
+    closes = 60000 + np.cumsum(rng.normal(0, 100, count))
+    opens = np.r_[closes[0], closes[:-1]]
+    return [[i * 3600000, o, max(o, c) + 50, min(o, c) - 50, c, 1000.0] for i, (o, c) in enumerate(zip(opens, closes))]
+
+
+def move_last_close(klines, factor):
+    moved = [list(row) for row in klines]
+    last = moved[-1]
+    last[4] *= factor
+    last[2], last[3] = max(last[2], last[4]), min(last[3], last[4])
+    return moved
+
+
+class DeduplicateScreenshotsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.day_dir = os.path.join(self.tmp.name, 'screenshots', '2026-10-17')
+        self.currency_dir = os.path.join(self.day_dir, 'BTCUSDT')
+        os.makedirs(self.currency_dir)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def shot(self, name, seed):
+        return save_chart(os.path.join(self.currency_dir, name), seed)
+
+    def test_drops_duplicates_within_a_run(self):
+        first = self.shot('20261017_083000_BTCUSDT.png', 1)
+        repeat = self.shot('20261017_083100_BTCUSDT.png', 1)
+        other = self.shot('20261017_083200_BTCUSDT.png', 2)
+        self.assertEqual(deduplicate_screenshots([repeat, other, first], persist=False), [first, other])
+        self.assertFalse(os.path.exists(os.path.join(self.day_dir, INDEX_FILENAME)))
+
+    def chart(self, name, klines):
+        path = os.path.join(self.currency_dir, name)
+        with open(path, 'wb') as f:
+            f.write(render_candlestick_chart(klines, 'BTCUSDT 1h'))
+        return path
+
+    def test_keeps_charts_that_differ_only_in_the_last_candle(self):
+        klines = hourly_klines()
+        first = self.chart('20261017_080000_BTCUSDT.png', klines)
+        moved = self.chart('20261017_081500_BTCUSDT.png', move_last_close(klines, 1.001))
+        repeat = self.chart('20261017_083000_BTCUSDT.png', move_last_close(klines, 1.001))
+        self.assertEqual(deduplicate_screenshots([first, moved, repeat], persist=False), [first, moved])
+
+    def test_compares_only_against_the_previous_capture(self):
+        first = self.shot('20261017_083000_BTCUSDT.png', 1)
+        other = self.shot('20261017_083100_BTCUSDT.png', 2)
+        back = self.shot('20261017_083200_BTCUSDT.png', 1)
+        self.assertEqual(deduplicate_screenshots([first, other, back], persist=False), [first, other, back])
+
+    def test_persisted_index_drops_a_repeat_of_the_last_run(self):
+        first = self.shot('20261017_083000_BTCUSDT.png', 1)
+        self.assertEqual(deduplicate_screenshots([first], persist=True), [first])
+        with open(os.path.join(self.day_dir, INDEX_FILENAME), encoding='utf-8') as f:
+            self.assertEqual([e['path'] for e in json.load(f)['BTCUSDT']], [first])
+
+        repeat = self.shot('20261017_120000_BTCUSDT.png', 1)
+        other = self.shot('20261017_120100_BTCUSDT.png', 3)
+        self.assertEqual(deduplicate_screenshots([repeat, other], persist=True), [other])
+        # Listing the day's files again keeps the screenshots that were indexed before
+        self.assertEqual(deduplicate_screenshots([first, repeat, other], persist=True), [first, other])
+
+    def test_deleted_screenshots_are_dropped_from_the_index(self):
+        first = self.shot('20261017_083000_BTCUSDT.png', 1)
+        deduplicate_screenshots([first], persist=True)
+        os.remove(first)
+        repeat = self.shot('20261017_120000_BTCUSDT.png', 1)
+        self.assertEqual(deduplicate_screenshots([repeat], persist=True), [repeat])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image, PngImagePlugin
+
+from utils.chart_renderer import render_candlestick_chart
+from utils.image_pipeline import compress_screenshot, compress_screenshots
+
+
+def save_photo_like(path, size=(400, 300)):
+    # Noisy pixels, where lossy encoding is clearly smaller than PNG
+    rng = np.random.default_rng(0)
+    pixels = (rng.random((size[1] // 4, size[0] // 4, 3)) * 255).astype(np.uint8)
+    info = PngImagePlugin.PngInfo()
+    info.add_text('Comment', 'captured by test')
+    Image.fromarray(pixels, 'RGB').resize(size, Image.BILINEAR).save(path, pnginfo=info)
+    return path
+
+
+class CompressScreenshotTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+    def test_converts_resizes_and_strips_metadata(self):
+        original = save_photo_like(self.path('shot.png'), (400, 300))
+        for image_format, extension, pil_format in (('webp', '.webp', 'WEBP'), ('jpeg', '.jpg', 'JPEG')):
+            result = compress_screenshot(original, image_format, quality=80, max_width=200, max_height=200,
+                                         keep_original=True)
+            self.assertEqual(result['path'], self.path('shot' + extension))
+            self.assertFalse(result['kept_original'])
+            self.assertGreater(result['saved_bytes'], 0)
+            with Image.open(result['path']) as image:
+                self.assertEqual(image.format, pil_format)
+                self.assertEqual(image.size, (200, 150))
+                self.assertNotIn('Comment', image.info)
+                self.assertNotIn('exif', image.info)
+
+    def test_original_is_removed_unless_kept(self):
+        original = save_photo_like(self.path('shot.png'))
+        compress_screenshot(original, 'webp', quality=80, keep_original=True)
+        self.assertTrue(os.path.exists(original))
+        result = compress_screenshot(original, 'webp', quality=80, keep_original=False)
+        self.assertFalse(os.path.exists(original))
+        self.assertTrue(os.path.exists(result['path']))
+
+    def test_flat_charts_fall_back_to_lossless_webp(self):
+        klines = [[i * 3600000, 100 + i % 7, 104 + i % 7, 97 + i % 7, 101 + i % 5, 10.0] for i in range(120)]
+        original = self.path('chart.png')
+        with open(original, 'wb') as f:
+            f.write(render_candlestick_chart(klines, 'BTCUSDT 1h', width=800, height=500))
+        result = compress_screenshot(original, 'webp', quality=80, max_width=1600, max_height=1600,
+                                     keep_original=True)
+        self.assertLess(result['compressed_bytes'], result['original_bytes'])
+        with Image.open(result['path']) as image, Image.open(original) as source:
+            self.assertEqual(np.asarray(image.convert('RGB')).tolist(), np.asarray(source.convert('RGB')).tolist())
+
+    def test_original_is_kept_when_compression_does_not_help(self):
+        original = self.path('tiny.png')
+        Image.new('RGB', (64, 64), (22, 26, 30)).save(original, optimize=True)
+        with self.assertLogs('binance_trade_analyzer', level='WARNING'):
+            paths = compress_screenshots([original], image_format='jpeg', quality=95, keep_original=False)
+        self.assertEqual(paths, [original])
+        self.assertTrue(os.path.exists(original))
+        self.assertFalse(os.path.exists(self.path('tiny.jpg')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import math
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from utils import indicators
+from utils.indicators import atr, build_indicator_tables, compute_indicators, ema, macd, rsi, stack_klines
+
+
+def reference_ema(values, period, alpha=None):
+    alpha = 2.0 / (period + 1) if alpha is None else alpha
+    out = [math.nan] * len(values)
+    if len(values) < period:
+        return out
+    current = sum(values[:period]) / period
+    out[period - 1] = current
+    for t in range(period, len(values)):
+        current += alpha * (values[t] - current)
+        out[t] = current
+    return out
+
+
+def reference_rsi(closes, period):
+    gains = [max(b - a, 0.0) for a, b in zip(closes, closes[1:])]
+    losses = [max(a - b, 0.0) for a, b in zip(closes, closes[1:])]
+    avg_gain = reference_ema(gains, period, 1.0 / period)[-1]
+    avg_loss = reference_ema(losses, period, 1.0 / period)[-1]
+    return 100.0 if avg_loss == 0 else 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+def make_klines(closes, start_ms=1760000000000, step_ms=3600000):
+    return [[start_ms + i * step_ms, c, c + 1.0, c - 1.5, c, 10.0] for i, c in enumerate(closes)]
+
+
+def wave(n, phase=0.0):
+    return [100.0 + 5.0 * math.sin(i / 4.0 + phase) + 0.1 * i for i in range(n)]
+
+
+class IndicatorMathTest(unittest.TestCase):
+
+    def setUp(self):
+        self.closes = np.array([wave(80), wave(80, 1.0)])
+
+    def test_ema_matches_reference(self):
+        result = ema(self.closes, 21)
+        for row, values in zip(result, self.closes):
+            expected = reference_ema(list(values), 21)
+            self.assertTrue(np.all(np.isnan(row[:20])))
+            np.testing.assert_allclose(row[20:], expected[20:])
+
+    def test_macd_histogram_is_line_minus_signal(self):
+        line, signal, histogram = macd(self.closes)
+        np.testing.assert_allclose(line[:, 25:], (ema(self.closes, 12) - ema(self.closes, 26))[:, 25:])
+        self.assertTrue(np.all(np.isnan(signal[:, :33])))
+        self.assertFalse(np.isnan(signal[:, 33]).any())
+        np.testing.assert_allclose(histogram[:, 33:], (line - signal)[:, 33:])
+
+    def test_rsi_matches_wilder_reference(self):
+        result = rsi(self.closes, 14)
+        for row, values in zip(result, self.closes):
+            self.assertAlmostEqual(row[-1], reference_rsi(list(values), 14))
+        rising = np.arange(30, dtype=np.float64).reshape(1, -1)
+        self.assertEqual(rsi(rising, 14)[0, -1], 100.0)
+
+    def test_atr_of_constant_range(self):
+        closes = np.full((1, 40), 100.0)
+        result = atr(closes + 1.0, closes - 1.5, closes, 14)
+        self.assertTrue(np.isnan(result[0, 13]))
+        np.testing.assert_allclose(result[0, 14:], 2.5)
+
+
+class StackKlinesTest(unittest.TestCase):
+
+    def test_series_of_different_length_are_not_truncated(self):
+        snapshots = {
+            'BTCUSDT': {'klines': {'1h': make_klines(wave(100)), '4h': make_klines(wave(100, 0.5))}},
+            'NEWUSDT': {'klines': {'1h': make_klines(wave(40))}}
+        }
+        batches = stack_klines(snapshots, ['1h', '4h'])
+        shapes = sorted((closes.shape, keys) for keys, _, _, closes in batches)
+        self.assertEqual(shapes, [((1, 40), [('NEWUSDT', '1h')]),
+                                  ((2, 100), [('BTCUSDT', '1h'), ('BTCUSDT', '4h')])])
+
+    def test_indicators_do_not_depend_on_other_series(self):
+        btc = {'klines': {'1h': make_klines(wave(100))}}
+        alone = compute_indicators({'BTCUSDT': btc}, ['1h'])
+        mixed = compute_indicators({'NEWUSDT': {'klines': {'1h': make_klines(wave(40, 2.0))}}, 'BTCUSDT': btc}, ['1h'])
+        self.assertEqual(list(mixed), ['NEWUSDT', 'BTCUSDT'])
+        self.assertEqual(mixed['BTCUSDT'], alone['BTCUSDT'])
+        expected_ema = reference_ema(wave(100), 21)[-1]
+        self.assertAlmostEqual(alone['BTCUSDT']['1h']['ema21'], expected_ema)
+
+    def test_no_klines(self):
+        self.assertEqual(stack_klines({'BTCUSDT': {'klines': {}}}, ['1h']), [])
+        self.assertEqual(compute_indicators({'BTCUSDT': {}}, ['1h']), {})
+
+    def test_tables_per_currency_come_from_one_batch(self):
+        snapshots = {
+            'BTCUSDT': {'klines': {'1h': make_klines(wave(100))}},
+            'ETHUSDT': {'klines': {'1h': make_klines(wave(100, 1.0))}},
+            'BNBUSDT': {'klines': {}}
+        }
+        with mock.patch.object(indicators, 'fetch_market_snapshots', return_value=snapshots) as fetch, \
+                mock.patch.object(indicators, 'compute_indicators', wraps=compute_indicators) as compute:
+            tables = build_indicator_tables(['BTCUSDT', 'ETHUSDT', 'BNBUSDT'], timeframes=['1h'])
+        fetch.assert_called_once()
+        compute.assert_called_once()
+        self.assertEqual(sorted(tables), ['BTCUSDT', 'ETHUSDT'])
+        for currency, table in tables.items():
+            rows = table.splitlines()[1:]
+            self.assertEqual([row.split()[:2] for row in rows], [[currency, '1h']])
+
+
+if __name__ == '__main__':
+    unittest.main()
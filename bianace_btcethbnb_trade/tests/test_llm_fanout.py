@@ -0,0 +1,116 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from utils import llm_fanout
+from utils.llm_fanout import TokenBucket, RateLimiter, MIN_RATE_FACTOR, RATE_RECOVERY_STEP, estimate_tokens
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class RateLimitTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        for target, value in ((llm_fanout.time, 'monotonic'), (llm_fanout.asyncio, 'sleep')):
+            patcher = mock.patch.object(target, value, getattr(self.clock, value))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class TokenBucketTest(RateLimitTestCase):
+    def test_refills_at_the_current_rate(self):
+        bucket = TokenBucket(60)
+        self.assertEqual(bucket.wait_s(60, 1.0), 0.0)
+        bucket.available = 0.0
+        self.assertAlmostEqual(bucket.wait_s(1, 1.0), 1.0)
+        self.assertAlmostEqual(bucket.wait_s(1, 0.5), 2.0)
+        self.clock.now += 2
+        self.assertEqual(bucket.wait_s(1, 0.5), 0.0)
+        self.assertAlmostEqual(bucket.available, 1.0)
+
+    def test_never_holds_more_than_its_capacity(self):
+        bucket = TokenBucket(60)
+        self.clock.now += 3600
+        bucket.refill(1.0)
+        self.assertEqual(bucket.available, 60)
+        # A request larger than the whole budget only waits for a full bucket
+        bucket.available = 30.0
+        self.assertAlmostEqual(bucket.wait_s(1000, 1.0), 30.0)
+
+
+class RateLimiterTest(RateLimitTestCase):
+    def acquire(self, limiter, count, tokens=1):
+        async def run():
+            for _ in range(count):
+                await limiter.acquire(tokens)
+        asyncio.run(run())
+
+    def test_bursts_up_to_the_budget_then_paces(self):
+        limiter = RateLimiter(rpm=60, tpm=100000)
+        self.acquire(limiter, 60)
+        self.assertEqual(self.clock.sleeps, [])
+        self.acquire(limiter, 2)
+        self.assertEqual(len(self.clock.sleeps), 2)
+        self.assertAlmostEqual(sum(self.clock.sleeps), 2.0)
+
+    def test_token_budget_holds_back_large_requests(self):
+        limiter = RateLimiter(rpm=1000, tpm=600)
+        self.acquire(limiter, 1, tokens=600)
+        self.acquire(limiter, 1, tokens=300)
+        self.assertAlmostEqual(sum(self.clock.sleeps), 30.0)
+
+    def test_rate_limit_pauses_and_halves_the_rate(self):
+        limiter = RateLimiter(rpm=60, tpm=100000)
+        with self.assertLogs('binance_trade_analyzer', level='WARNING'):
+            limiter.on_rate_limited(5)
+        self.assertEqual(limiter.factor, 0.5)
+        self.assertEqual(limiter.rate_limited, 1)
+        self.acquire(limiter, 1)
+        # The pause and the emptied request bucket at half rate both hold the request back
+        self.assertAlmostEqual(self.clock.now - 1000.0, 5.0)
+
+        with self.assertLogs('binance_trade_analyzer', level='WARNING'):
+            for _ in range(10):
+                limiter.on_rate_limited()
+        self.assertEqual(limiter.factor, MIN_RATE_FACTOR)
+
+        limiter.on_success()
+        self.assertAlmostEqual(limiter.factor, MIN_RATE_FACTOR + RATE_RECOVERY_STEP)
+        for _ in range(20):
+            limiter.on_success()
+        self.assertEqual(limiter.factor, 1.0)
+
+    def test_settle_returns_unused_tokens(self):
+        limiter = RateLimiter(rpm=60, tpm=1000)
+        self.acquire(limiter, 1, tokens=800)
+        limiter.settle(800, 300)
+        self.assertAlmostEqual(limiter.tokens.available, 700)
+        limiter.settle(0, -5000)
+        self.assertEqual(limiter.tokens.available, 1000)
+
+
+class EstimateTokensTest(unittest.TestCase):
+    def test_counts_text_parts_and_max_tokens(self):
+        payload = {
+            'messages': [
+                {'role': 'system', 'content': 'x' * 30},
+                {'role': 'user', 'content': [{'type': 'text', 'text': 'y' * 60}, {'type': 'image_url', 'image_url': {}}]}
+            ],
+            'max_tokens': 100
+        }
+        self.assertEqual(estimate_tokens(payload), 90 // llm_fanout.CHARS_PER_TOKEN + 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
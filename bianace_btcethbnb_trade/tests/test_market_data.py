@@ -0,0 +1,100 @@
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from utils.market_data import fetch_market_snapshots
+
+
+def klines(interval, limit):
+    step = {'1h': 3600000, '4h': 14400000}[interval]
+    return [[1760000000000 + i * step, '100.0', '110.0', '90.0', str(100.0 + i), '12.5', 0, '0', 0, '0', '0', '0']
+            for i in range(limit)]
+
+
+class StubFuturesHandler(BaseHTTPRequestHandler):
+    """Serves the /fapi/v1 endpoints fetch_market_snapshots reads, from fixed data"""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self.server.requests.append((url.path, query))
+        if query.get('symbol') == 'FAILUSDT':
+            return self.reply(500, {'code': -1000, 'msg': 'stub failure'})
+        if url.path == '/fapi/v1/ticker/24hr':
+            body = {'symbol': query['symbol'], 'lastPrice': '101.5', 'highPrice': '110', 'lowPrice': '90',
+                    'volume': '1000', 'quoteVolume': '101500', 'priceChangePercent': '1.5'}
+        elif url.path == '/fapi/v1/premiumIndex':
+            body = {'symbol': query['symbol'], 'markPrice': '101.4', 'indexPrice': '101.3',
+                    'lastFundingRate': '0.0001', 'nextFundingTime': 0}
+        elif url.path == '/fapi/v1/depth':
+            body = {'asks': [[str(102 + i), '1.0'] for i in range(int(query['limit']))],
+                    'bids': [[str(101 - i), '2.0'] for i in range(int(query['limit']))]}
+        elif url.path == '/fapi/v1/klines':
+            body = klines(query['interval'], int(query['limit']))
+        else:
+            return self.reply(404, {'code': -1, 'msg': 'not found'})
+        self.reply(200, body)
+
+    def reply(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FetchMarketSnapshotsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubFuturesHandler)
+        cls.server.requests = []
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}/"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.requests.clear()
+
+    def test_snapshots_from_stub_server(self):
+        snapshots = fetch_market_snapshots(['BTCUSDT', 'ETHUSDT'], timeframes=['1h', '4h'], kline_limit=30,
+                                           levels=5, base_url=self.base_url, max_workers=4, timeout=5)
+
+        self.assertEqual(sorted(snapshots), ['BTCUSDT', 'ETHUSDT'])
+        snapshot = snapshots['BTCUSDT']
+        self.assertEqual(snapshot['source'], 'rest')
+        self.assertEqual(snapshot['last_price'], 101.5)
+        self.assertEqual(snapshot['mark_price'], 101.4)
+        self.assertAlmostEqual(snapshot['funding_rate_pct'], 0.01)
+        self.assertEqual(snapshot['asks'][0], [102.0, 1.0])
+        self.assertEqual(len(snapshot['bids']), 5)
+        self.assertEqual(sorted(snapshot['klines']), ['1h', '4h'])
+        self.assertEqual(len(snapshot['klines']['4h']), 30)
+        self.assertEqual(snapshot['klines']['1h'][-1], [1760000000000 + 29 * 3600000, 100.0, 110.0, 90.0, 129.0, 12.5])
+
+        # Three endpoints plus one klines request per timeframe, for each currency
+        self.assertEqual(len(self.server.requests), 2 * (3 + 2))
+        depth = [query for path, query in self.server.requests if path == '/fapi/v1/depth']
+        self.assertEqual({query['limit'] for query in depth}, {'5'})
+
+    def test_failed_currency_is_left_out(self):
+        with self.assertLogs('binance_trade_analyzer', level='WARNING') as logs:
+            snapshots = fetch_market_snapshots(['BTCUSDT', 'FAILUSDT'], timeframes=['1h'], kline_limit=5,
+                                               base_url=self.base_url, max_workers=2, timeout=5)
+        self.assertEqual(list(snapshots), ['BTCUSDT'])
+        self.assertIn('Incomplete market data for FAILUSDT', logs.output[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+from unittest import mock
+
+from utils import page_readiness
+from utils.page_readiness import NetworkTracker, ReadinessState, canvas_change_ratio
+
+
+class FakePage:
+    def on(self, event, handler):
+        pass
+
+
+class FakeRequest:
+    def __init__(self, resource_type):
+        self.resource_type = resource_type
+
+
+class CanvasChangeRatioTest(unittest.TestCase):
+
+    def test_identical_samples_are_unchanged(self):
+        sample = [[10] * 1024, [200] * 1024]
+        self.assertEqual(canvas_change_ratio(sample, [list(s) for s in sample]), 0.0)
+
+    def test_small_pixel_noise_is_ignored(self):
+        before = [[100] * 1024]
+        after = [[100 + page_readiness.PIXEL_DELTA] * 1024]
+        self.assertEqual(canvas_change_ratio(before, after), 0.0)
+
+    def test_fraction_of_changed_pixels(self):
+        before = [[0] * 1000]
+        after = [[255] * 10 + [0] * 990]
+        self.assertAlmostEqual(canvas_change_ratio(before, after), 0.01)
+
+    def test_canvas_count_change_or_no_canvas_counts_as_changed(self):
+        self.assertEqual(canvas_change_ratio([[0] * 4], [[0] * 4, [0] * 4]), 1.0)
+        self.assertEqual(canvas_change_ratio(None, [[0] * 4]), 1.0)
+        self.assertEqual(canvas_change_ratio([], []), 1.0)
+
+
+class NetworkTrackerTest(unittest.TestCase):
+
+    def test_streaming_requests_are_ignored(self):
+        tracker = NetworkTracker(FakePage())
+        tracker._on_request(FakeRequest('websocket'))
+        self.assertEqual(tracker.pending, {})
+
+    def test_polling_does_not_reset_quiet_timer(self):
+        tracker = NetworkTracker(FakePage())
+        tracker.last_activity -= 10
+        request = FakeRequest('xhr')
+        tracker._on_request(request)
+        tracker._on_request_done(request)
+        self.assertTrue(tracker.is_quiet(quiet_ms=1000, max_pending=0))
+
+    def test_long_running_requests_are_ignored(self):
+        tracker = NetworkTracker(FakePage())
+        tracker.last_activity -= 10
+        request = FakeRequest('fetch')
+        tracker._on_request(request)
+        self.assertFalse(tracker.is_quiet(quiet_ms=1000, max_pending=0))
+        tracker.pending[request] -= page_readiness.READINESS_LONG_REQUEST_MS / 1000 + 1
+        self.assertTrue(tracker.is_quiet(quiet_ms=1000, max_pending=0))
+
+    def test_document_request_keeps_network_busy(self):
+        tracker = NetworkTracker(FakePage())
+        tracker.last_activity -= 10
+        request = FakeRequest('script')
+        tracker._on_request(request)
+        tracker._on_request_done(request)
+        self.assertFalse(tracker.is_quiet(quiet_ms=1000, max_pending=0))
+
+
+class ReadinessStateTest(unittest.TestCase):
+
+    present = {'chart': True, 'price': False, 'orderbook': True}
+
+    def test_ready_once_live_chart_changes_within_tolerance(self):
+        state = ReadinessState(max_wait_ms=60000)
+        base = [0] * 1024
+        # A ticking last candle changes a handful of pixels on every sample
+        samples = [base[:i] + [255] * 5 + base[i + 5:] for i in (0, 5, 10, 15)]
+        done = [state.update(self.present, [sample]) for sample in samples]
+        self.assertTrue(done[-1])
+        self.assertTrue(state.ready())
+        self.assertEqual(state.missing_selectors, ['price'])
+
+    def test_not_ready_without_chart_selector(self):
+        state = ReadinessState(max_wait_ms=60000)
+        for _ in range(5):
+            self.assertFalse(state.update({'chart': False}, [[0] * 1024]))
+        self.assertFalse(state.ready())
+
+    def test_budget_exhausted_ends_wait(self):
+        state = ReadinessState(max_wait_ms=0)
+        self.assertTrue(state.update(self.present, [[0] * 1024]))
+        with mock.patch.object(page_readiness, '_log_result'):
+            self.assertFalse(state.result()['ready'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+from unittest import mock
+
+from tests import stub_playwright
+
+# The resident tab helpers only need page-like objects, so Playwright doesn't have to be installed
+stub_playwright()
+
+from utils import resident_tabs
+from utils.resident_tabs import TAB_NAME_PREFIX, find_resident_tab, refresh_stale_tab, tab_tick_age
+
+
+class FakeTab:
+    def __init__(self, url, name='', ticks=()):
+        self.url = url
+        self.name = name
+        # Tick age states returned by successive TICK_AGE_SCRIPT evaluations
+        self.ticks = list(ticks)
+        self.waited_ms = 0
+
+    def evaluate(self, script, arg=None):
+        if script == "() => window.name":
+            return self.name
+        if script == "() => { window.name = ''; }":
+            self.name = ''
+            return None
+        if script.startswith("(name) =>"):
+            self.name = arg
+            return None
+        if script == resident_tabs.TICK_WATCH_SCRIPT:
+            return True
+        if script == resident_tabs.TICK_AGE_SCRIPT:
+            return self.ticks.pop(0) if len(self.ticks) > 1 else self.ticks[0]
+        raise AssertionError(f"Unexpected script {script[:40]}")
+
+    def wait_for_timeout(self, ms):
+        self.waited_ms += ms
+
+
+class FakeContext:
+    def __init__(self, pages):
+        self.pages = pages
+
+
+class FindResidentTabTest(unittest.TestCase):
+
+    def test_pinned_tab_showing_the_currency_is_reused(self):
+        tab = FakeTab('https://www.binance.com/zh-CN/futures/BTCUSDT', TAB_NAME_PREFIX + 'BTCUSDT')
+        self.assertEqual(find_resident_tab(FakeContext([tab]), 'BTCUSDT'), (tab, False))
+
+    def test_pinned_tab_navigated_elsewhere_is_released(self):
+        moved = FakeTab('https://www.binance.com/zh-CN/futures/ETHUSDT', TAB_NAME_PREFIX + 'BTCUSDT')
+        other = FakeTab('https://www.binance.com/zh-CN/futures/BTCUSDT')
+        with mock.patch.object(resident_tabs.logging, 'getLogger'):
+            page, opened = find_resident_tab(FakeContext([moved, other]), 'BTCUSDT')
+        self.assertIs(page, other)
+        self.assertFalse(opened)
+        self.assertEqual(moved.name, '')
+        self.assertEqual(other.name, TAB_NAME_PREFIX + 'BTCUSDT')
+
+
+class TabTickAgeTest(unittest.TestCase):
+
+    def test_tab_watched_in_an_earlier_run_is_not_probed(self):
+        tab = FakeTab('', ticks=[{'age': None, 'watched': 60000}])
+        self.assertIsNone(tab_tick_age(tab, probe_ms=3000))
+        self.assertEqual(tab.waited_ms, 0)
+
+    def test_probe_only_waits_for_the_rest_of_the_watch_window(self):
+        tab = FakeTab('', ticks=[{'age': None, 'watched': 2900}, {'age': 40, 'watched': 3000}])
+        self.assertEqual(tab_tick_age(tab, probe_ms=3000), 40)
+        self.assertEqual(tab.waited_ms, 100)
+
+
+class RefreshStaleTabTest(unittest.TestCase):
+
+    def test_blocker_is_removed_after_each_reload(self):
+        page = mock.Mock()
+        blockers = [object(), object()]
+        with mock.patch.object(resident_tabs, 'install_resource_blocker', side_effect=blockers), \
+                mock.patch.object(resident_tabs, 'remove_resource_blocker') as remove, \
+                mock.patch.object(resident_tabs, 'report_resource_blocker'), \
+                mock.patch.object(resident_tabs, 'NetworkTracker'), \
+                mock.patch.object(resident_tabs, 'wait_for_page_ready'):
+            refresh_stale_tab(page, 'BTCUSDT')
+            refresh_stale_tab(page, 'BTCUSDT')
+        self.assertEqual([c.args[0] for c in remove.call_args_list], blockers)
+        self.assertEqual(page.reload.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
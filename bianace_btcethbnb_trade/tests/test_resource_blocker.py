@@ -0,0 +1,112 @@
+import unittest
+from unittest import mock
+
+from tests import stub_playwright
+
+# utils.screenshot imports Playwright at module level; the blocker itself only needs a page-like object
+stub_playwright()
+
+from utils import screenshot
+from utils.screenshot import ResourceBlocker, install_resource_blocker
+
+
+class FakeSession:
+    def __init__(self):
+        self.handlers = {}
+        self.sent = []
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def send(self, method, params=None):
+        self.sent.append((method, params))
+
+    def emit(self, event, params):
+        self.handlers[event](params)
+
+
+class FakeContext:
+    def __init__(self, session, persistent=False):
+        self.session = session
+        # Playwright returns no browser for a persistent context
+        self.browser = None if persistent else object()
+
+    def new_cdp_session(self, page):
+        if self.session is None:
+            raise RuntimeError('no CDP')
+        return self.session
+
+
+class FakePage:
+    def __init__(self, session, persistent=False):
+        self.context = FakeContext(session, persistent)
+        self.routes = []
+
+    def route(self, pattern, handler):
+        self.routes.append(pattern)
+
+    def on(self, event, handler):
+        pass
+
+
+class ResourceBlockerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.blocker = ResourceBlocker(['font'], ['doubleclick.net'], ['tradingview'])
+
+    def test_patterns(self):
+        self.assertEqual(self.blocker.blocked_url_patterns(), ['*://*doubleclick.net*/*'])
+        self.assertEqual(self.blocker.fetch_patterns(),
+                         [{'urlPattern': '*', 'resourceType': 'Font', 'requestStage': 'Request'}])
+
+    def test_allowed_domains_take_precedence(self):
+        font = {'resourceType': 'Font', 'request': {'url': 'https://s3.tradingview.com/a.woff2'}}
+        self.assertFalse(self.blocker.paused_request_blocked(font))
+        font['request']['url'] = 'https://bin.bnbstatic.com/a.woff2'
+        self.assertTrue(self.blocker.paused_request_blocked(font))
+
+    def test_install_uses_cdp_and_counts_real_bytes(self):
+        session = FakeSession()
+        page = FakePage(session)
+        with mock.patch.object(screenshot, 'RESOURCE_BLOCKING', True):
+            blocker = install_resource_blocker(page)
+        self.assertIs(blocker.session, session)
+        self.assertEqual(page.routes, [])
+        methods = [method for method, _ in session.sent]
+        self.assertEqual(methods, ['Network.enable', 'Network.setBlockedURLs', 'Fetch.enable'])
+
+        session.emit('Fetch.requestPaused', {'requestId': '1', 'resourceType': 'Font',
+                                             'request': {'url': 'https://fonts.example.com/a.woff2'}})
+        session.emit('Fetch.requestPaused', {'requestId': '2', 'resourceType': 'Font',
+                                             'request': {'url': 'https://s3.tradingview.com/a.woff2'}})
+        self.assertEqual(session.sent[-2], ('Fetch.failRequest', {'requestId': '1', 'errorReason': 'BlockedByClient'}))
+        self.assertEqual(session.sent[-1], ('Fetch.continueRequest', {'requestId': '2'}))
+
+        session.emit('Network.loadingFailed', {'type': 'Script', 'blockedReason': 'inspector'})
+        session.emit('Network.loadingFailed', {'type': 'XHR', 'errorText': 'net::ERR_ABORTED'})
+        session.emit('Network.loadingFinished', {'encodedDataLength': 1500})
+        session.emit('Network.requestServedFromCache', {'requestId': '3'})
+        session.emit('Network.loadingFinished', {'encodedDataLength': 0})
+        with mock.patch.object(screenshot.logging, 'getLogger'):
+            stats = blocker.report('BTCUSDT')
+        self.assertEqual(stats, {'blocked_requests': 2, 'blocked_by_type': {'font': 1, 'script': 1},
+                                 'allowed_requests': 2, 'cached_requests': 1, 'loaded_bytes': 1500})
+
+    def test_falls_back_to_route_without_cdp(self):
+        page = FakePage(None)
+        with mock.patch.object(screenshot, 'RESOURCE_BLOCKING', True), \
+                mock.patch.object(screenshot.logging, 'getLogger'):
+            blocker = install_resource_blocker(page)
+        self.assertIsNone(blocker.session)
+        self.assertEqual(page.routes, ['**/*'])
+
+    def test_never_routes_a_persistent_profile(self):
+        page = FakePage(None, persistent=True)
+        with mock.patch.object(screenshot, 'RESOURCE_BLOCKING', True), \
+                mock.patch.object(screenshot.logging, 'getLogger'):
+            self.assertIsNone(install_resource_blocker(page))
+        self.assertEqual(page.routes, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import os
+import copy
+import base64
+import tempfile
+import unittest
+from unittest import mock
+
+from utils import response_cache
+from utils.response_cache import ResponseCache, payload_cache_key
+
+
+def payload(text='Analyze BTCUSDT', system='Rules', max_tokens=2048, image=None):
+    content = [{'type': 'text', 'text': text}]
+    if image is not None:
+        content.append({'type': 'image_url', 'image_url': {'url': 'data:image/png;base64,' + base64.b64encode(image).decode()}})
+    return {
+        'model': 'deepseek-chat',
+        'messages': [{'role': 'system', 'content': system}, {'role': 'user', 'content': content}],
+        'max_tokens': max_tokens
+    }
+
+
+class PayloadCacheKeyTest(unittest.TestCase):
+    def test_every_part_of_the_request_changes_the_key(self):
+        base = payload_cache_key(payload())
+        self.assertEqual(payload_cache_key(payload()), base)
+        for changed in (payload(text='Analyze BTCUSDT\nMarket data: last 65000'), payload(system='Other rules'),
+                        payload(max_tokens=4096), payload(image=b'png')):
+            self.assertNotEqual(payload_cache_key(changed), base)
+
+    def test_inline_images_are_keyed_by_content(self):
+        request = payload(image=b'png')
+        key = payload_cache_key(request)
+        self.assertEqual(payload_cache_key(copy.deepcopy(request)), key)
+        self.assertNotEqual(payload_cache_key(payload(image=b'other png')), key)
+        # The request itself is left untouched
+        self.assertTrue(request['messages'][1]['content'][1]['image_url']['url'].startswith('data:image/png;base64,'))
+
+    def test_referenced_screenshots_are_keyed_by_content(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'BTCUSDT_trade.png')
+            with open(path, 'wb') as f:
+                f.write(b'first')
+            key = payload_cache_key(payload(), [path])
+            with open(path, 'wb') as f:
+                f.write(b'second')
+            self.assertNotEqual(payload_cache_key(payload(), [path]), key)
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'cache', 'responses.sqlite')
+        self.now = 1000000.0
+        patcher = mock.patch.object(response_cache.time, 'time', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def cache(self, **kwargs):
+        return ResponseCache(self.path, **kwargs)
+
+    def response(self, size):
+        return {'choices': [{'message': {'content': 'x' * size}}]}
+
+    def test_entries_expire_after_the_ttl(self):
+        cache = self.cache(ttl_s=60, max_bytes=10 ** 6, bypass=False)
+        with self.assertLogs('binance_trade_analyzer', level='INFO'):
+            cache.put('key', self.response(10))
+            self.now += 59
+            self.assertEqual(cache.get('key'), self.response(10))
+            self.now += 2
+            self.assertIsNone(cache.get('key'))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_least_recently_used_entries_are_evicted_beyond_the_size_cap(self):
+        entry_size = len(response_cache.json.dumps(self.response(100)))
+        cache = self.cache(ttl_s=0, max_bytes=entry_size * 2, bypass=False)
+        with self.assertLogs('binance_trade_analyzer', level='INFO'):
+            for key in ('a', 'b'):
+                cache.put(key, self.response(100))
+                self.now += 1
+            # Reading a makes b the least recently used entry
+            cache.get('a')
+            self.now += 1
+            cache.put('c', self.response(100))
+            self.assertIsNotNone(cache.get('a'))
+            self.assertIsNone(cache.get('b'))
+            self.assertIsNotNone(cache.get('c'))
+
+    def test_entries_survive_a_new_cache_instance(self):
+        with self.assertLogs('binance_trade_analyzer', level='INFO'):
+            self.cache(ttl_s=0, bypass=False).put('key', self.response(10))
+            self.assertEqual(self.cache(ttl_s=0, bypass=False).get('key'), self.response(10))
+
+    def test_connections_are_closed(self):
+        connections = []
+        connect = response_cache.sqlite3.connect
+
+        def tracking_connect(*args, **kwargs):
+            connections.append(connect(*args, **kwargs))
+            return connections[-1]
+
+        with mock.patch.object(response_cache.sqlite3, 'connect', tracking_connect), \
+                self.assertLogs('binance_trade_analyzer', level='INFO'):
+            cache = self.cache(ttl_s=0, bypass=False)
+            cache.put('key', self.response(10))
+            cache.get('key')
+        self.assertEqual(len(connections), 3)
+        for conn in connections:
+            with self.assertRaises(response_cache.sqlite3.ProgrammingError):
+                conn.execute('SELECT 1')
+
+    def test_bypass_skips_lookups_but_stores_fresh_responses(self):
+        with self.assertLogs('binance_trade_analyzer', level='INFO'):
+            cache = self.cache(ttl_s=0, bypass=True)
+            cache.put('key', self.response(10))
+            self.assertIsNone(cache.get('key'))
+            cache.bypass = False
+            self.assertEqual(cache.get('key'), self.response(10))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import time
+import tempfile
+import unittest
+from unittest import mock
+
+from tests import stub_playwright
+
+# FrameRing only writes files, so Playwright doesn't have to be installed
+stub_playwright()
+
+from utils import screencast_sampler
+from utils.screencast_sampler import FrameRing
+
+
+class FrameRingTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.object(screencast_sampler, 'SCREENSHOT_OUTPUT_DIR', tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def ring(self, **kwargs):
+        return FrameRing('BTCUSDT', '2026-01-01', extension='jpg', **kwargs)
+
+    def test_keeps_at_most_max_frames(self):
+        ring = self.ring(max_frames=3, max_age_s=0)
+        now = time.time()
+        written = [ring.add(b'frame', now - 10 + i) for i in range(5)]
+        self.assertEqual(ring.paths(), written[2:])
+        self.assertEqual(sorted(os.listdir(ring.currency_dir)), sorted(os.path.basename(p) for p in written[2:]))
+
+    def test_deletes_frames_older_than_max_age(self):
+        ring = self.ring(max_frames=10, max_age_s=60)
+        now = time.time()
+        old = ring.add(b'frame', now - 120)
+        recent = ring.add(b'frame', now - 5)
+        self.assertEqual(ring.paths(), [recent])
+        self.assertFalse(os.path.exists(old))
+        self.assertEqual(ring.prune(now + 120), 1)
+        self.assertEqual(ring.paths(), [])
+
+    def test_frames_of_earlier_runs_count_towards_the_limit(self):
+        ring = self.ring(max_frames=2, max_age_s=0)
+        now = time.time()
+        for i in range(2):
+            path = ring.add(b'frame', now - 10 + i)
+            os.utime(path, (now - 10 + i, now - 10 + i))
+        # Unrelated files in the currency directory are left alone
+        other = os.path.join(ring.currency_dir, 'notes.txt')
+        open(other, 'w').close()
+
+        restarted = self.ring(max_frames=2, max_age_s=0)
+        self.assertEqual(restarted.paths(), ring.paths())
+        latest = restarted.add(b'frame', now)
+        self.assertEqual(restarted.paths(), [ring.paths()[1], latest])
+        self.assertTrue(os.path.exists(other))
+
+
+if __name__ == '__main__':
+    unittest.main()
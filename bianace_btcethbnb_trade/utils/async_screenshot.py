@@ -0,0 +1,310 @@
+import os
+import json
+import asyncio
+import logging
+from datetime import datetime
+from playwright.async_api import async_playwright
+from config.settings import (
+    BINANCE_CONTRACT_URLS,
+    CAPTURE_MAX_CONCURRENCY,
+    CAPTURE_REGIONS,
+    CAPTURE_TIMEFRAMES,
+    CAPTURE_SYMBOL_BUDGET_S,
+    CAPTURE_RUN_BUDGET_S,
+    READINESS_MAX_WAIT_MS
+)
+from utils.page_readiness import NetworkTracker, wait_for_page_ready_async
+from utils.deadline import Deadline, BudgetExceeded
+from utils.dom_extractor import record_market_snapshot_async
+from utils.screenshot import (
+    capture_page_regions_async,
+    capture_timeframes_async,
+    install_resource_blocker_async,
+    report_resource_blocker,
+    get_session_cookies,
+    cache_session_cookies,
+    capture_launch_options,
+    profile_needs_session,
+    mark_profile_seeded
+)
+
+
+async def load_session_async(context, session_file='binance_session.json'):
+    """
+    Load browser session (cookies) from a file into an async browser context
+
+    Args:
+        context: Playwright async browser context
+        session_file (str): Path to session file
+
+    Returns:
+        bool: True if session loaded successfully, False otherwise
+    """
+    try:
+        cookies = get_session_cookies(session_file)
+        await context.add_cookies(cookies)
+        print(f"Session loaded from {session_file}")
+        return True
+    except FileNotFoundError:
+        print(f"Session file {session_file} not found")
+        return False
+    except Exception as e:
+        print(f"Error loading session: {str(e)}")
+        return False
+
+
+async def save_session_async(context, session_file='binance_session.json'):
+    """
+    Save browser session (cookies) from an async browser context to a file
+
+    Args:
+        context: Playwright async browser context
+        session_file (str): Path to save session file
+    """
+    cookies = await context.cookies()
+    with open(session_file, 'w') as f:
+        json.dump(cookies, f)
+    cache_session_cookies(cookies, session_file)
+    print(f"Session saved to {session_file}")
+
+
+def build_screenshot_path(currency, date_dir, index=0, capture_times_per_currency=1):
+    """
+    Build the screenshot file path under data/screenshots/<date>/<currency>/
+
+    Args:
+        currency (str): Currency pair (e.g., BTCUSDT)
+        date_dir (str): Date directory name (YYYY-MM-DD)
+        index (int): Zero-based capture index for this currency
+        capture_times_per_currency (int): Total number of captures for this currency
+
+    Returns:
+        str: Path to the screenshot file
+    """
+    timestamp_str = datetime.now().strftime('%Y%m%d_%H%M%S')
+    if capture_times_per_currency > 1:
+        filename = f'{timestamp_str}_{currency}_trade_{index+1}.png'
+    else:
+        filename = f'{timestamp_str}_{currency}_trade.png'
+
+    currency_dir = os.path.join('data', 'screenshots', date_dir, currency)
+    os.makedirs(currency_dir, exist_ok=True)
+
+    return os.path.join(currency_dir, filename)
+
+
+async def _capture_currency(context, semaphore, currency, date_dir, capture_times_per_currency, max_retries=3,
+                            deadline=None, symbol_budget_s=None):
+    """
+    Capture all screenshots for a single currency on its own page. The currency's budget
+    starts once it gets a page slot, and every stage timeout shrinks to the time left.
+
+    Args:
+        context: Playwright async browser context shared by all currencies
+        semaphore (asyncio.Semaphore): Limits the number of pages working at once
+        currency (str): Currency pair to capture
+        date_dir (str): Date directory name (YYYY-MM-DD)
+        capture_times_per_currency (int): Number of times to capture this currency
+        max_retries (int): Maximum attempts per capture
+        deadline (Deadline): Enclosing deadline, e.g. of the run or of a worker job
+        symbol_budget_s (float): Time budget of this currency in seconds (default: CAPTURE_SYMBOL_BUDGET_S)
+
+    Returns:
+        list: List of file paths saved for this currency
+    """
+    url = BINANCE_CONTRACT_URLS.get(currency, BINANCE_CONTRACT_URLS['BTCUSDT'])
+    file_paths = []
+
+    async with semaphore:
+        deadline = Deadline(symbol_budget_s or CAPTURE_SYMBOL_BUDGET_S, parent=deadline, label=currency)
+        if deadline.expired():
+            print(f"Run budget exhausted, skipping {currency}")
+            return file_paths
+        page = await context.new_page()
+        blocker = await install_resource_blocker_async(page)
+        tracker = NetworkTracker(page)
+        try:
+            for i in range(capture_times_per_currency):
+                for retry_count in range(1, max_retries + 1):
+                    if deadline.expired():
+                        break
+                    try:
+                        # Navigate to the target URL
+                        await page.goto(url, timeout=deadline.stage_timeout_ms('goto', 60000))
+                        await page.wait_for_load_state("load", timeout=deadline.stage_timeout_ms('load', 60000))
+
+                        # Binance pages keep network activity going, so instead of networkidle wait until
+                        # key elements are present, pending requests settle and the chart stops redrawing
+                        await wait_for_page_ready_async(
+                            page, tracker, max_wait_ms=deadline.stage_timeout_ms('readiness', READINESS_MAX_WAIT_MS), label=currency
+                        )
+
+                        # Capture every configured chart interval in this page session
+                        if CAPTURE_TIMEFRAMES:
+                            timeframe_paths = await capture_timeframes_async(
+                                page, currency, date_dir, tracker=tracker, index=i, capture_times_per_currency=capture_times_per_currency,
+                                deadline=deadline
+                            )
+                            if timeframe_paths:
+                                await record_market_snapshot_async(page, currency, timeframe_paths[0])
+                                file_paths.extend(timeframe_paths)
+                                report_resource_blocker(blocker, currency)
+                                break
+                            print(f"Could not switch chart intervals for {currency}, falling back to page screenshot")
+                        
+                        # Capture labelled panel screenshots instead of the whole page when configured
+                        if CAPTURE_REGIONS:
+                            region_paths = await capture_page_regions_async(
+                                page, currency, date_dir, index=i, capture_times_per_currency=capture_times_per_currency,
+                                deadline=deadline
+                            )
+                            if region_paths:
+                                await record_market_snapshot_async(page, currency, region_paths[0])
+                                file_paths.extend(region_paths)
+                                report_resource_blocker(blocker, currency)
+                                break
+                            print(f"No configured regions found for {currency}, falling back to page screenshot")
+
+                        filepath = build_screenshot_path(currency, date_dir, i, capture_times_per_currency)
+                        await page.screenshot(path=filepath, full_page=True, timeout=deadline.stage_timeout_ms('screenshot', 120000))
+                        await record_market_snapshot_async(page, currency, filepath)
+
+                        print(f"Screenshot {i+1} for {currency} saved to {filepath}")
+                        file_paths.append(filepath)
+                        report_resource_blocker(blocker, currency)
+                        break
+
+                    except Exception as e:
+                        if isinstance(e, BudgetExceeded):
+                            deadline.mark_timed_out()
+                        print(f"Error capturing screenshot for {currency} (attempt {i+1}, retry {retry_count}): {str(e)}")
+                        if retry_count < max_retries and not deadline.expired():
+                            print(f"Retrying {currency} in 5 seconds...")
+                            await asyncio.sleep(min(5, deadline.remaining_s()))
+                        else:
+                            print(f"Failed to capture screenshot for {currency} after {retry_count} attempts")
+        finally:
+            try:
+                await page.close()
+            except Exception as e:
+                print(f"Error closing page for {currency}: {str(e)}")
+
+    return file_paths
+
+
+async def launch_capture_context_async(p, persistent=None, session_file='binance_session.json', headless=None,
+                                       profile_dir=None):
+    """
+    Async version of launch_capture_context: a throwaway context, or the persistent
+    profile when BROWSER_PERSISTENT_PROFILE is set
+
+    Args:
+        p: Playwright instance from async_playwright()
+        persistent (bool): Use the persistent profile (default: BROWSER_PERSISTENT_PROFILE)
+        session_file (str): Session file used to seed cookies
+        headless (bool): Run without a window (default: BROWSER_HEADLESS)
+        profile_dir (str): Persistent profile directory (default: the managed profile)
+
+    Returns:
+        tuple: (browser, context). browser is None for a persistent context.
+    """
+    options = capture_launch_options(persistent, headless, profile_dir)
+
+    if not options['persistent']:
+        browser = await p.chromium.launch(**options['launch_kwargs'])
+        context = await browser.new_context(**options['context_kwargs'])
+        await load_session_async(context, session_file)
+        return browser, context
+
+    profile_dir = options['profile_dir']
+    context = await p.chromium.launch_persistent_context(profile_dir, **options['launch_kwargs'])
+    if profile_needs_session(profile_dir) and await load_session_async(context, session_file):
+        mark_profile_seeded(profile_dir)
+    return None, context
+
+
+async def capture_multiple_screenshots_async(currencies, capture_times_per_currency=1, max_concurrency=None, deadline=None):
+    """
+    Capture screenshots for all currencies concurrently with one page per currency
+    in a single shared browser context, within CAPTURE_SYMBOL_BUDGET_S per currency
+    and the run deadline overall.
+
+    Args:
+        currencies (list): List of currency pairs to capture (e.g., ['BTCUSDT', 'ETHUSDT'])
+        capture_times_per_currency (int): Number of times to capture each currency
+        max_concurrency (int): Maximum number of pages capturing at once (default: CAPTURE_MAX_CONCURRENCY)
+        deadline (Deadline): Run deadline (default: CAPTURE_RUN_BUDGET_S from now)
+
+    Returns:
+        list: List of file paths to saved screenshots, ordered by currency
+    """
+    logger = logging.getLogger('binance_trade_analyzer')
+
+    if max_concurrency is None:
+        max_concurrency = CAPTURE_MAX_CONCURRENCY
+    max_concurrency = max(1, int(max_concurrency))
+
+    run_deadline = deadline or Deadline(CAPTURE_RUN_BUDGET_S, label='run')
+    date_dir = datetime.now().strftime('%Y-%m-%d')
+    file_paths = []
+
+    async with async_playwright() as p:
+        browser = None
+        context = None
+        try:
+            browser, context = await launch_capture_context_async(p)
+
+            semaphore = asyncio.Semaphore(max_concurrency)
+            logger.info(f"Capturing {len(currencies)} currencies with concurrency {max_concurrency}")
+
+            results = await asyncio.gather(
+                *[_capture_currency(context, semaphore, currency, date_dir, capture_times_per_currency, deadline=run_deadline)
+                  for currency in currencies],
+                return_exceptions=True
+            )
+
+            # Keep the output order deterministic: follow the order of the currencies argument
+            for currency, result in zip(currencies, results):
+                if isinstance(result, Exception):
+                    print(f"Error capturing screenshots for {currency}: {str(result)}")
+                    continue
+                file_paths.extend(result)
+
+            try:
+                if browser is None or browser.is_connected():
+                    await save_session_async(context, 'binance_session.json')
+            except Exception as e:
+                print(f"Error saving session: {str(e)}")
+
+            return file_paths
+
+        except Exception as e:
+            print(f"Error launching new browser: {str(e)}")
+            return file_paths
+
+        finally:
+            try:
+                if browser:
+                    await browser.close()
+                elif context:
+                    await context.close()
+            except Exception:
+                pass
+
+
+def capture_multiple_screenshots_concurrent(currencies, capture_times_per_currency=1, max_concurrency=None):
+    """
+    Synchronous entry point for the async capture engine.
+    Drop-in replacement for capture_multiple_screenshots_new_browser.
+
+    Args:
+        currencies (list): List of currency pairs to capture (e.g., ['BTCUSDT', 'ETHUSDT'])
+        capture_times_per_currency (int): Number of times to capture each currency
+        max_concurrency (int): Maximum number of pages capturing at once
+
+    Returns:
+        list: List of file paths to saved screenshots
+    """
+    return asyncio.run(
+        capture_multiple_screenshots_async(currencies, capture_times_per_currency, max_concurrency)
+    )
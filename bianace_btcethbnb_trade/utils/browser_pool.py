@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Warm browser pool daemon.
+
+Keeps one Chromium instance with remote debugging and one pre-navigated tab per
+currency alive between scheduled runs, and serves capture requests over a local
+socket so a run only pays for the capture itself.
+
+Start it from the project root:
+    python3 -m utils.browser_pool
+"""
+
+import os
+import sys
+import json
+import socket
+import logging
+import socketserver
+from datetime import datetime
+
+# Add the project root directory to Python path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playwright.sync_api import sync_playwright
+from config.settings import (
+    BINANCE_CONTRACT_URLS,
+    SUPPORTED_CURRENCIES,
+    BROWSER_POOL_HOST,
+    BROWSER_POOL_PORT,
+    CHROME_DEBUG_PORT,
+    CAPTURE_TIMEFRAMES
+)
+from utils.screenshot import (
+    start_chrome_with_debugging_and_urls, wait_for_cdp_ready, install_resource_blocker, remove_resource_blocker,
+    finish_capture, capture_timeframes
+)
+from utils.page_readiness import wait_for_page_ready
+from utils.async_screenshot import build_screenshot_path
+
+
+logger = logging.getLogger('binance_browser_pool')
+
+
+class BrowserPool:
+    """
+    Holds the CDP connection to the warm Chrome instance and one tab per currency
+    """
+
+    def __init__(self, currencies=None, port=CHROME_DEBUG_PORT):
+        """
+        Args:
+            currencies (list): Currency pairs to keep warm (default: SUPPORTED_CURRENCIES)
+            port (int): Chrome remote debugging port
+        """
+        self.currencies = list(currencies or SUPPORTED_CURRENCIES)
+        self.port = port
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.pages = {}
+        self.blockers = {}
+
+    def start(self):
+        """
+        Start (or attach to) Chrome and open one tab per currency
+        """
+        if not wait_for_cdp_ready(self.port, timeout=1):
+            logger.info("Chrome not running, starting Chrome with debugging...")
+            if not start_chrome_with_debugging_and_urls():
+                raise RuntimeError("Failed to start Chrome with debugging")
+            if not wait_for_cdp_ready(self.port):
+                raise RuntimeError(f"Chrome DevTools endpoint on port {self.port} did not become ready")
+
+        self.playwright = sync_playwright().start()
+        self._connect()
+        self.ensure_tabs()
+
+    def _connect(self):
+        self.browser = self.playwright.chromium.connect_over_cdp(f"http://localhost:{self.port}")
+        self.context = self.browser.contexts[0] if self.browser.contexts else self.browser.new_context()
+        self.pages = {}
+
+    def ensure_tabs(self):
+        """
+        Make sure the browser is connected and every currency has a live, navigated tab
+        """
+        if not self.browser or not self.browser.is_connected():
+            logger.warning("Browser connection lost, reconnecting...")
+            if not wait_for_cdp_ready(self.port, timeout=1):
+                start_chrome_with_debugging_and_urls()
+                wait_for_cdp_ready(self.port)
+            self._connect()
+
+        for currency in self.currencies:
+            page = self.pages.get(currency)
+            if page and not page.is_closed():
+                continue
+
+            url = BINANCE_CONTRACT_URLS.get(currency, BINANCE_CONTRACT_URLS['BTCUSDT'])
+            page = None
+            for existing in self.context.pages:
+                if url in existing.url or currency in existing.url:
+                    page = existing
+                    break
+
+            # A tab found again after a failed capture still has its old blocker
+            remove_resource_blocker(self.blockers.pop(currency, None))
+            if not page:
+                page = self.context.new_page()
+                self.blockers[currency] = install_resource_blocker(page)
+                page.goto(url, timeout=60000)
+                logger.info(f"Opened warm tab for {currency}")
+            else:
+                self.blockers[currency] = install_resource_blocker(page)
+
+            self.pages[currency] = page
+
+    def capture(self, currencies=None):
+        """
+        Capture a viewport screenshot of each warm tab
+
+        Args:
+            currencies (list): Currency pairs to capture (default: all pool currencies)
+
+        Returns:
+            list: List of file paths to saved screenshots
+        """
+        currencies = currencies or self.currencies
+        for currency in currencies:
+            if currency not in self.currencies:
+                self.currencies.append(currency)
+        self.ensure_tabs()
+
+        date_dir = datetime.now().strftime('%Y-%m-%d')
+        file_paths = []
+        for currency in currencies:
+            page = self.pages[currency]
+            try:
+                page.bring_to_front()
+                wait_for_page_ready(page, label=currency)
+                if CAPTURE_TIMEFRAMES:
+                    timeframe_paths = capture_timeframes(page, currency, date_dir)
+                    if timeframe_paths:
+                        file_paths.extend(timeframe_paths)
+                        finish_capture(page, currency, timeframe_paths[0], self.blockers.get(currency))
+                        continue
+                filepath = build_screenshot_path(currency, date_dir)
+                page.screenshot(path=filepath, full_page=False, timeout=60000)
+                logger.info(f"Screenshot for {currency} saved to {filepath}")
+                file_paths.append(filepath)
+                finish_capture(page, currency, filepath, self.blockers.get(currency))
+            except Exception as e:
+                logger.error(f"Error capturing screenshot for {currency}: {str(e)}")
+                # Forget the tab and its blocker; the next request finds the tab again (or opens
+                # a new one if it was closed) and installs a fresh blocker
+                remove_resource_blocker(self.blockers.pop(currency, None))
+                self.pages.pop(currency, None)
+        return file_paths
+
+    def stop(self):
+        """
+        Disconnect from Chrome. The browser itself is left running.
+        """
+        if self.playwright:
+            self.playwright.stop()
+            self.playwright = None
+
+
+class _PoolRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Handles one JSON request per line: {"action": "ping"|"capture"|"shutdown", "currencies": [...]}
+    """
+
+    def handle(self):
+        line = self.rfile.readline()
+        try:
+            request = json.loads(line.decode('utf-8'))
+            action = request.get('action')
+            if action == 'ping':
+                response = {'status': 'ok'}
+            elif action == 'capture':
+                file_paths = self.server.pool.capture(request.get('currencies'))
+                response = {'status': 'ok', 'file_paths': file_paths}
+            elif action == 'shutdown':
+                response = {'status': 'ok'}
+                self.server.shutdown_requested = True
+            else:
+                response = {'status': 'error', 'message': f"Unknown action: {action}"}
+        except Exception as e:
+            logger.error(f"Error handling pool request: {str(e)}", exc_info=True)
+            response = {'status': 'error', 'message': str(e)}
+
+        self.wfile.write((json.dumps(response) + '\n').encode('utf-8'))
+
+
+class BrowserPoolServer(socketserver.TCPServer):
+    """
+    Single-threaded local socket server. Requests are handled on the thread that owns
+    the Playwright connection, which the sync API requires.
+    """
+
+    allow_reuse_address = True
+
+    def __init__(self, pool, host=BROWSER_POOL_HOST, port=BROWSER_POOL_PORT):
+        super().__init__((host, port), _PoolRequestHandler)
+        self.pool = pool
+        self.shutdown_requested = False
+        # Wake up periodically to keep the tabs healthy between requests
+        self.timeout = 60
+
+    def handle_timeout(self):
+        try:
+            self.pool.ensure_tabs()
+        except Exception as e:
+            logger.error(f"Error refreshing warm tabs: {str(e)}")
+
+    def serve_until_shutdown(self):
+        while not self.shutdown_requested:
+            self.handle_request()
+
+
+def _send_request(request, host=BROWSER_POOL_HOST, port=BROWSER_POOL_PORT, timeout=300):
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.sendall((json.dumps(request) + '\n').encode('utf-8'))
+        reader = sock.makefile('rb')
+        return json.loads(reader.readline().decode('utf-8'))
+
+
+def ping_browser_pool(host=BROWSER_POOL_HOST, port=BROWSER_POOL_PORT):
+    """
+    Check whether the browser pool daemon is running
+
+    Returns:
+        bool: True if the daemon answered
+    """
+    try:
+        return _send_request({'action': 'ping'}, host, port, timeout=2).get('status') == 'ok'
+    except Exception:
+        return False
+
+
+def request_pool_capture(currencies, host=BROWSER_POOL_HOST, port=BROWSER_POOL_PORT, timeout=300):
+    """
+    Ask the browser pool daemon to capture screenshots
+
+    Args:
+        currencies (list): List of currency pairs to capture
+        timeout (float): Socket timeout in seconds
+
+    Returns:
+        list: List of file paths to saved screenshots, or None if the daemon is unavailable
+    """
+    try:
+        response = _send_request({'action': 'capture', 'currencies': list(currencies)}, host, port, timeout)
+    except Exception as e:
+        logger.warning(f"Browser pool unavailable: {str(e)}")
+        return None
+    if response.get('status') != 'ok':
+        logger.error(f"Browser pool capture failed: {response.get('message')}")
+        return None
+    return response.get('file_paths', [])
+
+
+def run_browser_pool(currencies=None, host=BROWSER_POOL_HOST, port=BROWSER_POOL_PORT):
+    """
+    Start the browser pool and serve capture requests until a shutdown request arrives
+    """
+    pool = BrowserPool(currencies)
+    pool.start()
+    logger.info(f"Browser pool warm with tabs for {pool.currencies}, listening on {host}:{port}")
+    with BrowserPoolServer(pool, host, port) as server:
+        try:
+            server.serve_until_shutdown()
+        except KeyboardInterrupt:
+            logger.info("Browser pool stopped by user")
+        finally:
+            pool.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Warm browser pool daemon")
+    parser.add_argument("--currencies", nargs='+', default=None, help="Currency pairs to keep warm")
+    parser.add_argument("--port", type=int, default=BROWSER_POOL_PORT, help="Local port to listen on")
+    args = parser.parse_args()
+
+    run_browser_pool(args.currencies, port=args.port)
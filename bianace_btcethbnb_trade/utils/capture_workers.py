@@ -0,0 +1,331 @@
+import os
+import time
+import signal
+import asyncio
+import logging
+import multiprocessing
+from collections import deque
+from datetime import datetime
+from multiprocessing.connection import wait
+from playwright.async_api import async_playwright
+from config.settings import (
+    BROWSER_PERSISTENT_PROFILE,
+    CAPTURE_WORKERS,
+    CAPTURE_WORKER_JOB_TIMEOUT_S,
+    CAPTURE_WORKER_MAX_CAPTURES,
+    CAPTURE_WORKER_MAX_RSS_MB,
+    CAPTURE_RUN_BUDGET_S
+)
+from utils.async_screenshot import launch_capture_context_async, save_session_async, _capture_currency
+from utils.screenshot import get_profile_dir
+from utils.deadline import Deadline
+
+
+# A worker gets this fraction of its job's hard deadline as its own budget, so it can stop
+# and report partial results before the supervisor kills it
+JOB_BUDGET_FRACTION = 0.9
+
+
+def process_tree_rss_mb(pid):
+    """
+    Resident memory of a process and all of its descendants (the browser and its renderers),
+    read from /proc
+
+    Args:
+        pid (int): Root process id
+
+    Returns:
+        float: RSS in MB, or None where /proc is not available
+    """
+    if not os.path.isdir('/proc'):
+        return None
+
+    children = {}
+    rss_pages = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                stat = f.read()
+            # The command name may contain spaces, so split after its closing parenthesis
+            fields = stat[stat.rfind(')') + 2:].split()
+            children.setdefault(int(fields[1]), []).append(int(entry))
+            rss_pages[int(entry)] = int(fields[21])
+        except (OSError, ValueError, IndexError):
+            continue
+
+    total = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        total += rss_pages.get(current, 0)
+        stack.extend(children.get(current, []))
+    return total * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+async def _worker_loop(conn, profile_dir=None):
+    """
+    Keep one browser open and capture the jobs received over conn until None arrives
+
+    Args:
+        conn: Pipe end shared with the supervisor
+        profile_dir (str): Persistent profile of this worker, None for a throwaway context
+    """
+    loop = asyncio.get_running_loop()
+    async with async_playwright() as p:
+        browser, context = await launch_capture_context_async(p, persistent=profile_dir is not None, profile_dir=profile_dir)
+        semaphore = asyncio.Semaphore(1)
+        try:
+            while True:
+                job = await loop.run_in_executor(None, conn.recv)
+                if job is None:
+                    break
+
+                start = time.monotonic()
+                try:
+                    paths = await _capture_currency(
+                        context, semaphore, job['currency'], job['date_dir'], job['capture_times_per_currency'],
+                        deadline=Deadline(job.get('budget_s'), label=job['currency'])
+                    )
+                    error = None if paths else 'No screenshots captured'
+                except Exception as e:
+                    paths = []
+                    error = str(e)
+
+                conn.send({
+                    'currency': job['currency'],
+                    'status': 'ok' if paths else 'error',
+                    'paths': paths,
+                    'error': error,
+                    'elapsed_s': round(time.monotonic() - start, 2),
+                    'worker_pid': os.getpid()
+                })
+
+            try:
+                await save_session_async(context, 'binance_session.json')
+            except Exception as e:
+                print(f"Error saving session: {str(e)}")
+        finally:
+            try:
+                if browser:
+                    await browser.close()
+                elif context:
+                    await context.close()
+            except Exception:
+                pass
+
+
+def _worker_main(conn, profile_dir=None):
+    # Own process group, so a hung worker is killed together with its driver and browser
+    if hasattr(os, 'setpgrp'):
+        os.setpgrp()
+    asyncio.run(_worker_loop(conn, profile_dir))
+
+
+class CaptureWorker:
+    """
+    One capture worker process with its own browser, as seen from the supervisor
+    """
+
+    def __init__(self, mp_context, slot=0, profile_dir=None):
+        """
+        Args:
+            mp_context: multiprocessing context the worker is started with
+            slot (int): Pool position, reused by the worker that replaces this one
+            profile_dir (str): Persistent profile of the worker, None for a throwaway context
+        """
+        self.slot = slot
+        self.conn, child_conn = mp_context.Pipe()
+        self.process = mp_context.Process(target=_worker_main, args=(child_conn, profile_dir), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.captures = 0
+        self.job = None
+        self.deadline = None
+        self.timeout_s = None
+
+    def assign(self, index, job, timeout_s):
+        """
+        Send a job to the worker and start its deadline. The worker's own budget for the
+        job (budget_s) ends shortly before the deadline at which it is killed.
+
+        Args:
+            index (int): Position of the job's record in the result list
+            job (dict): Job with currency, date_dir and capture_times_per_currency
+            timeout_s (float): Deadline in seconds from now
+        """
+        self.job = (index, job)
+        self.timeout_s = timeout_s
+        self.deadline = time.monotonic() + timeout_s
+        self.conn.send(dict(job, budget_s=timeout_s * JOB_BUDGET_FRACTION))
+
+    def kill(self):
+        """
+        Kill the worker together with its driver and browser processes
+        """
+        try:
+            if hasattr(os, 'killpg'):
+                os.killpg(self.process.pid, signal.SIGKILL)
+            else:
+                self.process.kill()
+        except (OSError, ProcessLookupError):
+            pass
+        self.process.join(5)
+        self.conn.close()
+
+    def stop(self, timeout_s=30):
+        """
+        Ask the worker to close its browser and exit, killing it if it does not
+        """
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout_s)
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.conn.close()
+
+
+def capture_in_workers(currencies, capture_times_per_currency=1, workers=None, job_timeout_s=None,
+                       max_captures=None, max_rss_mb=None, run_budget_s=None):
+    """
+    Capture every currency in supervised worker processes. Each worker keeps a browser open
+    across jobs; a job that runs past its deadline gets its worker killed, and workers are
+    replaced after max_captures captures or when their process tree exceeds max_rss_mb.
+    The calling process only dispatches jobs, so a hung or leaking browser can't block or bloat it.
+    Job deadlines never reach past the run budget, and jobs not started within it are skipped.
+    With BROWSER_PERSISTENT_PROFILE each worker slot gets its own profile (<profile>/worker-N),
+    since Chrome locks a profile directory to a single browser.
+
+    Args:
+        currencies (list): List of currency pairs to capture
+        capture_times_per_currency (int): Number of times to capture each currency
+        workers (int): Number of worker processes (default: CAPTURE_WORKERS)
+        job_timeout_s (float): Hard deadline per currency in seconds (default: CAPTURE_WORKER_JOB_TIMEOUT_S)
+        max_captures (int): Captures after which a worker is recycled (default: CAPTURE_WORKER_MAX_CAPTURES)
+        max_rss_mb (float): RSS after which a worker is recycled (default: CAPTURE_WORKER_MAX_RSS_MB)
+        run_budget_s (float): Budget of the whole run; job deadlines never reach past it (default: CAPTURE_RUN_BUDGET_S)
+
+    Returns:
+        list: One record per currency, in currency order, with currency, status
+              ('ok', 'error', 'timeout', 'crashed' or 'skipped'), paths, error, elapsed_s, worker_pid and rss_mb
+    """
+    logger = logging.getLogger('binance_trade_analyzer')
+
+    workers = max(1, min(workers or CAPTURE_WORKERS, len(currencies)))
+    job_timeout_s = job_timeout_s or CAPTURE_WORKER_JOB_TIMEOUT_S
+    max_captures = max_captures or CAPTURE_WORKER_MAX_CAPTURES
+    max_rss_mb = max_rss_mb or CAPTURE_WORKER_MAX_RSS_MB
+    run_deadline = Deadline(run_budget_s or CAPTURE_RUN_BUDGET_S, label='run')
+
+    # Spawned workers don't inherit the scheduler's threads or its memory
+    mp_context = multiprocessing.get_context('spawn')
+    if BROWSER_PERSISTENT_PROFILE:
+        profile_dir = get_profile_dir()
+        profile_dirs = [os.path.join(profile_dir, f'worker-{slot+1}') for slot in range(workers)]
+    else:
+        profile_dirs = [None] * workers
+    date_dir = datetime.now().strftime('%Y-%m-%d')
+    pending = deque(
+        (index, {'currency': currency, 'date_dir': date_dir, 'capture_times_per_currency': capture_times_per_currency})
+        for index, currency in enumerate(currencies)
+    )
+    records = [None] * len(currencies)
+    pool = []
+
+    def finish(worker, record):
+        index, job = worker.job
+        record.setdefault('worker_pid', worker.process.pid)
+        record['rss_mb'] = None if record['status'] in ('timeout', 'crashed') else process_tree_rss_mb(worker.process.pid)
+        records[index] = record
+        worker.job = None
+        worker.captures += job['capture_times_per_currency']
+        logger.info(
+            f"Capture worker {record['worker_pid']} finished {job['currency']}: {record['status']} "
+            f"({len(record['paths'])} screenshots, {record['elapsed_s']}s, RSS {record['rss_mb'] or 0:.0f} MB)"
+        )
+
+    try:
+        while pending or any(worker.job for worker in pool):
+            # Jobs not started within the run budget are not started at all
+            if run_deadline.expired():
+                while pending:
+                    index, job = pending.popleft()
+                    records[index] = {'currency': job['currency'], 'status': 'skipped', 'paths': [],
+                                      'error': 'Run budget exhausted', 'elapsed_s': 0.0, 'worker_pid': None, 'rss_mb': None}
+                    logger.warning(f"Run budget exhausted, skipping {job['currency']}")
+            # Job deadlines end with the run budget at the latest
+            timeout_s = min(job_timeout_s, run_deadline.remaining_s())
+
+            # Hand out jobs to idle workers, starting workers up to the pool size
+            for worker in pool:
+                if worker.job is None and pending:
+                    worker.assign(*pending.popleft(), timeout_s)
+            while len(pool) < workers and pending:
+                # A replacement worker takes over the slot, and so the profile, of the one it replaces
+                slot = min(set(range(workers)) - {worker.slot for worker in pool})
+                worker = CaptureWorker(mp_context, slot, profile_dirs[slot])
+                pool.append(worker)
+                worker.assign(*pending.popleft(), timeout_s)
+
+            busy = [worker for worker in pool if worker.job]
+            if not busy:
+                continue
+
+            next_deadline = min(worker.deadline for worker in busy)
+            wait([worker.conn for worker in busy] + [worker.process.sentinel for worker in busy],
+                 timeout=max(0, next_deadline - time.monotonic()))
+
+            for worker in busy:
+                job = worker.job[1]
+                result = None
+                if worker.conn.poll():
+                    try:
+                        result = worker.conn.recv()
+                    except EOFError:
+                        result = None
+
+                if result is not None:
+                    finish(worker, result)
+                    rss_mb = result['rss_mb']
+                    if worker.captures >= max_captures or (rss_mb is not None and rss_mb > max_rss_mb):
+                        logger.info(
+                            f"Recycling capture worker {worker.process.pid} after {worker.captures} captures "
+                            f"(RSS {rss_mb or 0:.0f} MB)"
+                        )
+                        worker.stop()
+                        pool.remove(worker)
+                elif not worker.process.is_alive():
+                    finish(worker, {'currency': job['currency'], 'status': 'crashed', 'paths': [],
+                                    'error': f"Worker exited with code {worker.process.exitcode}",
+                                    'elapsed_s': round(worker.timeout_s - (worker.deadline - time.monotonic()), 2)})
+                    worker.kill()
+                    pool.remove(worker)
+                elif time.monotonic() >= worker.deadline:
+                    logger.warning(f"Capture of {job['currency']} exceeded {worker.timeout_s:.1f}s, killing worker {worker.process.pid}")
+                    finish(worker, {'currency': job['currency'], 'status': 'timeout', 'paths': [],
+                                    'error': f"Deadline of {worker.timeout_s:.1f}s exceeded",
+                                    'elapsed_s': round(worker.timeout_s, 2)})
+                    worker.kill()
+                    pool.remove(worker)
+    finally:
+        for worker in pool:
+            if worker.job:
+                worker.kill()
+            else:
+                worker.stop()
+
+    return records
+
+
+def capture_paths(records):
+    """
+    Screenshot paths of all successful capture records, in record order
+
+    Returns:
+        list: List of file paths
+    """
+    return [path for record in records if record for path in record['paths']]
@@ -0,0 +1,134 @@
+import os
+import time
+import base64
+import asyncio
+import logging
+from datetime import datetime
+from playwright.async_api import async_playwright
+from config.settings import CHROME_DEBUG_PORT
+from utils.cdp_client import UNTHROTTLE_COMMANDS, SYMBOL_TEXT_EXPRESSION, currency_for_url, needs_symbol_text
+from utils.dom_extractor import record_market_snapshot_async
+from utils.page_readiness import wait_for_page_ready_async
+from utils.screenshot import install_resource_blocker_async, remove_resource_blocker_async, report_resource_blocker
+
+
+async def _tab_currency(page, index):
+    """
+    Currency shown in a tab: from its URL, or from the symbol label of a Binance page
+    """
+    symbol_text = None
+    if needs_symbol_text(page.url):
+        try:
+            symbol_text = await page.evaluate(SYMBOL_TEXT_EXPRESSION)
+        except Exception as e:
+            print(f"Error extracting currency from page content for tab {index+1}: {str(e)}")
+    return currency_for_url(page.url, index, symbol_text)
+
+
+async def _capture_tab(context, page, currency, path, label, max_wait_ms=None):
+    """
+    Capture one tab through its own CDP session, with background throttling turned off for it.
+    The tab is first checked for readiness with the resource blocker installed, and its market
+    snapshot is saved next to the screenshot.
+
+    Returns:
+        float: Capture time in seconds
+    """
+    start = time.monotonic()
+    blocker = await install_resource_blocker_async(page)
+    session = await context.new_cdp_session(page)
+    try:
+        for method, params in UNTHROTTLE_COMMANDS:
+            try:
+                await session.send(method, params)
+            except Exception as e:
+                # Older Chrome versions lack some of these commands; capture anyway
+                logging.getLogger('binance_trade_analyzer').debug(f"{method} failed: {str(e)}")
+
+        # Every tab waits at the same time, so the readiness budget is spent once for all tabs
+        try:
+            readiness = await wait_for_page_ready_async(page, max_wait_ms=max_wait_ms, label=label)
+            if readiness['missing_selectors']:
+                print(f"Elements not found for {label}: {readiness['missing_selectors']}, continuing...")
+        except Exception as e:
+            print(f"Warning: Some UI elements not fully loaded for {label}: {str(e)}")
+
+        result = await session.send('Page.captureScreenshot', {'format': 'png', 'fromSurface': True})
+        with open(path, 'wb') as f:
+            f.write(base64.b64decode(result['data']))
+    finally:
+        await session.detach()
+    elapsed = time.monotonic() - start
+    await record_market_snapshot_async(page, currency, path)
+    report_resource_blocker(blocker, label)
+    await remove_resource_blocker_async(blocker)
+    return elapsed
+
+
+async def capture_tabs_parallel_async(port=CHROME_DEBUG_PORT, url_filter='', currencies=None, max_wait_ms=15000):
+    """
+    Capture every open tab of an existing Chrome concurrently, each over its own CDP session.
+    No tab is brought to front, so K tabs take about as long as the slowest one.
+
+    Args:
+        port (int): Chrome remote debugging port
+        url_filter (str): Only capture tabs whose URL contains this text (empty: all tabs)
+        currencies (list): Only capture the first tab of each of these currencies (default: every tab)
+        max_wait_ms (int): Readiness budget shared by all tabs in milliseconds
+
+    Returns:
+        list: List of file paths to saved screenshots, in tab order
+    """
+    logger = logging.getLogger('binance_trade_analyzer')
+
+    timestamp = datetime.now()
+    date_dir = timestamp.strftime('%Y-%m-%d')
+    timestamp_str = timestamp.strftime('%Y%m%d_%H%M%S')
+
+    async with async_playwright() as p:
+        browser = await p.chromium.connect_over_cdp(f"http://localhost:{port}")
+        if not browser.contexts:
+            print("No browser contexts found")
+            return []
+        context = browser.contexts[0]
+
+        tabs = []
+        for i, page in enumerate(context.pages):
+            if url_filter and url_filter not in page.url.lower():
+                continue
+            currency = await _tab_currency(page, i)
+            if currencies is not None and (currency not in currencies or any(t[1] == currency for t in tabs)):
+                continue
+            currency_dir = os.path.join('data', 'screenshots', date_dir, currency)
+            os.makedirs(currency_dir, exist_ok=True)
+            tabs.append((i, currency, page, os.path.join(currency_dir, f'{timestamp_str}_tab_{i+1}_{currency}_trade.png')))
+
+        start = time.monotonic()
+        results = await asyncio.gather(
+            *[_capture_tab(context, page, currency, path, f"tab {i+1} ({currency})", max_wait_ms)
+              for i, currency, page, path in tabs],
+            return_exceptions=True
+        )
+
+        # gather keeps the tab order, so the output order is deterministic
+        file_paths = []
+        for (i, currency, _, path), result in zip(tabs, results):
+            if isinstance(result, Exception):
+                print(f"Error capturing screenshot for tab {i+1} ({currency}): {str(result)}")
+                continue
+            logger.info(f"Tab {i+1} ({currency}) captured in {result * 1000:.0f} ms to {path}")
+            file_paths.append(path)
+
+        logger.info(f"Captured {len(file_paths)} of {len(tabs)} tabs in {(time.monotonic() - start) * 1000:.0f} ms")
+        # Note: We don't close the browser as it's connected to an existing instance
+        return file_paths
+
+
+def capture_tabs_parallel(port=CHROME_DEBUG_PORT, url_filter='', currencies=None, max_wait_ms=15000):
+    """
+    Synchronous entry point for capture_tabs_parallel_async
+
+    Returns:
+        list: List of file paths to saved screenshots, in tab order
+    """
+    return asyncio.run(capture_tabs_parallel_async(port, url_filter, currencies, max_wait_ms))
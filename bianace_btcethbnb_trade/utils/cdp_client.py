@@ -0,0 +1,402 @@
+import os
+import re
+import json
+import time
+import base64
+import logging
+import requests
+import websocket
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from config.settings import (
+    CHROME_DEBUG_PORT,
+    BINANCE_CONTRACT_URLS,
+    READINESS_SAMPLE_INTERVAL_MS,
+    READINESS_CANVAS_EXCLUDE_RIGHT
+)
+from utils.page_readiness import READY_SELECTORS, REQUIRED_SELECTORS, SELECTORS_SCRIPT, CANVAS_SAMPLE_SCRIPT, ReadinessState
+from utils.dom_extractor import record_market_snapshot_cdp
+
+
+# CDP commands that stop Chrome from treating a background tab as hidden:
+# focus emulation keeps it rendering like the focused tab and the lifecycle state undoes freezing
+UNTHROTTLE_COMMANDS = [
+    ('Emulation.setFocusEmulationEnabled', {'enabled': True}),
+    ('Page.setWebLifecycleState', {'state': 'active'})
+]
+
+# Symbol label of a Binance page, read when the URL of a tab doesn't name the currency
+SYMBOL_TEXT_EXPRESSION = """
+(document.querySelector('.symbol-text, [data-symbol], .tradingview-symbol') || {}).textContent || ''
+"""
+
+# A tab is only worth waiting for once it has finished loading and shows a chart
+TAB_READY_EXPRESSION = f"""
+document.readyState === 'complete' && !!document.querySelector({json.dumps(READY_SELECTORS['chart'])})
+"""
+
+
+class CDPError(Exception):
+    """
+    Error returned by Chrome for a CDP command
+    """
+
+
+class CDPClient:
+    """
+    Minimal Chrome DevTools Protocol client over the websocket of one target.
+    Commands are sent one at a time; events received while waiting for a reply are dropped.
+    """
+
+    def __init__(self, ws_url, timeout=30):
+        """
+        Args:
+            ws_url (str): webSocketDebuggerUrl of the target (see list_targets)
+            timeout (float): Connect and reply timeout in seconds
+        """
+        # Chrome rejects websocket connections with an Origin header unless --remote-allow-origins is set
+        self.ws = websocket.create_connection(ws_url, timeout=timeout, suppress_origin=True)
+        self._next_id = 0
+
+    def send(self, method, params=None):
+        """
+        Send a command and wait for its reply
+
+        Args:
+            method (str): CDP method, e.g. Page.captureScreenshot
+            params (dict): Command parameters
+
+        Returns:
+            dict: Command result
+
+        Raises:
+            CDPError: If Chrome returns an error for the command
+        """
+        self._next_id += 1
+        command_id = self._next_id
+        self.ws.send(json.dumps({'id': command_id, 'method': method, 'params': params or {}}))
+        while True:
+            message = json.loads(self.ws.recv())
+            if message.get('id') != command_id:
+                continue
+            if 'error' in message:
+                raise CDPError(f"{method} failed: {message['error'].get('message')}")
+            return message.get('result', {})
+
+    def evaluate(self, expression, context_id=None):
+        """
+        Evaluate a JavaScript expression in the page and return its value
+
+        Args:
+            expression (str): JavaScript expression
+            context_id (int): Execution context to evaluate in (default: the main frame)
+
+        Returns:
+            The JSON-serializable result
+        """
+        params = {'expression': expression, 'returnByValue': True, 'awaitPromise': True}
+        if context_id is not None:
+            params['contextId'] = context_id
+        result = self.send('Runtime.evaluate', params)
+        if 'exceptionDetails' in result:
+            raise CDPError(f"Evaluation failed: {result['exceptionDetails'].get('text')}")
+        return result.get('result', {}).get('value')
+
+    def capture_screenshot(self, path, image_format='png'):
+        """
+        Capture the viewport of the page into a file
+
+        Returns:
+            str: Path to the saved screenshot
+        """
+        result = self.send('Page.captureScreenshot', {'format': image_format, 'fromSurface': True})
+        with open(path, 'wb') as f:
+            f.write(base64.b64decode(result['data']))
+        return path
+
+    def close(self):
+        try:
+            self.ws.close()
+        except Exception:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def needs_symbol_text(url):
+    """
+    Whether the currency of a tab has to be read from the page: a Binance tab whose URL doesn't name one
+    """
+    return not re.search(r'[A-Z]+USDT', url) and 'binance' in url.lower()
+
+
+def currency_for_url(url, index, symbol_text=None):
+    """
+    Currency pair shown in a tab, taken from its URL, or for a Binance tab from its symbol label
+
+    Args:
+        url (str): Tab URL
+        index (int): Zero-based tab index, used for tabs without a currency
+        symbol_text (str): Text of the symbol label (SYMBOL_TEXT_EXPRESSION), read when needs_symbol_text(url)
+
+    Returns:
+        str: Currency pair, UNKNOWN for a Binance tab without one, or TAB_<n> for other tabs
+    """
+    matches = re.findall(r'([A-Z]+USDT)', url)
+    if matches:
+        return matches[0]
+    if 'binance' not in url.lower():
+        return f"TAB_{index+1}"
+    match = re.search(r'([A-Z]+USDT)', symbol_text or '')
+    return match.group(1) if match else "UNKNOWN"
+
+
+def list_targets(port=CHROME_DEBUG_PORT, host='localhost', timeout=5):
+    """
+    List the page targets of a Chrome with remote debugging through its /json endpoint
+
+    Returns:
+        list: Target dicts with id, url, title and webSocketDebuggerUrl
+    """
+    response = requests.get(f"http://{host}:{port}/json", timeout=timeout)
+    response.raise_for_status()
+    return [target for target in response.json() if target.get('type') == 'page' and target.get('webSocketDebuggerUrl')]
+
+
+def find_currency_target(targets, currency):
+    """
+    First target showing a currency pair
+
+    Returns:
+        dict: Target, or None
+    """
+    url = BINANCE_CONTRACT_URLS.get(currency, BINANCE_CONTRACT_URLS['BTCUSDT'])
+    for target in targets:
+        if url in target['url'] or currency in target['url']:
+            return target
+    return None
+
+
+def _frame_contexts(client):
+    """
+    One isolated execution context per frame of the page, so the chart canvases of
+    embedded frames are sampled like in the Playwright readiness check
+    """
+    contexts = []
+    stack = [client.send('Page.getFrameTree')['frameTree']]
+    while stack:
+        node = stack.pop()
+        stack.extend(node.get('childFrames', []))
+        try:
+            world = client.send('Page.createIsolatedWorld', {'frameId': node['frame']['id'], 'worldName': 'readiness'})
+            contexts.append(world['executionContextId'])
+        except CDPError:
+            continue
+    return contexts
+
+
+def wait_for_target_ready(client, max_wait_ms=None, selectors=None, label=''):
+    """
+    Version of wait_for_page_ready for a direct CDP connection. The same ReadinessState decides
+    from the selector groups and the chart canvases of every frame; the websocket does not follow
+    network events, so the network counts as idle.
+
+    Args:
+        client (CDPClient): Connection to the tab
+        max_wait_ms (int): Maximum time budget in milliseconds (default: READINESS_MAX_WAIT_MS)
+        selectors (dict): Selector groups to wait for (default: READY_SELECTORS)
+        label (str): Label used in log messages (e.g., the currency)
+
+    Returns:
+        dict: Readiness result with ready, waited_ms, canvas_stable, network_idle and missing_selectors
+    """
+    state = ReadinessState(None, selectors, max_wait_ms)
+    selectors_expression = f"({SELECTORS_SCRIPT})({json.dumps(state.selectors)})"
+    canvas_expression = f"({CANVAS_SAMPLE_SCRIPT})({json.dumps(READINESS_CANVAS_EXCLUDE_RIGHT)})"
+    contexts = _frame_contexts(client)
+
+    while True:
+        try:
+            present = client.evaluate(selectors_expression) or {}
+        except CDPError:
+            present = {}
+        sample = []
+        for context_id in contexts:
+            try:
+                sample.extend(client.evaluate(canvas_expression, context_id) or [])
+            except CDPError:
+                continue
+        if state.update(present, sample):
+            break
+        time.sleep(min(READINESS_SAMPLE_INTERVAL_MS, max(1, state.remaining_ms())) / 1000)
+
+    return state.result(label)
+
+
+def capture_client(client, path, currency=None, require_ready=True, max_wait_ms=None, label=''):
+    """
+    Wait until the tab of an open connection is ready and capture it, without navigating it
+
+    Args:
+        client (CDPClient): Connection to the tab
+        path (str): Screenshot destination
+        currency (str): Currency pair, used to save the DOM market snapshot next to the screenshot
+        require_ready (bool): Skip a tab that is still loading or shows no chart instead of capturing it
+        max_wait_ms (int): Readiness budget in milliseconds (default: READINESS_MAX_WAIT_MS)
+        label (str): Label used in log messages
+
+    Returns:
+        str: Path to the saved screenshot, or None if the tab was skipped
+    """
+    if require_ready and not client.evaluate(TAB_READY_EXPRESSION):
+        return None
+    # Background tabs only redraw their charts once they are no longer throttled
+    for method, params in UNTHROTTLE_COMMANDS:
+        try:
+            client.send(method, params)
+        except CDPError:
+            pass
+
+    readiness = wait_for_target_ready(client, max_wait_ms, label=label or currency or '')
+    required_missing = [name for name in REQUIRED_SELECTORS if name in readiness['missing_selectors']]
+    if require_ready and required_missing:
+        return None
+
+    client.capture_screenshot(path)
+    if currency:
+        record_market_snapshot_cdp(client, currency, path)
+    return path
+
+
+def capture_target(target, path, currency=None, require_ready=True, max_wait_ms=None, label=''):
+    """
+    Capture one target over its own websocket, without navigating it (see capture_client)
+
+    Args:
+        target (dict): Target from list_targets
+        path (str): Screenshot destination
+        currency (str): Currency pair, used to save the DOM market snapshot next to the screenshot
+        require_ready (bool): Skip a tab that is still loading or shows no chart instead of capturing it
+        max_wait_ms (int): Readiness budget in milliseconds (default: READINESS_MAX_WAIT_MS)
+        label (str): Label used in log messages
+
+    Returns:
+        str: Path to the saved screenshot, or None if the tab was not ready
+    """
+    with CDPClient(target['webSocketDebuggerUrl']) as client:
+        return capture_client(client, path, currency, require_ready, max_wait_ms, label)
+
+
+def capture_currency_direct(currency, port=CHROME_DEBUG_PORT, max_wait_ms=None):
+    """
+    Capture a currency from its open tab over a direct CDP websocket, skipping the Playwright
+    driver. The tab goes through the same readiness check as the Playwright paths; tabs that
+    are still loading or show no chart return None so the caller can fall back to Playwright.
+
+    Args:
+        currency (str): Currency pair to capture
+        port (int): Chrome remote debugging port
+        max_wait_ms (int): Readiness budget in milliseconds (default: READINESS_MAX_WAIT_MS)
+
+    Returns:
+        str: Path to the saved screenshot, or None
+    """
+    logger = logging.getLogger('binance_trade_analyzer')
+    start = time.monotonic()
+    try:
+        target = find_currency_target(list_targets(port), currency)
+        if target is None:
+            return None
+
+        timestamp = datetime.now()
+        currency_dir = os.path.join('data', 'screenshots', timestamp.strftime('%Y-%m-%d'), currency)
+        os.makedirs(currency_dir, exist_ok=True)
+        filepath = os.path.join(currency_dir, f"{timestamp.strftime('%Y%m%d_%H%M%S')}_{currency}_trade.png")
+
+        if capture_target(target, filepath, currency, max_wait_ms=max_wait_ms) is None:
+            logger.info(f"Tab for {currency} is not ready, using the Playwright path")
+            return None
+    except Exception as e:
+        logger.warning(f"Direct CDP capture for {currency} failed: {str(e)}")
+        return None
+
+    logger.info(f"Direct CDP capture for {currency} saved to {filepath} in {(time.monotonic() - start) * 1000:.0f} ms")
+    return filepath
+
+
+def capture_currencies_direct(currencies, port=CHROME_DEBUG_PORT, max_wait_ms=None):
+    """
+    Capture several currencies at once with capture_currency_direct, one websocket per tab
+
+    Args:
+        currencies (list): List of currency pairs to capture
+        port (int): Chrome remote debugging port
+        max_wait_ms (int): Readiness budget in milliseconds; tabs wait at the same time
+
+    Returns:
+        list: List of file paths to saved screenshots, in currency order; currencies without
+              a ready tab are left out
+    """
+    if not currencies:
+        return []
+    with ThreadPoolExecutor(max_workers=len(currencies)) as executor:
+        paths = list(executor.map(lambda currency: capture_currency_direct(currency, port, max_wait_ms), currencies))
+    return [path for path in paths if path]
+
+
+def capture_all_tabs_direct(port=CHROME_DEBUG_PORT, url_filter='', max_wait_ms=15000):
+    """
+    Capture every open tab concurrently, one websocket per tab, without the Playwright driver
+
+    Args:
+        port (int): Chrome remote debugging port
+        url_filter (str): Only capture tabs whose URL contains this text (empty: all tabs)
+        max_wait_ms (int): Readiness budget of each tab in milliseconds; tabs wait at the same time
+
+    Returns:
+        list: List of file paths to saved screenshots, in tab order
+    """
+    logger = logging.getLogger('binance_trade_analyzer')
+
+    timestamp = datetime.now()
+    date_dir = timestamp.strftime('%Y-%m-%d')
+    timestamp_str = timestamp.strftime('%Y%m%d_%H%M%S')
+
+    jobs = []
+    for i, target in enumerate(list_targets(port)):
+        if url_filter and url_filter not in target['url'].lower():
+            continue
+        symbol_text = None
+        if needs_symbol_text(target['url']):
+            try:
+                with CDPClient(target['webSocketDebuggerUrl']) as client:
+                    symbol_text = client.evaluate(SYMBOL_TEXT_EXPRESSION)
+            except Exception as e:
+                print(f"Error extracting currency from page content for tab {i+1}: {str(e)}")
+        currency = currency_for_url(target['url'], i, symbol_text)
+        currency_dir = os.path.join('data', 'screenshots', date_dir, currency)
+        os.makedirs(currency_dir, exist_ok=True)
+        jobs.append((i, currency, target, os.path.join(currency_dir, f'{timestamp_str}_tab_{i+1}_{currency}_trade.png')))
+
+    if not jobs:
+        return []
+
+    start = time.monotonic()
+    file_paths = []
+    with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+        # Tabs that never settle are captured anyway once the budget is spent, like the Playwright paths do
+        futures = [executor.submit(capture_target, target, path, currency, False, max_wait_ms, f"tab {i+1} ({currency})")
+                   for i, currency, target, path in jobs]
+        # Collect in submission order, so the output order is deterministic
+        for (i, currency, _, path), future in zip(jobs, futures):
+            try:
+                file_paths.append(future.result())
+            except Exception as e:
+                print(f"Error capturing screenshot for tab {i+1} ({currency}): {str(e)}")
+
+    logger.info(f"Captured {len(file_paths)} of {len(jobs)} tabs over direct CDP in {(time.monotonic() - start) * 1000:.0f} ms")
+    return file_paths
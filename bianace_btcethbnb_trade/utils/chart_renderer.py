@@ -0,0 +1,217 @@
+import io
+import os
+import logging
+import numpy as np
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, ImageDraw, ImageFont
+from config.settings import (
+    SCREENSHOT_OUTPUT_DIR,
+    MARKET_DATA_TIMEFRAMES,
+    CHART_RENDER_WIDTH,
+    CHART_RENDER_HEIGHT,
+    CHART_RENDER_BARS,
+    CHART_RENDER_WORKERS
+)
+from utils.indicators import ema, macd, EMA_PERIOD
+
+
+# Colors of the Binance dark theme
+BACKGROUND = (22, 26, 30)
+GRID = (43, 49, 57)
+TEXT = (132, 142, 156)
+UP = (14, 203, 129)
+DOWN = (246, 70, 93)
+EMA_COLOR = (240, 185, 11)
+MACD_COLOR = (33, 150, 243)
+SIGNAL_COLOR = (255, 152, 0)
+
+# Vertical share of the price, volume and MACD panels
+PANEL_SHARES = (0.62, 0.14, 0.24)
+AXIS_WIDTH = 80
+TITLE_HEIGHT = 24
+
+
+def _scale(values, low, high, top, bottom):
+    """
+    Map values in [low, high] to pixel rows between bottom and top
+    """
+    span = (high - low) or 1.0
+    return bottom - (values - low) / span * (bottom - top)
+
+
+def _polyline(draw, xs, ys, color):
+    points = [(float(x), float(y)) for x, y in zip(xs, ys) if not np.isnan(y)]
+    if len(points) > 1:
+        draw.line(points, fill=color, width=2)
+
+
+def _panel_frame(draw, font, top, bottom, width, low, high, digits):
+    draw.rectangle([0, top, width - AXIS_WIDTH, bottom], outline=GRID)
+    for fraction in (0.25, 0.5, 0.75):
+        y = top + (bottom - top) * fraction
+        draw.line([(0, y), (width - AXIS_WIDTH, y)], fill=GRID)
+        value = high - (high - low) * fraction
+        draw.text((width - AXIS_WIDTH + 4, y - 6), f"{value:.{digits}g}", fill=TEXT, font=font)
+
+
+def render_candlestick_chart(klines, title='', width=None, height=None, bars=None):
+    """
+    Draw candlestick, volume, EMA21 and MACD panels from klines into a PNG buffer
+
+    Args:
+        klines (list): Klines as [open_time_ms, open, high, low, close, volume] rows
+        title (str): Title drawn in the top-left corner
+        width (int): Image width in pixels (default: CHART_RENDER_WIDTH)
+        height (int): Image height in pixels (default: CHART_RENDER_HEIGHT)
+        bars (int): Number of most recent klines to draw (default: CHART_RENDER_BARS)
+
+    Returns:
+        bytes: PNG image
+    """
+    width = width or CHART_RENDER_WIDTH
+    height = height or CHART_RENDER_HEIGHT
+    bars = bars or CHART_RENDER_BARS
+
+    data = np.asarray(klines, dtype=np.float64)
+    closes_all = data[:, 4][np.newaxis, :]
+    # Indicators use the full history so the visible part is already warmed up
+    ema_values = ema(closes_all, EMA_PERIOD)[0, -bars:]
+    macd_line, signal_line, histogram = (values[0, -bars:] for values in macd(closes_all))
+    data = data[-bars:]
+    opens, highs, lows, closes, volumes = data[:, 1], data[:, 2], data[:, 3], data[:, 4], data[:, 5]
+
+    image = Image.new('RGB', (width, height), BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default()
+
+    plot_width = width - AXIS_WIDTH
+    step = plot_width / len(data)
+    body_width = max(1.0, step * 0.7)
+    xs = (np.arange(len(data)) + 0.5) * step
+
+    usable = height - TITLE_HEIGHT
+    price_top = TITLE_HEIGHT
+    price_bottom = price_top + usable * PANEL_SHARES[0]
+    volume_bottom = price_bottom + usable * PANEL_SHARES[1]
+    macd_bottom = height - 1
+
+    # Price panel with candles and EMA21
+    low = float(np.nanmin(np.concatenate([lows, ema_values])))
+    high = float(np.nanmax(np.concatenate([highs, ema_values])))
+    _panel_frame(draw, font, price_top, price_bottom, width, low, high, 7)
+    colors = [UP if c >= o else DOWN for o, c in zip(opens, closes)]
+    high_ys = _scale(highs, low, high, price_top, price_bottom)
+    low_ys = _scale(lows, low, high, price_top, price_bottom)
+    open_ys = _scale(opens, low, high, price_top, price_bottom)
+    close_ys = _scale(closes, low, high, price_top, price_bottom)
+    for x, hy, ly, oy, cy, color in zip(xs, high_ys, low_ys, open_ys, close_ys, colors):
+        draw.line([(x, hy), (x, ly)], fill=color)
+        draw.rectangle([x - body_width / 2, min(oy, cy), x + body_width / 2, max(oy, cy)], fill=color)
+    _polyline(draw, xs, _scale(ema_values, low, high, price_top, price_bottom), EMA_COLOR)
+
+    # Volume panel
+    _panel_frame(draw, font, price_bottom, volume_bottom, width, 0, float(volumes.max()), 3)
+    volume_ys = _scale(volumes, 0, float(volumes.max()), price_bottom, volume_bottom)
+    for x, y, color in zip(xs, volume_ys, colors):
+        draw.rectangle([x - body_width / 2, y, x + body_width / 2, volume_bottom], fill=color)
+
+    # MACD panel with histogram, MACD and signal lines
+    finite = np.concatenate([macd_line, signal_line, histogram])
+    finite = finite[~np.isnan(finite)]
+    bound = float(np.abs(finite).max()) if finite.size else 1.0
+    _panel_frame(draw, font, volume_bottom, macd_bottom, width, -bound, bound, 3)
+    zero_y = _scale(0.0, -bound, bound, volume_bottom, macd_bottom)
+    for x, value in zip(xs, histogram):
+        if not np.isnan(value):
+            y = _scale(value, -bound, bound, volume_bottom, macd_bottom)
+            draw.rectangle([x - body_width / 2, min(y, zero_y), x + body_width / 2, max(y, zero_y)],
+                           fill=UP if value >= 0 else DOWN)
+    _polyline(draw, xs, _scale(macd_line, -bound, bound, volume_bottom, macd_bottom), MACD_COLOR)
+    _polyline(draw, xs, _scale(signal_line, -bound, bound, volume_bottom, macd_bottom), SIGNAL_COLOR)
+
+    # Title and last price
+    last_time = datetime.fromtimestamp(data[-1, 0] / 1000).strftime('%Y-%m-%d %H:%M')
+    draw.text((6, 6), f"{title}  O {opens[-1]:.7g}  H {highs[-1]:.7g}  L {lows[-1]:.7g}  C {closes[-1]:.7g}  "
+                      f"EMA{EMA_PERIOD} {ema_values[-1]:.7g}  {last_time}", fill=TEXT, font=font)
+    last_y = float(close_ys[-1])
+    draw.rectangle([plot_width, last_y - 7, width, last_y + 7], fill=colors[-1])
+    draw.text((plot_width + 4, last_y - 6), f"{closes[-1]:.7g}", fill=BACKGROUND, font=font)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', optimize=False)
+    return buffer.getvalue()
+
+
+def build_chart_path(currency, timeframe, date_dir=None, output_dir=None):
+    """
+    Build the chart path under <output_dir>/<date>/<currency>/, the layout used for screenshots
+
+    Returns:
+        str: Path to the PNG file
+    """
+    output_dir = output_dir or SCREENSHOT_OUTPUT_DIR
+    date_dir = date_dir or datetime.now().strftime('%Y-%m-%d')
+    currency_dir = os.path.join(output_dir, date_dir, currency)
+    os.makedirs(currency_dir, exist_ok=True)
+
+    timestamp_str = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return os.path.join(currency_dir, f'{timestamp_str}_{currency}_{timeframe}_chart.png')
+
+
+def _render_job(job):
+    """
+    Render one chart in a worker process and write it to disk
+
+    Args:
+        job (tuple): (currency, timeframe, klines, path)
+
+    Returns:
+        str: Path to the written PNG file
+    """
+    currency, timeframe, klines, path = job
+    png = render_candlestick_chart(klines, title=f"{currency} {timeframe}")
+    with open(path, 'wb') as f:
+        f.write(png)
+    return path
+
+
+def render_charts(snapshots, timeframes=None, max_workers=None, date_dir=None):
+    """
+    Render a chart per currency and timeframe from REST market snapshots in a process pool
+
+    Args:
+        snapshots (dict): Currency -> market snapshot with klines (see utils.market_data)
+        timeframes (list): Timeframes to render (default: MARKET_DATA_TIMEFRAMES)
+        max_workers (int): Number of worker processes (default: CHART_RENDER_WORKERS)
+        date_dir (str): Date directory name (default: today)
+
+    Returns:
+        list: Paths to the rendered charts, ordered by currency and timeframe
+    """
+    logger = logging.getLogger('binance_trade_analyzer')
+
+    timeframes = timeframes or MARKET_DATA_TIMEFRAMES
+    max_workers = max_workers or CHART_RENDER_WORKERS
+
+    jobs = []
+    for currency, snapshot in snapshots.items():
+        for timeframe in timeframes:
+            klines = snapshot.get('klines', {}).get(timeframe)
+            if klines:
+                jobs.append((currency, timeframe, klines, build_chart_path(currency, timeframe, date_dir)))
+
+    if not jobs:
+        return []
+
+    file_paths = []
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(jobs))) as executor:
+        futures = [executor.submit(_render_job, job) for job in jobs]
+        # Collect in submission order, so the output order is deterministic
+        for job, future in zip(jobs, futures):
+            try:
+                file_paths.append(future.result())
+                logger.info(f"Rendered {job[1]} chart for {job[0]} to {job[3]}")
+            except Exception as e:
+                logger.error(f"Error rendering {job[1]} chart for {job[0]}: {str(e)}")
+    return file_paths
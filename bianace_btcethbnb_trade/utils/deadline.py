@@ -0,0 +1,128 @@
+import time
+
+
+class BudgetExceeded(TimeoutError):
+    """
+    Raised when a stage is about to start but its deadline has no time left
+    """
+
+
+class Deadline:
+    """
+    Time budget that propagates through a capture. A child deadline (e.g. one symbol inside
+    a run) never outlasts its parent, and stage timeouts shrink to whatever is left, so a
+    slow stage eats into the budget of later ones instead of extending the run.
+    Stages that were cut short or ran out of time are recorded for the result report.
+    """
+
+    def __init__(self, budget_s, parent=None, label=''):
+        """
+        Args:
+            budget_s (float): Budget in seconds from now (None: only the parent's budget applies)
+            parent (Deadline): Enclosing deadline
+            label (str): Label used in reports (e.g., the currency)
+        """
+        self.start = time.monotonic()
+        self.expires_at = self.start + budget_s if budget_s else None
+        self.parent = parent
+        self.label = label
+        self.stage = None
+        self.clipped_stages = []
+        self.timed_out_stages = []
+
+    def remaining_s(self):
+        """
+        Returns:
+            float: Seconds left, including the parent's limit (inf when unlimited)
+        """
+        remaining = self.expires_at - time.monotonic() if self.expires_at else float('inf')
+        if self.parent is not None:
+            remaining = min(remaining, self.parent.remaining_s())
+        return max(0.0, remaining)
+
+    def expired(self):
+        return self.remaining_s() <= 0
+
+    def elapsed_s(self):
+        return time.monotonic() - self.start
+
+    def child(self, budget_s, label=''):
+        """
+        Deadline for a part of this one, e.g. one symbol of a run
+
+        Returns:
+            Deadline: Deadline that ends at the earlier of budget_s from now and this deadline
+        """
+        return Deadline(budget_s, parent=self, label=label)
+
+    def stage_timeout_ms(self, stage, default_ms):
+        """
+        Start a stage and return its timeout: the stage default, shrunk to the remaining budget
+
+        Args:
+            stage (str): Stage name (e.g., goto, load, readiness, screenshot)
+            default_ms (int): Timeout of the stage when there is enough budget
+
+        Returns:
+            int: Timeout in milliseconds
+
+        Raises:
+            BudgetExceeded: If there is no time left for the stage
+        """
+        self.stage = stage
+        remaining_ms = self.remaining_s() * 1000
+        if remaining_ms <= 0:
+            self.mark_timed_out()
+            raise BudgetExceeded(f"No time left for {stage}" + (f" of {self.label}" if self.label else ''))
+        if remaining_ms < default_ms and stage not in self.clipped_stages:
+            self.clipped_stages.append(stage)
+        return int(max(1, min(default_ms, remaining_ms)))
+
+    def mark_timed_out(self):
+        """
+        Record the current stage as one that ran out of time
+        """
+        if self.stage and self.stage not in self.timed_out_stages:
+            self.timed_out_stages.append(self.stage)
+
+    def sleep(self, seconds):
+        """
+        Sleep for seconds, but not past the deadline
+
+        Returns:
+            bool: True if time is left after sleeping
+        """
+        time.sleep(min(seconds, self.remaining_s()))
+        return not self.expired()
+
+    def report(self):
+        """
+        Returns:
+            dict: elapsed_s, expired, clipped_stages and timed_out_stages
+        """
+        return {
+            'elapsed_s': round(self.elapsed_s(), 2),
+            'expired': self.expired(),
+            'clipped_stages': list(self.clipped_stages),
+            'timed_out_stages': list(self.timed_out_stages)
+        }
+
+
+def stage_timeout_ms(deadline, stage, default_ms):
+    """
+    Timeout of a stage under an optional deadline (see Deadline.stage_timeout_ms)
+
+    Args:
+        deadline (Deadline): Deadline of the capture, or None for no budget
+        stage (str): Stage name
+        default_ms (int): Timeout of the stage when there is enough budget
+
+    Returns:
+        int: Timeout in milliseconds
+
+    Raises:
+        BudgetExceeded: If there is no time left for the stage
+    """
+    if deadline is None:
+        return default_ms
+    return deadline.stage_timeout_ms(stage, default_ms)
@@ -1,7 +1,31 @@
 import requests
 import json
-from config.settings import DEEPSEEK_API_KEY, DEEPSEEK_API_BASE, DEEPSEEK_MODEL
+import random
+import logging
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from config.settings import (
+    DEEPSEEK_API_KEY,
+    DEEPSEEK_API_BASE,
+    DEEPSEEK_MODEL,
+    DEEPSEEK_CONNECT_TIMEOUT,
+    DEEPSEEK_READ_TIMEOUT,
+    DEEPSEEK_POOL_SIZE,
+    DEEPSEEK_BACKOFF_BASE_S,
+    DEEPSEEK_BACKOFF_MAX_S,
+    DEEPSEEK_STREAM,
+    LARK_STREAM_PROGRESS_INTERVAL_S,
+    INDICATORS_ENABLED
+)
+from utils.dom_extractor import load_market_snapshot, format_market_snapshot
+from utils.market_data import format_klines
+from utils.indicators import build_indicator_table
+from utils.lark_notifier import LarkNotifier
+from utils.response_cache import get_response_cache, payload_cache_key
 import base64
+import mimetypes
 import os
 import time
 from typing import Optional
@@ -21,122 +45,510 @@ def encode_image_to_base64(image_path):
         return base64.b64encode(image_file.read()).decode('utf-8')
 
 
-def send_to_deepseek(screenshot_path, document_content, prompt=None, max_retries=3):
+def _api_key_configured():
+    return bool(DEEPSEEK_API_KEY and DEEPSEEK_API_KEY.strip()) and DEEPSEEK_API_KEY != "your_api_key_here"
+
+
+def mock_response(content):
     """
-    Send screenshot and document content to DeepSeek API with retry mechanism
+    Response in the API's format, returned instead of calling the API when no API key is configured
+    
+    Args:
+        content (str): Message content
+    
+    Returns:
+        dict: Mock response
+    """
+    return {
+        "choices": [{
+            "message": {
+                "content": content
+            }
+        }]
+    }
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header given either in seconds or as an HTTP date
+    
+    Args:
+        value (str): Header value
+    
+    Returns:
+        float: Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class DeepSeekClient:
+    """
+    DeepSeek API client holding one pooled keep-alive session, so requests after the first
+    skip the TCP and TLS handshake. Every request has separate connect and read timeouts,
+    and retries wait for Retry-After when the server sends it, otherwise for a jittered backoff.
+    """
+    
+    def __init__(self, api_key=None, api_base=None, connect_timeout=None, read_timeout=None, pool_size=None):
+        """
+        Args:
+            api_key (str): API key (default: DEEPSEEK_API_KEY)
+            api_base (str): API base URL (default: DEEPSEEK_API_BASE)
+            connect_timeout (float): Connect timeout in seconds (default: DEEPSEEK_CONNECT_TIMEOUT)
+            read_timeout (float): Read timeout in seconds (default: DEEPSEEK_READ_TIMEOUT)
+            pool_size (int): Maximum pooled connections (default: DEEPSEEK_POOL_SIZE)
+        """
+        self.api_base = (api_base or DEEPSEEK_API_BASE).rstrip('/')
+        self.timeout = (connect_timeout or DEEPSEEK_CONNECT_TIMEOUT, read_timeout or DEEPSEEK_READ_TIMEOUT)
+        pool_size = pool_size or DEEPSEEK_POOL_SIZE
+        
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key or DEEPSEEK_API_KEY}",
+            "Content-Type": "application/json"
+        })
+    
+    def warmup(self):
+        """
+        Open a pooled connection to the API host, so the first completion doesn't pay for
+        DNS, TCP and TLS. Failures are only logged.
+        
+        Returns:
+            bool: True if the API answered
+        """
+        logger = logging.getLogger('binance_trade_analyzer')
+        start = time.monotonic()
+        try:
+            self.session.get(f"{self.api_base}/models", timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"DeepSeek connection warmup failed: {str(e)}")
+            return False
+        logger.info(f"DeepSeek connection warmed up in {(time.monotonic() - start) * 1000:.0f} ms")
+        return True
+    
+    def warmup_in_background(self):
+        """
+        Run warmup in a daemon thread, e.g. while screenshots are being captured
+        
+        Returns:
+            threading.Thread: The warmup thread
+        """
+        thread = threading.Thread(target=self.warmup, name='deepseek-warmup', daemon=True)
+        thread.start()
+        return thread
+    
+    def retry_delay(self, attempt, response=None):
+        """
+        Seconds to wait before the next attempt: Retry-After when the server sent it,
+        otherwise exponential backoff with full jitter
+        
+        Args:
+            attempt (int): Zero-based number of the attempt that failed
+            response (requests.Response): Failed response, if any
+        
+        Returns:
+            float: Seconds to wait
+        """
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                return min(retry_after, DEEPSEEK_BACKOFF_MAX_S)
+        return random.uniform(0, min(DEEPSEEK_BACKOFF_MAX_S, DEEPSEEK_BACKOFF_BASE_S * 2 ** attempt))
+    
+    def post(self, payload, stream=False):
+        """
+        Send one chat completion request without retrying
+        
+        Args:
+            payload (dict): Request body
+            stream (bool): Request server-sent events and don't read the body yet (see read_stream)
+        
+        Returns:
+            requests.Response: Raw response
+        
+        Raises:
+            Exception: For statuses that retrying can't fix (invalid key, no balance, unknown model)
+        """
+        if stream:
+            payload = dict(payload, stream=True, stream_options={'include_usage': True})
+        response = self.session.post(
+            f"{self.api_base}/chat/completions", json=payload, timeout=self.timeout, stream=stream
+        )
+        if response.status_code == 401:  # Unauthorized
+            raise Exception("Invalid API key")
+        elif response.status_code == 402:  # Insufficient balance
+            raise Exception("Insufficient balance")
+        elif response.status_code == 404:  # Not found
+            raise Exception("Model not found")
+        return response
+    
+    def read_stream(self, response, on_delta=None, start=None):
+        """
+        Read a server-sent events completion chunk by chunk
+        
+        Args:
+            response (requests.Response): Streaming response from post(payload, stream=True)
+            on_delta (callable): Called with each content chunk as it arrives
+            start (float): time.monotonic() when the request was sent (default: now)
+        
+        Returns:
+            dict: Response in the non-streaming format, plus metrics with
+                  time_to_first_token_s and total_s
+        """
+        start = start or time.monotonic()
+        parts = []
+        first_token_s = None
+        finish_reason = None
+        usage = None
+        try:
+            for line in response.iter_lines():
+                # Blank lines separate events, lines starting with ':' are keep-alive comments
+                if not line or line.startswith(b':') or not line.startswith(b'data:'):
+                    continue
+                data = line[len(b'data:'):].strip()
+                if data == b'[DONE]':
+                    break
+                chunk = json.loads(data)
+                usage = chunk.get('usage') or usage
+                for choice in chunk.get('choices', []):
+                    finish_reason = choice.get('finish_reason') or finish_reason
+                    content = (choice.get('delta') or {}).get('content')
+                    if not content:
+                        continue
+                    if first_token_s is None:
+                        first_token_s = time.monotonic() - start
+                        logging.getLogger('binance_trade_analyzer').info(
+                            f"DeepSeek time to first token: {first_token_s:.2f}s"
+                        )
+                    parts.append(content)
+                    if on_delta:
+                        on_delta(content)
+        except requests.exceptions.RequestException as e:
+            if parts:
+                # Retrying would repeat the chunks that were already delivered
+                raise Exception(f"Stream interrupted after {len(''.join(parts))} characters: {str(e)}")
+            raise
+        finally:
+            response.close()
+        
+        return {
+            "choices": [{
+                "message": {"role": "assistant", "content": ''.join(parts)},
+                "finish_reason": finish_reason
+            }],
+            "usage": usage,
+            "metrics": {
+                "time_to_first_token_s": round(first_token_s, 3) if first_token_s is not None else None,
+                "total_s": round(time.monotonic() - start, 3)
+            }
+        }
+    
+    def chat_completion(self, payload, max_retries=3, on_delta=None):
+        """
+        POST a chat completion request with retry mechanism
+        
+        Args:
+            payload (dict): Request body
+            max_retries (int): Maximum number of attempts
+            on_delta (callable): Stream the completion and call this with each chunk as it arrives
+        
+        Returns:
+            dict: Response from DeepSeek API
+        """
+        for attempt in range(max_retries):
+            try:
+                start = time.monotonic()
+                response = self.post(payload, stream=on_delta is not None)
+                if response.status_code == 200:
+                    result = self.read_stream(response, on_delta, start) if on_delta is not None else response.json()
+                    prompt_cache_usage.record(result)
+                    return result
+                
+                error_msg = f"API request failed with status code {response.status_code}: {response.text}"
+                if attempt < max_retries - 1:
+                    wait_time = self.retry_delay(attempt, response)
+                    if response.status_code == 429:  # Rate limit
+                        print(f"Rate limit hit, waiting {wait_time:.1f} seconds before retry...")
+                    else:
+                        print(f"Error: {error_msg}, retrying in {wait_time:.1f} seconds...")
+                    time.sleep(wait_time)
+                    continue
+                raise Exception(error_msg)
+            
+            except requests.exceptions.RequestException as e:
+                if attempt < max_retries - 1:
+                    wait_time = self.retry_delay(attempt)
+                    print(f"Network error: {str(e)}, retrying in {wait_time:.1f} seconds...")
+                    time.sleep(wait_time)
+                    continue
+                raise Exception(f"Network error after {max_retries} attempts: {str(e)}")
+        
+        # This should never be reached due to the retry logic
+        raise Exception("Unexpected error")
+    
+    def close(self):
+        self.session.close()
+
+
+# Client shared by all requests of this process
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_deepseek_client():
+    """
+    Return the shared DeepSeek client, creating it on first use
+    
+    Returns:
+        DeepSeekClient: Shared client
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = DeepSeekClient()
+        return _client
+
+
+def warm_up_deepseek():
+    """
+    Warm the shared client's connection in the background while other work (e.g. capture) runs.
+    Does nothing in mock mode without an API key.
+    
+    Returns:
+        threading.Thread: The warmup thread, or None
+    """
+    if not _api_key_configured():
+        return None
+    return get_deepseek_client().warmup_in_background()
+
+
+# Fixed instructions at the start of every request. Together with the rules document they form
+# a prefix that is identical across calls, which DeepSeek serves from its context cache;
+# everything that changes per call goes into the user message after it.
+SYSTEM_INSTRUCTIONS = (
+    "You are a trading analyst for Binance USDT-M perpetual futures. "
+    "Analyze the market data, screenshots and indicators in the user message strictly according to "
+    "the trading rules document below, and base every signal and recommendation on those rules."
+)
+
+
+def build_system_message(document_content):
+    """
+    System message with the fixed instructions and the rules document. It must not contain
+    anything that changes between calls, or the provider-side prefix cache misses.
     
     Args:
-        screenshot_path (str): Path to the screenshot image
         document_content (str): Content of the trade rules document
-        prompt (str): Custom prompt to send with the request
+    
+    Returns:
+        dict: System message
+    """
+    return {
+        "role": "system",
+        "content": f"{SYSTEM_INSTRUCTIONS}\n\nTrading Rules Document:\n{document_content}"
+    }
+
+
+class PromptCacheUsage:
+    """
+    prompt_cache_hit_tokens / prompt_cache_miss_tokens reported by DeepSeek, summed over a run
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        self.requests = 0
+        self.hit_tokens = 0
+        self.miss_tokens = 0
+    
+    def record(self, response):
+        """
+        Add the cache usage of a response and log it
+        
+        Args:
+            response (dict): Response from DeepSeek API
+        """
+        usage = response.get('usage') or {}
+        if 'prompt_cache_hit_tokens' not in usage and 'prompt_cache_miss_tokens' not in usage:
+            return
+        hit = usage.get('prompt_cache_hit_tokens', 0)
+        miss = usage.get('prompt_cache_miss_tokens', 0)
+        with self._lock:
+            self.requests += 1
+            self.hit_tokens += hit
+            self.miss_tokens += miss
+        logging.getLogger('binance_trade_analyzer').info(f"Prompt cache: {hit} hit tokens, {miss} miss tokens")
+    
+    def report(self):
+        """
+        Returns:
+            dict: requests, prompt_cache_hit_tokens, prompt_cache_miss_tokens and hit_ratio
+        """
+        with self._lock:
+            total = self.hit_tokens + self.miss_tokens
+            return {
+                'requests': self.requests,
+                'prompt_cache_hit_tokens': self.hit_tokens,
+                'prompt_cache_miss_tokens': self.miss_tokens,
+                'hit_ratio': round(self.hit_tokens / total, 3) if total else None
+            }
+
+
+prompt_cache_usage = PromptCacheUsage()
+
+
+def log_prompt_cache_report(reset=True, logger=None):
+    """
+    Log the prompt cache usage of the run so far
+    
+    Args:
+        reset (bool): Start counting a new run afterwards (e.g., for the next scheduled run)
+        logger (logging.Logger): Logger to use (default: binance_trade_analyzer)
+    
+    Returns:
+        dict: Report from PromptCacheUsage.report
+    """
+    report = prompt_cache_usage.report()
+    if report['requests']:
+        ratio = f"{report['hit_ratio'] * 100:.0f}%" if report['hit_ratio'] is not None else 'n/a'
+        (logger or logging.getLogger('binance_trade_analyzer')).info(
+            f"Prompt cache over {report['requests']} requests: {report['prompt_cache_hit_tokens']} hit tokens, "
+            f"{report['prompt_cache_miss_tokens']} miss tokens ({ratio} hit)"
+        )
+    if reset:
+        prompt_cache_usage.reset()
+    return report
+
+
+def _post_chat_completion(payload, max_retries=3, report_path=None, currency=None, cache_key=None):
+    """
+    POST a chat completion request to the DeepSeek API over the shared client
+    
+    Args:
+        payload (dict): Request body
         max_retries (int): Maximum number of retries for failed requests
+        report_path (str): Stream the completion into this report file while it is generated
+        currency (str): Currency pair, used in progress notifications
+        cache_key (str): Response cache key (see utils.response_cache.payload_cache_key)
     
     Returns:
         dict: Response from DeepSeek API
     """
+    cache = get_response_cache() if cache_key else None
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+    
+    if report_path and DEEPSEEK_STREAM:
+        with ReportStream(report_path, currency) as report:
+            response = get_deepseek_client().chat_completion(payload, max_retries, on_delta=report.write)
+    else:
+        response = get_deepseek_client().chat_completion(payload, max_retries)
+    
+    if cache is not None:
+        cache.put(cache_key, response)
+    return response
+
+
+def build_screenshot_payload(screenshot_path, document_content, prompt=None, indicator_table=None):
+    """
+    Build the chat completion request for one screenshot
+    
+    Args:
+        screenshot_path (str): Path to the screenshot image
+        document_content (str): Content of the trade rules document
+        prompt (str): Custom prompt to send with the request
+        indicator_table (str): Indicator table from utils.indicators to include
+    
+    Returns:
+        dict: Request body
+    """
     if not prompt:
         prompt = "Based on the trading rules document and the Binance futures contract screenshot, please analyze and provide insights."
     
-    # Check if we're in test mode (no API key)
-    if DEEPSEEK_API_KEY == "your_api_key_here" or not DEEPSEEK_API_KEY or DEEPSEEK_API_KEY.strip() == "":
-        # Return mock response for testing
-        return {
-            "choices": [{
-                "message": {
-                    "content": f"[Mock Response] Analysis of the Binance futures contract with the provided trading rules would go here. In actual implementation, this would be processed by DeepSeek AI.\n\nDocument Content Preview:\n{document_content[:500]}..."
-                }
-            }]
-        }
-    
     # For DeepSeek, we'll send only the text content since it doesn't support image inputs
     # We'll describe the image content instead
     image_description = f"Screenshot of Binance futures contract page saved at: {screenshot_path}"
-    
-    headers = {
-        "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
-        "Content-Type": "application/json"
-    }
+    snapshot = load_market_snapshot(screenshot_path)
+    if snapshot:
+        image_description += f"\nMarket data read from the page: {format_market_snapshot(snapshot)}"
+    if indicator_table:
+        image_description += f"\n\nIndicators computed from exchange klines:\n{indicator_table}"
     
     payload = {
         "model": DEEPSEEK_MODEL,
         "messages": [
+            build_system_message(document_content),
             {
                 "role": "user",
-                "content": f"{prompt}\n\n{image_description}\n\nTrading Rules Document:\n{document_content}"
+                "content": f"{prompt}\n\n{image_description}"
             }
         ],
         "max_tokens": 2048
     }
     
-    # Retry mechanism
-    for attempt in range(max_retries):
-        try:
-            response = requests.post(f"{DEEPSEEK_API_BASE}/chat/completions", headers=headers, json=payload)
-            
-            if response.status_code == 200:
-                return response.json()
-            elif response.status_code == 429:  # Rate limit
-                wait_time = 2 ** attempt  # Exponential backoff
-                print(f"Rate limit hit, waiting {wait_time} seconds before retry...")
-                time.sleep(wait_time)
-                continue
-            elif response.status_code == 401:  # Unauthorized
-                raise Exception("Invalid API key")
-            elif response.status_code == 402:  # Insufficient balance
-                raise Exception("Insufficient balance")
-            elif response.status_code == 404:  # Not found
-                raise Exception("Model not found")
-            else:
-                error_msg = f"API request failed with status code {response.status_code}: {response.text}"
-                if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt
-                    print(f"Error: {error_msg}, retrying in {wait_time} seconds...")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    raise Exception(error_msg)
-        
-        except requests.exceptions.RequestException as e:
-            if attempt < max_retries - 1:
-                wait_time = 2 ** attempt
-                print(f"Network error: {str(e)}, retrying in {wait_time} seconds...")
-                time.sleep(wait_time)
-                continue
-            else:
-                raise Exception(f"Network error after {max_retries} attempts: {str(e)}")
+    return payload
+
+
+def send_to_deepseek(screenshot_path, document_content, prompt=None, max_retries=3, indicator_table=None, report_path=None):
+    """
+    Send screenshot and document content to DeepSeek API with retry mechanism
     
-    # This should never be reached due to the retry logic
-    raise Exception("Unexpected error")
+    Args:
+        screenshot_path (str): Path to the screenshot image
+        document_content (str): Content of the trade rules document
+        prompt (str): Custom prompt to send with the request
+        max_retries (int): Maximum number of retries for failed requests
+        indicator_table (str): Indicator table from utils.indicators to include
+        report_path (str): Stream the completion into this report file while it is generated
+    
+    Returns:
+        dict: Response from DeepSeek API
+    """
+    # Check if we're in test mode (no API key)
+    if not _api_key_configured():
+        # Return mock response for testing
+        return mock_response(f"[Mock Response] Analysis of the Binance futures contract with the provided trading rules would go here. In actual implementation, this would be processed by DeepSeek AI.\n\nDocument Content Preview:\n{document_content[:500]}...")
+    
+    payload = build_screenshot_payload(screenshot_path, document_content, prompt, indicator_table)
+    cache_key = payload_cache_key(payload, [screenshot_path])
+    return _post_chat_completion(payload, max_retries, report_path, cache_key=cache_key)
 
 
-def send_multiple_screenshots_to_deepseek(screenshot_paths, document_content, currency, prompt=None, max_retries=3):
+def build_multiple_screenshots_payload(screenshot_paths, document_content, currency, prompt=None, indicator_table=None):
     """
-    Send multiple screenshots and document content to DeepSeek API with retry mechanism
+    Build the chat completion request for multiple screenshots of a currency
     
     Args:
         screenshot_paths (list): List of paths to the screenshot images
         document_content (str): Content of the trade rules document
         currency (str): Currency pair being analyzed
         prompt (str): Custom prompt to send with the request
-        max_retries (int): Maximum number of retries for failed requests
+        indicator_table (str): Indicator table from utils.indicators to include
     
     Returns:
-        dict: Response from DeepSeek API
+        dict: Request body
     """
     if not prompt:
         prompt = f"Based on the trading rules document and multiple Binance futures contract screenshots for {currency}, please analyze and provide comprehensive insights."
     
-    # Check if we're in test mode (no API key)
-    if DEEPSEEK_API_KEY == "your_api_key_here" or not DEEPSEEK_API_KEY or DEEPSEEK_API_KEY.strip() == "":
-        # Return mock response for testing
-        return {
-            "choices": [{
-                "message": {
-                    "content": f"[Mock Response] Comprehensive analysis of {len(screenshot_paths)} Binance futures contract screenshots for {currency} with the provided trading rules would go here. In actual implementation, this would be processed by DeepSeek AI.\n\nDocument Content Preview:\n{document_content[:500]}...\n\nScreenshots processed: {screenshot_paths}"
-                }
-            }]
-        }
-    
     # Prepare both image encodings and text descriptions for future multi-modal support
     encoded_images = []
     screenshots_description = f"Multiple screenshots of Binance futures contract pages for {currency}:\n"
@@ -149,33 +561,34 @@ def send_multiple_screenshots_to_deepseek(screenshot_paths, document_content, cu
                 'index': i,
                 'path': path,
                 'encoded': encoded_image,
-                'mime_type': 'image/png'  # Assuming PNG format, adjust as needed
+                'mime_type': mimetypes.guess_type(path)[0] or 'image/png'
             })
             screenshots_description += f"  - Screenshot {i}: {path}\n"
+            snapshot = load_market_snapshot(path)
+            if snapshot:
+                screenshots_description += f"    Market data: {format_market_snapshot(snapshot)}\n"
         except Exception as e:
             print(f"Warning: Could not encode image {path}: {str(e)}")
             screenshots_description += f"  - Screenshot {i}: {path} [Could not encode]\n"
     
-    headers = {
-        "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
-        "Content-Type": "application/json"
-    }
+    if indicator_table:
+        screenshots_description += f"\nIndicators computed from exchange klines:\n{indicator_table}\n"
     
     # Build message content - currently using text description since DeepSeek doesn't support image inputs
     # But we're structuring it to be ready for multi-modal support in the future
-    content_text = f"{prompt}\n\n{screenshots_description}\n\nTrading Rules Document:\n{document_content}"
+    content_text = f"{prompt}\n\n{screenshots_description}"
     
     # Note: When DeepSeek adds image support, we can modify this to include base64-encoded images
     # Example format for future use:
     # content = [
     #     {"type": "text", "text": prompt},
     #     * [{"type": "image_url", "image_url": {"url": f"data:{img['mime_type']};base64,{img['encoded']}"} for img in encoded_images],
-    #     {"type": "text", "text": f"Trading Rules Document:\n{document_content}"}
     # ]
     
     payload = {
         "model": DEEPSEEK_MODEL,
         "messages": [
+            build_system_message(document_content),
             {
                 "role": "user",
                 "content": content_text
@@ -184,45 +597,167 @@ def send_multiple_screenshots_to_deepseek(screenshot_paths, document_content, cu
         "max_tokens": 4096  # Increase tokens for multiple screenshots analysis
     }
     
-    # Retry mechanism
-    for attempt in range(max_retries):
-        try:
-            response = requests.post(f"{DEEPSEEK_API_BASE}/chat/completions", headers=headers, json=payload)
-            
-            if response.status_code == 200:
-                return response.json()
-            elif response.status_code == 429:  # Rate limit
-                wait_time = 2 ** attempt  # Exponential backoff
-                print(f"Rate limit hit, waiting {wait_time} seconds before retry...")
-                time.sleep(wait_time)
-                continue
-            elif response.status_code == 401:  # Unauthorized
-                raise Exception("Invalid API key")
-            elif response.status_code == 402:  # Insufficient balance
-                raise Exception("Insufficient balance")
-            elif response.status_code == 404:  # Not found
-                raise Exception("Model not found")
-            else:
-                error_msg = f"API request failed with status code {response.status_code}: {response.text}"
-                if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt
-                    print(f"Error: {error_msg}, retrying in {wait_time} seconds...")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    raise Exception(error_msg)
+    return payload
+
+
+def send_multiple_screenshots_to_deepseek(screenshot_paths, document_content, currency, prompt=None, max_retries=3, indicator_table=None, report_path=None):
+    """
+    Send multiple screenshots and document content to DeepSeek API with retry mechanism
+    
+    Args:
+        screenshot_paths (list): List of paths to the screenshot images
+        document_content (str): Content of the trade rules document
+        currency (str): Currency pair being analyzed
+        prompt (str): Custom prompt to send with the request
+        max_retries (int): Maximum number of retries for failed requests
+        indicator_table (str): Indicator table from utils.indicators to include
+        report_path (str): Stream the completion into this report file while it is generated
+    
+    Returns:
+        dict: Response from DeepSeek API
+    """
+    # Check if we're in test mode (no API key)
+    if not _api_key_configured():
+        # Return mock response for testing
+        return mock_response(f"[Mock Response] Comprehensive analysis of {len(screenshot_paths)} Binance futures contract screenshots for {currency} with the provided trading rules would go here. In actual implementation, this would be processed by DeepSeek AI.\n\nDocument Content Preview:\n{document_content[:500]}...\n\nScreenshots processed: {screenshot_paths}")
+    
+    payload = build_multiple_screenshots_payload(screenshot_paths, document_content, currency, prompt, indicator_table)
+    cache_key = payload_cache_key(payload, screenshot_paths)
+    return _post_chat_completion(payload, max_retries, report_path, currency, cache_key)
+
+
+def send_market_data_to_deepseek(snapshots, document_content, currency, prompt=None, max_retries=3, report_path=None):
+    """
+    Send REST market snapshots (no screenshots) and document content to DeepSeek API
+    
+    Args:
+        snapshots (list): Market snapshots from utils.market_data.fetch_market_snapshots
+        document_content (str): Content of the trade rules document
+        currency (str): Currency pair (or report name) being analyzed
+        prompt (str): Custom prompt to send with the request
+        max_retries (int): Maximum number of retries for failed requests
+        report_path (str): Stream the completion into this report file while it is generated
+    
+    Returns:
+        dict: Response from DeepSeek API
+    """
+    if not prompt:
+        prompt = f"Based on the trading rules document and the Binance futures market data for {currency}, please analyze and provide comprehensive insights."
+    
+    # Check if we're in test mode (no API key)
+    if not _api_key_configured():
+        # Return mock response for testing
+        return mock_response(f"[Mock Response] Analysis of Binance futures market data for {currency} with the provided trading rules would go here. In actual implementation, this would be processed by DeepSeek AI.\n\nDocument Content Preview:\n{document_content[:500]}...\n\nSymbols processed: {[s['currency'] for s in snapshots]}")
+    
+    market_description = "Binance futures market data (public REST API):\n"
+    for snapshot in snapshots:
+        market_description += f"- {format_market_snapshot(snapshot)}\n"
+        klines_text = format_klines(snapshot)
+        if klines_text:
+            market_description += f"  Recent klines:\n{klines_text}\n"
+    
+    # Exact indicator values, so the rules can be checked without reading them off a chart
+    if INDICATORS_ENABLED:
+        indicator_table = build_indicator_table([s['currency'] for s in snapshots], {s['currency']: s for s in snapshots})
+        if indicator_table:
+            market_description += f"\nIndicators:\n{indicator_table}\n"
+    
+    payload = {
+        "model": DEEPSEEK_MODEL,
+        "messages": [
+            build_system_message(document_content),
+            {
+                "role": "user",
+                "content": f"{prompt}\n\n{market_description}"
+            }
+        ],
+        "max_tokens": 4096
+    }
+    
+    cache_key = payload_cache_key(payload)
+    return _post_chat_completion(payload, max_retries, report_path, currency, cache_key)
+
+
+# Marks a report that is still being generated; holds its progress as JSON
+PARTIAL_SUFFIX = '.partial'
+
+
+class ReportStream:
+    """
+    Appends streamed completion chunks to a report file as they arrive, so the web app can
+    show the report while it is generated. A <report>.partial file next to it marks the
+    report as in progress and records the time to first token; it is removed when the
+    stream ends. With LARK_STREAM_PROGRESS_INTERVAL_S set, the text so far is also sent
+    to Lark at that interval.
+    """
+    
+    def __init__(self, output_path, currency=None, progress_interval_s=None):
+        """
+        Args:
+            output_path (str): Report file path
+            currency (str): Currency pair, used in progress notifications
+            progress_interval_s (float): Seconds between Lark progress messages, 0 to disable
+                                         (default: LARK_STREAM_PROGRESS_INTERVAL_S)
+        """
+        self.output_path = output_path
+        self.partial_path = output_path + PARTIAL_SUFFIX
+        self.currency = currency
+        self.progress_interval_s = LARK_STREAM_PROGRESS_INTERVAL_S if progress_interval_s is None else progress_interval_s
+        self.start = time.monotonic()
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.time_to_first_token_s = None
+        self.chars = 0
+        self.text = []
+        self.last_progress = self.start
         
-        except requests.exceptions.RequestException as e:
-            if attempt < max_retries - 1:
-                wait_time = 2 ** attempt
-                print(f"Network error: {str(e)}, retrying in {wait_time} seconds...")
-                time.sleep(wait_time)
-                continue
-            else:
-                raise Exception(f"Network error after {max_retries} attempts: {str(e)}")
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        self.file = open(output_path, 'w', encoding='utf-8')
+        self._write_status()
+    
+    def _write_status(self):
+        with open(self.partial_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'currency': self.currency,
+                'started_at': self.started_at,
+                'time_to_first_token_s': self.time_to_first_token_s
+            }, f)
+    
+    def write(self, chunk):
+        """
+        Append a chunk to the report and flush it, so readers see it right away
+        
+        Args:
+            chunk (str): Content chunk
+        """
+        if self.time_to_first_token_s is None:
+            self.time_to_first_token_s = round(time.monotonic() - self.start, 3)
+            self._write_status()
+        self.file.write(chunk)
+        self.file.flush()
+        self.chars += len(chunk)
+        self.text.append(chunk)
+        
+        now = time.monotonic()
+        if self.progress_interval_s and now - self.last_progress >= self.progress_interval_s:
+            self.last_progress = now
+            LarkNotifier().send_progress_notification(
+                self.currency or os.path.basename(self.output_path), ''.join(self.text), now - self.start
+            )
+    
+    def close(self):
+        self.file.close()
+        try:
+            os.remove(self.partial_path)
+        except OSError:
+            pass
+    
+    def __enter__(self):
+        return self
     
-    # This should never be reached due to the retry logic
-    raise Exception("Unexpected error")
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None and self.chars:
+            self.file.write(f"\n\n[Generation interrupted: {str(exc)}]")
+        self.close()
 
 
 def save_response(response, output_path):
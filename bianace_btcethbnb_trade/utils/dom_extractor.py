@@ -0,0 +1,298 @@
+import os
+import re
+import json
+import logging
+from datetime import datetime
+from config.settings import DOM_EXTRACTION, ORDERBOOK_LEVELS
+
+
+# Reads the raw ticker values and order book rows from the Binance futures page in one evaluate call.
+# Ticker values are found by their visible labels, which are more stable than the generated class names.
+EXTRACT_SCRIPT = """
+() => {
+    const text = (el) => ((el && el.textContent) || '').trim();
+    const candidates = Array.from(document.querySelectorAll('div, span, dt, th, label'))
+        .filter(el => el.children.length <= 1);
+
+    // With prefix, labels starting with exclude are skipped (e.g. the quote volume when looking for the base volume)
+    const findLabelValue = (label, prefix, exclude) => {
+        for (const node of candidates) {
+            const t = text(node);
+            if (prefix ? !t.startsWith(label) || (exclude && t.startsWith(exclude)) : t !== label) {
+                continue;
+            }
+            const sibling = node.nextElementSibling;
+            if (sibling && text(sibling)) {
+                return text(sibling);
+            }
+            const parentText = text(node.parentElement);
+            if (parentText.length > t.length) {
+                return parentText.slice(t.length).trim();
+            }
+        }
+        return null;
+    };
+
+    const firstText = (selectors) => {
+        for (const selector of selectors) {
+            const value = text(document.querySelector(selector));
+            if (value) {
+                return value;
+            }
+        }
+        return null;
+    };
+
+    const readRows = (selectors) => {
+        for (const selector of selectors) {
+            const rows = Array.from(document.querySelectorAll(selector))
+                .map(row => (text(row).match(/-?[\\d,]+\\.?\\d*/g) || []).slice(0, 2))
+                .filter(values => values.length === 2);
+            if (rows.length) {
+                return rows;
+            }
+        }
+        return [];
+    };
+
+    return {
+        title: document.title,
+        last_price: firstText(['.contractPrice', '.showPrice', '[class*="lastPrice"]', '[class*="last-price"]']),
+        mark_price: findLabelValue('Mark', false) || findLabelValue('Mark Price', false),
+        index_price: findLabelValue('Index', false) || findLabelValue('Index Price', false),
+        funding: findLabelValue('Funding / Countdown', false) || findLabelValue('Funding Rate', true),
+        high_24h: findLabelValue('24h High', false),
+        low_24h: findLabelValue('24h Low', false),
+        volume_24h_base: findLabelValue('24h Volume(', true, '24h Volume(USDT)'),
+        volume_24h_quote: findLabelValue('24h Volume(USDT)', false),
+        asks: readRows(['.orderbook-ask .row', '.asks .row', '[class*="orderbook"] [class*="ask"] [class*="row"]']),
+        bids: readRows(['.orderbook-bid .row', '.bids .row', '[class*="orderbook"] [class*="bid"] [class*="row"]'])
+    };
+}
+"""
+
+SUFFIX_MULTIPLIERS = {'K': 1e3, 'M': 1e6, 'B': 1e9}
+
+
+def _to_number(value):
+    """
+    Parse a displayed number such as '96,123.4', '1.23B' or '0.0100%'
+
+    Returns:
+        float: Parsed number, or None
+    """
+    if value is None:
+        return None
+    match = re.search(r'(-?[\d,]*\.?\d+)\s*([KMB])?', str(value))
+    if not match:
+        return None
+    number = float(match.group(1).replace(',', ''))
+    if match.group(2):
+        number *= SUFFIX_MULTIPLIERS[match.group(2)]
+    return number
+
+
+def _parse_levels(rows, levels, descending):
+    parsed = []
+    for price, quantity in rows:
+        price, quantity = _to_number(price), _to_number(quantity)
+        if price is not None and quantity is not None:
+            parsed.append([price, quantity])
+    parsed.sort(key=lambda level: level[0], reverse=descending)
+    return parsed[:levels]
+
+
+def parse_market_snapshot(raw, currency, levels=None):
+    """
+    Turn the raw DOM strings into a compact numeric snapshot
+
+    Args:
+        raw (dict): Result of EXTRACT_SCRIPT
+        currency (str): Currency pair
+        levels (int): Number of order book levels per side (default: ORDERBOOK_LEVELS)
+
+    Returns:
+        dict: Numeric market snapshot
+    """
+    levels = levels or ORDERBOOK_LEVELS
+
+    last_price = raw.get('last_price')
+    if not last_price and raw.get('title'):
+        # The page title starts with the last price, e.g. "96,123.4 | BTCUSDT ..."
+        last_price = raw['title'].split('|')[0]
+
+    funding_rate = None
+    countdown = None
+    if raw.get('funding'):
+        parts = raw['funding'].split('/')
+        funding_rate = _to_number(parts[0])
+        if len(parts) > 1:
+            countdown = parts[1].strip()
+
+    return {
+        'currency': currency,
+        'captured_at': datetime.now().isoformat(timespec='seconds'),
+        'last_price': _to_number(last_price),
+        'mark_price': _to_number(raw.get('mark_price')),
+        'index_price': _to_number(raw.get('index_price')),
+        'funding_rate_pct': funding_rate,
+        'funding_countdown': countdown,
+        'high_24h': _to_number(raw.get('high_24h')),
+        'low_24h': _to_number(raw.get('low_24h')),
+        'volume_24h_base': _to_number(raw.get('volume_24h_base')),
+        'volume_24h_quote': _to_number(raw.get('volume_24h_quote')),
+        'asks': _parse_levels(raw.get('asks') or [], levels, descending=False),
+        'bids': _parse_levels(raw.get('bids') or [], levels, descending=True)
+    }
+
+
+def extract_market_snapshot(page, currency, levels=None):
+    """
+    Read price, funding, 24h stats and top order book levels from a loaded sync page
+
+    Args:
+        page: Playwright sync page
+        currency (str): Currency pair
+        levels (int): Number of order book levels per side (default: ORDERBOOK_LEVELS)
+
+    Returns:
+        dict: Numeric market snapshot
+    """
+    raw = page.evaluate(EXTRACT_SCRIPT)
+    return parse_market_snapshot(raw, currency, levels)
+
+
+async def extract_market_snapshot_async(page, currency, levels=None):
+    """
+    Async version of extract_market_snapshot
+
+    Args:
+        page: Playwright async page
+        currency (str): Currency pair
+        levels (int): Number of order book levels per side (default: ORDERBOOK_LEVELS)
+
+    Returns:
+        dict: Numeric market snapshot
+    """
+    raw = await page.evaluate(EXTRACT_SCRIPT)
+    return parse_market_snapshot(raw, currency, levels)
+
+
+def snapshot_path_for(screenshot_path):
+    """
+    Path of the JSON snapshot stored next to a screenshot. The image extension is ignored,
+    so the snapshot is still found after the screenshot was converted to WebP or JPEG.
+
+    Returns:
+        str: Path to the JSON file
+    """
+    return os.path.splitext(screenshot_path)[0] + '.json'
+
+
+def save_market_snapshot(snapshot, screenshot_path):
+    """
+    Write a market snapshot as JSON next to its screenshot
+
+    Returns:
+        str: Path to the JSON file
+    """
+    json_path = snapshot_path_for(screenshot_path)
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, ensure_ascii=False, indent=2)
+    logging.getLogger('binance_trade_analyzer').info(f"Market snapshot for {snapshot['currency']} saved to {json_path}")
+    return json_path
+
+
+def record_market_snapshot(page, currency, screenshot_path):
+    """
+    Extract the market snapshot from a sync page and save it next to the screenshot.
+    Does nothing when DOM_EXTRACTION is disabled; extraction errors never fail the capture.
+
+    Returns:
+        str: Path to the JSON file, or None
+    """
+    if not DOM_EXTRACTION:
+        return None
+    try:
+        return save_market_snapshot(extract_market_snapshot(page, currency), screenshot_path)
+    except Exception as e:
+        print(f"Warning: Could not extract market data for {currency}: {str(e)}")
+        return None
+
+
+async def record_market_snapshot_async(page, currency, screenshot_path):
+    """
+    Async version of record_market_snapshot
+
+    Returns:
+        str: Path to the JSON file, or None
+    """
+    if not DOM_EXTRACTION:
+        return None
+    try:
+        return save_market_snapshot(await extract_market_snapshot_async(page, currency), screenshot_path)
+    except Exception as e:
+        print(f"Warning: Could not extract market data for {currency}: {str(e)}")
+        return None
+
+
+def record_market_snapshot_cdp(client, currency, screenshot_path):
+    """
+    Version of record_market_snapshot for a direct CDP connection (see utils.cdp_client)
+
+    Returns:
+        str: Path to the JSON file, or None
+    """
+    if not DOM_EXTRACTION:
+        return None
+    try:
+        raw = client.evaluate(f"({EXTRACT_SCRIPT})()")
+        return save_market_snapshot(parse_market_snapshot(raw, currency), screenshot_path)
+    except Exception as e:
+        print(f"Warning: Could not extract market data for {currency}: {str(e)}")
+        return None
+
+
+def load_market_snapshot(screenshot_path):
+    """
+    Load the market snapshot stored next to a screenshot
+
+    Returns:
+        dict: Market snapshot, or None if there is none
+    """
+    json_path = snapshot_path_for(screenshot_path)
+    if not os.path.exists(json_path):
+        return None
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Warning: Could not read market snapshot {json_path}: {str(e)}")
+        return None
+
+
+def format_market_snapshot(snapshot):
+    """
+    Format a market snapshot as one compact line for the analysis prompt
+
+    Returns:
+        str: Compact snapshot text
+    """
+    fields = [
+        ('last', 'last_price'),
+        ('mark', 'mark_price'),
+        ('index', 'index_price'),
+        ('funding%', 'funding_rate_pct'),
+        ('funding_in', 'funding_countdown'),
+        ('24h_high', 'high_24h'),
+        ('24h_low', 'low_24h'),
+        ('24h_vol', 'volume_24h_base'),
+        ('24h_vol_usdt', 'volume_24h_quote'),
+        ('24h_change%', 'price_change_24h_pct')
+    ]
+    parts = [f"{label}={snapshot[key]}" for label, key in fields if snapshot.get(key) is not None]
+    if snapshot.get('asks'):
+        parts.append('asks=' + ' '.join(f"{price}x{quantity}" for price, quantity in snapshot['asks']))
+    if snapshot.get('bids'):
+        parts.append('bids=' + ' '.join(f"{price}x{quantity}" for price, quantity in snapshot['bids']))
+    return f"{snapshot.get('currency')} @ {snapshot.get('captured_at')}: " + ', '.join(parts)
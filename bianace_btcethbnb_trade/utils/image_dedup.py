@@ -0,0 +1,246 @@
+import os
+import re
+import json
+import logging
+import numpy as np
+from datetime import datetime
+from PIL import Image
+from config.settings import DEDUP_MAX_HAMMING_DISTANCE, DEDUP_PERSIST_INDEX
+
+
+# 32x32 grid (1024 bits): on an 8x8 hash a 1% move of the last candle, or even a whole new
+# bar, left the hash unchanged, so real price moves were dropped as duplicates
+HASH_SIZE = 32
+
+# Hash index stored next to the currency directories of a day: data/screenshots/<date>/<file>
+INDEX_FILENAME = 'dedup_hashes.json'
+
+
+def compute_hashes(image_path, hash_size=HASH_SIZE):
+    """
+    Compute the average hash (aHash) and difference hash (dHash) of an image
+
+    Args:
+        image_path (str): Path to the image
+        hash_size (int): Hash grid size; the hash has hash_size * hash_size bits
+
+    Returns:
+        tuple: (ahash, dhash) as packed numpy uint8 arrays
+    """
+    with Image.open(image_path) as image:
+        gray = image.convert('L')
+        ahash_pixels = np.asarray(gray.resize((hash_size, hash_size), Image.BILINEAR), dtype=np.float32)
+        dhash_pixels = np.asarray(gray.resize((hash_size + 1, hash_size), Image.BILINEAR), dtype=np.float32)
+
+    ahash = np.packbits(ahash_pixels > ahash_pixels.mean())
+    dhash = np.packbits(dhash_pixels[:, 1:] > dhash_pixels[:, :-1])
+    return ahash, dhash
+
+
+def hamming_distance(hash_a, hash_b):
+    """
+    Number of differing bits between two packed hashes
+
+    Returns:
+        int: Hamming distance
+    """
+    return int(np.unpackbits(np.bitwise_xor(hash_a, hash_b)).sum())
+
+
+def capture_time(image_path):
+    """
+    Capture time of a screenshot, taken from the YYYYMMDD_HHMMSS filename prefix
+    and falling back to the file modification time
+
+    Returns:
+        datetime: Capture time
+    """
+    match = re.match(r'(\d{8}_\d{6})', os.path.basename(image_path))
+    if match:
+        return datetime.strptime(match.group(1), '%Y%m%d_%H%M%S')
+    return datetime.fromtimestamp(os.path.getmtime(image_path))
+
+
+def currency_from_path(image_path):
+    """
+    Currency of a screenshot stored as data/screenshots/<date>/<currency>/<file>
+
+    Returns:
+        str: Currency pair, or the parent directory name for other layouts
+    """
+    return os.path.basename(os.path.dirname(os.path.abspath(image_path)))
+
+
+def index_path_for(image_path):
+    """
+    Path of the hash index of the day a screenshot belongs to
+
+    Returns:
+        str: data/screenshots/<date>/dedup_hashes.json for a screenshot in data/screenshots/<date>/<currency>/
+    """
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(image_path))), INDEX_FILENAME)
+
+
+class PerceptualHashIndex:
+    """
+    Index of screenshot hashes keyed by currency and capture time. With a path it is loaded
+    from and saved to a JSON file, so screenshots of earlier runs are compared against too.
+    """
+
+    def __init__(self, max_distance=None, path=None):
+        """
+        Args:
+            max_distance (int): Maximum Hamming distance for two images to count as duplicates
+                                (default: DEDUP_MAX_HAMMING_DISTANCE)
+            path (str): JSON file to load the index from and save it to (default: in memory only)
+        """
+        self.max_distance = DEDUP_MAX_HAMMING_DISTANCE if max_distance is None else max_distance
+        self.path = path
+        self.entries = {}
+        if path and os.path.exists(path):
+            self.load()
+
+    def load(self):
+        """
+        Read the index file, dropping entries whose screenshot no longer exists
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.getLogger('binance_trade_analyzer').warning(f"Ignoring unreadable dedup index {self.path}: {str(e)}")
+            return
+        for currency, entries in stored.items():
+            for entry in entries:
+                if os.path.exists(entry['path']):
+                    self.add(currency, datetime.fromisoformat(entry['time']), entry['path'],
+                             np.frombuffer(bytes.fromhex(entry['ahash']), dtype=np.uint8),
+                             np.frombuffer(bytes.fromhex(entry['dhash']), dtype=np.uint8))
+
+    def save(self):
+        """
+        Write the index file (no-op for an in-memory index)
+        """
+        if not self.path:
+            return
+        stored = {
+            currency: [
+                {'time': entry['time'].isoformat(), 'path': entry['path'],
+                 'ahash': entry['ahash'].tobytes().hex(), 'dhash': entry['dhash'].tobytes().hex()}
+                for entry in entries
+            ]
+            for currency, entries in self.entries.items()
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(stored, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def contains(self, currency, path):
+        """
+        Whether a screenshot is already indexed, e.g. when a later run lists the day's files again
+        """
+        path = os.path.abspath(path)
+        return any(os.path.abspath(entry['path']) == path for entry in self.entries.get(currency, []))
+
+    def previous(self, currency, timestamp):
+        """
+        Most recent indexed image of a currency captured before the given time
+
+        Returns:
+            dict: Index entry, or None
+        """
+        earlier = [entry for entry in self.entries.get(currency, []) if entry['time'] < timestamp]
+        return max(earlier, key=lambda entry: entry['time']) if earlier else None
+
+    def find_duplicate(self, currency, timestamp, ahash, dhash):
+        """
+        Check whether an image is a near-duplicate of the capture of the same currency right
+        before it. Only consecutive captures are compared: a chart that returns to an earlier
+        state later in the day is still a new observation.
+
+        Returns:
+            dict: Previous index entry if it is a near-duplicate, or None
+        """
+        entry = self.previous(currency, timestamp)
+        # Entries hashed with another hash size can't be compared
+        if entry is None or entry['ahash'].shape != ahash.shape or entry['dhash'].shape != dhash.shape:
+            return None
+        distance = max(hamming_distance(ahash, entry['ahash']), hamming_distance(dhash, entry['dhash']))
+        if distance <= self.max_distance:
+            return dict(entry, distance=distance)
+        return None
+
+    def add(self, currency, timestamp, path, ahash, dhash):
+        """
+        Add an image to the index
+        """
+        self.entries.setdefault(currency, []).append({
+            'time': timestamp,
+            'path': path,
+            'ahash': ahash,
+            'dhash': dhash
+        })
+
+
+def deduplicate_screenshots(image_paths, max_distance=None, index=None, persist=None):
+    """
+    Drop screenshots that are near-duplicates of the previous screenshot of the same currency.
+    With persist, each day's hashes are kept in INDEX_FILENAME next to its screenshots, so the
+    first capture of a run is compared against the last one of the previous run of the day.
+
+    Args:
+        image_paths (list): Paths to screenshots
+        max_distance (int): Maximum Hamming distance for duplicates (default: DEDUP_MAX_HAMMING_DISTANCE)
+        index (PerceptualHashIndex): Existing index to check against and extend (default: one per day, see persist)
+        persist (bool): Load and save the day's index file (default: DEDUP_PERSIST_INDEX)
+
+    Returns:
+        list: Paths to keep, in capture-time order
+    """
+    logger = logging.getLogger('binance_trade_analyzer')
+
+    if persist is None:
+        persist = DEDUP_PERSIST_INDEX
+    day_indexes = {}
+
+    def index_for(path):
+        if index is not None:
+            return index
+        index_path = index_path_for(path) if persist else None
+        if index_path not in day_indexes:
+            day_indexes[index_path] = PerceptualHashIndex(max_distance, index_path)
+        return day_indexes[index_path]
+
+    kept = []
+    for path in sorted(image_paths, key=capture_time):
+        currency = currency_from_path(path)
+        path_index = index_for(path)
+        if path_index.contains(currency, path):
+            kept.append(path)
+            continue
+        try:
+            ahash, dhash = compute_hashes(path)
+        except Exception as e:
+            logger.warning(f"Could not hash {path}, keeping it: {str(e)}")
+            kept.append(path)
+            continue
+
+        timestamp = capture_time(path)
+        duplicate = path_index.find_duplicate(currency, timestamp, ahash, dhash)
+        if duplicate:
+            logger.info(f"Skipping {path}: near-duplicate of {duplicate['path']} (distance {duplicate['distance']})")
+            continue
+
+        path_index.add(currency, timestamp, path, ahash, dhash)
+        kept.append(path)
+
+    for day_index in day_indexes.values():
+        try:
+            day_index.save()
+        except OSError as e:
+            logger.warning(f"Could not save dedup index {day_index.path}: {str(e)}")
+
+    if len(kept) < len(image_paths):
+        logger.info(f"Deduplication kept {len(kept)} of {len(image_paths)} screenshots")
+    return kept
@@ -0,0 +1,134 @@
+import os
+import logging
+from PIL import Image
+from config.settings import (
+    SCREENSHOT_IMAGE_FORMAT,
+    SCREENSHOT_IMAGE_QUALITY,
+    SCREENSHOT_MAX_WIDTH,
+    SCREENSHOT_MAX_HEIGHT,
+    SCREENSHOT_KEEP_ORIGINAL
+)
+
+
+FORMAT_EXTENSIONS = {
+    'webp': '.webp',
+    'jpeg': '.jpg',
+    'jpg': '.jpg'
+}
+
+
+def _encode(image, output_path, image_format, quality, lossless=False):
+    if image_format == 'webp':
+        image.save(output_path, format='WEBP', quality=quality, method=4, lossless=lossless)
+    else:
+        image.save(output_path, format='JPEG', quality=quality, optimize=True, progressive=True)
+    return os.path.getsize(output_path)
+
+
+def compress_screenshot(image_path, image_format=None, quality=None, max_width=None, max_height=None, keep_original=None):
+    """
+    Convert a screenshot to WebP or JPEG, downscale it to the maximum dimensions and strip metadata.
+    Flat chart images often get bigger with lossy WebP, so WebP falls back to lossless encoding,
+    and the original is kept when neither encoding is smaller than it.
+
+    Args:
+        image_path (str): Path to the original screenshot (usually PNG)
+        image_format (str): Target format, 'webp' or 'jpeg' (default: SCREENSHOT_IMAGE_FORMAT)
+        quality (int): Encoder quality 1-100 (default: SCREENSHOT_IMAGE_QUALITY)
+        max_width (int): Maximum output width in pixels (default: SCREENSHOT_MAX_WIDTH)
+        max_height (int): Maximum output height in pixels (default: SCREENSHOT_MAX_HEIGHT)
+        keep_original (bool): Keep the original file next to the compressed one (default: SCREENSHOT_KEEP_ORIGINAL)
+
+    Returns:
+        dict: path, original_path, original_bytes, compressed_bytes, saved_bytes and
+              kept_original (True if the original was smaller and is returned as path)
+    """
+    image_format = (image_format or SCREENSHOT_IMAGE_FORMAT).lower()
+    quality = quality or SCREENSHOT_IMAGE_QUALITY
+    max_width = max_width or SCREENSHOT_MAX_WIDTH
+    max_height = max_height or SCREENSHOT_MAX_HEIGHT
+    if keep_original is None:
+        keep_original = SCREENSHOT_KEEP_ORIGINAL
+
+    if image_format not in FORMAT_EXTENSIONS:
+        raise ValueError(f"Unsupported image format: {image_format}")
+
+    output_path = os.path.splitext(image_path)[0] + FORMAT_EXTENSIONS[image_format]
+    original_bytes = os.path.getsize(image_path)
+    same_file = os.path.abspath(output_path) == os.path.abspath(image_path)
+
+    with Image.open(image_path) as image:
+        # Downscale in place, preserving the aspect ratio
+        image.thumbnail((max_width, max_height), Image.LANCZOS)
+
+        # Re-create the image from raw pixels so no metadata (EXIF, text chunks, ICC) is carried over
+        mode = 'RGB' if image_format in ('jpeg', 'jpg') or image.mode not in ('RGB', 'RGBA') else image.mode
+        pixels = image.convert(mode)
+        clean = Image.new(mode, pixels.size)
+        clean.paste(pixels)
+
+        compressed_bytes = _encode(clean, output_path, image_format, quality)
+        if image_format == 'webp' and compressed_bytes >= original_bytes:
+            compressed_bytes = _encode(clean, output_path, image_format, quality, lossless=True)
+
+    kept = compressed_bytes >= original_bytes and not same_file
+    if kept:
+        os.remove(output_path)
+        output_path = image_path
+        compressed_bytes = original_bytes
+    elif not keep_original and not same_file:
+        os.remove(image_path)
+
+    return {
+        'path': output_path,
+        'original_path': image_path,
+        'original_bytes': original_bytes,
+        'compressed_bytes': compressed_bytes,
+        'saved_bytes': original_bytes - compressed_bytes,
+        'kept_original': kept
+    }
+
+
+def compress_screenshots(image_paths, **kwargs):
+    """
+    Run the compression stage over a list of captured screenshots and log the byte savings
+
+    Args:
+        image_paths (list): Paths to captured screenshots
+        **kwargs: Options passed to compress_screenshot
+
+    Returns:
+        list: Paths to the compressed images, in the same order. Images that fail to
+              compress are returned unchanged.
+    """
+    logger = logging.getLogger('binance_trade_analyzer')
+
+    output_paths = []
+    total_original = 0
+    total_compressed = 0
+    for path in image_paths:
+        try:
+            result = compress_screenshot(path, **kwargs)
+        except Exception as e:
+            logger.warning(f"Could not compress {path}: {str(e)}")
+            output_paths.append(path)
+            continue
+
+        total_original += result['original_bytes']
+        total_compressed += result['compressed_bytes']
+        output_paths.append(result['path'])
+        if result['kept_original']:
+            logger.warning(f"Compressing {path} did not make it smaller, keeping the original")
+            continue
+        ratio = result['original_bytes'] / max(1, result['compressed_bytes'])
+        logger.info(
+            f"Compressed {path} -> {result['path']}: {result['original_bytes']} -> "
+            f"{result['compressed_bytes']} bytes (saved {result['saved_bytes']}, {ratio:.1f}x)"
+        )
+
+    if total_original:
+        logger.info(
+            f"Compressed {len(image_paths)} screenshots: {total_original} -> {total_compressed} bytes "
+            f"(saved {total_original - total_compressed})"
+        )
+    return output_paths
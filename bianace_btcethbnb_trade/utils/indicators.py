@@ -0,0 +1,318 @@
+import time
+import logging
+import numpy as np
+from config.settings import MARKET_DATA_TIMEFRAMES
+from utils.market_data import fetch_market_snapshots
+
+
+EMA_PERIOD = 21
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+
+
+def _ewm(values, alpha, seed_period):
+    """
+    Exponentially weighted mean along the time axis (axis 1) of a 2D array,
+    seeded with the simple mean of the first seed_period values.
+    The loop runs over time only; every step updates all series at once.
+
+    Args:
+        values (np.ndarray): Array of shape (series, time)
+        alpha (float): Smoothing factor
+        seed_period (int): Number of leading values averaged for the seed
+
+    Returns:
+        np.ndarray: Array of the same shape; values before the seed are NaN
+    """
+    result = np.full(values.shape, np.nan)
+    if values.shape[1] < seed_period:
+        return result
+
+    current = values[:, :seed_period].mean(axis=1)
+    result[:, seed_period - 1] = current
+    for t in range(seed_period, values.shape[1]):
+        current = current + alpha * (values[:, t] - current)
+        result[:, t] = current
+    return result
+
+
+def ema(values, period):
+    """
+    Exponential moving average of each row of a 2D array
+
+    Returns:
+        np.ndarray: EMA, NaN for the first period - 1 values
+    """
+    return _ewm(values, 2.0 / (period + 1), period)
+
+
+def wilder(values, period):
+    """
+    Wilder's smoothing (RMA) of each row of a 2D array, as used by RSI and ATR
+
+    Returns:
+        np.ndarray: RMA, NaN for the first period - 1 values
+    """
+    return _ewm(values, 1.0 / period, period)
+
+
+def macd(closes, fast=MACD_FAST, slow=MACD_SLOW, signal=MACD_SIGNAL):
+    """
+    MACD line, signal line and histogram of each row of a 2D close array
+
+    Returns:
+        tuple: (macd_line, signal_line, histogram)
+    """
+    macd_line = ema(closes, fast) - ema(closes, slow)
+    # The signal EMA starts where the MACD line becomes defined
+    signal_line = np.full(closes.shape, np.nan)
+    start = slow - 1
+    if closes.shape[1] > start:
+        signal_line[:, start:] = ema(macd_line[:, start:], signal)
+    return macd_line, signal_line, macd_line - signal_line
+
+
+def rsi(closes, period=RSI_PERIOD):
+    """
+    Relative strength index of each row of a 2D close array
+
+    Returns:
+        np.ndarray: RSI in [0, 100], NaN where undefined
+    """
+    delta = np.diff(closes, axis=1)
+    avg_gain = wilder(np.clip(delta, 0, None), period)
+    avg_loss = wilder(np.clip(-delta, 0, None), period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    values = np.where((avg_loss == 0) & ~np.isnan(avg_gain), 100.0, values)
+    # Align with the close array: the first close has no change
+    return np.concatenate([np.full((closes.shape[0], 1), np.nan), values], axis=1)
+
+
+def atr(highs, lows, closes, period=ATR_PERIOD):
+    """
+    Average true range of each row of 2D high, low and close arrays
+
+    Returns:
+        np.ndarray: ATR, NaN where undefined
+    """
+    previous_close = closes[:, :-1]
+    true_range = np.maximum.reduce([
+        highs[:, 1:] - lows[:, 1:],
+        np.abs(highs[:, 1:] - previous_close),
+        np.abs(lows[:, 1:] - previous_close)
+    ])
+    values = wilder(true_range, period)
+    return np.concatenate([np.full((closes.shape[0], 1), np.nan), values], axis=1)
+
+
+def stack_klines(snapshots, timeframes=None):
+    """
+    Stack the klines of every (currency, timeframe) pair into 2D arrays, one row per pair.
+    Only series of equal length share a batch, so no series is cut to a shorter one
+    (e.g. a newly listed symbol with fewer daily klines).
+
+    Args:
+        snapshots (dict): Currency -> market snapshot with klines (see utils.market_data)
+        timeframes (list): Timeframes to include (default: MARKET_DATA_TIMEFRAMES)
+
+    Returns:
+        list: One (keys, highs, lows, closes) batch per series length, where keys is a list of (currency, timeframe)
+    """
+    timeframes = timeframes or MARKET_DATA_TIMEFRAMES
+
+    by_length = {}
+    for currency, snapshot in snapshots.items():
+        for timeframe in timeframes:
+            rows = snapshot.get('klines', {}).get(timeframe)
+            if rows:
+                keys, series = by_length.setdefault(len(rows), ([], []))
+                keys.append((currency, timeframe))
+                series.append(np.asarray(rows, dtype=np.float64))
+
+    batches = []
+    for keys, series in by_length.values():
+        stacked = np.stack(series)
+        # Kline columns: open_time, open, high, low, close, volume
+        batches.append((keys, stacked[:, :, 2], stacked[:, :, 3], stacked[:, :, 4]))
+    return batches
+
+
+def _last_cross(histogram):
+    """
+    Direction of and bars since the most recent sign change of each histogram row
+
+    Returns:
+        tuple: (direction, bars_ago) arrays; direction is 1 (bullish), -1 (bearish) or 0 (none)
+    """
+    sign = np.sign(histogram)
+    changes = sign[:, 1:] * sign[:, :-1] < 0
+    length = changes.shape[1]
+    has_cross = changes.any(axis=1)
+    # Index of the last True in each row
+    last_index = length - 1 - np.argmax(changes[:, ::-1], axis=1)
+    direction = np.where(has_cross, sign[np.arange(len(sign)), last_index + 1], 0)
+    bars_ago = np.where(has_cross, length - 1 - last_index, -1)
+    return direction.astype(int), bars_ago.astype(int)
+
+
+def compute_indicators(snapshots, timeframes=None):
+    """
+    Compute EMA21, MACD, RSI and ATR for all currencies and timeframes in one batch
+
+    Args:
+        snapshots (dict): Currency -> market snapshot with klines (see utils.market_data)
+        timeframes (list): Timeframes to include (default: MARKET_DATA_TIMEFRAMES)
+
+    Returns:
+        dict: Currency -> timeframe -> latest indicator values
+    """
+    logger = logging.getLogger('binance_trade_analyzer')
+    start = time.perf_counter()
+
+    batches = stack_klines(snapshots, timeframes)
+    if not batches:
+        return {}
+
+    by_key = {}
+    for keys, highs, lows, closes in batches:
+        by_key.update(_batch_indicators(keys, highs, lows, closes))
+
+    # Keep the currency and timeframe order of the input
+    results = {}
+    for currency, snapshot in snapshots.items():
+        for timeframe in timeframes or MARKET_DATA_TIMEFRAMES:
+            if (currency, timeframe) in by_key:
+                results.setdefault(currency, {})[timeframe] = by_key[(currency, timeframe)]
+
+    logger.info(
+        f"Computed indicators for {len(by_key)} series in {len(batches)} batches "
+        f"in {(time.perf_counter() - start) * 1000:.1f} ms"
+    )
+    return results
+
+
+def _batch_indicators(keys, highs, lows, closes):
+    """
+    Latest indicator values of one batch of equal-length series
+
+    Returns:
+        dict: (currency, timeframe) -> latest indicator values
+    """
+    ema_values = ema(closes, EMA_PERIOD)
+    macd_line, signal_line, histogram = macd(closes)
+    rsi_values = rsi(closes)
+    atr_values = atr(highs, lows, closes)
+    cross_direction, cross_bars_ago = _last_cross(histogram)
+
+    last_close = closes[:, -1]
+    last_ema = ema_values[:, -1]
+    ema_slope = last_ema - ema_values[:, -2]
+    last_atr = atr_values[:, -1]
+
+    results = {}
+    for i, key in enumerate(keys):
+        results[key] = {
+            'close': float(last_close[i]),
+            'ema21': float(last_ema[i]),
+            'ema21_slope': float(ema_slope[i]),
+            'trend': 'up' if last_close[i] > last_ema[i] and ema_slope[i] > 0
+                     else 'down' if last_close[i] < last_ema[i] and ema_slope[i] < 0
+                     else 'flat',
+            'macd': float(macd_line[i, -1]),
+            'macd_signal': float(signal_line[i, -1]),
+            'macd_hist': float(histogram[i, -1]),
+            'macd_cross': {1: 'bullish', -1: 'bearish'}.get(int(cross_direction[i])),
+            'macd_cross_bars_ago': int(cross_bars_ago[i]),
+            'rsi14': float(rsi_values[i, -1]),
+            'atr14': float(last_atr[i]),
+            'atr14_pct': float(last_atr[i] / last_close[i] * 100) if last_close[i] else None
+        }
+    return results
+
+
+def _fmt(value, digits=5):
+    if value is None or np.isnan(value):
+        return '-'
+    return f"{value:.{digits}g}"
+
+
+def format_indicator_table(indicators):
+    """
+    Format computed indicators as a compact fixed-column text table for the analysis prompt
+
+    Args:
+        indicators (dict): Result of compute_indicators
+
+    Returns:
+        str: Text table, one row per currency and timeframe
+    """
+    header = "symbol tf close ema21 trend macd signal hist cross(bars) rsi14 atr14 atr%"
+    lines = [header]
+    for currency, by_timeframe in indicators.items():
+        for timeframe, values in by_timeframe.items():
+            cross = f"{values['macd_cross']}({values['macd_cross_bars_ago']})" if values['macd_cross'] else '-'
+            lines.append(' '.join([
+                currency,
+                timeframe,
+                _fmt(values['close'], 8),
+                _fmt(values['ema21'], 8),
+                values['trend'],
+                _fmt(values['macd']),
+                _fmt(values['macd_signal']),
+                _fmt(values['macd_hist']),
+                cross,
+                _fmt(values['rsi14'], 3),
+                _fmt(values['atr14']),
+                _fmt(values['atr14_pct'], 3)
+            ]))
+    return '\n'.join(lines)
+
+
+def build_indicator_table(currencies, snapshots=None, timeframes=None):
+    """
+    Compute the indicator table for the given currencies, fetching klines from the REST API
+    when no snapshots are passed. Used to give screenshot-based analyses exact indicator values.
+
+    Args:
+        currencies (list): Currency pairs
+        snapshots (dict): Currency -> market snapshot with klines (default: fetched)
+        timeframes (list): Timeframes to include (default: MARKET_DATA_TIMEFRAMES)
+
+    Returns:
+        str: Indicator table, or None if no klines could be fetched
+    """
+    try:
+        if snapshots is None:
+            snapshots = fetch_market_snapshots(currencies, timeframes=timeframes)
+        indicators = compute_indicators({c: snapshots[c] for c in currencies if c in snapshots}, timeframes)
+    except Exception as e:
+        logging.getLogger('binance_trade_analyzer').warning(f"Could not compute indicators: {str(e)}")
+        return None
+    return format_indicator_table(indicators) if indicators else None
+
+
+def build_indicator_tables(currencies, snapshots=None, timeframes=None):
+    """
+    Compute the indicators of all currencies in one batch (one fetch, one vectorized pass)
+    and format a separate table per currency, for analyses that send one request per currency
+
+    Args:
+        currencies (list): Currency pairs
+        snapshots (dict): Currency -> market snapshot with klines (default: fetched)
+        timeframes (list): Timeframes to include (default: MARKET_DATA_TIMEFRAMES)
+
+    Returns:
+        dict: Currency -> indicator table; currencies without klines are left out
+    """
+    try:
+        if snapshots is None:
+            snapshots = fetch_market_snapshots(currencies, timeframes=timeframes)
+        indicators = compute_indicators({c: snapshots[c] for c in currencies if c in snapshots}, timeframes)
+    except Exception as e:
+        logging.getLogger('binance_trade_analyzer').warning(f"Could not compute indicators: {str(e)}")
+        return {}
+    return {currency: format_indicator_table({currency: values}) for currency, values in indicators.items() if values}
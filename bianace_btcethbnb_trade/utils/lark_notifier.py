@@ -88,6 +88,30 @@ class LarkNotifier:
         """
         return self.send_text_message(message)
     
+    def send_progress_notification(self, currency, partial_text, elapsed_s, max_chars=1500):
+        """
+        发送分析进行中的通知，附带目前已生成的内容
+        
+        Args:
+            currency (str): 交易对
+            partial_text (str): 目前已生成的报告内容
+            elapsed_s (float): 已用时间（秒）
+            max_chars (int): 只发送最后这么多字符
+        """
+        excerpt = partial_text[-max_chars:]
+        if len(partial_text) > max_chars:
+            excerpt = "..." + excerpt
+        message = f"""
+⏳ 币安期货分析生成中
+
+交易对: {currency}
+已用时间: {elapsed_s:.0f} 秒
+已生成: {len(partial_text)} 字符
+
+{excerpt}
+        """
+        return self.send_text_message(message)
+    
     def _get_current_time(self):
         """
         获取当前时间字符串
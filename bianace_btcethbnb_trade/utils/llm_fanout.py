@@ -0,0 +1,292 @@
+import time
+import asyncio
+import logging
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from config.settings import LLM_MAX_CONCURRENCY, DEEPSEEK_RPM, DEEPSEEK_TPM, DEEPSEEK_STREAM
+from utils.deepseek_client import (
+    get_deepseek_client, parse_retry_after, mock_response, ReportStream, prompt_cache_usage, _api_key_configured
+)
+from utils.response_cache import get_response_cache
+
+
+# Rough prompt size estimate used to charge the token budget before the real usage is known
+CHARS_PER_TOKEN = 3
+
+# After a 429 the rate is halved, down to this fraction of the configured budget
+MIN_RATE_FACTOR = 0.1
+# Each successful request gives back this fraction of the configured budget
+RATE_RECOVERY_STEP = 0.1
+
+
+def estimate_tokens(payload):
+    """
+    Upper estimate of the tokens a request uses: prompt characters plus max_tokens
+
+    Args:
+        payload (dict): Chat completion request body
+
+    Returns:
+        int: Estimated tokens
+    """
+    chars = 0
+    for message in payload.get('messages', []):
+        content = message.get('content') or ''
+        if isinstance(content, list):
+            content = ''.join(part.get('text', '') for part in content if isinstance(part, dict))
+        chars += len(content)
+    return chars // CHARS_PER_TOKEN + payload.get('max_tokens', 0)
+
+
+class TokenBucket:
+    """
+    Budget of units per minute that refills continuously and allows bursts up to one minute's worth
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.updated = time.monotonic()
+
+    def refill(self, factor):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.capacity / 60 * factor)
+        self.updated = now
+
+    def wait_s(self, amount, factor):
+        """
+        Returns:
+            float: Seconds until amount units are available at the current rate
+        """
+        self.refill(factor)
+        # A single request larger than the whole budget only waits for a full bucket
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / (self.capacity / 60 * factor)
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute budget shared by concurrent requests.
+    A 429 halves the rate and pauses all requests for Retry-After; each success
+    raises the rate again until the configured budget is reached.
+    """
+
+    def __init__(self, rpm=None, tpm=None):
+        """
+        Args:
+            rpm (int): Requests per minute (default: DEEPSEEK_RPM)
+            tpm (int): Tokens per minute (default: DEEPSEEK_TPM)
+        """
+        self.requests = TokenBucket(rpm or DEEPSEEK_RPM)
+        self.tokens = TokenBucket(tpm or DEEPSEEK_TPM)
+        self.factor = 1.0
+        self.paused_until = 0.0
+        self.rate_limited = 0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens):
+        """
+        Wait until one request and the given tokens fit into the budget, then take them
+
+        Args:
+            tokens (int): Estimated tokens of the request
+        """
+        # The lock makes waiting requests go out in arrival order
+        async with self._lock:
+            while True:
+                wait = max(
+                    self.paused_until - time.monotonic(),
+                    self.requests.wait_s(1, self.factor),
+                    self.tokens.wait_s(tokens, self.factor)
+                )
+                if wait <= 0:
+                    self.requests.available -= 1
+                    self.tokens.available -= min(tokens, self.tokens.capacity)
+                    return
+                await asyncio.sleep(wait)
+
+    def settle(self, estimated, used):
+        """
+        Correct the token budget once the real usage of a request is known
+        """
+        self.tokens.available = min(self.tokens.capacity, self.tokens.available + estimated - used)
+
+    def on_success(self):
+        self.factor = min(1.0, self.factor + RATE_RECOVERY_STEP)
+
+    def on_rate_limited(self, retry_after_s=None):
+        """
+        Slow down after a 429: halve the rate, drop the request burst and pause until Retry-After
+
+        Args:
+            retry_after_s (float): Retry-After of the response in seconds, if sent
+        """
+        self.rate_limited += 1
+        self.factor = max(MIN_RATE_FACTOR, self.factor / 2)
+        self.requests.available = 0.0
+        pause = retry_after_s if retry_after_s is not None else 60 / (self.requests.capacity * self.factor)
+        self.paused_until = max(self.paused_until, time.monotonic() + pause)
+        logging.getLogger('binance_trade_analyzer').warning(
+            f"DeepSeek rate limit hit, pausing {pause:.1f}s and lowering the rate to "
+            f"{self.factor * 100:.0f}% ({self.requests.capacity * self.factor:.0f} requests/min)"
+        )
+
+
+class AsyncDeepSeekClient:
+    """
+    Sends chat completions concurrently under a shared RateLimiter. Requests run in a thread
+    pool over the pooled session of the shared DeepSeek client, so they reuse its warm connections.
+    """
+
+    def __init__(self, rpm=None, tpm=None, concurrency=None, client=None):
+        """
+        Args:
+            rpm (int): Requests per minute (default: DEEPSEEK_RPM)
+            tpm (int): Tokens per minute (default: DEEPSEEK_TPM)
+            concurrency (int): Requests in flight at once (default: LLM_MAX_CONCURRENCY)
+            client (DeepSeekClient): Client whose session is used (default: the shared client)
+        """
+        self.client = client or get_deepseek_client()
+        self.limiter = RateLimiter(rpm, tpm)
+        self.concurrency = max(1, concurrency or LLM_MAX_CONCURRENCY)
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='deepseek')
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def chat_completion(self, payload, max_retries=5, report_path=None, name=None):
+        """
+        Send a chat completion request, retrying 429s at the adapted rate and other failures with backoff
+
+        Args:
+            payload (dict): Request body
+            max_retries (int): Maximum number of attempts
+            report_path (str): Stream the completion into this report file while it is generated
+            name (str): Request name (e.g., the currency), used in progress notifications
+
+        Returns:
+            dict: Response from DeepSeek API
+        """
+        loop = asyncio.get_running_loop()
+        estimated = estimate_tokens(payload)
+        stream = bool(report_path and DEEPSEEK_STREAM)
+        for attempt in range(max_retries):
+            await self.limiter.acquire(estimated)
+            try:
+                async with self._semaphore:
+                    start = time.monotonic()
+                    response = await loop.run_in_executor(self.executor, self.client.post, payload, stream)
+                    result = None
+                    if response.status_code == 200 and stream:
+                        with ReportStream(report_path, name) as report:
+                            result = await loop.run_in_executor(
+                                self.executor, self.client.read_stream, response, report.write, start
+                            )
+                    elif response.status_code == 200:
+                        result = response.json()
+            except requests.exceptions.RequestException as e:
+                if attempt < max_retries - 1:
+                    wait_time = self.client.retry_delay(attempt)
+                    print(f"Network error: {str(e)}, retrying in {wait_time:.1f} seconds...")
+                    await asyncio.sleep(wait_time)
+                    continue
+                raise Exception(f"Network error after {max_retries} attempts: {str(e)}")
+
+            if result is not None:
+                prompt_cache_usage.record(result)
+                self.limiter.on_success()
+                self.limiter.settle(estimated, (result.get('usage') or {}).get('total_tokens', estimated))
+                return result
+
+            error_msg = f"API request failed with status code {response.status_code}: {response.text}"
+            if attempt == max_retries - 1:
+                raise Exception(error_msg)
+            if response.status_code == 429:  # Rate limit: the limiter holds back every request, not just this one
+                self.limiter.on_rate_limited(parse_retry_after(response.headers.get('Retry-After')))
+            else:
+                wait_time = self.client.retry_delay(attempt, response)
+                print(f"Error: {error_msg}, retrying in {wait_time:.1f} seconds...")
+                await asyncio.sleep(wait_time)
+
+        # This should never be reached due to the retry logic
+        raise Exception("Unexpected error")
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+
+async def _send_all(payloads, report_paths, rpm, tpm, concurrency, max_retries):
+    logger = logging.getLogger('binance_trade_analyzer')
+    client = AsyncDeepSeekClient(rpm, tpm, concurrency)
+
+    async def send(name, payload):
+        start = time.monotonic()
+        try:
+            result = await client.chat_completion(payload, max_retries, report_paths.get(name), name)
+            logger.info(f"DeepSeek response for {name} received in {time.monotonic() - start:.1f}s")
+            return result
+        except Exception as e:
+            logger.error(f"DeepSeek request for {name} failed after {time.monotonic() - start:.1f}s: {str(e)}")
+            return e
+
+    try:
+        results = await asyncio.gather(*(send(name, payload) for name, payload in payloads.items()))
+    finally:
+        client.close()
+    if client.limiter.rate_limited:
+        logger.info(f"DeepSeek rate limit hit {client.limiter.rate_limited} times during this batch")
+    return dict(zip(payloads.keys(), results))
+
+
+def send_payloads_concurrently(payloads, report_paths=None, cache_keys=None, rpm=None, tpm=None, concurrency=None,
+                               max_retries=5):
+    """
+    Send several chat completion requests at once, e.g. one per currency, so the batch takes
+    about as long as the slowest request instead of the sum of all of them
+
+    Args:
+        payloads (dict): Name (e.g., the currency) -> request body
+        report_paths (dict): Name -> report file that the completion is streamed into while it is generated
+        cache_keys (dict): Name -> response cache key; cached responses are returned without a request
+        rpm (int): Requests per minute (default: DEEPSEEK_RPM)
+        tpm (int): Tokens per minute (default: DEEPSEEK_TPM)
+        concurrency (int): Requests in flight at once (default: LLM_MAX_CONCURRENCY)
+        max_retries (int): Maximum number of attempts per request
+
+    Returns:
+        dict: Name -> response from DeepSeek API, or the Exception the request failed with
+    """
+    if not payloads:
+        return {}
+
+    # Check if we're in test mode (no API key)
+    if not _api_key_configured():
+        return {
+            name: mock_response(f"[Mock Response] Analysis for {name} would go here. In actual implementation, this would be processed by DeepSeek AI.")
+            for name in payloads
+        }
+
+    cache_keys = cache_keys or {}
+    cache = get_response_cache() if cache_keys else None
+    results = {}
+    if cache is not None:
+        for name in payloads:
+            if name in cache_keys:
+                cached = cache.get(cache_keys[name])
+                if cached is not None:
+                    results[name] = cached
+    pending = {name: payload for name, payload in payloads.items() if name not in results}
+    if not pending:
+        return results
+
+    start = time.monotonic()
+    results.update(asyncio.run(_send_all(pending, report_paths or {}, rpm, tpm, concurrency, max_retries)))
+    logging.getLogger('binance_trade_analyzer').info(
+        f"Sent {len(pending)} DeepSeek requests concurrently in {time.monotonic() - start:.1f}s"
+    )
+
+    if cache is not None:
+        for name in pending:
+            if name in cache_keys and not isinstance(results[name], Exception):
+                cache.put(cache_keys[name], results[name])
+    return {name: results[name] for name in payloads}
@@ -0,0 +1,229 @@
+import os
+import json
+import time
+import logging
+import requests
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from config.settings import (
+    BINANCE_FAPI_BASE,
+    MARKET_DATA_TIMEFRAMES,
+    MARKET_DATA_KLINE_LIMIT,
+    MARKET_DATA_MAX_WORKERS,
+    MARKET_DATA_TIMEOUT,
+    MARKET_DATA_OUTPUT_DIR,
+    ORDERBOOK_LEVELS
+)
+
+
+# Order book depth limits accepted by /fapi/v1/depth
+DEPTH_LIMITS = [5, 10, 20, 50, 100, 500, 1000]
+
+
+def create_market_session(pool_size=None):
+    """
+    Create an HTTP session whose connection pool is large enough for all concurrent requests,
+    so every request after the first reuses an open keep-alive connection
+
+    Args:
+        pool_size (int): Maximum number of pooled connections (default: MARKET_DATA_MAX_WORKERS)
+
+    Returns:
+        requests.Session: Pooled session
+    """
+    pool_size = pool_size or MARKET_DATA_MAX_WORKERS
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'Accept': 'application/json'})
+    return session
+
+
+def _get_json(session, base_url, path, params, timeout):
+    response = session.get(f"{base_url}{path}", params=params, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def _depth_limit(levels):
+    for limit in DEPTH_LIMITS:
+        if limit >= levels:
+            return limit
+    return DEPTH_LIMITS[-1]
+
+
+def _float(value):
+    return float(value) if value not in (None, '') else None
+
+
+def _format_countdown(next_funding_ms):
+    if not next_funding_ms:
+        return None
+    seconds = max(0, int(next_funding_ms / 1000 - time.time()))
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def build_market_snapshot(currency, ticker, premium, depth, klines, levels=None):
+    """
+    Assemble the REST responses of one symbol into a snapshot with the same fields as
+    the DOM snapshot (see utils.dom_extractor), plus the klines per timeframe
+
+    Args:
+        currency (str): Currency pair
+        ticker (dict): /fapi/v1/ticker/24hr response
+        premium (dict): /fapi/v1/premiumIndex response
+        depth (dict): /fapi/v1/depth response
+        klines (dict): Timeframe -> /fapi/v1/klines response
+        levels (int): Number of order book levels per side (default: ORDERBOOK_LEVELS)
+
+    Returns:
+        dict: Market snapshot
+    """
+    levels = levels or ORDERBOOK_LEVELS
+    funding_rate = _float(premium.get('lastFundingRate'))
+
+    return {
+        'currency': currency,
+        'captured_at': datetime.now().isoformat(timespec='seconds'),
+        'source': 'rest',
+        'last_price': _float(ticker.get('lastPrice')),
+        'mark_price': _float(premium.get('markPrice')),
+        'index_price': _float(premium.get('indexPrice')),
+        'funding_rate_pct': round(funding_rate * 100, 6) if funding_rate is not None else None,
+        'funding_countdown': _format_countdown(premium.get('nextFundingTime')),
+        'high_24h': _float(ticker.get('highPrice')),
+        'low_24h': _float(ticker.get('lowPrice')),
+        'volume_24h_base': _float(ticker.get('volume')),
+        'volume_24h_quote': _float(ticker.get('quoteVolume')),
+        'price_change_24h_pct': _float(ticker.get('priceChangePercent')),
+        'asks': [[float(price), float(quantity)] for price, quantity in depth.get('asks', [])[:levels]],
+        'bids': [[float(price), float(quantity)] for price, quantity in depth.get('bids', [])[:levels]],
+        # Each kline is [open_time_ms, open, high, low, close, volume]
+        'klines': {
+            interval: [[int(k[0])] + [float(value) for value in k[1:6]] for k in rows]
+            for interval, rows in klines.items()
+        }
+    }
+
+
+def fetch_market_snapshots(currencies, timeframes=None, kline_limit=None, levels=None,
+                           base_url=None, session=None, max_workers=None, timeout=None):
+    """
+    Fetch ticker, premium index, order book and klines for every currency concurrently
+    over one pooled HTTP session, and assemble one snapshot per currency
+
+    Args:
+        currencies (list): Currency pairs (e.g., ['BTCUSDT', 'ETHUSDT'])
+        timeframes (list): Kline intervals (default: MARKET_DATA_TIMEFRAMES)
+        kline_limit (int): Number of klines per timeframe (default: MARKET_DATA_KLINE_LIMIT)
+        levels (int): Number of order book levels per side (default: ORDERBOOK_LEVELS)
+        base_url (str): REST base URL, e.g. a local stub server (default: BINANCE_FAPI_BASE)
+        session (requests.Session): Session to reuse (default: a new pooled session)
+        max_workers (int): Maximum concurrent requests (default: MARKET_DATA_MAX_WORKERS)
+        timeout (float): Per-request timeout in seconds (default: MARKET_DATA_TIMEOUT)
+
+    Returns:
+        dict: Currency -> snapshot. Currencies whose requests failed are left out.
+    """
+    logger = logging.getLogger('binance_trade_analyzer')
+
+    timeframes = timeframes or MARKET_DATA_TIMEFRAMES
+    kline_limit = kline_limit or MARKET_DATA_KLINE_LIMIT
+    levels = levels or ORDERBOOK_LEVELS
+    base_url = (base_url or BINANCE_FAPI_BASE).rstrip('/')
+    max_workers = max_workers or MARKET_DATA_MAX_WORKERS
+    timeout = timeout or MARKET_DATA_TIMEOUT
+
+    own_session = session is None
+    if own_session:
+        session = create_market_session(max_workers)
+
+    # One request per (currency, endpoint); klines add one request per timeframe
+    requests_by_key = {}
+    for currency in currencies:
+        requests_by_key[(currency, 'ticker')] = ('/fapi/v1/ticker/24hr', {'symbol': currency})
+        requests_by_key[(currency, 'premium')] = ('/fapi/v1/premiumIndex', {'symbol': currency})
+        requests_by_key[(currency, 'depth')] = ('/fapi/v1/depth', {'symbol': currency, 'limit': _depth_limit(levels)})
+        for interval in timeframes:
+            requests_by_key[(currency, interval)] = (
+                '/fapi/v1/klines', {'symbol': currency, 'interval': interval, 'limit': kline_limit}
+            )
+
+    start = time.monotonic()
+    results = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                key: executor.submit(_get_json, session, base_url, path, params, timeout)
+                for key, (path, params) in requests_by_key.items()
+            }
+            for key, future in futures.items():
+                try:
+                    results[key] = future.result()
+                except Exception as e:
+                    logger.error(f"Market data request {key[1]} for {key[0]} failed: {str(e)}")
+    finally:
+        if own_session:
+            session.close()
+
+    snapshots = {}
+    for currency in currencies:
+        keys = [(currency, 'ticker'), (currency, 'premium'), (currency, 'depth')] + [(currency, t) for t in timeframes]
+        if any(key not in results for key in keys):
+            logger.warning(f"Incomplete market data for {currency}, skipping")
+            continue
+        snapshots[currency] = build_market_snapshot(
+            currency,
+            results[(currency, 'ticker')],
+            results[(currency, 'premium')],
+            results[(currency, 'depth')],
+            {interval: results[(currency, interval)] for interval in timeframes},
+            levels
+        )
+
+    logger.info(
+        f"Fetched market data for {len(snapshots)}/{len(currencies)} currencies "
+        f"({len(requests_by_key)} requests) in {time.monotonic() - start:.2f}s"
+    )
+    return snapshots
+
+
+def save_market_data(snapshot, output_dir=None):
+    """
+    Save a REST market snapshot as JSON under <output_dir>/<date>/<currency>/
+
+    Returns:
+        str: Path to the JSON file
+    """
+    output_dir = output_dir or MARKET_DATA_OUTPUT_DIR
+    now = datetime.now()
+    currency_dir = os.path.join(output_dir, now.strftime('%Y-%m-%d'), snapshot['currency'])
+    os.makedirs(currency_dir, exist_ok=True)
+
+    filepath = os.path.join(currency_dir, f"{now.strftime('%Y%m%d_%H%M%S')}_{snapshot['currency']}_market.json")
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, ensure_ascii=False)
+    return filepath
+
+
+def format_klines(snapshot, last=5):
+    """
+    Format the most recent klines of each timeframe as compact text lines
+
+    Args:
+        snapshot (dict): Market snapshot with klines
+        last (int): Number of most recent klines per timeframe
+
+    Returns:
+        str: One line per timeframe
+    """
+    lines = []
+    for interval, rows in snapshot.get('klines', {}).items():
+        candles = ' | '.join(
+            f"{datetime.fromtimestamp(k[0] / 1000).strftime('%m-%d %H:%M')} o={k[1]} h={k[2]} l={k[3]} c={k[4]} v={k[5]}"
+            for k in rows[-last:]
+        )
+        lines.append(f"    {interval}: {candles}")
+    return '\n'.join(lines)
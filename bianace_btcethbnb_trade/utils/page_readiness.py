@@ -0,0 +1,400 @@
+import time
+import asyncio
+import logging
+from config.settings import (
+    READINESS_MAX_WAIT_MS,
+    READINESS_SAMPLE_INTERVAL_MS,
+    READINESS_STABLE_FRAMES,
+    READINESS_NETWORK_QUIET_MS,
+    READINESS_MAX_PENDING_REQUESTS,
+    READINESS_CANVAS_TOLERANCE,
+    READINESS_CANVAS_EXCLUDE_RIGHT,
+    READINESS_LONG_REQUEST_MS
+)
+
+
+# Selector groups checked before the page is considered ready (see REQUIRED_SELECTORS)
+READY_SELECTORS = {
+    'chart': '[data-testid="chart-container"], .tradingview-chart, .chart-wrapper, .chart-container, .tv-chart-container',
+    'price': '.price-data, .market-price, .chart-price, .contractPrice, .showPrice',
+    'orderbook': '.orderbook, .order-book, [class*="orderbook"], [class*="OrderBook"]'
+}
+
+# Selector groups without which the page is not ready; missing optional groups are only reported
+REQUIRED_SELECTORS = ('chart',)
+
+# Reports which selector groups have at least one visible element
+SELECTORS_SCRIPT = """
+(selectors) => {
+    const present = {};
+    for (const [name, selector] of Object.entries(selectors)) {
+        present[name] = Array.from(document.querySelectorAll(selector)).some(e => e.getClientRects().length > 0);
+    }
+    return present;
+}
+"""
+
+# Downscales every visible canvas in the frame to 32x32 grayscale samples. The right edge
+# (excludeRight of the width) is left out: the price axis and the last candle change on
+# every tick of a live chart. Tainted or detached canvases are skipped.
+CANVAS_SAMPLE_SCRIPT = """
+(excludeRight) => {
+    const canvases = Array.from(document.querySelectorAll('canvas'))
+        .filter(c => c.width > 0 && c.height > 0);
+    const probe = document.createElement('canvas');
+    probe.width = 32;
+    probe.height = 32;
+    const ctx = probe.getContext('2d');
+    const samples = [];
+    for (const canvas of canvases) {
+        try {
+            ctx.clearRect(0, 0, 32, 32);
+            const width = Math.max(1, Math.floor(canvas.width * (1 - excludeRight)));
+            ctx.drawImage(canvas, 0, 0, width, canvas.height, 0, 0, 32, 32);
+            const data = ctx.getImageData(0, 0, 32, 32).data;
+            const gray = new Array(1024);
+            for (let i = 0; i < 1024; i++) {
+                gray[i] = (data[i * 4] * 299 + data[i * 4 + 1] * 587 + data[i * 4 + 2] * 114) / 1000 | 0;
+            }
+            samples.push(gray);
+        } catch (e) {
+            // Tainted or detached canvas, skip it
+        }
+    }
+    return samples;
+}
+"""
+
+# Gray level difference below which a sampled pixel counts as unchanged (antialiasing, blinking cursor)
+PIXEL_DELTA = 24
+
+# Requests that stay open for the life of the page and never finish
+STREAMING_RESOURCE_TYPES = ('websocket', 'eventsource')
+# Requests a live chart keeps issuing; they count as pending but don't reset the quiet timer
+POLLING_RESOURCE_TYPES = ('xhr', 'fetch')
+
+
+def canvas_change_ratio(previous, current):
+    """
+    Fraction of sampled pixels that changed between two canvas samples
+
+    Args:
+        previous (list): Per-canvas grayscale samples from CANVAS_SAMPLE_SCRIPT
+        current (list): Per-canvas grayscale samples from CANVAS_SAMPLE_SCRIPT
+
+    Returns:
+        float: Changed fraction, 1.0 if there is nothing to compare or canvases appeared or disappeared
+    """
+    if not previous or not current or len(previous) != len(current):
+        return 1.0
+    total = 0
+    changed = 0
+    for before, after in zip(previous, current):
+        if len(before) != len(after):
+            return 1.0
+        total += len(before)
+        changed += sum(1 for a, b in zip(before, after) if abs(a - b) > PIXEL_DELTA)
+    return changed / total if total else 1.0
+
+
+class NetworkTracker:
+    """
+    Tracks in-flight requests of a page so readiness can wait for the network to settle.
+    Attach it before navigation to see the requests issued during page load.
+    Websockets, event streams and requests open longer than READINESS_LONG_REQUEST_MS are
+    ignored, and the XHR polling of a live chart doesn't keep the network from counting as quiet.
+    """
+
+    def __init__(self, page):
+        """
+        Attach request listeners to a Playwright page (sync or async API)
+
+        Args:
+            page: Playwright page
+        """
+        self.page = page
+        # request -> time.monotonic() when it started
+        self.pending = {}
+        self.last_activity = time.monotonic()
+        page.on('request', self._on_request)
+        page.on('requestfinished', self._on_request_done)
+        page.on('requestfailed', self._on_request_done)
+
+    def _on_request(self, request):
+        if request.resource_type in STREAMING_RESOURCE_TYPES:
+            return
+        now = time.monotonic()
+        self.pending[request] = now
+        if request.resource_type not in POLLING_RESOURCE_TYPES:
+            self.last_activity = now
+
+    def _on_request_done(self, request):
+        if self.pending.pop(request, None) is not None and request.resource_type not in POLLING_RESOURCE_TYPES:
+            self.last_activity = time.monotonic()
+
+    def is_quiet(self, quiet_ms=None, max_pending=None):
+        """
+        Check whether the network has settled
+
+        Args:
+            quiet_ms (int): Minimum time since the last page-load request started or finished
+            max_pending (int): Maximum number of short-lived requests allowed to still be in flight
+
+        Returns:
+            bool: True if the network is quiet
+        """
+        if quiet_ms is None:
+            quiet_ms = READINESS_NETWORK_QUIET_MS
+        if max_pending is None:
+            max_pending = READINESS_MAX_PENDING_REQUESTS
+        now = time.monotonic()
+        active = sum(1 for started in self.pending.values() if (now - started) * 1000 < READINESS_LONG_REQUEST_MS)
+        idle_ms = (now - self.last_activity) * 1000
+        return active <= max_pending and idle_ms >= quiet_ms
+
+    def detach(self):
+        """
+        Remove the request listeners from the page
+        """
+        for event, handler in (('request', self._on_request),
+                               ('requestfinished', self._on_request_done),
+                               ('requestfailed', self._on_request_done)):
+            try:
+                self.page.remove_listener(event, handler)
+            except Exception:
+                pass
+
+
+class ReadinessState:
+    """
+    Readiness decision shared by the sync, async and direct CDP waits. The page is ready when
+    the required selectors are visible, the network is quiet and the chart canvases changed by
+    at most READINESS_CANVAS_TOLERANCE over READINESS_STABLE_FRAMES consecutive samples.
+    """
+
+    def __init__(self, tracker=None, selectors=None, max_wait_ms=None):
+        """
+        Args:
+            tracker (NetworkTracker): Network tracker (None: the network is not checked)
+            selectors (dict): Selector groups (default: READY_SELECTORS)
+            max_wait_ms (int): Maximum time budget in milliseconds (default: READINESS_MAX_WAIT_MS)
+        """
+        self.tracker = tracker
+        self.selectors = READY_SELECTORS if selectors is None else selectors
+        self.start = time.monotonic()
+        self.deadline = self.start + (READINESS_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000
+        self.previous = None
+        self.stable_count = 0
+        self.canvas_stable = False
+        self.network_idle = False
+        self.missing_selectors = list(self.selectors)
+
+    def remaining_ms(self):
+        return _remaining_ms(self.deadline)
+
+    def update(self, present, sample):
+        """
+        Add one sample
+
+        Args:
+            present (dict): Selector group name -> visible, from SELECTORS_SCRIPT
+            sample (list): Canvas samples from CANVAS_SAMPLE_SCRIPT
+
+        Returns:
+            bool: True when waiting is over (ready or budget exhausted)
+        """
+        self.missing_selectors = [name for name in self.selectors if not present.get(name)]
+        ratio = canvas_change_ratio(self.previous, sample)
+        self.previous = sample
+        self.stable_count = self.stable_count + 1 if ratio <= READINESS_CANVAS_TOLERANCE else 0
+        self.canvas_stable = self.stable_count >= READINESS_STABLE_FRAMES - 1
+        self.network_idle = self.tracker.is_quiet() if self.tracker is not None else True
+        return self.ready() or self.remaining_ms() <= 0
+
+    def ready(self):
+        required_missing = [name for name in REQUIRED_SELECTORS if name in self.missing_selectors]
+        return self.canvas_stable and self.network_idle and not required_missing
+
+    def result(self, label=''):
+        """
+        Returns:
+            dict: Readiness result with ready, waited_ms, canvas_stable, network_idle and missing_selectors
+        """
+        result = {
+            'ready': self.ready(),
+            'waited_ms': int((time.monotonic() - self.start) * 1000),
+            'canvas_stable': self.canvas_stable,
+            'network_idle': self.network_idle,
+            'missing_selectors': self.missing_selectors
+        }
+        _log_result(result, label)
+        return result
+
+
+def _remaining_ms(deadline):
+    return max(0, int((deadline - time.monotonic()) * 1000))
+
+
+def _log_result(result, label):
+    logger = logging.getLogger('binance_trade_analyzer')
+    status = "ready" if result['ready'] else "not ready (budget exhausted)"
+    logger.info(
+        f"Page {label} {status} after {result['waited_ms']} ms "
+        f"(canvas_stable={result['canvas_stable']}, network_idle={result['network_idle']}, "
+        f"missing_selectors={result['missing_selectors']})"
+    )
+
+
+def _canvas_sample(page):
+    sample = []
+    for frame in page.frames:
+        try:
+            sample.extend(frame.evaluate(CANVAS_SAMPLE_SCRIPT, READINESS_CANVAS_EXCLUDE_RIGHT) or [])
+        except Exception:
+            pass
+    return sample
+
+
+async def _canvas_sample_async(page):
+    sample = []
+    for frame in page.frames:
+        try:
+            sample.extend(await frame.evaluate(CANVAS_SAMPLE_SCRIPT, READINESS_CANVAS_EXCLUDE_RIGHT) or [])
+        except Exception:
+            pass
+    return sample
+
+
+def _selectors_present(page, selectors):
+    try:
+        return page.evaluate(SELECTORS_SCRIPT, selectors)
+    except Exception:
+        return {}
+
+
+async def _selectors_present_async(page, selectors):
+    try:
+        return await page.evaluate(SELECTORS_SCRIPT, selectors)
+    except Exception:
+        return {}
+
+
+def wait_for_page_ready(page, tracker=None, max_wait_ms=None, selectors=None, label=''):
+    """
+    Wait until the page is visually and functionally ready instead of sleeping a fixed time.
+    Each sample checks all selector groups at once, the network and the chart canvases
+    (see ReadinessState).
+
+    Args:
+        page: Playwright sync page
+        tracker (NetworkTracker): Tracker attached before navigation (created now if None)
+        max_wait_ms (int): Maximum time budget in milliseconds (default: READINESS_MAX_WAIT_MS)
+        selectors (dict): Selector groups to wait for (default: READY_SELECTORS)
+        label (str): Label used in log messages (e.g., the currency)
+
+    Returns:
+        dict: Readiness result with ready, waited_ms, canvas_stable, network_idle and missing_selectors
+    """
+    own_tracker = tracker is None
+    if own_tracker:
+        tracker = NetworkTracker(page)
+
+    state = ReadinessState(tracker, selectors, max_wait_ms)
+    while not state.update(_selectors_present(page, state.selectors), _canvas_sample(page)):
+        page.wait_for_timeout(min(READINESS_SAMPLE_INTERVAL_MS, max(1, state.remaining_ms())))
+
+    if own_tracker:
+        tracker.detach()
+    return state.result(label)
+
+
+async def wait_for_page_ready_async(page, tracker=None, max_wait_ms=None, selectors=None, label=''):
+    """
+    Async version of wait_for_page_ready for the async capture engine
+
+    Args:
+        page: Playwright async page
+        tracker (NetworkTracker): Tracker attached before navigation (created now if None)
+        max_wait_ms (int): Maximum time budget in milliseconds (default: READINESS_MAX_WAIT_MS)
+        selectors (dict): Selector groups to wait for (default: READY_SELECTORS)
+        label (str): Label used in log messages (e.g., the currency)
+
+    Returns:
+        dict: Readiness result with ready, waited_ms, canvas_stable, network_idle and missing_selectors
+    """
+    own_tracker = tracker is None
+    if own_tracker:
+        tracker = NetworkTracker(page)
+
+    state = ReadinessState(tracker, selectors, max_wait_ms)
+    while not state.update(await _selectors_present_async(page, state.selectors), await _canvas_sample_async(page)):
+        await asyncio.sleep(min(READINESS_SAMPLE_INTERVAL_MS, max(1, state.remaining_ms())) / 1000)
+
+    if own_tracker:
+        tracker.detach()
+    return state.result(label)
+
+
+def wait_for_redraw(page, action, tracker=None, max_wait_ms=None, label=''):
+    """
+    Run an action that changes the chart in place (e.g. switching the interval) and wait
+    until the chart canvases have changed and are stable again. Much cheaper than reloading.
+
+    Args:
+        page: Playwright sync page
+        action (callable): Function that triggers the redraw; its return value is passed through.
+                           A falsy return value means nothing changed and skips the wait.
+        tracker (NetworkTracker): Tracker attached to the page (created now if None)
+        max_wait_ms (int): Maximum time budget in milliseconds (default: READINESS_MAX_WAIT_MS)
+        label (str): Label used in log messages
+
+    Returns:
+        tuple: (action result, readiness result)
+    """
+    if max_wait_ms is None:
+        max_wait_ms = READINESS_MAX_WAIT_MS
+
+    before = _canvas_sample(page)
+    outcome = action()
+    if not outcome:
+        return outcome, None
+    deadline = time.monotonic() + max_wait_ms / 1000
+
+    # Wait for the redraw to start, otherwise the old chart would already look stable
+    while canvas_change_ratio(before, _canvas_sample(page)) <= READINESS_CANVAS_TOLERANCE and _remaining_ms(deadline) > 0:
+        page.wait_for_timeout(min(READINESS_SAMPLE_INTERVAL_MS, max(1, _remaining_ms(deadline))))
+
+    readiness = wait_for_page_ready(page, tracker, max_wait_ms=_remaining_ms(deadline), label=label)
+    return outcome, readiness
+
+
+async def wait_for_redraw_async(page, action, tracker=None, max_wait_ms=None, label=''):
+    """
+    Async version of wait_for_redraw
+
+    Args:
+        page: Playwright async page
+        action (callable): Coroutine function that triggers the redraw; a falsy result skips the wait
+        tracker (NetworkTracker): Tracker attached to the page (created now if None)
+        max_wait_ms (int): Maximum time budget in milliseconds (default: READINESS_MAX_WAIT_MS)
+        label (str): Label used in log messages
+
+    Returns:
+        tuple: (action result, readiness result)
+    """
+    if max_wait_ms is None:
+        max_wait_ms = READINESS_MAX_WAIT_MS
+
+    before = await _canvas_sample_async(page)
+    outcome = await action()
+    if not outcome:
+        return outcome, None
+    deadline = time.monotonic() + max_wait_ms / 1000
+
+    # Wait for the redraw to start, otherwise the old chart would already look stable
+    while (canvas_change_ratio(before, await _canvas_sample_async(page)) <= READINESS_CANVAS_TOLERANCE
+           and _remaining_ms(deadline) > 0):
+        await page.wait_for_timeout(min(READINESS_SAMPLE_INTERVAL_MS, max(1, _remaining_ms(deadline))))
+
+    readiness = await wait_for_page_ready_async(page, tracker, max_wait_ms=_remaining_ms(deadline), label=label)
+    return outcome, readiness
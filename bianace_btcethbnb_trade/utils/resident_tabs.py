@@ -0,0 +1,331 @@
+import time
+import logging
+from datetime import datetime
+from playwright.sync_api import sync_playwright
+from config.settings import (
+    BINANCE_CONTRACT_URLS,
+    CHROME_DEBUG_PORT,
+    DIRECT_CDP_CAPTURE,
+    CAPTURE_SYMBOL_BUDGET_S,
+    CAPTURE_RUN_BUDGET_S,
+    READINESS_MAX_WAIT_MS,
+    RESIDENT_TAB_STALE_MS,
+    RESIDENT_TAB_PROBE_MS
+)
+from utils.cdp_client import CDPClient, list_targets, capture_client
+from utils.page_readiness import NetworkTracker, wait_for_page_ready
+from utils.screenshot import install_resource_blocker, remove_resource_blocker, report_resource_blocker
+from utils.async_screenshot import build_screenshot_path
+from utils.dom_extractor import record_market_snapshot
+from utils.deadline import Deadline, stage_timeout_ms
+
+
+# Window name used to pin a tab to a symbol, so the same tab is found again on every run
+TAB_NAME_PREFIX = 'binance-resident-'
+
+# Records the time of the last price change. Binance writes the last price into the document title
+# and the ticker element, so a change of either one is a tick. Installing it twice is a no-op;
+# the watcher stays in the tab, so later runs read the tick age without watching again.
+TICK_WATCH_SCRIPT = """
+() => {
+    if (window.__residentTickWatch) {
+        return false;
+    }
+    window.__residentTickWatch = true;
+    window.__residentWatchStart = Date.now();
+    window.__residentLastTick = 0;
+    const tick = () => { window.__residentLastTick = Date.now(); };
+    const observer = new MutationObserver(tick);
+    const title = document.querySelector('title');
+    if (title) {
+        observer.observe(title, {childList: true, characterData: true, subtree: true});
+    }
+    const ticker = document.querySelector('.contractPrice, .showPrice, [class*="lastPrice"], [class*="last-price"]');
+    if (ticker) {
+        observer.observe(ticker, {childList: true, characterData: true, subtree: true});
+    }
+    return true;
+}
+"""
+
+# Milliseconds since the last tick (null when no tick has been seen yet) and since the watcher was installed
+TICK_AGE_SCRIPT = """
+() => ({
+    age: window.__residentLastTick ? Date.now() - window.__residentLastTick : null,
+    watched: window.__residentWatchStart ? Date.now() - window.__residentWatchStart : 0
+})
+"""
+
+
+def find_resident_tab(context, currency, deadline=None):
+    """
+    Find the tab pinned to a currency, or adopt an open tab showing that currency.
+    Only when there is none is a new tab opened and navigated.
+
+    Args:
+        context: Playwright browser context of the connected Chrome
+        currency (str): Currency pair
+        deadline (Deadline): Budget for opening a new tab
+
+    Returns:
+        tuple: (page, opened) where opened is True if the tab was just created
+    """
+    tab_name = TAB_NAME_PREFIX + currency
+    url = BINANCE_CONTRACT_URLS.get(currency, BINANCE_CONTRACT_URLS['BTCUSDT'])
+
+    adopt = None
+    for page in context.pages:
+        shows_currency = url in page.url or currency in page.url
+        try:
+            pinned = page.evaluate("() => window.name") == tab_name
+        except Exception:
+            continue
+        if pinned and shows_currency:
+            return page, False
+        if pinned:
+            # The user navigated the pinned tab elsewhere; release it instead of capturing the wrong symbol
+            logging.getLogger('binance_trade_analyzer').warning(
+                f"Tab pinned to {currency} now shows {page.url}, unpinning it"
+            )
+            page.evaluate("() => { window.name = ''; }")
+            continue
+        if adopt is None and shows_currency:
+            adopt = page
+
+    opened = adopt is None
+    page = adopt
+    if opened:
+        page = context.new_page()
+        blocker = install_resource_blocker(page)
+        tracker = NetworkTracker(page)
+        page.goto(url, timeout=stage_timeout_ms(deadline, 'goto', 60000))
+        wait_for_page_ready(page, tracker, max_wait_ms=stage_timeout_ms(deadline, 'readiness', READINESS_MAX_WAIT_MS), label=currency)
+        tracker.detach()
+        remove_resource_blocker(blocker)
+
+    page.evaluate("(name) => { window.name = name; }", tab_name)
+    return page, opened
+
+
+def watch_tab_ticks(page):
+    """
+    Install the tick watcher in a tab (no-op if it is already watched)
+
+    Returns:
+        bool: True if the watcher was installed now
+    """
+    return page.evaluate(TICK_WATCH_SCRIPT)
+
+
+def tab_tick_age(page, probe_ms=None):
+    """
+    Time since the ticker of a tab last changed. The watcher is installed on first use.
+    A tab that has not ticked yet is observed until it has been watched for probe_ms in total,
+    so watchers installed up front for all tabs (see capture_resident_tabs) share one probe
+    window, and tabs watched in an earlier run are not probed at all.
+
+    Args:
+        page: Playwright sync page
+        probe_ms (int): Minimum watch time before a tab without ticks counts as stale (default: RESIDENT_TAB_PROBE_MS)
+
+    Returns:
+        int: Milliseconds since the last tick, or None if no tick was seen
+    """
+    if probe_ms is None:
+        probe_ms = RESIDENT_TAB_PROBE_MS
+
+    watch_tab_ticks(page)
+    state = page.evaluate(TICK_AGE_SCRIPT)
+    while state['age'] is None and state['watched'] < probe_ms:
+        page.wait_for_timeout(min(100, probe_ms - state['watched']))
+        state = page.evaluate(TICK_AGE_SCRIPT)
+    return state['age']
+
+
+def refresh_stale_tab(page, currency, deadline=None):
+    """
+    Reload a tab whose data stopped updating and wait until it is ready again.
+    window.name survives the reload, so the tab stays pinned. The resource blocker is only
+    installed for the reload and removed afterwards, so repeated refreshes never stack handlers.
+    With a deadline, the reload and the readiness wait only get the time left.
+    """
+    blocker = install_resource_blocker(page)
+    try:
+        tracker = NetworkTracker(page)
+        page.reload(timeout=stage_timeout_ms(deadline, 'reload', 60000))
+        wait_for_page_ready(page, tracker, max_wait_ms=stage_timeout_ms(deadline, 'readiness', READINESS_MAX_WAIT_MS), label=currency)
+        tracker.detach()
+        report_resource_blocker(blocker, currency)
+    finally:
+        remove_resource_blocker(blocker)
+
+
+def _direct_tick_age(client, probe_ms):
+    """
+    Version of tab_tick_age for a direct CDP connection whose watcher is already installed
+    """
+    state = client.evaluate(f"({TICK_AGE_SCRIPT})()")
+    while state['age'] is None and state['watched'] < probe_ms:
+        time.sleep(min(100, probe_ms - state['watched']) / 1000)
+        state = client.evaluate(f"({TICK_AGE_SCRIPT})()")
+    return state['age']
+
+
+def capture_resident_tabs_direct(currencies, date_dir, port=CHROME_DEBUG_PORT, stale_ms=None, probe_ms=None, deadline=None):
+    """
+    Capture the healthy pinned tabs over direct CDP websockets, without starting the Playwright
+    driver. Tabs that are missing, not pinned, stale or not ready are left out, so
+    capture_resident_tabs adopts, opens or reloads them through Playwright.
+
+    Args:
+        currencies (list): List of currency pairs to capture
+        date_dir (str): Date directory name
+        port (int): Chrome remote debugging port
+        stale_ms (int): Ticker age after which a tab counts as stale (default: RESIDENT_TAB_STALE_MS)
+        probe_ms (int): Minimum watch time of a tab without ticks (default: RESIDENT_TAB_PROBE_MS)
+        deadline (Deadline): Run deadline; each currency gets CAPTURE_SYMBOL_BUDGET_S within it
+
+    Returns:
+        dict: Currency -> path to the saved screenshot
+    """
+    logger = logging.getLogger('binance_trade_analyzer')
+
+    if stale_ms is None:
+        stale_ms = RESIDENT_TAB_STALE_MS
+    if probe_ms is None:
+        probe_ms = RESIDENT_TAB_PROBE_MS
+
+    clients = {}
+    try:
+        # Connect to the pinned tab of every currency and start its tick watcher first,
+        # so the probe windows of all tabs overlap
+        for target in list_targets(port):
+            for currency in currencies:
+                url = BINANCE_CONTRACT_URLS.get(currency, BINANCE_CONTRACT_URLS['BTCUSDT'])
+                if currency in clients or not (url in target['url'] or currency in target['url']):
+                    continue
+                client = CDPClient(target['webSocketDebuggerUrl'])
+                if client.evaluate("window.name") != TAB_NAME_PREFIX + currency:
+                    client.close()
+                    continue
+                clients[currency] = client
+                client.evaluate(f"({TICK_WATCH_SCRIPT})()")
+
+        file_paths = {}
+        for currency in currencies:
+            if currency not in clients:
+                continue
+            start = time.monotonic()
+            symbol_deadline = Deadline(CAPTURE_SYMBOL_BUDGET_S, parent=deadline, label=currency)
+            try:
+                tick_age = _direct_tick_age(clients[currency], probe_ms)
+                if tick_age is None or tick_age > stale_ms:
+                    logger.info(f"Tab for {currency} is stale (last tick: {tick_age} ms ago), leaving it to the reload path")
+                    continue
+                filepath = capture_client(
+                    clients[currency], build_screenshot_path(currency, date_dir), currency,
+                    max_wait_ms=symbol_deadline.stage_timeout_ms('readiness', READINESS_MAX_WAIT_MS)
+                )
+                if filepath is None:
+                    logger.info(f"Tab for {currency} is not ready, leaving it to the Playwright path")
+                    continue
+                file_paths[currency] = filepath
+                logger.info(
+                    f"Resident tab capture for {currency} saved to {filepath} over direct CDP in "
+                    f"{(time.monotonic() - start) * 1000:.0f} ms"
+                )
+            except Exception as e:
+                logger.warning(f"Direct CDP capture of resident tab for {currency} failed: {str(e)}")
+        return file_paths
+    finally:
+        for client in clients.values():
+            client.close()
+
+
+def capture_resident_tabs(currencies, port=CHROME_DEBUG_PORT, stale_ms=None, deadline=None):
+    """
+    Capture each currency from its pinned tab in an existing Chrome with remote debugging.
+    Healthy pinned tabs are captured over direct CDP websockets first (see
+    capture_resident_tabs_direct); the rest go through Playwright, which adopts or opens
+    missing tabs and reloads tabs whose ticker has not changed for stale_ms.
+
+    Args:
+        currencies (list): List of currency pairs to capture
+        port (int): Chrome remote debugging port
+        stale_ms (int): Ticker age after which a tab is reloaded (default: RESIDENT_TAB_STALE_MS)
+        deadline (Deadline): Run deadline (default: CAPTURE_RUN_BUDGET_S from now); each currency
+                             gets CAPTURE_SYMBOL_BUDGET_S within it
+
+    Returns:
+        list: List of file paths to saved screenshots, in currency order
+    """
+    logger = logging.getLogger('binance_trade_analyzer')
+
+    if stale_ms is None:
+        stale_ms = RESIDENT_TAB_STALE_MS
+    run_deadline = deadline or Deadline(CAPTURE_RUN_BUDGET_S, label='run')
+
+    date_dir = datetime.now().strftime('%Y-%m-%d')
+    captured = {}
+
+    if DIRECT_CDP_CAPTURE:
+        try:
+            captured = capture_resident_tabs_direct(currencies, date_dir, port, stale_ms, deadline=run_deadline)
+        except Exception as e:
+            logger.warning(f"Direct CDP capture of resident tabs failed, using Playwright: {str(e)}")
+    remaining = [currency for currency in currencies if currency not in captured]
+    if not remaining:
+        return [captured[currency] for currency in currencies]
+
+    with sync_playwright() as p:
+        try:
+            browser = p.chromium.connect_over_cdp(f"http://localhost:{port}")
+        except Exception as e:
+            print(f"Error connecting to existing Chrome: {str(e)}")
+            return [captured[currency] for currency in currencies if currency in captured]
+
+        context = browser.contexts[0] if browser.contexts else browser.new_context()
+
+        # Find every tab and start its tick watcher first, so freshly attached tabs are probed in parallel
+        tabs = {}
+        for currency in remaining:
+            try:
+                tabs[currency] = find_resident_tab(context, currency, run_deadline)
+                watch_tab_ticks(tabs[currency][0])
+            except Exception as e:
+                logger.error(f"Error finding resident tab for {currency}: {str(e)}")
+
+        for currency in remaining:
+            if currency not in tabs:
+                continue
+            if run_deadline.expired():
+                logger.warning(f"Run budget exhausted, skipping {currency}")
+                continue
+            start = time.monotonic()
+            symbol_deadline = run_deadline.child(CAPTURE_SYMBOL_BUDGET_S, label=currency)
+            try:
+                page, opened = tabs[currency]
+
+                # Foreground tabs are not throttled, so the ticker updates and the capture shows the current frame
+                page.bring_to_front()
+
+                tick_age = tab_tick_age(page)
+                if tick_age is None or tick_age > stale_ms:
+                    logger.warning(f"Tab for {currency} is stale (last tick: {tick_age} ms ago), reloading")
+                    refresh_stale_tab(page, currency, symbol_deadline)
+
+                filepath = build_screenshot_path(currency, date_dir)
+                page.screenshot(path=filepath, full_page=False, timeout=symbol_deadline.stage_timeout_ms('screenshot', 10000))
+                record_market_snapshot(page, currency, filepath)
+                captured[currency] = filepath
+
+                logger.info(
+                    f"Resident tab capture for {currency} saved to {filepath} in "
+                    f"{(time.monotonic() - start) * 1000:.0f} ms"
+                    f"{' (new tab)' if opened else ''}"
+                )
+            except Exception as e:
+                logger.error(f"Error capturing resident tab for {currency}: {str(e)}")
+
+        # Note: We don't close the browser as it's connected to an existing instance
+    return [captured[currency] for currency in currencies if currency in captured]
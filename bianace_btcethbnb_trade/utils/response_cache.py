@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from config.settings import (
+    RESPONSE_CACHE_ENABLED,
+    RESPONSE_CACHE_PATH,
+    RESPONSE_CACHE_TTL_HOURS,
+    RESPONSE_CACHE_MAX_MB,
+    RESPONSE_CACHE_BYPASS
+)
+
+
+def file_digest(path):
+    """
+    SHA-256 of a file's content, so the key changes when a screenshot is overwritten in place.
+    The request names the screenshot path, so a renamed or copied screenshot still gets a new key.
+
+    Args:
+        path (str): File path
+
+    Returns:
+        str: Hex digest, or the path itself (marked as missing) if the file can't be read
+    """
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+    except OSError:
+        return f"missing:{path}"
+    return digest.hexdigest()
+
+
+def _digest_images(value):
+    """
+    Copy of a request body part with inline base64 images (data: URLs) replaced by their SHA-256
+    """
+    if isinstance(value, dict):
+        return {key: _digest_images(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_digest_images(item) for item in value]
+    if isinstance(value, str) and value.startswith('data:') and ';base64,' in value:
+        header, data = value.split(',', 1)
+        return f"{header},sha256:{hashlib.sha256(data.encode('ascii', 'replace')).hexdigest()}"
+    return value
+
+
+def payload_cache_key(payload, screenshot_paths=()):
+    """
+    Content-addressed cache key of a chat completion request. The key covers the final request
+    body, so everything the model sees (model, system instructions, prompt, market snapshot text,
+    indicator table, max_tokens) changes it. Inline images are hashed instead of serialized, and
+    screenshots the request refers to by path are hashed by content.
+
+    Args:
+        payload (dict): Request body as sent
+        screenshot_paths (list): Screenshots described in the request
+
+    Returns:
+        str: Hex digest
+    """
+    parts = {
+        'payload': _digest_images(payload),
+        'screenshots': [file_digest(path) for path in screenshot_paths]
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    DeepSeek responses stored in SQLite by request key. Entries expire after ttl_s, and the
+    least recently used ones are evicted once the stored responses exceed max_bytes.
+    Each call opens (and closes) its own connection, so the cache can be used from any thread.
+    """
+
+    def __init__(self, path=None, ttl_s=None, max_bytes=None, bypass=None):
+        """
+        Args:
+            path (str): SQLite database file (default: RESPONSE_CACHE_PATH)
+            ttl_s (float): Entry lifetime in seconds, 0 for no expiry (default: RESPONSE_CACHE_TTL_HOURS)
+            max_bytes (int): Size cap of the stored responses (default: RESPONSE_CACHE_MAX_MB)
+            bypass (bool): Don't read from the cache, only store fresh responses (default: RESPONSE_CACHE_BYPASS)
+        """
+        self.path = path or RESPONSE_CACHE_PATH
+        self.ttl_s = RESPONSE_CACHE_TTL_HOURS * 3600 if ttl_s is None else ttl_s
+        self.max_bytes = max_bytes or int(RESPONSE_CACHE_MAX_MB * 1024 * 1024)
+        self.bypass = RESPONSE_CACHE_BYPASS if bypass is None else bypass
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, '
+                'created_at REAL NOT NULL, last_used REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)')
+
+    @contextmanager
+    def _connect(self):
+        """
+        Connection that commits on success, rolls back on an error and is always closed
+        """
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _log(self, outcome, key):
+        logging.getLogger('binance_trade_analyzer').info(
+            f"Response cache {outcome} for {key[:12]} ({self.hits} hits, {self.misses} misses this run)"
+        )
+
+    def get(self, key):
+        """
+        Cached response for a key
+
+        Returns:
+            dict: Response, or None on a miss, an expired entry or when bypassed
+        """
+        if self.bypass:
+            with self._lock:
+                self.misses += 1
+            self._log('bypassed', key)
+            return None
+
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute('SELECT response, created_at FROM responses WHERE key = ?', (key,)).fetchone()
+            if row and self.ttl_s and now - row[1] > self.ttl_s:
+                conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                row = None
+            if row:
+                conn.execute('UPDATE responses SET last_used = ? WHERE key = ?', (now, key))
+
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        self._log('hit' if row else 'miss', key)
+        return json.loads(row[0]) if row else None
+
+    def put(self, key, response):
+        """
+        Store a response and evict entries beyond the TTL and size cap
+        """
+        data = json.dumps(response, ensure_ascii=False)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO responses (key, response, size, created_at, last_used) VALUES (?, ?, ?, ?, ?)',
+                (key, data, len(data.encode('utf-8')), now, now)
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        if self.ttl_s:
+            conn.execute('DELETE FROM responses WHERE created_at < ?', (now - self.ttl_s,))
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for key, size in conn.execute('SELECT key, size FROM responses ORDER BY last_used'):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        conn.executemany('DELETE FROM responses WHERE key = ?', evicted)
+        logging.getLogger('binance_trade_analyzer').info(f"Response cache evicted {len(evicted)} least recently used entries")
+
+
+# Cache shared by all requests of this process
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """
+    Return the shared response cache, creating it on first use
+
+    Returns:
+        ResponseCache: Shared cache, or None when RESPONSE_CACHE_ENABLED is off
+    """
+    global _cache
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
+
+
+def bypass_response_cache(bypass=True):
+    """
+    Skip cache lookups for the rest of the run, e.g. for --no-cache; fresh responses are still stored
+    """
+    cache = get_response_cache()
+    if cache is not None:
+        cache.bypass = bypass
@@ -0,0 +1,246 @@
+import os
+import glob
+import time
+import base64
+import logging
+from collections import deque
+from datetime import datetime
+from playwright.sync_api import sync_playwright
+from config.settings import (
+    CHROME_DEBUG_PORT,
+    SCREENSHOT_OUTPUT_DIR,
+    SCREENCAST_INTERVAL_S,
+    SCREENCAST_DURATION_S,
+    SCREENCAST_MAX_FRAMES,
+    SCREENCAST_MAX_AGE_MINUTES,
+    SCREENCAST_FORMAT,
+    SCREENCAST_QUALITY,
+    SCREENCAST_MAX_WIDTH,
+    SCREENCAST_MAX_HEIGHT
+)
+from utils.cdp_client import UNTHROTTLE_COMMANDS
+from utils.resident_tabs import find_resident_tab
+
+
+# File name suffix of sampled frames, e.g. 20250101_093000_123_BTCUSDT_frame.jpg
+FRAME_SUFFIX = '_frame'
+
+
+class FrameRing:
+    """
+    Bounded series of frames of one currency on disk. Frames beyond max_frames or older
+    than max_age_s are deleted oldest first, so the series never grows past its limits.
+    Frames left by earlier runs of the same day are picked up and count towards the limits.
+    """
+
+    def __init__(self, currency, date_dir=None, max_frames=None, max_age_s=None, extension=None):
+        """
+        Args:
+            currency (str): Currency pair
+            date_dir (str): Date directory name (default: today)
+            max_frames (int): Maximum number of frames kept (default: SCREENCAST_MAX_FRAMES)
+            max_age_s (float): Maximum frame age in seconds, 0 for no limit (default: SCREENCAST_MAX_AGE_MINUTES)
+            extension (str): Frame file extension (default: from SCREENCAST_FORMAT)
+        """
+        self.currency = currency
+        self.max_frames = max_frames or SCREENCAST_MAX_FRAMES
+        self.max_age_s = SCREENCAST_MAX_AGE_MINUTES * 60 if max_age_s is None else max_age_s
+        self.extension = extension or ('jpg' if SCREENCAST_FORMAT == 'jpeg' else SCREENCAST_FORMAT)
+        self.currency_dir = os.path.join(SCREENSHOT_OUTPUT_DIR, date_dir or datetime.now().strftime('%Y-%m-%d'), currency)
+        os.makedirs(self.currency_dir, exist_ok=True)
+
+        # (captured_at, path) pairs, oldest first
+        self.frames = deque()
+        existing = glob.glob(os.path.join(self.currency_dir, f'*_{currency}{FRAME_SUFFIX}.*'))
+        for path in sorted(existing, key=os.path.getmtime):
+            self.frames.append((os.path.getmtime(path), path))
+        self.prune()
+
+    def add(self, data, captured_at=None):
+        """
+        Write a frame to disk and apply the retention limits
+
+        Args:
+            data (bytes): Encoded image
+            captured_at (float): Capture time as a Unix timestamp (default: now)
+
+        Returns:
+            str: Path to the frame file
+        """
+        captured_at = captured_at or time.time()
+        moment = datetime.fromtimestamp(captured_at)
+        # Milliseconds keep sub-second sampling intervals from overwriting each other
+        filename = f"{moment.strftime('%Y%m%d_%H%M%S')}_{moment.microsecond // 1000:03d}_{self.currency}{FRAME_SUFFIX}.{self.extension}"
+        path = os.path.join(self.currency_dir, filename)
+        with open(path, 'wb') as f:
+            f.write(data)
+        self.frames.append((captured_at, path))
+        self.prune()
+        return path
+
+    def prune(self, now=None):
+        """
+        Delete the oldest frames until the series is within max_frames and max_age_s
+
+        Returns:
+            int: Number of deleted frames
+        """
+        now = now or time.time()
+        removed = 0
+        while self.frames and (len(self.frames) > self.max_frames
+                               or (self.max_age_s and now - self.frames[0][0] > self.max_age_s)):
+            _, path = self.frames.popleft()
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            removed += 1
+        return removed
+
+    def paths(self):
+        """
+        Returns:
+            list: Frame paths, oldest first
+        """
+        return [path for _, path in self.frames]
+
+
+class ScreencastSampler:
+    """
+    Streams the frames of one tab over Page.startScreencast and keeps only the latest one
+    in memory. sample() writes that frame to the ring, so the sampling interval is set by
+    the caller and does not depend on how often the page repaints.
+    """
+
+    def __init__(self, context, page, currency, ring):
+        """
+        Args:
+            context: Playwright browser context that owns the page
+            page: Playwright sync page to stream
+            currency (str): Currency pair shown in the page
+            ring (FrameRing): Destination of the sampled frames
+        """
+        self.currency = currency
+        self.ring = ring
+        self.latest = None
+        self.frames_received = 0
+        self.session = context.new_cdp_session(page)
+        self.session.on('Page.screencastFrame', self._on_frame)
+
+    def _on_frame(self, params):
+        self.latest = params['data']
+        self.frames_received += 1
+        # Chrome sends the next frame only after the previous one is acknowledged
+        try:
+            self.session.send('Page.screencastFrameAck', {'sessionId': params['sessionId']})
+        except Exception:
+            pass
+
+    def start(self):
+        for method, params in UNTHROTTLE_COMMANDS:
+            try:
+                self.session.send(method, params)
+            except Exception as e:
+                logging.getLogger('binance_trade_analyzer').debug(f"{method} failed: {str(e)}")
+
+        params = {
+            'format': SCREENCAST_FORMAT,
+            'maxWidth': SCREENCAST_MAX_WIDTH,
+            'maxHeight': SCREENCAST_MAX_HEIGHT,
+            'everyNthFrame': 1
+        }
+        if SCREENCAST_FORMAT == 'jpeg':
+            params['quality'] = SCREENCAST_QUALITY
+        self.session.send('Page.startScreencast', params)
+
+    def sample(self):
+        """
+        Write the most recent frame to the ring
+
+        Returns:
+            str: Path to the frame file, or None if no frame has arrived yet
+        """
+        if self.latest is None:
+            return None
+        return self.ring.add(base64.b64decode(self.latest))
+
+    def stop(self):
+        try:
+            self.session.send('Page.stopScreencast')
+        finally:
+            self.session.detach()
+
+
+def sample_screencast(currencies, duration_s=None, interval_s=None, max_frames=None, port=CHROME_DEBUG_PORT):
+    """
+    Sample an evenly spaced frame series of each currency from its pinned tab in an existing
+    Chrome with remote debugging. All tabs stream at once and stay loaded the whole time;
+    nothing is reloaded between samples.
+
+    Args:
+        currencies (list): List of currency pairs to sample
+        duration_s (float): Sampling duration in seconds (default: SCREENCAST_DURATION_S)
+        interval_s (float): Time between samples in seconds (default: SCREENCAST_INTERVAL_S)
+        max_frames (int): Frames kept per currency (default: SCREENCAST_MAX_FRAMES)
+        port (int): Chrome remote debugging port
+
+    Returns:
+        dict: Currency -> frame paths kept on disk, oldest first
+    """
+    logger = logging.getLogger('binance_trade_analyzer')
+
+    duration_s = duration_s or SCREENCAST_DURATION_S
+    interval_s = interval_s or SCREENCAST_INTERVAL_S
+
+    series = {}
+    with sync_playwright() as p:
+        try:
+            browser = p.chromium.connect_over_cdp(f"http://localhost:{port}")
+        except Exception as e:
+            print(f"Error connecting to existing Chrome: {str(e)}")
+            return series
+
+        context = browser.contexts[0] if browser.contexts else browser.new_context()
+
+        samplers = []
+        for currency in currencies:
+            try:
+                page, _ = find_resident_tab(context, currency)
+                sampler = ScreencastSampler(context, page, currency, FrameRing(currency, max_frames=max_frames))
+                sampler.start()
+                samplers.append((page, sampler))
+            except Exception as e:
+                logger.error(f"Could not start screencast for {currency}: {str(e)}")
+
+        if not samplers:
+            return series
+
+        # Waiting on one page lets Playwright dispatch the frame events of every session
+        pump = samplers[0][0]
+        start = time.monotonic()
+        next_sample = start + interval_s
+        try:
+            while next_sample <= start + duration_s:
+                pump.wait_for_timeout(max(0, (next_sample - time.monotonic()) * 1000))
+                for _, sampler in samplers:
+                    path = sampler.sample()
+                    if path is None:
+                        logger.warning(f"No screencast frame received for {sampler.currency} yet")
+                # Schedule from the start time, so slow writes don't make the series drift
+                next_sample += interval_s
+        finally:
+            for _, sampler in samplers:
+                try:
+                    sampler.stop()
+                except Exception as e:
+                    logger.debug(f"Error stopping screencast for {sampler.currency}: {str(e)}")
+
+        for _, sampler in samplers:
+            series[sampler.currency] = sampler.ring.paths()
+            logger.info(
+                f"Screencast for {sampler.currency}: {sampler.frames_received} frames received, "
+                f"{len(series[sampler.currency])} kept"
+            )
+
+        # Note: We don't close the browser as it's connected to an existing instance
+    return series
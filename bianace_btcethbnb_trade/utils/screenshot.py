@@ -1,12 +1,78 @@
 import os
+import sys
 import json
 import time
+import atexit
+import shutil
 import subprocess
 import logging
 from playwright.sync_api import sync_playwright
-from config.settings import BINANCE_CONTRACT_URLS
+from config.settings import (
+    BINANCE_CONTRACT_URLS,
+    SCREENSHOT_REGIONS,
+    CAPTURE_REGIONS,
+    RESOURCE_BLOCKING,
+    BLOCKED_RESOURCE_TYPES,
+    BLOCKED_DOMAINS,
+    ALLOWED_DOMAINS,
+    BROWSER_PERSISTENT_PROFILE,
+    BROWSER_PROFILE_DIR,
+    BROWSER_PROFILE_VERSION,
+    BROWSER_CACHE_SIZE_MB,
+    CAPTURE_TIMEFRAMES,
+    TIMEFRAME_OPTIONS,
+    TIMEFRAME_SWITCH_MAX_WAIT_MS,
+    PARALLEL_TAB_CAPTURE,
+    DIRECT_CDP_CAPTURE,
+    CAPTURE_SYMBOL_BUDGET_S,
+    CAPTURE_RUN_BUDGET_S,
+    READINESS_MAX_WAIT_MS,
+    BROWSER_HEADLESS,
+    STORAGE_STATE_FILE,
+    XVFB_FALLBACK,
+    XVFB_DISPLAY,
+    CHROME_PATH
+)
+from urllib.parse import urlparse
+from utils.page_readiness import NetworkTracker, wait_for_page_ready, wait_for_redraw, wait_for_redraw_async
+from utils.dom_extractor import record_market_snapshot
+from utils.deadline import Deadline, BudgetExceeded, stage_timeout_ms
 from datetime import datetime
 
+# Session cookies kept in memory so relaunches don't re-read the session file
+_session_cache = {}
+
+
+def get_session_cookies(session_file='binance_session.json'):
+    """
+    Return the session cookies, reading the session file only on first use
+    
+    Args:
+        session_file (str): Path to session file
+    
+    Returns:
+        list: Cookies
+    
+    Raises:
+        FileNotFoundError: If the session file does not exist and nothing is cached
+    """
+    if session_file not in _session_cache:
+        with open(session_file, 'r') as f:
+            _session_cache[session_file] = json.load(f)
+    return _session_cache[session_file]
+
+
+def cache_session_cookies(cookies, session_file='binance_session.json'):
+    """
+    Replace the in-memory session cookies after a session was saved
+    
+    Args:
+        cookies (list): Cookies
+        session_file (str): Path to session file the cookies belong to
+    """
+    _session_cache[session_file] = cookies
+
+
 def save_session(context, session_file='binance_session.json'):
     """
     Save browser session (cookies) to a file
@@ -18,6 +84,7 @@ def save_session(context, session_file='binance_session.json'):
     cookies = context.cookies()
     with open(session_file, 'w') as f:
         json.dump(cookies, f)
+    cache_session_cookies(cookies, session_file)
     print(f"Session saved to {session_file}")
 
 
@@ -33,8 +100,7 @@ def load_session(context, session_file='binance_session.json'):
         bool: True if session loaded successfully, False otherwise
     """
     try:
-        with open(session_file, 'r') as f:
-            cookies = json.load(f)
+        cookies = get_session_cookies(session_file)
         context.add_cookies(cookies)
         print(f"Session loaded from {session_file}")
         return True
@@ -46,6 +112,1079 @@ def load_session(context, session_file='binance_session.json'):
         return False
 
 
+# Launch arguments for capture browsers started by Playwright
+CAPTURE_BROWSER_ARGS = [
+    "--disable-blink-features=AutomationControlled",
+    "--disable-dev-shm-usage",
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-web-security",
+    "--disable-features=VizDisplayCompositor",
+    "--disable-ipc-flooding-protection",
+    "--disable-background-timer-throttling",
+    "--disable-renderer-backgrounding",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--disable-default-apps",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-extensions",
+    "--disable-plugins",
+    "--disable-gpu"
+]
+
+CAPTURE_USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Xvfb server started by ensure_display, stopped when the process exits
+_xvfb_process = None
+
+
+def ensure_display():
+    """
+    Make sure headed Chrome has an X server. On Linux without DISPLAY, start Xvfb
+    when XVFB_FALLBACK is enabled and point DISPLAY at it.
+    
+    Returns:
+        bool: True if a display is available (or not needed on this platform)
+    """
+    global _xvfb_process
+    
+    if not sys.platform.startswith('linux') or os.environ.get('DISPLAY'):
+        return True
+    if not XVFB_FALLBACK:
+        print("No X server found (DISPLAY is not set). Set BROWSER_HEADLESS=true or XVFB_FALLBACK=true")
+        return False
+    
+    if _xvfb_process is None or _xvfb_process.poll() is not None:
+        xvfb_path = shutil.which('Xvfb')
+        if not xvfb_path:
+            print("XVFB_FALLBACK is enabled but Xvfb is not installed")
+            return False
+        _xvfb_process = subprocess.Popen(
+            [xvfb_path, XVFB_DISPLAY, '-screen', '0', '1920x1080x24', '-nolisten', 'tcp'],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        atexit.register(_xvfb_process.terminate)
+        
+        # Xvfb is ready once its socket exists
+        socket_path = f"/tmp/.X11-unix/X{XVFB_DISPLAY.lstrip(':').split('.')[0]}"
+        deadline = time.monotonic() + 5
+        while not os.path.exists(socket_path) and time.monotonic() < deadline:
+            time.sleep(0.1)
+        print(f"Started Xvfb on display {XVFB_DISPLAY}")
+    
+    os.environ['DISPLAY'] = XVFB_DISPLAY
+    return True
+
+
+def browser_launch_kwargs(args=None, headless=None):
+    """
+    Playwright launch keyword arguments for headed or headless Chrome
+    
+    Args:
+        args (list): Chrome command line arguments (default: CAPTURE_BROWSER_ARGS)
+        headless (bool): Run without a window (default: BROWSER_HEADLESS)
+    
+    Returns:
+        dict: headless and args keyword arguments for launch() and launch_persistent_context()
+    """
+    if args is None:
+        args = CAPTURE_BROWSER_ARGS
+    if headless is None:
+        headless = BROWSER_HEADLESS
+    
+    if headless:
+        # New headless mode is the full browser without a window, so pages render as in headed Chrome.
+        # It is requested through the argument because headless=True starts the old headless shell.
+        return {'headless': False, 'args': list(args) + ['--headless=new', '--window-size=1920,1080']}
+    
+    ensure_display()
+    return {'headless': False, 'args': list(args)}
+
+
+def find_chrome_path(p=None):
+    """
+    Find a Chrome or Chromium executable for the remote debugging instance
+    
+    Args:
+        p: Playwright instance, used to fall back to the bundled Chromium
+    
+    Returns:
+        str: Path to the executable, or None if none was found
+    """
+    candidates = [
+        CHROME_PATH,
+        "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+        "/usr/bin/google-chrome",
+        "/usr/bin/google-chrome-stable",
+        "/usr/bin/chromium",
+        "/usr/bin/chromium-browser",
+        "/snap/bin/chromium"
+    ]
+    for path in candidates:
+        if path and os.path.exists(path):
+            return path
+    
+    for name in ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser'):
+        path = shutil.which(name)
+        if path:
+            return path
+    
+    if p is not None and os.path.exists(p.chromium.executable_path):
+        return p.chromium.executable_path
+    return None
+
+
+def bootstrap_login(currency='BTCUSDT', storage_state_file=None, session_file='binance_session.json'):
+    """
+    One-time headed login. Opens a browser window, waits for the user to log in and
+    exports the storage state (cookies and localStorage) for later headless runs.
+    
+    Args:
+        currency (str): Currency pair whose page is opened
+        storage_state_file (str): Storage state destination (default: STORAGE_STATE_FILE)
+        session_file (str): Session file that also receives the cookies
+    
+    Returns:
+        str: Path to the storage state file
+    """
+    storage_state_file = storage_state_file or STORAGE_STATE_FILE
+    url = BINANCE_CONTRACT_URLS.get(currency, BINANCE_CONTRACT_URLS['BTCUSDT'])
+    
+    with sync_playwright() as p:
+        browser = p.chromium.launch(**browser_launch_kwargs(headless=False))
+        context = browser.new_context(user_agent=CAPTURE_USER_AGENT, viewport={'width': 1920, 'height': 1080})
+        load_session(context, session_file)
+        page = context.new_page()
+        page.goto(url, timeout=60000)
+        
+        print("Browser opened. Please log in to Binance and set your preferences.")
+        print("After logging in, press Enter in this terminal to export the session...")
+        input()
+        
+        context.storage_state(path=storage_state_file)
+        save_session(context, session_file)
+        print(f"Storage state saved to {storage_state_file}")
+        browser.close()
+    
+    return storage_state_file
+
+
+def get_profile_dir(base_dir=None, version=None):
+    """
+    Return the managed, versioned persistent profile directory, removing profiles of other versions
+    
+    Args:
+        base_dir (str): Directory holding the profiles (default: BROWSER_PROFILE_DIR)
+        version (str): Profile version (default: BROWSER_PROFILE_VERSION)
+    
+    Returns:
+        str: Path to the profile directory for this version
+    """
+    base_dir = base_dir or BROWSER_PROFILE_DIR
+    version = version or BROWSER_PROFILE_VERSION
+    profile_name = f'v{version}'
+    os.makedirs(base_dir, exist_ok=True)
+    
+    for name in os.listdir(base_dir):
+        path = os.path.join(base_dir, name)
+        if name != profile_name and name.startswith('v') and os.path.isdir(path):
+            print(f"Removing outdated browser profile {path}")
+            shutil.rmtree(path, ignore_errors=True)
+    
+    profile_dir = os.path.join(base_dir, profile_name)
+    os.makedirs(profile_dir, exist_ok=True)
+    return profile_dir
+
+
+def capture_launch_options(persistent=None, headless=None, profile_dir=None):
+    """
+    Launch arguments of a capture context, shared by the sync and async launch
+    
+    Args:
+        persistent (bool): Use the persistent profile (default: BROWSER_PERSISTENT_PROFILE)
+        headless (bool): Run without a window (default: BROWSER_HEADLESS)
+        profile_dir (str): Persistent profile directory (default: get_profile_dir())
+    
+    Returns:
+        dict: persistent, profile_dir (persistent only), launch_kwargs and context_kwargs
+    """
+    if persistent is None:
+        persistent = BROWSER_PERSISTENT_PROFILE
+    
+    if not persistent:
+        # The exported login state carries localStorage too; cookies from the session file are added on top
+        storage_state = STORAGE_STATE_FILE if os.path.exists(STORAGE_STATE_FILE) else None
+        return {
+            'persistent': False,
+            'profile_dir': None,
+            'launch_kwargs': browser_launch_kwargs(headless=headless),
+            'context_kwargs': {'user_agent': CAPTURE_USER_AGENT, 'storage_state': storage_state}
+        }
+    
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+    return {
+        'persistent': True,
+        'profile_dir': profile_dir or get_profile_dir(),
+        'launch_kwargs': dict(
+            user_agent=CAPTURE_USER_AGENT,
+            **browser_launch_kwargs(
+                CAPTURE_BROWSER_ARGS + [f"--disk-cache-size={BROWSER_CACHE_SIZE_MB * 1024 * 1024}"],
+                headless=headless
+            )
+        ),
+        'context_kwargs': None
+    }
+
+
+def _seeded_marker(profile_dir):
+    # Cookies live in the profile; they are seeded from the session only once per fresh profile
+    return os.path.join(profile_dir, '.session_seeded')
+
+
+def profile_needs_session(profile_dir):
+    """
+    Whether a persistent profile has not been seeded with the session cookies yet
+    """
+    return not os.path.exists(_seeded_marker(profile_dir))
+
+
+def mark_profile_seeded(profile_dir):
+    """
+    Record that a persistent profile has been seeded with the session cookies
+    """
+    with open(_seeded_marker(profile_dir), 'w') as f:
+        f.write(datetime.now().isoformat())
+
+
+def launch_capture_context(p, persistent=None, session_file='binance_session.json', headless=None):
+    """
+    Launch a browser context for capturing, either a throwaway context or a persistent profile
+    that keeps the HTTP cache, localStorage and chart layout between runs.
+    
+    Args:
+        p: Playwright instance from sync_playwright()
+        persistent (bool): Use the persistent profile (default: BROWSER_PERSISTENT_PROFILE)
+        session_file (str): Session file used to seed cookies
+        headless (bool): Run without a window (default: BROWSER_HEADLESS)
+    
+    Returns:
+        tuple: (browser, context). browser is None for a persistent context.
+    """
+    options = capture_launch_options(persistent, headless)
+    
+    if not options['persistent']:
+        browser = p.chromium.launch(**options['launch_kwargs'])
+        context = browser.new_context(**options['context_kwargs'])
+        load_session(context, session_file)
+        return browser, context
+    
+    profile_dir = options['profile_dir']
+    context = p.chromium.launch_persistent_context(profile_dir, **options['launch_kwargs'])
+    if profile_needs_session(profile_dir) and load_session(context, session_file):
+        mark_profile_seeded(profile_dir)
+    
+    print(f"Launched persistent browser profile {profile_dir}")
+    return None, context
+
+
+def capture_context_alive(browser, context):
+    """
+    Check whether a context returned by launch_capture_context is still usable
+    
+    Returns:
+        bool: True if the browser/context is still connected
+    """
+    if browser is not None:
+        return browser.is_connected()
+    try:
+        context.cookies()
+        return True
+    except Exception:
+        return False
+
+
+def close_capture_context(browser, context):
+    """
+    Close a context returned by launch_capture_context
+    """
+    try:
+        if browser is not None:
+            browser.close()
+        elif context is not None:
+            context.close()
+    except Exception:
+        pass
+
+
+# Finds, in one round trip, the first visible selector for every region of the region map
+REGION_LOCATOR_SCRIPT = """
+(regions) => {
+    const found = {};
+    for (const [name, selectors] of Object.entries(regions)) {
+        for (const selector of selectors) {
+            const element = document.querySelector(selector);
+            if (!element) {
+                continue;
+            }
+            const rect = element.getBoundingClientRect();
+            if (rect.width > 0 && rect.height > 0) {
+                found[name] = selector;
+                break;
+            }
+        }
+    }
+    return found;
+}
+"""
+
+
+def build_region_path(currency, date_dir, region, index=0, capture_times_per_currency=1):
+    """
+    Build the path of a labelled region screenshot under data/screenshots/<date>/<currency>/
+    
+    Args:
+        currency (str): Currency pair (e.g., BTCUSDT)
+        date_dir (str): Date directory name (YYYY-MM-DD)
+        region (str): Region label (e.g., chart, orderbook)
+        index (int): Zero-based capture index for this currency
+        capture_times_per_currency (int): Total number of captures for this currency
+    
+    Returns:
+        str: Path to the region screenshot file
+    """
+    timestamp_str = datetime.now().strftime('%Y%m%d_%H%M%S')
+    if capture_times_per_currency > 1:
+        filename = f'{timestamp_str}_{currency}_{region}_{index+1}.png'
+    else:
+        filename = f'{timestamp_str}_{currency}_{region}.png'
+    
+    currency_dir = os.path.join('data', 'screenshots', date_dir, currency)
+    os.makedirs(currency_dir, exist_ok=True)
+    
+    return os.path.join(currency_dir, filename)
+
+
+def _select_regions(regions):
+    if regions is None:
+        regions = CAPTURE_REGIONS or list(SCREENSHOT_REGIONS.keys())
+    return {name: SCREENSHOT_REGIONS[name] for name in regions if name in SCREENSHOT_REGIONS}
+
+
+def _region_targets(region_map, found, currency, date_dir, index, capture_times_per_currency):
+    """
+    Pair every located region with its selector and output path; regions that were not found are reported and skipped
+
+    Args:
+        region_map (dict): Region name -> candidate selectors, from _select_regions
+        found (dict): Region name -> first visible selector, from REGION_LOCATOR_SCRIPT
+
+    Returns:
+        list: (region, selector, filepath) tuples in region order
+    """
+    targets = []
+    for region in region_map:
+        selector = (found or {}).get(region)
+        if not selector:
+            print(f"Region '{region}' not found for {currency}, skipping")
+            continue
+        targets.append((region, selector, build_region_path(currency, date_dir, region, index, capture_times_per_currency)))
+    return targets
+
+
+def _report_capture(file_paths, what, currency, filepath, error=None):
+    """
+    Print the outcome of one screenshot and collect its path if it was saved
+
+    Args:
+        file_paths (list): Saved paths, appended to on success
+        what (str): What was captured, e.g. "region 'chart'" or "4h screenshot"
+        currency (str): Currency pair (e.g., BTCUSDT)
+        filepath (str): Screenshot path
+        error (Exception): Error the capture failed with, None on success
+    """
+    if error is None:
+        print(f"{what[0].upper()}{what[1:]} for {currency} saved to {filepath}")
+        file_paths.append(filepath)
+    else:
+        print(f"Error capturing {what} for {currency}: {str(error)}")
+
+
+def capture_page_regions(page, currency, date_dir, regions=None, index=0, capture_times_per_currency=1, deadline=None):
+    """
+    Capture the chart, order book, funding/24h stats and position panels as separate images.
+    All regions are located in a single evaluate call and then captured as element screenshots.
+    
+    Args:
+        page: Playwright sync page that is already loaded
+        currency (str): Currency pair (e.g., BTCUSDT)
+        date_dir (str): Date directory name (YYYY-MM-DD)
+        regions (list): Region names to capture (default: CAPTURE_REGIONS, or every region in SCREENSHOT_REGIONS)
+        index (int): Zero-based capture index for this currency
+        capture_times_per_currency (int): Total number of captures for this currency
+        deadline (Deadline): Budget of the capture; region screenshots only get the time left
+    
+    Returns:
+        list: List of file paths to saved region screenshots, up to the first one without time left
+    """
+    region_map = _select_regions(regions)
+    found = page.evaluate(REGION_LOCATOR_SCRIPT, region_map)
+    
+    file_paths = []
+    for region, selector, filepath in _region_targets(region_map, found, currency, date_dir, index, capture_times_per_currency):
+        try:
+            timeout_ms = stage_timeout_ms(deadline, 'regions', 30000)
+        except BudgetExceeded as e:
+            print(f"{str(e)}, keeping {len(file_paths)} region screenshots")
+            break
+        try:
+            page.locator(selector).first.screenshot(path=filepath, timeout=timeout_ms)
+        except Exception as e:
+            _report_capture(file_paths, f"region '{region}'", currency, filepath, e)
+        else:
+            _report_capture(file_paths, f"region '{region}'", currency, filepath)
+    
+    return file_paths
+
+
+# Switches the chart interval in place: through the TradingView widget API when the page exposes it,
+# otherwise by clicking the visible interval button with a matching label.
+SET_INTERVAL_SCRIPT = """
+({resolution, labels}) => {
+    for (const widget of [window.tvWidget, window.widget, window.tradingViewWidget]) {
+        try {
+            if (widget && typeof widget.activeChart === 'function') {
+                widget.activeChart().setResolution(resolution);
+                return 'widget';
+            }
+            if (widget && typeof widget.chart === 'function') {
+                widget.chart().setResolution(resolution);
+                return 'widget';
+            }
+        } catch (e) {
+            // Widget not ready, fall back to clicking
+        }
+    }
+    const wanted = new Set(labels);
+    const candidates = Array.from(document.querySelectorAll('button, [role="button"], [role="tab"], div, span'))
+        .filter(el => el.children.length === 0 && wanted.has((el.textContent || '').trim()));
+    for (const el of candidates) {
+        const rect = el.getBoundingClientRect();
+        if (rect.width > 0 && rect.height > 0) {
+            el.click();
+            return 'click';
+        }
+    }
+    return null;
+}
+"""
+
+# Reads the interval the chart currently shows, in the form SET_INTERVAL_SCRIPT takes,
+# so the user's tab can be put back after the interval captures
+CURRENT_INTERVAL_SCRIPT = """
+(labels) => {
+    for (const widget of [window.tvWidget, window.widget, window.tradingViewWidget]) {
+        try {
+            if (widget && typeof widget.activeChart === 'function') {
+                return {resolution: String(widget.activeChart().resolution()), labels: []};
+            }
+            if (widget && typeof widget.chart === 'function') {
+                return {resolution: String(widget.chart().resolution()), labels: []};
+            }
+        } catch (e) {
+            // Widget not ready, fall back to the highlighted interval button
+        }
+    }
+    const wanted = new Set(labels);
+    const isActive = el => !!el && (
+        el.getAttribute('aria-selected') === 'true' ||
+        el.getAttribute('aria-pressed') === 'true' ||
+        /(^|[\\s_-])(active|selected|checked)/i.test(typeof el.className === 'string' ? el.className : '')
+    );
+    const candidates = Array.from(document.querySelectorAll('button, [role="button"], [role="tab"], div, span'))
+        .filter(el => el.children.length === 0 && wanted.has((el.textContent || '').trim()));
+    for (const el of candidates) {
+        const rect = el.getBoundingClientRect();
+        if (rect.width > 0 && rect.height > 0 && (isActive(el) || isActive(el.parentElement))) {
+            const label = el.textContent.trim();
+            return {resolution: label, labels: [label]};
+        }
+    }
+    return null;
+}
+"""
+
+
+def build_timeframe_path(currency, date_dir, timeframe, index=0, capture_times_per_currency=1):
+    """
+    Build the path of a timeframe screenshot, e.g. 20250101_080000_BTCUSDT_4h_trade.png
+    
+    Returns:
+        str: Path to the screenshot file
+    """
+    return build_region_path(currency, date_dir, f'{timeframe}_trade', index, capture_times_per_currency)
+
+
+def _interval_args(timeframe):
+    options = TIMEFRAME_OPTIONS.get(timeframe, {})
+    return {
+        'resolution': options.get('resolution', timeframe),
+        'labels': options.get('labels', [timeframe])
+    }
+
+
+def _interval_labels():
+    labels = set(TIMEFRAME_OPTIONS)
+    for options in TIMEFRAME_OPTIONS.values():
+        labels.update(options.get('labels', []))
+    return sorted(labels)
+
+
+def _evaluate_frames(page, script, arg):
+    # The TradingView chart may live in an iframe, so every frame is tried until one answers
+    for frame in page.frames:
+        try:
+            result = frame.evaluate(script, arg)
+        except Exception:
+            continue
+        if result:
+            return result
+    return None
+
+
+async def _evaluate_frames_async(page, script, arg):
+    for frame in page.frames:
+        try:
+            result = await frame.evaluate(script, arg)
+        except Exception:
+            continue
+        if result:
+            return result
+    return None
+
+
+def switch_chart_interval(page, timeframe):
+    """
+    Switch the chart of a loaded sync page to another interval without reloading.
+    The TradingView chart may live in an iframe, so every frame is tried.
+    
+    Args:
+        page: Playwright sync page
+        timeframe (str): Interval, e.g. 1h, 4h or 1d
+    
+    Returns:
+        str: 'widget' or 'click' depending on how the interval was switched, or None if it could not be
+    """
+    return _evaluate_frames(page, SET_INTERVAL_SCRIPT, _interval_args(timeframe))
+
+
+async def switch_chart_interval_async(page, timeframe):
+    """
+    Async version of switch_chart_interval
+    
+    Returns:
+        str: 'widget' or 'click' depending on how the interval was switched, or None if it could not be
+    """
+    return await _evaluate_frames_async(page, SET_INTERVAL_SCRIPT, _interval_args(timeframe))
+
+
+def _timeframe_target(method, currency, date_dir, timeframe, index, capture_times_per_currency):
+    """
+    Output path for a timeframe capture, or None (reported) if the chart could not be switched
+    """
+    if not method:
+        print(f"Could not switch {currency} chart to {timeframe}, skipping")
+        return None
+    return build_timeframe_path(currency, date_dir, timeframe, index, capture_times_per_currency)
+
+
+def _restore_interval(currency, original, method):
+    if original is None:
+        print(f"Could not read the original {currency} chart interval, leaving the last one in place")
+    elif not method:
+        print(f"Could not restore the {currency} chart to {original['resolution']}")
+
+
+def capture_timeframes(page, currency, date_dir, timeframes=None, tracker=None, index=0, capture_times_per_currency=1,
+                       deadline=None):
+    """
+    Capture one screenshot per chart interval in the same page session.
+    The interval is switched in place and only a short redraw-stability check runs
+    between captures, so N intervals cost roughly one page load. The chart is switched
+    back to the interval it showed before, since the page may be the user's own tab.
+    
+    Args:
+        page: Playwright sync page that is already loaded
+        currency (str): Currency pair (e.g., BTCUSDT)
+        date_dir (str): Date directory name (YYYY-MM-DD)
+        timeframes (list): Intervals to capture (default: CAPTURE_TIMEFRAMES)
+        tracker (NetworkTracker): Tracker attached to the page
+        index (int): Zero-based capture index for this currency
+        capture_times_per_currency (int): Total number of captures for this currency
+        deadline (Deadline): Budget of the capture; interval switches and screenshots only get the time left
+    
+    Returns:
+        list: List of file paths to saved screenshots, in interval order, up to the first interval without time left
+    """
+    # The page may be the user's own tab, so it is put back on its interval afterwards
+    original = _evaluate_frames(page, CURRENT_INTERVAL_SCRIPT, _interval_labels())
+    file_paths = []
+    try:
+        for timeframe in timeframes or CAPTURE_TIMEFRAMES:
+            method, _ = wait_for_redraw(
+                page, lambda: switch_chart_interval(page, timeframe), tracker,
+                max_wait_ms=stage_timeout_ms(deadline, 'timeframes', TIMEFRAME_SWITCH_MAX_WAIT_MS), label=f"{currency} {timeframe}"
+            )
+            filepath = _timeframe_target(method, currency, date_dir, timeframe, index, capture_times_per_currency)
+            if not filepath:
+                continue
+            timeout_ms = stage_timeout_ms(deadline, 'timeframes', 60000)
+            try:
+                page.screenshot(path=filepath, full_page=False, timeout=timeout_ms)
+            except Exception as e:
+                _report_capture(file_paths, f"{timeframe} screenshot", currency, filepath, e)
+            else:
+                _report_capture(file_paths, f"{timeframe} screenshot", currency, filepath)
+    except BudgetExceeded as e:
+        print(f"{str(e)}, keeping {len(file_paths)} interval screenshots")
+    finally:
+        method = _evaluate_frames(page, SET_INTERVAL_SCRIPT, original) if original else None
+        _restore_interval(currency, original, method)
+    return file_paths
+
+
+async def capture_timeframes_async(page, currency, date_dir, timeframes=None, tracker=None, index=0, capture_times_per_currency=1,
+                                   deadline=None):
+    """
+    Async version of capture_timeframes for the async capture engine
+    
+    Returns:
+        list: List of file paths to saved screenshots, in interval order
+    """
+    original = await _evaluate_frames_async(page, CURRENT_INTERVAL_SCRIPT, _interval_labels())
+    file_paths = []
+    try:
+        for timeframe in timeframes or CAPTURE_TIMEFRAMES:
+            method, _ = await wait_for_redraw_async(
+                page, lambda: switch_chart_interval_async(page, timeframe), tracker,
+                max_wait_ms=stage_timeout_ms(deadline, 'timeframes', TIMEFRAME_SWITCH_MAX_WAIT_MS), label=f"{currency} {timeframe}"
+            )
+            filepath = _timeframe_target(method, currency, date_dir, timeframe, index, capture_times_per_currency)
+            if not filepath:
+                continue
+            timeout_ms = stage_timeout_ms(deadline, 'timeframes', 60000)
+            try:
+                await page.screenshot(path=filepath, full_page=False, timeout=timeout_ms)
+            except Exception as e:
+                _report_capture(file_paths, f"{timeframe} screenshot", currency, filepath, e)
+            else:
+                _report_capture(file_paths, f"{timeframe} screenshot", currency, filepath)
+    except BudgetExceeded as e:
+        print(f"{str(e)}, keeping {len(file_paths)} interval screenshots")
+    finally:
+        method = await _evaluate_frames_async(page, SET_INTERVAL_SCRIPT, original) if original else None
+        _restore_interval(currency, original, method)
+    return file_paths
+
+
+async def capture_page_regions_async(page, currency, date_dir, regions=None, index=0, capture_times_per_currency=1,
+                                     deadline=None):
+    """
+    Async version of capture_page_regions for the async capture engine
+    
+    Args:
+        page: Playwright async page that is already loaded
+        currency (str): Currency pair (e.g., BTCUSDT)
+        date_dir (str): Date directory name (YYYY-MM-DD)
+        regions (list): Region names to capture (default: CAPTURE_REGIONS, or every region in SCREENSHOT_REGIONS)
+        index (int): Zero-based capture index for this currency
+        capture_times_per_currency (int): Total number of captures for this currency
+        deadline (Deadline): Budget of the capture; region screenshots only get the time left
+    
+    Returns:
+        list: List of file paths to saved region screenshots, up to the first one without time left
+    """
+    region_map = _select_regions(regions)
+    found = await page.evaluate(REGION_LOCATOR_SCRIPT, region_map)
+    
+    file_paths = []
+    for region, selector, filepath in _region_targets(region_map, found, currency, date_dir, index, capture_times_per_currency):
+        try:
+            timeout_ms = stage_timeout_ms(deadline, 'regions', 30000)
+        except BudgetExceeded as e:
+            print(f"{str(e)}, keeping {len(file_paths)} region screenshots")
+            break
+        try:
+            await page.locator(selector).first.screenshot(path=filepath, timeout=timeout_ms)
+        except Exception as e:
+            _report_capture(file_paths, f"region '{region}'", currency, filepath, e)
+        else:
+            _report_capture(file_paths, f"region '{region}'", currency, filepath)
+    
+    return file_paths
+
+
+# Playwright resource types as named by the CDP Network and Fetch domains
+CDP_RESOURCE_TYPES = {
+    'document': 'Document',
+    'stylesheet': 'Stylesheet',
+    'image': 'Image',
+    'media': 'Media',
+    'font': 'Font',
+    'script': 'Script',
+    'texttrack': 'TextTrack',
+    'xhr': 'XHR',
+    'fetch': 'Fetch',
+    'eventsource': 'EventSource',
+    'websocket': 'WebSocket',
+    'manifest': 'Manifest',
+    'other': 'Other'
+}
+
+
+class ResourceBlocker:
+    """
+    Blocks analytics, ads, tracking beacons and non-essential resource types, and counts
+    what each capture blocked and downloaded. It runs over a CDP session of the page:
+    blocked domains go to Network.setBlockedURLs and only requests of blocked types pause
+    in Fetch, so the HTTP cache stays on and other requests never round-trip through Python.
+    page.route is only the fallback when no CDP session can be opened, and never used
+    with the persistent profile since it would turn off the cache the profile is kept for.
+    """
+    
+    def __init__(self, blocked_types=None, blocked_domains=None, allowed_domains=None):
+        """
+        Args:
+            blocked_types (list): Resource types to block (default: BLOCKED_RESOURCE_TYPES)
+            blocked_domains (list): Domain patterns to block (default: BLOCKED_DOMAINS)
+            allowed_domains (list): Domain patterns never blocked (default: ALLOWED_DOMAINS)
+        """
+        self.blocked_types = set(BLOCKED_RESOURCE_TYPES if blocked_types is None else blocked_types)
+        self.blocked_domains = BLOCKED_DOMAINS if blocked_domains is None else blocked_domains
+        self.allowed_domains = ALLOWED_DOMAINS if allowed_domains is None else allowed_domains
+        # CDP session the blocker runs on, or None when it is installed with page.route
+        self.session = None
+        self.page = None
+        self.reset_stats()
+    
+    def reset_stats(self):
+        """
+        Reset the per-capture counters
+        """
+        self.blocked_requests = 0
+        self.blocked_by_type = {}
+        self.allowed_requests = 0
+        self.cached_requests = 0
+        self.loaded_bytes = 0
+    
+    def should_block(self, resource_type, url):
+        """
+        Decide whether a request is blocked. Allow patterns take precedence over deny patterns.
+        
+        Args:
+            resource_type (str): Playwright resource type of the request
+            url (str): Request URL
+        
+        Returns:
+            bool: True if the request should be aborted
+        """
+        host = urlparse(url).netloc.lower()
+        if any(pattern in host for pattern in self.allowed_domains):
+            return False
+        if any(pattern in host for pattern in self.blocked_domains):
+            return True
+        return resource_type in self.blocked_types
+    
+    def blocked_url_patterns(self):
+        """
+        Network.setBlockedURLs patterns for the blocked domains (matched against the host part of the URL)
+        """
+        return [f"*://*{domain}*/*" for domain in self.blocked_domains]
+    
+    def fetch_patterns(self):
+        """
+        Fetch.enable patterns that pause only requests of the blocked resource types
+        """
+        return [
+            {'urlPattern': '*', 'resourceType': CDP_RESOURCE_TYPES[resource_type], 'requestStage': 'Request'}
+            for resource_type in sorted(self.blocked_types) if resource_type in CDP_RESOURCE_TYPES
+        ]
+    
+    def _count_blocked(self, resource_type):
+        self.blocked_requests += 1
+        self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + 1
+    
+    def _record(self, resource_type, url):
+        if self.should_block(resource_type, url):
+            self._count_blocked(resource_type)
+            return True
+        return False
+    
+    def paused_request_blocked(self, event):
+        """
+        Decide a Fetch.requestPaused event; allowed hosts are let through
+        
+        Returns:
+            bool: True if the request should be failed
+        """
+        return self._record(event.get('resourceType', 'Other').lower(), event['request']['url'])
+    
+    def on_loading_finished(self, event):
+        """
+        Network.loadingFinished listener: adds up the bytes actually received over the network
+        """
+        self.allowed_requests += 1
+        self.loaded_bytes += int(event.get('encodedDataLength') or 0)
+    
+    def on_loading_failed(self, event):
+        """
+        Network.loadingFailed listener: counts requests blocked by Network.setBlockedURLs
+        """
+        if event.get('blockedReason') == 'inspector':
+            self._count_blocked(event.get('type', 'Other').lower())
+    
+    def on_served_from_cache(self, event):
+        """
+        Network.requestServedFromCache listener
+        """
+        self.cached_requests += 1
+    
+    def handle(self, route):
+        """
+        Route handler for the sync Playwright API (fallback without CDP)
+        """
+        if self._record(route.request.resource_type, route.request.url):
+            route.abort()
+        else:
+            route.continue_()
+    
+    async def handle_async(self, route):
+        """
+        Route handler for the async Playwright API (fallback without CDP)
+        """
+        if self._record(route.request.resource_type, route.request.url):
+            await route.abort()
+        else:
+            await route.continue_()
+    
+    def _add_sizes(self, sizes):
+        self.allowed_requests += 1
+        self.loaded_bytes += max(0, sizes.get('responseHeadersSize', 0)) + max(0, sizes.get('responseBodySize', 0))
+    
+    def on_request_finished(self, request):
+        """
+        requestfinished listener of the route fallback: adds up the real response sizes
+        """
+        try:
+            self._add_sizes(request.sizes())
+        except Exception:
+            pass
+    
+    async def on_request_finished_async(self, request):
+        """
+        Async version of on_request_finished
+        """
+        try:
+            self._add_sizes(await request.sizes())
+        except Exception:
+            pass
+    
+    def report(self, label=''):
+        """
+        Log and return the counters for the current capture, then reset them
+        
+        Args:
+            label (str): Label used in the log message (e.g., the currency)
+        
+        Returns:
+            dict: blocked_requests, blocked_by_type, allowed_requests, cached_requests, loaded_bytes
+        """
+        stats = {
+            'blocked_requests': self.blocked_requests,
+            'blocked_by_type': dict(self.blocked_by_type),
+            'allowed_requests': self.allowed_requests,
+            'cached_requests': self.cached_requests,
+            'loaded_bytes': self.loaded_bytes
+        }
+        logging.getLogger('binance_trade_analyzer').info(
+            f"Resource blocking {label}: blocked {stats['blocked_requests']} requests ({stats['blocked_by_type']}), "
+            f"loaded {stats['allowed_requests']} requests ({stats['loaded_bytes']} bytes over the network, "
+            f"{stats['cached_requests']} from cache)"
+        )
+        self.reset_stats()
+        return stats
+
+
+def _resolve_paused_request(session, blocker, event):
+    if blocker.paused_request_blocked(event):
+        session.send('Fetch.failRequest', {'requestId': event['requestId'], 'errorReason': 'BlockedByClient'})
+    else:
+        session.send('Fetch.continueRequest', {'requestId': event['requestId']})
+
+
+async def _resolve_paused_request_async(session, blocker, event):
+    if blocker.paused_request_blocked(event):
+        await session.send('Fetch.failRequest', {'requestId': event['requestId'], 'errorReason': 'BlockedByClient'})
+    else:
+        await session.send('Fetch.continueRequest', {'requestId': event['requestId']})
+
+
+def _keeps_http_cache(page):
+    # page.route disables the HTTP cache, which is what the persistent profile is kept for.
+    # A persistent context has no browser object.
+    try:
+        return BROWSER_PERSISTENT_PROFILE or page.context.browser is None
+    except Exception:
+        return BROWSER_PERSISTENT_PROFILE
+
+
+def install_resource_blocker(page):
+    """
+    Install the request blocking layer on a sync Playwright page
+    
+    Args:
+        page: Playwright sync page
+    
+    Returns:
+        ResourceBlocker: The installed blocker, or None when RESOURCE_BLOCKING is disabled
+    """
+    if not RESOURCE_BLOCKING:
+        return None
+    blocker = ResourceBlocker()
+    blocker.page = page
+    try:
+        session = page.context.new_cdp_session(page)
+        session.on('Network.loadingFinished', blocker.on_loading_finished)
+        session.on('Network.loadingFailed', blocker.on_loading_failed)
+        session.on('Network.requestServedFromCache', blocker.on_served_from_cache)
+        session.on('Fetch.requestPaused', lambda event: _resolve_paused_request(session, blocker, event))
+        session.send('Network.enable')
+        session.send('Network.setBlockedURLs', {'urls': blocker.blocked_url_patterns()})
+        if blocker.fetch_patterns():
+            session.send('Fetch.enable', {'patterns': blocker.fetch_patterns()})
+        blocker.session = session
+    except Exception as e:
+        if _keeps_http_cache(page):
+            logging.getLogger('binance_trade_analyzer').warning(
+                f"CDP request blocking unavailable, not blocking to keep the persistent profile's HTTP cache: {str(e)}"
+            )
+            return None
+        logging.getLogger('binance_trade_analyzer').warning(f"CDP request blocking unavailable, using page.route: {str(e)}")
+        page.route("**/*", blocker.handle)
+        page.on('requestfinished', blocker.on_request_finished)
+    return blocker
+
+
+async def install_resource_blocker_async(page):
+    """
+    Install the request blocking layer on an async Playwright page
+    
+    Args:
+        page: Playwright async page
+    
+    Returns:
+        ResourceBlocker: The installed blocker, or None when RESOURCE_BLOCKING is disabled
+    """
+    if not RESOURCE_BLOCKING:
+        return None
+    blocker = ResourceBlocker()
+    blocker.page = page
+    try:
+        session = await page.context.new_cdp_session(page)
+        session.on('Network.loadingFinished', blocker.on_loading_finished)
+        session.on('Network.loadingFailed', blocker.on_loading_failed)
+        session.on('Network.requestServedFromCache', blocker.on_served_from_cache)
+        session.on('Fetch.requestPaused', lambda event: _resolve_paused_request_async(session, blocker, event))
+        await session.send('Network.enable')
+        await session.send('Network.setBlockedURLs', {'urls': blocker.blocked_url_patterns()})
+        if blocker.fetch_patterns():
+            await session.send('Fetch.enable', {'patterns': blocker.fetch_patterns()})
+        blocker.session = session
+    except Exception as e:
+        if _keeps_http_cache(page):
+            logging.getLogger('binance_trade_analyzer').warning(
+                f"CDP request blocking unavailable, not blocking to keep the persistent profile's HTTP cache: {str(e)}"
+            )
+            return None
+        logging.getLogger('binance_trade_analyzer').warning(f"CDP request blocking unavailable, using page.route: {str(e)}")
+        await page.route("**/*", blocker.handle_async)
+        page.on('requestfinished', blocker.on_request_finished_async)
+    return blocker
+
+
+def remove_resource_blocker(blocker):
+    """
+    Remove a blocker installed with install_resource_blocker from its page, so another one can be
+    installed without the handlers stacking up, and a tab of the user's Chrome is left unblocked
+    
+    Args:
+        blocker (ResourceBlocker): Blocker or None
+    """
+    if blocker is None:
+        return
+    try:
+        if blocker.session is not None:
+            blocker.session.detach()
+        elif blocker.page is not None:
+            blocker.page.unroute("**/*", blocker.handle)
+            blocker.page.remove_listener('requestfinished', blocker.on_request_finished)
+    except Exception as e:
+        logging.getLogger('binance_trade_analyzer').debug(f"Could not remove resource blocker: {str(e)}")
+    blocker.session = None
+    blocker.page = None
+
+
+async def remove_resource_blocker_async(blocker):
+    """
+    Async version of remove_resource_blocker
+    """
+    if blocker is None:
+        return
+    try:
+        if blocker.session is not None:
+            await blocker.session.detach()
+        elif blocker.page is not None:
+            await blocker.page.unroute("**/*", blocker.handle_async)
+            blocker.page.remove_listener('requestfinished', blocker.on_request_finished_async)
+    except Exception as e:
+        logging.getLogger('binance_trade_analyzer').debug(f"Could not remove resource blocker: {str(e)}")
+    blocker.session = None
+    blocker.page = None
+
+
+def report_resource_blocker(blocker, label=''):
+    """
+    Log the per-capture savings of a blocker installed with install_resource_blocker
+    
+    Args:
+        blocker (ResourceBlocker): Blocker or None
+        label (str): Label used in the log message
+    
+    Returns:
+        dict: Blocking statistics, or None when blocking is disabled
+    """
+    if blocker is None:
+        return None
+    return blocker.report(label)
+
+
+def finish_capture(page, currency, filepath, blocker=None, label=None):
+    """
+    Post-capture hook shared by every sync capture path: saves the market snapshot of the page
+    next to the screenshot and logs what the resource blocker saved
+    
+    Args:
+        page: Playwright sync page the screenshot was taken from
+        currency (str): Currency pair (e.g., BTCUSDT)
+        filepath (str): Screenshot path
+        blocker (ResourceBlocker): Blocker installed on the page, or None
+        label (str): Label used in the blocker log message (default: the currency)
+    """
+    record_market_snapshot(page, currency, filepath)
+    report_resource_blocker(blocker, label or currency)
+
+
 def capture_screenshot(currency, use_session=True):
     """
     Capture screenshot of Binance futures contract page with improved loading handling
@@ -76,7 +1215,7 @@ def capture_screenshot(currency, use_session=True):
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
     
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
+        browser = p.chromium.launch(**browser_launch_kwargs([], headless=True))
         context = browser.new_context()
         page = context.new_page()
         
@@ -88,19 +1227,24 @@ def capture_screenshot(currency, use_session=True):
             # Set a larger viewport to ensure we capture all elements
             page.set_viewport_size({"width": 1920, "height": 1080})
             
+            # Block non-essential resources and track network activity from the start of navigation
+            blocker = install_resource_blocker(page)
+            tracker = NetworkTracker(page)
+            
             # Navigate to the Binance futures page with a longer timeout
             page.goto(url, timeout=60000)
             
             # Wait for page to load - using load event
             page.wait_for_load_state("load", timeout=30000)
             
-            # Additional wait to ensure dynamic content is loaded
-            page.wait_for_timeout(10000)
+            # Wait until the page is actually rendered instead of a fixed delay
+            wait_for_page_ready(page, tracker, label=currency)
             
             # Capture full page screenshot
             page.screenshot(path=filepath, full_page=True)
             
             print(f"Screenshot saved to {filepath}")
+            finish_capture(page, currency, filepath, blocker)
             
         except Exception as e:
             print(f"Error capturing screenshot: {str(e)}")
@@ -259,16 +1403,16 @@ def capture_with_chrome_profile(currency):
         # Launch Chrome with a persistent context (like opening a new Chrome window)
         browser = p.chromium.launch_persistent_context(
             user_data_dir,
-            headless=False,
-            args=[
+            **browser_launch_kwargs([
                 '--disable-blink-features=AutomationControlled',
                 '--disable-dev-shm-usage',
                 '--no-sandbox',
-            ]
+            ], headless=False)  # Keep visible to allow for manual login
         )
         
         # Navigate to the target page
         page = browser.new_page()
+        blocker = install_resource_blocker(page)
         url = BINANCE_CONTRACT_URLS.get(currency, BINANCE_CONTRACT_URLS['BTCUSDT'])
         page.goto(url)
         
@@ -276,9 +1420,9 @@ def capture_with_chrome_profile(currency):
         print("After setting up, press Enter in this terminal to continue...")
         input()
         
-        # Wait for page to load
+        # Wait for page to load and render
         page.wait_for_load_state("load", timeout=30000)
-        page.wait_for_timeout(10000)
+        wait_for_page_ready(page, label=currency)
         
         # Capture full page screenshot
         page.screenshot(path=filepath, full_page=True)
@@ -290,6 +1434,7 @@ def capture_with_chrome_profile(currency):
         print("Session saved to binance_session.json")
         
         print(f"Screenshot saved to {filepath}")
+        finish_capture(page, currency, filepath, blocker)
         
         browser.close()
     
@@ -310,6 +1455,13 @@ def connect_to_existing_chrome_and_screenshot(currency):
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     logger = logging.getLogger('binance_trade_analyzer')
     
+    # Fast path: capture an already loaded tab over a direct websocket, without starting the Playwright driver
+    if DIRECT_CDP_CAPTURE:
+        from utils.cdp_client import capture_currency_direct
+        filepath = capture_currency_direct(currency)
+        if filepath:
+            return filepath
+    
     logger.info("Capturing screenshot...")
     timestamp = datetime.now()
     date_dir = timestamp.strftime('%Y-%m-%d')
@@ -342,26 +1494,17 @@ def connect_to_existing_chrome_and_screenshot(currency):
             
             # Navigate to the target URL
             url = BINANCE_CONTRACT_URLS.get(currency, BINANCE_CONTRACT_URLS['BTCUSDT'])
+            blocker = install_resource_blocker(page)
+            tracker = NetworkTracker(page)
             page.goto(url, timeout=60000)
             
             # Wait for page to load with extended timeout
             page.wait_for_load_state("load", timeout=60000)
             
-            # Wait for key UI elements to ensure page is ready
-            try:
-                # Wait for chart container to be visible
-                page.wait_for_selector('[data-testid="chart-container"], .tradingview-chart, .chart-wrapper, .chart-container, .tv-chart-container', 
-                                     state='visible', timeout=30000)
-                
-                # Wait for trading panel to be visible
-                page.wait_for_selector('.trade-panel, .order-form, .position-info', 
-                                     state='visible', timeout=20000)
-                
-                # Wait for market data to be visible
-                page.wait_for_selector('.price-data, .market-price, .chart-price', 
-                                     state='visible', timeout=15000)
-            except Exception as e:
-                logger.warning(f"Some UI elements not fully loaded: {str(e)}")
+            # Wait for key UI elements, network and chart rendering to settle
+            readiness = wait_for_page_ready(page, tracker, label=currency)
+            if readiness['missing_selectors']:
+                logger.warning(f"Some UI elements not fully loaded: {readiness['missing_selectors']}")
                 print("Proceeding with screenshot as basic elements are present")
             
             # Capture only the visible viewport to avoid timeout issues with complex pages
@@ -383,6 +1526,7 @@ def connect_to_existing_chrome_and_screenshot(currency):
             
             if screenshot_success:
                 logger.info(f"Screenshot saved to {filepath}")
+                finish_capture(page, currency, filepath, blocker)
 
             # Note: We don't close the browser as it's connected to an existing instance
             return filepath
@@ -418,26 +1562,14 @@ def start_chrome_with_debugging_and_urls():
     """
     logger = logging.getLogger('binance_trade_analyzer')
     
-    # Define the Chrome path and debugging parameters
-    chrome_path = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
-    
-    # Check if Chrome exists at the expected path
-    if not os.path.exists(chrome_path):
-        print(f"Chrome not found at {chrome_path}")
-        # Try alternative paths
-        possible_paths = [
-            "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
-            "/usr/bin/google-chrome",
-            "/usr/bin/chromium-browser"
-        ]
-        
-        for path in possible_paths:
-            if os.path.exists(path):
-                chrome_path = path
-                break
-        else:
-            print("Could not find Chrome browser")
-            return False
+    # Find Chrome on macOS or Linux, falling back to the Chromium bundled with Playwright
+    chrome_path = find_chrome_path()
+    if not chrome_path:
+        with sync_playwright() as p:
+            chrome_path = find_chrome_path(p)
+    if not chrome_path:
+        print("Could not find Chrome browser")
+        return False
     
     # Prepare the URLs to open
     urls = [url for url in BINANCE_CONTRACT_URLS.values()]
@@ -449,8 +1581,16 @@ def start_chrome_with_debugging_and_urls():
         "--user-data-dir=/tmp/chrome_debug",
         "--no-first-run",
         "--no-default-browser-check",
-        "--disable-blink-features=AutomationControlled"
+        "--disable-blink-features=AutomationControlled",
+        # Keep background tabs rendering and ticking so they can be captured without bring_to_front
+        "--disable-background-timer-throttling",
+        "--disable-renderer-backgrounding",
+        "--disable-backgrounding-occluded-windows"
     ]
+    if BROWSER_HEADLESS:
+        cmd.extend(["--headless=new", "--window-size=1920,1080"])
+    elif not ensure_display():
+        return False
     
     # Add the URLs to the command
     cmd.extend(urls)
@@ -461,8 +1601,9 @@ def start_chrome_with_debugging_and_urls():
         print(f"Chrome started with remote debugging on port 9222")
         print(f"Navigating to Binance URLs: {list(BINANCE_CONTRACT_URLS.values())}")
         
-        # Wait a bit for the browser to start
-        time.sleep(5)
+        # Wait for the DevTools endpoint instead of a fixed delay
+        if not wait_for_cdp_ready():
+            logger.warning("Chrome started but the DevTools endpoint is not responding yet")
         
         return True
     except Exception as e:
@@ -470,6 +1611,35 @@ def start_chrome_with_debugging_and_urls():
         return False
 
 
+def wait_for_cdp_ready(port=9222, timeout=30, interval=0.25):
+    """
+    Poll the Chrome DevTools /json/version endpoint until it responds.
+    
+    Args:
+        port (int): Remote debugging port
+        timeout (float): Maximum time to wait in seconds
+        interval (float): Delay between polls in seconds
+    
+    Returns:
+        dict: Parsed /json/version response, or None if Chrome did not become ready in time
+    """
+    import requests
+    
+    logger = logging.getLogger('binance_trade_analyzer')
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+        try:
+            response = requests.get(f"http://localhost:{port}/json/version", timeout=1)
+            if response.status_code == 200:
+                logger.info(f"Chrome DevTools ready on port {port} after {time.monotonic() - start:.2f}s")
+                return response.json()
+        except Exception:
+            pass
+        time.sleep(interval)
+    logger.warning(f"Chrome DevTools on port {port} not ready after {timeout}s")
+    return None
+
+
 def launch_chrome_with_remote_debugging():
     """
     Provides instructions for launching Chrome with remote debugging enabled.
@@ -510,8 +1680,7 @@ def capture_multiple_screenshots(currencies, capture_times_per_currency=1):
         # Launch a new Chrome instance
         try:
             browser = p.chromium.launch(
-                headless=False,  # Keep visible to allow for manual login
-                args=[
+                **browser_launch_kwargs([
                     "--disable-blink-features=AutomationControlled",
                     "--disable-dev-shm-usage",
                     "--no-sandbox",
@@ -525,7 +1694,7 @@ def capture_multiple_screenshots(currencies, capture_times_per_currency=1):
                     "--no-default-browser-check",
                     "--disable-default-apps",
                     "--disable-backgrounding-occluded-windows"
-                ]
+                ])
             )
             
             # Create a new context
@@ -544,6 +1713,8 @@ def capture_multiple_screenshots(currencies, capture_times_per_currency=1):
                     try:
                         # Create a new page for each capture
                         page = context.new_page()
+                        blocker = install_resource_blocker(page)
+                        tracker = NetworkTracker(page)
                         
                         # Navigate to the target URL
                         page.goto(url, timeout=60000)
@@ -551,20 +1722,9 @@ def capture_multiple_screenshots(currencies, capture_times_per_currency=1):
                         # Wait for page to load with extended timeout
                         page.wait_for_load_state("load", timeout=60000)
                         
-                        # Instead of waiting for networkidle, wait for a fixed time to allow resources to load
-                        # Binance pages often have ongoing network activity that prevents reaching networkidle state
-                        page.wait_for_timeout(15000)
-                        
-                        # Wait for specific elements that indicate the page is ready
-                        try:
-                            # Wait for chart or trading interface elements to be loaded
-                            page.wait_for_selector('[data-testid="chart-container"], .tradingview-chart, .chart-wrapper, .chart-container, .tv-chart-container', timeout=30000)
-                        except:
-                            # If specific selectors are not found, continue with the screenshot
-                            print("Specific chart elements not found, proceeding with screenshot")
-                        
-                        # Additional wait for dynamic content to visually render
-                        page.wait_for_timeout(5000)
+                        # Binance pages keep network activity going, so instead of networkidle wait until
+                        # key elements are present, pending requests settle and the chart stops redrawing
+                        wait_for_page_ready(page, tracker, label=currency)
                         
                         # Create timestamped filename with date and currency subdirectories
                         current_time = datetime.now()
@@ -588,6 +1748,7 @@ def capture_multiple_screenshots(currencies, capture_times_per_currency=1):
                         
                         print(f"Screenshot {i+1} for {currency} saved to {filepath}")
                         file_paths.append(filepath)
+                        finish_capture(page, currency, filepath, blocker)
                         
                     except Exception as e:
                         print(f"Error capturing screenshot for {currency} (attempt {i+1}): {str(e)}")
@@ -620,14 +1781,16 @@ def capture_multiple_screenshots(currencies, capture_times_per_currency=1):
             raise
 
 
-def capture_multiple_screenshots_existing_browser(currencies, capture_times_per_currency=1):
+def capture_multiple_screenshots_existing_browser(currencies, capture_times_per_currency=1, deadline=None):
     """
     Capture screenshots for multiple currencies using an existing browser instance,
-    with ability to capture multiple times per currency.
+    with ability to capture multiple times per currency. Each currency runs within
+    CAPTURE_SYMBOL_BUDGET_S and the whole call within the run deadline.
     
     Args:
         currencies (list): List of currency pairs to capture (e.g., ['BTCUSDT', 'ETHUSDT'])
         capture_times_per_currency (int): Number of times to capture each currency
+        deadline (Deadline): Run deadline (default: CAPTURE_RUN_BUDGET_S from now)
     
     Returns:
         list: List of file paths to saved screenshots
@@ -640,8 +1803,32 @@ def capture_multiple_screenshots_existing_browser(currencies, capture_times_per_
     
     logger = logging.getLogger('binance_trade_analyzer')
     
+    run_deadline = deadline or Deadline(CAPTURE_RUN_BUDGET_S, label='run')
     file_paths = []
     
+    # One page screenshot per currency: capture the open, ready tabs over direct CDP websockets
+    # first, then the remaining open tabs at once over Playwright CDP sessions, and only go
+    # through the tabs one by one for currencies still missing
+    single_shot = capture_times_per_currency == 1 and not CAPTURE_TIMEFRAMES and not CAPTURE_REGIONS
+    fast_paths = []
+    if single_shot and DIRECT_CDP_CAPTURE:
+        from utils.cdp_client import capture_currencies_direct
+        fast_paths.append(('Direct CDP capture', lambda remaining, max_wait_ms: capture_currencies_direct(
+            remaining, max_wait_ms=max_wait_ms)))
+    if single_shot and PARALLEL_TAB_CAPTURE:
+        from utils.cdp_capture import capture_tabs_parallel
+        fast_paths.append(('Parallel tab capture', lambda remaining, max_wait_ms: capture_tabs_parallel(
+            currencies=remaining, max_wait_ms=max_wait_ms)))
+    for name, capture in fast_paths:
+        try:
+            file_paths.extend(capture(currencies, run_deadline.stage_timeout_ms('readiness', 15000)))
+        except Exception as e:
+            print(f"{name} failed, trying the next capture path: {str(e)}")
+        captured = {os.path.basename(os.path.dirname(path)) for path in file_paths}
+        currencies = [currency for currency in currencies if currency not in captured]
+        if not currencies:
+            return file_paths
+    
     # Get the date for directory naming
     timestamp = datetime.now()
     date_dir = timestamp.strftime('%Y-%m-%d')
@@ -665,6 +1852,10 @@ def capture_multiple_screenshots_existing_browser(currencies, capture_times_per_
             
             for currency in currencies:
                 url = BINANCE_CONTRACT_URLS.get(currency, BINANCE_CONTRACT_URLS['BTCUSDT'])
+                deadline = run_deadline.child(CAPTURE_SYMBOL_BUDGET_S, label=currency)
+                if run_deadline.expired():
+                    print(f"Run budget exhausted, skipping {currency}")
+                    continue
                 
                 # Try to find an existing page for this currency
                 page = None
@@ -674,53 +1865,53 @@ def capture_multiple_screenshots_existing_browser(currencies, capture_times_per_
                         break
                 
                 # If no existing page found for this currency, create a new one
-                if not page:
-                    page = context.new_page()
-                    page.goto(url, timeout=60000)
+                try:
+                    if not page:
+                        page = context.new_page()
+                        blocker = install_resource_blocker(page)
+                        page.goto(url, timeout=deadline.stage_timeout_ms('goto', 60000))
+                    else:
+                        blocker = install_resource_blocker(page)
+                except Exception as e:
+                    print(f"Error opening page for {currency}: {str(e)}")
+                    continue
                 
                 for i in range(capture_times_per_currency):
                     max_retries = 3
                     retry_count = 0
                     
-                    while retry_count < max_retries:
+                    while retry_count < max_retries and not deadline.expired():
                         try:
                             # Bring the page to front to ensure it's active
                             page.bring_to_front()
                             
                             # Wait for page to be fully loaded and dynamic content to render
-                            page.wait_for_load_state("load", timeout=30000)
-                            
-                            # Additional wait for JavaScript and dynamic content to render
-                            page.wait_for_timeout(20000)
+                            page.wait_for_load_state("load", timeout=deadline.stage_timeout_ms('load', 30000))
                             
-                            # Try to wait for specific elements that should be present on Binance futures page
-                            selectors_to_wait = [
-                                '[data-testid="chart-container"]', 
-                                '.tradingview-chart', 
-                                '.chart-wrapper', 
-                                '.chart-container', 
-                                '.tv-chart-container',
-                                '.futures-chart',
-                                '.price-container'
-                            ]
+                            # Wait until key elements are present and the chart stops redrawing
+                            readiness = wait_for_page_ready(
+                                page, max_wait_ms=deadline.stage_timeout_ms('readiness', READINESS_MAX_WAIT_MS), label=currency
+                            )
+                            if readiness['missing_selectors']:
+                                print(f"Elements not found for {currency}: {readiness['missing_selectors']}, proceeding with screenshot")
                             
-                            element_found = False
-                            for selector in selectors_to_wait:
-                                try:
-                                    page.wait_for_selector(selector, timeout=10000)
-                                    element_found = True
-                                    print(f"Found element: {selector}")
+                            # Capture every configured chart interval in this page session
+                            if CAPTURE_TIMEFRAMES:
+                                timeframe_paths = capture_timeframes(page, currency, date_dir, index=i, capture_times_per_currency=capture_times_per_currency, deadline=deadline)
+                                if timeframe_paths:
+                                    file_paths.extend(timeframe_paths)
+                                    finish_capture(page, currency, timeframe_paths[0], blocker)
                                     break
-                                except:
-                                    continue
-                            
-                            if not element_found:
-                                print("No specific chart elements found, proceeding with screenshot after additional wait")
-                                # Wait a bit more if no specific elements are found
-                                page.wait_for_timeout(10000)
+                                print(f"Could not switch chart intervals for {currency}, falling back to page screenshot")
                             
-                            # Additional wait for dynamic content to visually render
-                            page.wait_for_timeout(5000)
+                            # Capture labelled panel screenshots instead of the whole page when configured
+                            if CAPTURE_REGIONS:
+                                region_paths = capture_page_regions(page, currency, date_dir, index=i, capture_times_per_currency=capture_times_per_currency, deadline=deadline)
+                                if region_paths:
+                                    file_paths.extend(region_paths)
+                                    finish_capture(page, currency, region_paths[0], blocker)
+                                    break
+                                print(f"No configured regions found for {currency}, falling back to page screenshot")
                             
                             # Create timestamped filename with date and currency subdirectories
                             current_time = datetime.now()
@@ -741,24 +1932,35 @@ def capture_multiple_screenshots_existing_browser(currencies, capture_times_per_
                             
                             # Capture screenshot - try viewport screenshot instead of full page
                             # Full page screenshots can fail on complex dynamic pages
-                            page.screenshot(path=filepath, full_page=False, timeout=120000)
+                            page.screenshot(path=filepath, full_page=False, timeout=deadline.stage_timeout_ms('screenshot', 120000))
                             
                             print(f"Screenshot {i+1} for {currency} saved to {filepath}")
                             file_paths.append(filepath)
+                            finish_capture(page, currency, filepath, blocker)
                             
                             # Success, break out of retry loop
                             break
                             
                         except Exception as e:
                             retry_count += 1
+                            if isinstance(e, BudgetExceeded):
+                                deadline.mark_timed_out()
                             print(f"Error capturing screenshot for {currency} (attempt {i+1}, retry {retry_count}): {str(e)}")
                             
-                            if retry_count < max_retries:
+                            if retry_count < max_retries and not deadline.expired():
                                 print(f"Retrying in 5 seconds...")
-                                time.sleep(5)
+                                deadline.sleep(5)
                             else:
-                                print(f"Failed to capture screenshot for {currency} after {max_retries} attempts")
+                                print(f"Failed to capture screenshot for {currency} after {retry_count} attempts")
                                 continue  # Continue with next currency instead of failing completely
+                
+                report = deadline.report()
+                if report['timed_out_stages'] or report['clipped_stages']:
+                    logger.info(
+                        f"Capture of {currency} took {report['elapsed_s']}s"
+                        + (f", out of time in {report['timed_out_stages']}" if report['timed_out_stages'] else '')
+                        + (f", shortened {report['clipped_stages']}" if report['clipped_stages'] else '')
+                    )
             
             # Save session when done - ensuring browser context is still available
             try:
@@ -780,7 +1982,7 @@ def capture_multiple_screenshots_existing_browser(currencies, capture_times_per_
             return []
 
 
-def capture_multiple_screenshots_new_browser(currencies, capture_times_per_currency=1):
+def capture_multiple_screenshots_new_browser(currencies, capture_times_per_currency=1, symbol_budget_s=None, run_budget_s=None):
     """
     Capture screenshots for multiple currencies using a newly launched browser instance,
     with ability to capture multiple times per currency.
@@ -788,130 +1990,113 @@ def capture_multiple_screenshots_new_browser(currencies, capture_times_per_curre
     Args:
         currencies (list): List of currency pairs to capture (e.g., ['BTCUSDT', 'ETHUSDT'])
         capture_times_per_currency (int): Number of times to capture each currency
+        symbol_budget_s (float): Time budget per currency in seconds (default: CAPTURE_SYMBOL_BUDGET_S)
+        run_budget_s (float): Time budget for all currencies in seconds (default: CAPTURE_RUN_BUDGET_S)
     
     Returns:
         list: List of file paths to saved screenshots
     """
-    from playwright.sync_api import sync_playwright
-    import time
+    records = capture_with_budget(currencies, capture_times_per_currency, symbol_budget_s, run_budget_s)
+    return [path for record in records for path in record['paths']]
+
+
+def capture_with_budget(currencies, capture_times_per_currency=1, symbol_budget_s=None, run_budget_s=None):
+    """
+    Capture currencies in a newly launched browser within a time budget per currency and
+    for the whole run. Every stage timeout (navigation, load, readiness, screenshot, retry
+    pause) shrinks to the time left, so a slow currency can't stall the run.
     
-    file_paths = []
+    Args:
+        currencies (list): List of currency pairs to capture (e.g., ['BTCUSDT', 'ETHUSDT'])
+        capture_times_per_currency (int): Number of times to capture each currency
+        symbol_budget_s (float): Time budget per currency in seconds (default: CAPTURE_SYMBOL_BUDGET_S)
+        run_budget_s (float): Time budget for all currencies in seconds (default: CAPTURE_RUN_BUDGET_S)
+    
+    Returns:
+        list: One record per currency with currency, status ('ok', 'partial', 'timeout',
+              'error' or 'skipped'), paths, error, elapsed_s, clipped_stages and timed_out_stages
+    """
+    from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+    
+    logger = logging.getLogger('binance_trade_analyzer')
+    
+    run_deadline = Deadline(run_budget_s or CAPTURE_RUN_BUDGET_S, label='run')
+    symbol_budget_s = symbol_budget_s or CAPTURE_SYMBOL_BUDGET_S
+    records = []
     
     # Get the date for directory naming
     timestamp = datetime.now()
     date_dir = timestamp.strftime('%Y-%m-%d')
     
     with sync_playwright() as p:
-        # Launch a new Chrome instance
+        # Launch a new Chrome instance (throwaway context or persistent profile)
         browser = None
+        context = None
         try:
-            browser = p.chromium.launch(
-                headless=False,  # Keep visible to allow for manual login
-                args=[
-                    "--disable-blink-features=AutomationControlled",
-                    "--disable-dev-shm-usage",
-                    "--no-sandbox",
-                    "--disable-setuid-sandbox",
-                    "--disable-web-security",
-                    "--disable-features=VizDisplayCompositor",
-                    "--disable-ipc-flooding-protection",
-                    "--disable-background-timer-throttling",
-                    "--disable-renderer-backgrounding",
-                    "--no-first-run",
-                    "--no-default-browser-check",
-                    "--disable-default-apps",
-                    "--disable-backgrounding-occluded-windows",
-                    # Add arguments to prevent crashes
-                    "--disable-extensions",
-                    "--disable-plugins",
-                    "--no-sandbox",
-                    "--disable-gpu",
-                    "--disable-dev-shm-usage",
-                    "--disable-ipc-flooding-protection"
-                ]
-            )
-            
-            # Create a new context
-            context = browser.new_context(
-                user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-            )
-            
-            # Load session if it exists
-            load_session(context, 'binance_session.json')
+            browser, context = launch_capture_context(p)
             
             # Process all currencies and captures with a single browser instance
             for currency in currencies:
                 url = BINANCE_CONTRACT_URLS.get(currency, BINANCE_CONTRACT_URLS['BTCUSDT'])
+                deadline = run_deadline.child(symbol_budget_s, label=currency)
+                file_paths = []
+                error = None
+                
+                if run_deadline.expired():
+                    records.append({'currency': currency, 'status': 'skipped', 'paths': [],
+                                    'error': 'Run budget exhausted', **deadline.report()})
+                    continue
                 
                 for i in range(capture_times_per_currency):
                     max_retries = 3
                     retry_count = 0
                     
-                    while retry_count < max_retries:
+                    while retry_count < max_retries and not deadline.expired():
                         page = None
                         try:
                             # Check if browser is still connected before creating a new page
-                            if not browser or not browser.is_connected():
+                            if not capture_context_alive(browser, context):
                                 print("Browser disconnected, attempting to relaunch...")
-                                # Relaunch browser if disconnected
-                                if browser:
-                                    try:
-                                        browser.close()
-                                    except:
-                                        pass
-                                browser = p.chromium.launch(
-                                    headless=False,
-                                    args=[
-                                        "--disable-blink-features=AutomationControlled",
-                                        "--disable-dev-shm-usage",
-                                        "--no-sandbox",
-                                        "--disable-setuid-sandbox",
-                                        "--disable-web-security",
-                                        "--disable-features=VizDisplayCompositor",
-                                        "--disable-ipc-flooding-protection",
-                                        "--disable-background-timer-throttling",
-                                        "--disable-renderer-backgrounding",
-                                        "--no-first-run",
-                                        "--no-default-browser-check",
-                                        "--disable-default-apps",
-                                        "--disable-backgrounding-occluded-windows",
-                                        "--disable-extensions",
-                                        "--disable-plugins",
-                                        "--no-sandbox",
-                                        "--disable-gpu",
-                                        "--disable-dev-shm-usage",
-                                        "--disable-ipc-flooding-protection"
-                                    ]
-                                )
-                                context = browser.new_context(
-                                    user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-                                )
-                                # Reload session in new context
-                                load_session(context, 'binance_session.json')
+                                # Relaunch browser if disconnected; the session comes from memory, not the file
+                                close_capture_context(browser, context)
+                                browser, context = launch_capture_context(p)
                             
                             # Create a new page for each capture
                             page = context.new_page()
+                            blocker = install_resource_blocker(page)
+                            tracker = NetworkTracker(page)
                             
                             # Navigate to the target URL
-                            page.goto(url, timeout=60000)
+                            page.goto(url, timeout=deadline.stage_timeout_ms('goto', 60000))
                             
                             # Wait for page to load with extended timeout
-                            page.wait_for_load_state("load", timeout=60000)
+                            page.wait_for_load_state("load", timeout=deadline.stage_timeout_ms('load', 60000))
                             
-                            # Instead of waiting for networkidle, wait for a fixed time to allow resources to load
-                            # Binance pages often have ongoing network activity that prevents reaching networkidle state
-                            page.wait_for_timeout(10000)
+                            # Binance pages keep network activity going, so instead of networkidle wait until
+                            # key elements are present, pending requests settle and the chart stops redrawing
+                            readiness = wait_for_page_ready(
+                                page, tracker, max_wait_ms=deadline.stage_timeout_ms('readiness', READINESS_MAX_WAIT_MS), label=currency
+                            )
+                            if not readiness['ready'] and deadline.expired():
+                                deadline.mark_timed_out()
                             
-                            # Wait for specific elements that indicate the page is ready
-                            try:
-                                # Wait for chart or trading interface elements to be loaded
-                                page.wait_for_selector('[data-testid="chart-container"], .tradingview-chart, .chart-wrapper, .chart-container, .tv-chart-container', timeout=30000)
-                            except:
-                                # If specific selectors are not found, continue with the screenshot
-                                print("Specific chart elements not found, proceeding with screenshot")
+                            # Capture every configured chart interval in this page session
+                            if CAPTURE_TIMEFRAMES:
+                                timeframe_paths = capture_timeframes(page, currency, date_dir, tracker=tracker, index=i, capture_times_per_currency=capture_times_per_currency, deadline=deadline)
+                                if timeframe_paths:
+                                    file_paths.extend(timeframe_paths)
+                                    finish_capture(page, currency, timeframe_paths[0], blocker)
+                                    break
+                                print(f"Could not switch chart intervals for {currency}, falling back to page screenshot")
                             
-                            # Additional wait for dynamic content to visually render
-                            page.wait_for_timeout(5000)
+                            # Capture labelled panel screenshots instead of the whole page when configured
+                            if CAPTURE_REGIONS:
+                                region_paths = capture_page_regions(page, currency, date_dir, index=i, capture_times_per_currency=capture_times_per_currency, deadline=deadline)
+                                if region_paths:
+                                    file_paths.extend(region_paths)
+                                    finish_capture(page, currency, region_paths[0], blocker)
+                                    break
+                                print(f"No configured regions found for {currency}, falling back to page screenshot")
                             
                             # Create timestamped filename with date and currency subdirectories
                             current_time = datetime.now()
@@ -927,28 +2112,28 @@ def capture_multiple_screenshots_new_browser(currencies, capture_times_per_curre
                             
                             filepath = os.path.join(currency_dir, filename)
                             
-                            # Ensure screenshots directory exists
-                            os.makedirs(os.path.dirname(filepath), exist_ok=True)
-                            
-                            # Capture full page screenshot with extended timeout
-                            page.screenshot(path=filepath, full_page=True, timeout=120000)
+                            # Capture full page screenshot with the time left for it
+                            page.screenshot(path=filepath, full_page=True, timeout=deadline.stage_timeout_ms('screenshot', 120000))
                             
                             print(f"Screenshot {i+1} for {currency} saved to {filepath}")
                             file_paths.append(filepath)
+                            finish_capture(page, currency, filepath, blocker)
                             
                             # Success, break out of retry loop
                             break
                             
                         except Exception as e:
                             retry_count += 1
+                            error = str(e)
+                            if isinstance(e, (PlaywrightTimeoutError, BudgetExceeded)):
+                                deadline.mark_timed_out()
                             print(f"Error capturing screenshot for {currency} (attempt {i+1}, retry {retry_count}): {str(e)}")
                             
-                            if retry_count < max_retries:
+                            if retry_count < max_retries and not deadline.expired():
                                 print(f"Retrying in 5 seconds...")
-                                time.sleep(5)
+                                deadline.sleep(5)
                             else:
-                                print(f"Failed to capture screenshot for {currency} after {max_retries} attempts")
-                                continue  # Continue with next currency instead of failing completely
+                                print(f"Failed to capture screenshot for {currency} after {retry_count} attempts")
                         finally:
                             # Close the page after capturing (only if page exists and not already closed)
                             if page and not page.is_closed():
@@ -959,31 +2144,43 @@ def capture_multiple_screenshots_new_browser(currencies, capture_times_per_curre
                                     pass  # Page might already be closed
                             # Explicitly delete the page reference to ensure it's cleaned up
                             page = None
+                
+                report = deadline.report()
+                if file_paths:
+                    status = 'ok' if len(file_paths) >= capture_times_per_currency and not report['timed_out_stages'] else 'partial'
+                else:
+                    status = 'timeout' if report['expired'] or report['timed_out_stages'] else 'error'
+                records.append({'currency': currency, 'status': status, 'paths': file_paths,
+                                'error': None if file_paths else error, **report})
+                logger.info(
+                    f"Capture of {currency}: {status} in {report['elapsed_s']}s"
+                    + (f", out of time in {report['timed_out_stages']}" if report['timed_out_stages'] else '')
+                    + (f", shortened {report['clipped_stages']}" if report['clipped_stages'] else '')
+                )
             
             # Save session when done - ensuring browser context is still available
             try:
-                if context and browser and browser.is_connected():
+                if context and capture_context_alive(browser, context):
                     save_session(context, 'binance_session.json')
             except Exception as e:
                 print(f"Error saving session: {str(e)}")
                 # Continue even if session saving fails
             
             # Close the browser after all screenshots
-            if browser:
-                browser.close()
-            
-            return file_paths
+            close_capture_context(browser, context)
             
         except Exception as e:
             print(f"Error launching new browser: {str(e)}")
             # If there was an exception outside the inner loop, make sure to close the browser if it was opened
-            if browser:
-                try:
-                    browser.close()
-                except:
-                    pass
-            # Return what we have so far (might be empty)
-            return file_paths
+            close_capture_context(browser, context)
+    
+    # Currencies never reached (e.g. the browser failed to launch) are reported as skipped
+    captured = {record['currency'] for record in records}
+    for currency in currencies:
+        if currency not in captured:
+            records.append({'currency': currency, 'status': 'skipped', 'paths': [], 'error': 'Not captured',
+                            **Deadline(None, parent=run_deadline).report()})
+    return records
 
 
 def capture_specific_tab_screenshot(currency, tab_index=0):
@@ -1028,54 +2225,24 @@ def capture_specific_tab_screenshot(currency, tab_index=0):
             
             # Navigate to the target URL
             url = BINANCE_CONTRACT_URLS.get(currency, BINANCE_CONTRACT_URLS['BTCUSDT'])
+            blocker = install_resource_blocker(page)
+            tracker = NetworkTracker(page)
             page.goto(url, timeout=60000)
             
             # Wait for page to load with extended timeout
             page.wait_for_load_state("load", timeout=60000)
             
-            # Additional wait for JavaScript and dynamic content to render
-            page.wait_for_timeout(20000)
-            
-            # Wait for key UI elements to ensure page is ready
-            selectors_to_wait = [
-                '[data-testid="chart-container"]', 
-                '.tradingview-chart', 
-                '.chart-wrapper', 
-                '.chart-container', 
-                '.tv-chart-container',
-                '.futures-chart',
-                '.price-container',
-                '.trade-panel',
-                '.order-form',
-                '.position-info',
-                '.price-data',
-                '.market-price',
-                '.chart-price'
-            ]
-            
-            element_found = False
-            for selector in selectors_to_wait:
-                try:
-                    page.wait_for_selector(selector, timeout=10000)
-                    element_found = True
-                    print(f"Found element: {selector}")
-                    break
-                except:
-                    continue
-            
-            if not element_found:
-                print("No specific chart elements found, proceeding with screenshot after additional wait")
-                # Wait a bit more if no specific elements are found
-                page.wait_for_timeout(10000)
-            
-            # Additional wait for dynamic content to visually render
-            page.wait_for_timeout(5000)
+            # Wait until key elements are present, the network settles and the chart stops redrawing
+            readiness = wait_for_page_ready(page, tracker, label=currency)
+            if readiness['missing_selectors']:
+                print(f"Elements not found: {readiness['missing_selectors']}, proceeding with screenshot")
             
             # Capture only the visible viewport to avoid timeout issues with complex pages
             # Full page screenshots can fail on trading interfaces with infinite scroll
             page.screenshot(path=filepath, full_page=False, timeout=60000)
             
             print(f"Screenshot saved to {filepath}")
+            finish_capture(page, currency, filepath, blocker)
             
             return filepath
             
@@ -1094,6 +2261,22 @@ def capture_all_tabs_screenshot():
     Returns:
         list: List of file paths to saved screenshots
     """
+    # Fast path: one direct websocket per tab, without starting the Playwright driver
+    if DIRECT_CDP_CAPTURE:
+        from utils.cdp_client import capture_all_tabs_direct
+        try:
+            return capture_all_tabs_direct()
+        except Exception as e:
+            print(f"Direct CDP capture failed, using Playwright: {str(e)}")
+    
+    # Capture all tabs at once over their own CDP sessions instead of bringing each to front
+    if PARALLEL_TAB_CAPTURE:
+        from utils.cdp_capture import capture_tabs_parallel
+        try:
+            return capture_tabs_parallel(url_filter='')
+        except Exception as e:
+            print(f"Parallel tab capture failed, capturing tabs one by one: {str(e)}")
+    
     timestamp = datetime.now()
     date_dir = timestamp.strftime('%Y-%m-%d')
     timestamp_str = timestamp.strftime('%Y%m%d_%H%M%S')
@@ -1116,6 +2299,9 @@ def capture_all_tabs_screenshot():
             pages = context.pages
             print(f"Found {len(pages)} tabs, capturing screenshot for each...")
             
+            # Block beacons and other non-essential requests the open tabs keep issuing
+            blockers = [install_resource_blocker(page) for page in pages]
+            
             # Ensure all pages are loaded before starting
             for page_idx, page in enumerate(pages):
                 try:
@@ -1189,29 +2375,10 @@ def capture_all_tabs_screenshot():
                     # Wait for key UI elements to ensure page is ready
                     page.wait_for_load_state("load", timeout=15000)
                     
-                    # Wait for chart container to be visible with shorter timeout
-                    try:
-                        page.wait_for_selector('[data-testid="chart-container"], .tradingview-chart, .chart-wrapper, .chart-container, .tv-chart-container', 
-                                             state='visible', timeout=15000)
-                    except:
-                        # If chart container not found, continue anyway
-                        print(f"Chart container not found for tab {i+1}, continuing...")
-                    
-                    # Wait for trading panel to be visible with shorter timeout
-                    try:
-                        page.wait_for_selector('.trade-panel, .order-form, .position-info', 
-                                             state='visible', timeout=10000)
-                    except:
-                        # If trading panel not found, continue anyway
-                        print(f"Trading panel not found for tab {i+1}, continuing...")
-                    
-                    # Wait for market data to be visible with shorter timeout
-                    try:
-                        page.wait_for_selector('.price-data, .market-price, .chart-price', 
-                                             state='visible', timeout=8000)
-                    except:
-                        # If market data not found, continue anyway
-                        print(f"Market data not found for tab {i+1}, continuing...")
+                    # Wait for selectors, network and chart rendering to settle within a shorter budget
+                    readiness = wait_for_page_ready(page, max_wait_ms=15000, label=f"tab {i+1} ({currency})")
+                    if readiness['missing_selectors']:
+                        print(f"Elements not found for tab {i+1}: {readiness['missing_selectors']}, continuing...")
                         
                 except Exception as e:
                     print(f"Warning: Some UI elements not fully loaded for tab {i+1}: {str(e)}")
@@ -1224,6 +2391,7 @@ def capture_all_tabs_screenshot():
                     page.screenshot(path=filepath, full_page=False, timeout=60000)
                     print(f"Screenshot for tab {i+1} ({currency}) saved to {filepath}")
                     file_paths.append(filepath)
+                    finish_capture(page, currency, filepath, blockers[i], f"tab {i+1} ({currency})")
                 except Exception as e:
                     print(f"Error capturing screenshot for tab {i+1} ({currency}): {str(e)}")
                     # Continue with next tab instead of failing completely
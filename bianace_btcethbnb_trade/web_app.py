@@ -9,6 +9,22 @@ app = Flask(__name__)
 REPORT_DIR = "./reports"
 SCREENSHOT_DIR = "./data/screenshots"
 LOG_DIR = "./logs"
+# Written next to a report while its completion is still streaming (see utils.deepseek_client.ReportStream)
+PARTIAL_SUFFIX = ".partial"
+
+
+def read_partial_status(filepath):
+    """
+    Progress of a report that is still being generated
+    
+    Returns:
+        dict: Status with currency, started_at and time_to_first_token_s, or None if the report is complete
+    """
+    try:
+        with open(filepath + PARTIAL_SUFFIX, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
 
 @app.route('/')
 def index():
@@ -76,7 +92,8 @@ def view_report(filename):
     
     return render_template('report.html', 
                          filename=filename, 
-                         content=content)
+                         content=content,
+                         streaming=read_partial_status(filepath) is not None)
 
 @app.route('/screenshot/<filename>')
 def view_screenshot(filename):
@@ -124,6 +141,26 @@ def api_reports():
     
     return jsonify(report_files)
 
+@app.route('/api/report/<filename>')
+def api_report(filename):
+    """
+    API endpoint to get a report's content so far, polled while it is streaming
+    """
+    filepath = os.path.join(REPORT_DIR, filename)
+    if not os.path.exists(filepath):
+        return jsonify({'error': 'File not found'}), 404
+    
+    with open(filepath, 'r', encoding='utf-8') as f:
+        content = f.read()
+    
+    status = read_partial_status(filepath)
+    return jsonify({
+        'filename': filename,
+        'content': content,
+        'streaming': status is not None,
+        'time_to_first_token_s': status.get('time_to_first_token_s') if status else None
+    })
+
 @app.route('/api/screenshot/<filename>')
 def api_screenshot(filename):
     """